@@ -116,11 +116,16 @@ function parseSheetUrl(url) {
 async function pollTasks() {
     setInterval(async () => {
         try {
-            const res = await fetch('/api/tasks');
-            const tasks = await res.json();
             const currentTaskId = localStorage.getItem('lastTaskId');
-            if (currentTaskId && tasks[currentTaskId]) {
-                const task = tasks[currentTaskId];
+            if (!currentTaskId) return;
+            const res = await fetch(`/api/tasks/${currentTaskId}`);
+            if (res.status === 404) {
+                // Tác vụ đã bị dọn khỏi sổ tác vụ (quá TASK_TTL)
+                localStorage.removeItem('lastTaskId');
+                return;
+            }
+            if (res.ok) {
+                const task = await res.json();
                 if (task.status === 'processing') {
                     addProgressItem(`[BG] ${task.progress}`);
                 } else if (task.status === 'success') {
@@ -746,18 +751,12 @@ async function syncToPlatformDb(mediaItem, platform, scheduleTime, isRevoke = fa
     const targetDriveId = mediaItem.id;
 
     try {
-        // 1. Fetch current data to check for duplicates
-        const listRes = await fetch(`/api/v2/sheets/${sheetName}`);
-        const listData = await listRes.json();
-
-        // Find existing row with matching Drive ID
-        const existingIdx = listData.findIndex(row => row[driveIdField] === targetDriveId);
+        // Tra cứu/ghi theo khóa media_drive_id trên server (không cần tải cả bảng để tìm vị trí)
+        const keyUrl = `/api/v2/sheets/${sheetName}/by/${driveIdField}/${encodeURIComponent(targetDriveId)}`;
 
         if (isRevoke) {
-            if (existingIdx !== -1) {
-                console.log(`Sync: Revoking - Deleting row ${existingIdx} in ${sheetName}`);
-                await fetch(`/api/v2/sheets/${sheetName}/${existingIdx}`, { method: 'DELETE' });
-            }
+            console.log(`Sync: Revoking - Deleting row with ${driveIdField}=${targetDriveId} in ${sheetName}`);
+            await fetch(keyUrl, { method: 'DELETE' });
             return;
         }
 
@@ -790,15 +789,16 @@ async function syncToPlatformDb(mediaItem, platform, scheduleTime, isRevoke = fa
             };
         }
 
-        if (existingIdx !== -1) {
-            // Update mode
-            console.log(`Sync: Updating existing row at ${existingIdx} in ${sheetName}`);
-            await fetch(`/api/v2/sheets/${sheetName}/${existingIdx}`, {
-                method: 'PUT',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify(payload)
-            });
-        } else {
+        // Update mode (404 nghĩa là chưa có hàng -> chuyển sang thêm mới)
+        const updateRes = await fetch(keyUrl, {
+            method: 'PUT',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(payload)
+        });
+
+        if (updateRes.ok) {
+            console.log(`Sync: Updated existing row with ${driveIdField}=${targetDriveId} in ${sheetName}`);
+        } else if (updateRes.status === 404) {
             // Append mode
             console.log(`Sync: Appending new row to ${sheetName}`);
             await fetch(`/api/v2/sheets/${sheetName}`, {
@@ -1046,7 +1046,7 @@ async function deletePost(index) {
 }
 
 // Function: Publish Now (Skip Schedule)
-async function publishNow(index) {
+async function publishNow(index, postId) {
     const confirmed = await showConfirmModal({
         title: "Public Ngay?",
         message: "Bạn có chắc muốn Public ngay lập tức bài viết này (Bỏ qua lịch hẹn)?",
@@ -1059,7 +1059,7 @@ async function publishNow(index) {
     fetch('/api/v2/post/publish-now', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ index: index })
+        body: JSON.stringify({ index: index, post_id: postId || null })
     })
         .then(res => res.json())
         .then(data => {
@@ -1396,11 +1396,9 @@ function startTaskPolling(taskId, btn, originalHtml, sheetName) {
     let lastMessage = "";
     const interval = setInterval(async () => {
         try {
-            const res = await fetch('/api/tasks');
-            const tasks = await res.json();
-            const task = tasks[taskId];
-
-            if (!task) return;
+            const res = await fetch(`/api/tasks/${taskId}`);
+            if (!res.ok) return;
+            const task = await res.json();
 
             if (task.status === 'processing') {
                 btn.innerHTML = '<i class="fas fa-sync fa-spin"></i>';
@@ -1447,6 +1445,9 @@ function renderHistory(container, data) {
 
         const gridHtml = items.map((item) => {
             const realIndex = data.indexOf(item);
+            // Khóa của bài: server tìm hàng theo khóa, realIndex có thể đã cũ khi hàng bị xóa/xoay vòng
+            const keyField = item.Facebook_Post_Id ? 'Facebook_Post_Id' : 'Youtube_Post_Id';
+            const postId = item[keyField] || '';
             const isFacebook = !!item.Facebook_Post_Id;
             const platformClass = isFacebook ? 'facebook' : 'youtube';
             const scheduledStatus = item.Status === 'SCHEDULED';
@@ -1454,18 +1455,18 @@ function renderHistory(container, data) {
             // Generic Management Actions
             let managementActions = `
                 <div class="card-mgmt-actions">
-                    <button class="btn-icon-tiny" onclick="syncThumbnail(${realIndex})" title="Đồng bộ Thumbnail">
+                    <button class="btn-icon-tiny" onclick="syncThumbnail(${realIndex}, '${postId}')" title="Đồng bộ Thumbnail">
                         <i class="fas fa-sync-alt"></i>
                     </button>
                     ${scheduledStatus ? `
-                    <button class="btn-icon-tiny success" onclick="publishNow(${realIndex})" title="🚀 Public Ngay (Bỏ qua lịch)">
+                    <button class="btn-icon-tiny success" onclick="publishNow(${realIndex}, '${postId}')" title="🚀 Public Ngay (Bỏ qua lịch)">
                         <i class="fas fa-rocket"></i>
                     </button>
                     ` : ''}
-                    <button class="btn-icon-tiny" onclick="openEditPostModal(${realIndex})" title="Sửa nội dung">
+                    <button class="btn-icon-tiny" onclick="openEditPostModal(${realIndex}, '${postId}')" title="Sửa nội dung">
                         <i class="fas fa-edit"></i>
                     </button>
-                    <button class="btn-icon-tiny danger" onclick="deletePublishedPost(${realIndex}, '${platformClass}')" title="Xoá bài đăng (Platform + Sheet)">
+                    <button class="btn-icon-tiny danger" onclick="deletePublishedPost(${realIndex}, '${platformClass}', '${postId}')" title="Xoá bài đăng (Platform + Sheet)">
                         <i class="fas fa-trash-alt"></i>
                     </button>
                 </div>
@@ -1505,7 +1506,7 @@ function renderHistory(container, data) {
                     </div>
                 </div>
                 
-                <button class="btn-delete-history" onclick="deleteHistoryRow(${realIndex})" title="Chỉ xoá dòng lịch sử (Không xoá bài)">
+                <button class="btn-delete-history" onclick="deleteHistoryRow(${realIndex}, '${keyField}', '${postId}')" title="Chỉ xoá dòng lịch sử (Không xoá bài)">
                     <i class="fas fa-eraser"></i>
                 </button>
             </div>`;
@@ -1533,11 +1534,17 @@ function renderHistory(container, data) {
 // --- GENERIC POST MANAGEMENT (FB & YT) ---
 
 let activeEditPostIndex = null;
+let activeEditPostId = '';
+
+// ?post_id=... cho các route /api/v2/post/*/<index>: có khóa thì server không dựa vào chỉ số
+function postIdQuery(postId) {
+    return postId ? `?post_id=${encodeURIComponent(postId)}` : '';
+}
 
-async function syncThumbnail(index) {
+async function syncThumbnail(index, postId) {
     addProgressItem(`🔄 Đang đồng bộ Thumbnail bài viết #${index}...`);
     try {
-        const res = await fetch(`/api/v2/post/sync-thumbnail/${index}`, { method: 'POST' });
+        const res = await fetch(`/api/v2/post/sync-thumbnail/${index}${postIdQuery(postId)}`, { method: 'POST' });
         const result = await res.json();
         if (res.ok) {
             addProgressItem(`✅ Đồng bộ Thumbnail thành công!`);
@@ -1550,12 +1557,15 @@ async function syncThumbnail(index) {
     }
 }
 
-async function openEditPostModal(index) {
+async function openEditPostModal(index, postId) {
     const rows = await (await fetch('/api/v2/sheets/Published_History')).json();
-    const item = rows[index];
+    const item = postId
+        ? rows.find(r => r.Facebook_Post_Id === postId || r.Youtube_Post_Id === postId)
+        : rows[index];
     if (!item) return;
 
     activeEditPostIndex = index;
+    activeEditPostId = postId || '';
 
     // Reset fields & Show Loading
     document.getElementById('edit-post-title-display').textContent = item.Name_video || `Bài viết #${index}`;
@@ -1568,7 +1578,7 @@ async function openEditPostModal(index) {
 
     // Fetch details from backend
     try {
-        const res = await fetch(`/api/v2/post/details/${index}`);
+        const res = await fetch(`/api/v2/post/details/${index}${postIdQuery(postId)}`);
         const result = await res.json();
 
         if (res.ok && result.success) {
@@ -1593,6 +1603,7 @@ async function openEditPostModal(index) {
 function closeEditPostModal() {
     document.getElementById('editPostModal').classList.remove('visible');
     activeEditPostIndex = null;
+    activeEditPostId = '';
 }
 
 document.getElementById('savePostEditBtn').onclick = async () => {
@@ -1617,13 +1628,13 @@ document.getElementById('savePostEditBtn').onclick = async () => {
             formData.append('privacy', privacy);
             formData.append('thumbnail', thumbFile);
 
-            res = await fetch(`/api/v2/post/update/${activeEditPostIndex}`, {
+            res = await fetch(`/api/v2/post/update/${activeEditPostIndex}${postIdQuery(activeEditPostId)}`, {
                 method: 'POST',
                 body: formData // Content-Type tự động set multipart/form-data
             });
         } else {
             // Không có file, dùng JSON như cũ
-            res = await fetch(`/api/v2/post/update/${activeEditPostIndex}`, {
+            res = await fetch(`/api/v2/post/update/${activeEditPostIndex}${postIdQuery(activeEditPostId)}`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({
@@ -1651,7 +1662,7 @@ document.getElementById('savePostEditBtn').onclick = async () => {
     }
 };
 
-async function deletePublishedPost(index, platform) {
+async function deletePublishedPost(index, platform, postId) {
     const confirmed = await showConfirmModal({
         title: "Xóa bài đăng?",
         message: `Hành động này sẽ XÓA bài viết trên ${platform.toUpperCase()} và xóa khỏi lịch sử. Không thể hoàn tác!`,
@@ -1662,7 +1673,7 @@ async function deletePublishedPost(index, platform) {
 
     addProgressItem(`🗑️ Đang xóa bài viết #${index} khỏi Platform & History...`);
     try {
-        const res = await fetch(`/api/v2/post/delete/${index}`, {
+        const res = await fetch(`/api/v2/post/delete/${index}${postIdQuery(postId)}`, {
             method: 'DELETE'
         });
         const result = await res.json();
@@ -1677,7 +1688,7 @@ async function deletePublishedPost(index, platform) {
     }
 }
 
-async function deleteHistoryRow(index) {
+async function deleteHistoryRow(index, keyField, postId) {
     const confirmed = await showConfirmModal({
         title: "Xóa lịch sử?",
         message: "Bạn có chắc muốn xoá dòng lịch sử này? (Bài viết trên Platform vẫn giữ nguyên)",
@@ -1687,7 +1698,11 @@ async function deleteHistoryRow(index) {
     if (!confirmed) return;
 
     try {
-        const res = await fetch(`/api/v2/sheets/Published_History/${index}`, { method: 'DELETE' });
+        // Có khóa bài đăng thì xóa theo khóa (route by/<field>/<value>), không theo chỉ số đã cũ
+        const url = postId
+            ? `/api/v2/sheets/Published_History/by/${keyField}/${encodeURIComponent(postId)}`
+            : `/api/v2/sheets/Published_History/${index}`;
+        const res = await fetch(url, { method: 'DELETE' });
         if (res.ok) {
             loadSheetData('Published_History');
         } else {
@@ -0,0 +1,70 @@
+# FILE: bench_google_clients.py
+# Đo chi phí tạo Google API client: build() mỗi lần gọi so với client cache của services/google_clients.py
+# Chạy: python bench_google_clients.py  (không cần mạng, không cần token thật)
+
+import sys
+import os
+import time
+import threading
+
+sys.path.append(os.getcwd())
+
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build
+from services.google_clients import get_service, clear_services
+
+ITERATIONS = 200
+APIS = [("sheets", "v4"), ("drive", "v3"), ("youtube", "v3")]
+
+
+def fake_creds():
+    return Credentials(
+        token="bench-token",
+        refresh_token="bench-refresh",
+        client_id="bench-client",
+        client_secret="bench-secret",
+        token_uri="https://oauth2.googleapis.com/token"
+    )
+
+
+def time_per_call(fn):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn()
+    return (time.perf_counter() - start) / ITERATIONS * 1000
+
+
+def bench_api(api_name, version):
+    # Cách cũ: get_creds() trả về object mới + build() mỗi lần
+    old_ms = time_per_call(lambda: build(api_name, version, credentials=fake_creds()))
+
+    # Cách mới: lần đầu build từ discovery tĩnh, các lần sau lấy từ cache LRU của tiến trình
+    clear_services()
+    start = time.perf_counter()
+    get_service(api_name, version, fake_creds())
+    first_ms = (time.perf_counter() - start) * 1000
+    cached_ms = time_per_call(lambda: get_service(api_name, version, fake_creds()))
+
+    # Thread mới (mỗi request Flask một thread) dùng lại client của tiến trình
+    result = {}
+
+    def other_thread():
+        start = time.perf_counter()
+        get_service(api_name, version, fake_creds())
+        result["ms"] = (time.perf_counter() - start) * 1000
+
+    t = threading.Thread(target=other_thread)
+    t.start()
+    t.join()
+
+    print(f"{api_name:8} {version:3} | build() mỗi lần: {old_ms:8.3f} ms | "
+          f"cache lần đầu: {first_ms:8.3f} ms | cache: {cached_ms:8.4f} ms | "
+          f"thread mới: {result['ms']:8.3f} ms | tiết kiệm/lượt: {old_ms - cached_ms:8.3f} ms")
+
+
+if __name__ == "__main__":
+    print(f"--- BENCHMARK GOOGLE API CLIENT ({ITERATIONS} lượt/API) ---\n")
+    for api_name, version in APIS:
+        bench_api(api_name, version)
+    print("\nLưu ý: số đo chưa tính kết nối TLS mới mà mỗi client build() lại phải mở;"
+          " client cache giữ kết nối keep-alive nên thực tế còn tiết kiệm thêm một lượt bắt tay TLS.")
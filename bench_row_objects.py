@@ -0,0 +1,57 @@
+# FILE: bench_row_objects.py
+# So sánh Model.to_dict (dict lồng nhau) với RowView (__slots__, trỏ thẳng vào mảng gốc) trên 100k hàng
+# Chạy: python bench_row_objects.py  (không cần mạng)
+
+import sys
+import os
+import json
+import time
+import tracemalloc
+
+sys.path.append(os.getcwd())
+
+from models.Facebook_db import FacebookDbModel
+from models.row_view import view_class, rows_to_json
+
+ROWS = 100_000
+
+
+def make_rows():
+    """Dữ liệu giống values.get trả về: có hàng đủ 22 ô, có hàng bị cắt các ô trống cuối"""
+    rows = []
+    for i in range(ROWS):
+        row = [str(i), f"DRIVE_{i}", f"Video {i}", "https://drive.google.com/x", "Video", "hook", "body",
+               "cta", "contact", "#sp", "#brand", "thumb", "Page", f"P{i % 7}", "TOKEN", "Reels",
+               "20/05/2025 09:00", "", "", "", "SCHEDULED", ""]
+        rows.append(row if i % 3 else row[:17])
+    return rows
+
+
+def measure(label, fn):
+    # Đo thời gian và bộ nhớ ở hai lượt riêng vì tracemalloc làm chậm chương trình đáng kể
+    start = time.perf_counter()
+    result = fn()
+    elapsed = (time.perf_counter() - start) * 1000
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:32} | {elapsed:9.1f} ms | bộ nhớ đỉnh: {peak / 1024 / 1024:8.1f} MB")
+    return result
+
+
+if __name__ == "__main__":
+    rows = make_rows()
+    view = view_class(FacebookDbModel)
+    print(f"--- BENCHMARK ROW OBJECTS ({ROWS:,} hàng Facebook_db) ---\n")
+
+    dicts = measure("Dựng: Model.to_dict", lambda: [FacebookDbModel.to_dict(r) for r in rows])
+    views = measure("Dựng: RowView", lambda: [view(r) for r in rows])
+
+    measure("Đọc 2 trường: dict", lambda: sum(1 for d in dicts if d["page"]["id"] == "P1" and d["status"]))
+    measure("Đọc 2 trường: RowView", lambda: sum(1 for v in views if v.page.id == "P1" and v.status))
+
+    measure("JSON: json.dumps(list dict)", lambda: json.dumps(dicts, separators=(",", ":")))
+    measure("JSON: rows_to_json(views)", lambda: rows_to_json(views))
+    measure("Dựng + JSON: dict", lambda: json.dumps([FacebookDbModel.to_dict(r) for r in rows], separators=(",", ":")))
+    measure("Dựng + JSON: RowView", lambda: rows_to_json(view(r) for r in rows))
@@ -0,0 +1,96 @@
+# FILE: bench_transfer_sizes.py
+# So sánh số byte truyền đi của các view History/Calendar và file tĩnh: nguyên bản / gzip / br (nếu có gói brotli)
+# Chạy: python bench_transfer_sizes.py  (không cần mạng, dùng Sheets API giả lập trong sheet_fakes.py)
+
+import sys
+import os
+import time
+import hashlib
+
+sys.path.append(os.getcwd())
+
+from flask import Flask
+from services import http_compression
+from services.static_assets import StaticAssets
+from sheet_fakes import install_fake, history_tab
+
+HISTORY_ROWS = 3_000
+CALENDAR_ROWS = 1_000
+
+
+def uid(i, length=33):
+    """ID giả nhưng không lặp lại (giống ID Drive/YouTube thật) để tỷ lệ nén không bị thổi phồng"""
+    return hashlib.sha256(str(i).encode()).hexdigest()[:length]
+
+
+def make_tabs():
+    history = history_tab()[:1]
+    for i in range(HISTORY_ROWS):
+        if i % 2:
+            history.append([uid(i), f"Review sản phẩm #{i}", "Video", "", "", "", "",
+                            "Kênh Review", "UC_CHANNEL_01", "kenh@gmail.com", uid(i, 11),
+                            f"https://i.ytimg.com/vi/{uid(i, 11)}/hqdefault.jpg",
+                            f"https://youtube.com/watch?v={uid(i, 11)}", "SUCCESS", f"2026-09-{i % 28 + 1:02d} 10:00:00"])
+        else:
+            history.append([uid(i), f"Review sản phẩm #{i}", "Reels", "Trang Bán Hàng", "1029384756",
+                            "EAAB" + uid(i, 64) * 3, f"1029384756_{uid(-i, 15)}", "", "", "", "",
+                            f"https://drive.google.com/thumbnail?id={uid(i)}",
+                            f"https://facebook.com/1029384756_{uid(-i, 15)}", "SCHEDULED", f"2026-10-{i % 18 + 1:02d} 08:00:00"])
+    calendar = [["STT", "Id", "Name", "Link_on_drive", "Category", "Youtube_channels", "Channel_Id",
+                 "Youtube_calendar", "YT_Post_type", "Facebook_pages", "Page_Id", "Facebook_calendar", "POST_TYPE",
+                 "Tiktok_accounts", "Account_Id", "Tiktok_calendar", "Tik_Post_type", "Calendar", "Scrip_action",
+                 "Thumbnail"]]
+    for i in range(CALENDAR_ROWS):
+        calendar.append([str(i + 1), uid(i), f"Review sản phẩm #{i}.mp4",
+                         f"https://drive.google.com/file/d/{uid(i)}/view", "Review",
+                         "Kênh Review", "UC_CHANNEL_01", f"{i % 28 + 1:02d}/10/2026 19:00", "Shorts",
+                         "Trang Bán Hàng", "1029384756", f"{i % 28 + 1:02d}/10/2026 20:00", "Reels",
+                         "", "", "", "", f"{i % 28 + 1:02d}/10/2026", "",
+                         f"https://drive.google.com/thumbnail?id={uid(i)}"])
+    return {"Published_History": history, "Media_Calendar": calendar}
+
+
+def encoded_sizes(body):
+    """{encoding: (số byte, ms nén)} với mức nén dùng cho phản hồi API"""
+    sizes = {"identity": (len(body), 0.0)}
+    for encoding in http_compression.available_encodings():
+        start = time.perf_counter()
+        size = len(http_compression.compress(body, encoding))
+        sizes[encoding] = (size, (time.perf_counter() - start) * 1000)
+    return sizes
+
+
+def report(label, sizes):
+    raw = sizes["identity"][0]
+    parts = [f"nguyên bản {raw / 1024:8.1f} KB"]
+    for encoding, (size, ms) in sizes.items():
+        if encoding != "identity":
+            parts.append(f"{encoding} {size / 1024:7.1f} KB ({raw / size:4.1f}x, {ms:5.1f} ms)")
+    print(f"{label:34} | " + " | ".join(parts))
+
+
+if __name__ == "__main__":
+    import routes
+    install_fake(make_tabs())
+    app = Flask(__name__)
+    app.register_blueprint(routes.api_bp)
+    client = app.test_client()
+
+    print(f"--- BENCHMARK KÍCH THƯỚC TRUYỀN TẢI (encoding: {', '.join(http_compression.available_encodings())}) ---\n")
+    for label, url in ((f"History ({HISTORY_ROWS:,} hàng)", "/api/v2/sheets/Published_History"),
+                       (f"Calendar ({CALENDAR_ROWS:,} hàng)", "/api/v2/sheets/Media_Calendar")):
+        body = client.get(url).data
+        report(label, encoded_sizes(body))
+        sent = client.get(url, headers={"Accept-Encoding": "br, gzip"})
+        print(f"{'  -> server gửi':34} | {len(sent.data) / 1024:8.1f} KB "
+              f"(Content-Encoding: {sent.headers.get('Content-Encoding', 'không')})")
+
+    print()
+    assets = StaticAssets(os.path.join(os.getcwd(), "Fontend"))
+    for path in assets.hashed + (assets.index,):
+        asset = assets._load(path)
+        sizes = {"identity": (len(asset.body), 0.0)}
+        sizes.update({encoding: (len(data), 0.0) for encoding, data in asset.variants.items()})
+        report(f"{path} (nén sẵn)", sizes)
+    print("\nscript.js/style.css kèm ?v=<hash>: Cache-Control: public, max-age=31536000, immutable "
+              "-> lần tải sau không tốn byte nào")
@@ -0,0 +1,27 @@
+# Cấu hình chung khi chạy test bằng pytest: các file SQLite cục bộ (sổ tác vụ, phiên upload, bảng hash nội dung)
+# nằm trong một thư mục tạm thay vì uploads_temp/ của server. Đặt trước khi import các module đọc biến môi trường.
+# Fixture fake_sheets: Sheets API giả lập (sheet_fakes.py), tự gỡ khi test kết thúc.
+
+import os
+import atexit
+import shutil
+import tempfile
+import pytest
+
+_folder = tempfile.mkdtemp(prefix="upload_new_content_test_")
+atexit.register(shutil.rmtree, _folder, ignore_errors=True)
+
+for name, filename in (("TASK_DB", "tasks.db"), ("UPLOAD_SESSION_DB", "upload_sessions.db"),
+                       ("CONTENT_INDEX_DB", "content_index.db")):
+    os.environ.setdefault(name, os.path.join(_folder, filename))
+
+import sheet_fakes  # import sau khi đã đặt biến môi trường
+
+
+@pytest.fixture
+def fake_sheets(monkeypatch):
+    """
+    install(tabs) -> FakeSheetsApi: SheetService đọc/ghi các tab giả trong bộ nhớ (sheet_fakes.install_fake).
+    Client, cache và các bảng phụ của SheetService được trả lại như cũ khi test kết thúc.
+    """
+    return lambda tabs: sheet_fakes.install_fake(tabs, monkeypatch)
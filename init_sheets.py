@@ -1,11 +1,13 @@
-from googleapiclient.discovery import build
 from logic import get_creds
+from services.google_clients import get_service
 from models.History_db import HistoryDbModel
+from services import history_archive
+import sys
 
 def init_history_sheet():
     """Tạo tab Published_History và thêm dòng tiêu đề."""
     creds = get_creds()
-    service = build('sheets', 'v4', credentials=creds)
+    service = get_service('sheets', 'v4', creds)
     spreadsheet_id = HistoryDbModel.SPREADSHEET_ID
     
     # 1. Tạo Tab mới (nếu chưa có - cái này có thể lỗi nếu tab đã tồn tại, nên dùng try-except)
@@ -15,7 +17,7 @@ def init_history_sheet():
                 'addSheet': {
                     'properties': {
                         'title': 'Published_History',
-                        'gridProperties': {'rowCount': 1000, 'columnCount': 10}
+                        'gridProperties': {'rowCount': 1000, 'columnCount': HistoryDbModel.WIDTH}
                     }
                 }
             }]
@@ -25,8 +27,8 @@ def init_history_sheet():
     except Exception as e:
         print("Tab Published_History đã tồn tại hoặc có lỗi:", e)
 
-    # 2. Thêm tiêu đề
-    headers = ["STT", "Platform", "Post_ID", "Title", "Publish_Date", "Direct_Link", "Thumbnail_URL", "Status", "Raw_Data"]
+    # 2. Thêm tiêu đề (theo HistoryDbModel.SCHEMA, kể cả cột Published_At)
+    headers = HistoryDbModel.SCHEMA.header_row()
     service.spreadsheets().values().update(
         spreadsheetId=spreadsheet_id,
         range="Published_History!A1",
@@ -35,5 +37,17 @@ def init_history_sheet():
     ).execute()
     print("Đã cập nhật tiêu đề cho bảng Lịch sử.")
 
+def migrate_history_published_at():
+    """
+    Chạy một lần với tab Published_History đã có dữ liệu từ trước khi có cột Published_At:
+    thêm tiêu đề cột và gán thời điểm hiện tại cho các hàng cũ (xem history_archive.migrate_published_at).
+    """
+    result = history_archive.migrate_published_at()
+    print(f"Published_At: {'đã thêm tiêu đề cột, ' if result['header_added'] else ''}"
+          f"gán cho {result['stamped']} hàng cũ.")
+
 if __name__ == "__main__":
-    init_history_sheet()
+    if sys.argv[1:] == ["migrate-published-at"]:
+        migrate_history_published_at()
+    else:
+        init_history_sheet()
@@ -1,12 +1,16 @@
 import os
 import json
+import time
 import uuid
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.oauth2.credentials import Credentials
-from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload
-from werkzeug.utils import secure_filename
+from services.google_clients import get_service
+from services import upload_sessions
+from services import content_index
+from services import task_store
 
 # --- CÁC HẰNG SỐ CẤU HÌNH ---
 TOKEN_FILE = 'token.json'  # File lưu trữ token đăng nhập sau khi xác thực thành công
@@ -19,13 +23,19 @@ SCOPES = [
 ]
 UPLOAD_FOLDER = 'uploads_temp'  # Thư mục tạm để lưu file trước khi đẩy lên Drive
 
+# Kích thước mỗi đoạn khi upload resumable lên Drive (byte, phải là bội của 256 KB).
+# Bộ nhớ cho một file đang upload chỉ cỡ một đoạn; mặc định của thư viện là 100 MB.
+UPLOAD_CHUNK_SIZE = max(1, int(os.environ.get("UPLOAD_CHUNK_SIZE", 8 * 1024 * 1024)) // (256 * 1024)) * 256 * 1024
+
+# Số file upload song song lên Drive trong một tác vụ (mỗi upload mượn một kết nối riêng trong pool của client)
+UPLOAD_WORKERS = max(1, int(os.environ.get("UPLOAD_WORKERS", 4)))
+
+# File tạm trong UPLOAD_FOLDER không thuộc tác vụ nào và không đổi quá ngần này giây thì bị dọn (sweep_uploads)
+UPLOAD_ORPHAN_AGE = int(os.environ.get("UPLOAD_ORPHAN_AGE", 3600))
+
 # Đảm bảo thư mục tạm luôn tồn tại
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
-# Biến toàn cục lưu trữ trạng thái các tác vụ upload (task_id -> status)
-# Lưu ý: Trong môi trường thực tế, nên dùng Database hoặc Redis thay vì biến memory.
-tasks = {}
-
 def get_creds(interactive=False):
     """
     Hàm xử lý xác thực Google API.
@@ -71,75 +81,189 @@ def get_creds(interactive=False):
             
     return creds
 
+def discard_uploads(files_data):
+    """Xóa các file tạm (đường dẫn 'path') của một lần upload còn sót lại trên đĩa"""
+    for item in [files_data.get('thumbnail')] + list(files_data.get('files', [])):
+        path = item and item.get('path')
+        if path and os.path.exists(path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
 def background_upload(task_id, form_data, files_data):
     """
     Hàm xử lý logic upload chính, chạy ngầm trong một luồng (thread) riêng.
     Quy trình:
     1. Tạo thư mục ảnh và video trên Drive.
-    2. Upload Thumbnail (nếu có).
-    3. Upload mảng file lên các thư mục tương ứng.
-    4. Ghi thông tin link đã upload vào Google Sheets.
+    2. Upload Thumbnail (nếu có) và mảng file lên các thư mục tương ứng, song song tối đa UPLOAD_WORKERS file.
+       File có nội dung (SHA-256) đã có trên Drive thì sao chép phía server vào thư mục mới, không gửi lại.
+    3. Ghi thông tin link đã upload vào Google Sheets.
+    Chạy lại cùng task_id (resume_uploads sau khi server khởi động lại) thì dùng lại thư mục đã tạo và link
+    của các file đã xong ở lần trước, file đang upload dở được gửi tiếp từ offset Drive đã nhận.
     """
+    # Sổ tác vụ dùng chung giữa các worker, lưu trong SQLite (TASK_DB)
+    tasks = task_store.default_store()
     try:
-        tasks[task_id] = {"status": "processing", "progress": "Bắt đầu xử lý..."}
+        # Tiến độ của lần chạy trước chỉ dùng lại khi tác vụ chưa kết thúc (chạy lại sau khi bị gián đoạn)
+        previous = tasks.get(task_id) or {}
+        if previous.get('status') not in task_store.ACTIVE_STATES:
+            previous = {}
+        if not tasks.update(task_id, status="processing", progress="Bắt đầu xử lý..."):
+            tasks.create(task_id, kind="upload", status="processing", progress="Bắt đầu xử lý...")
         
         creds = get_creds()
-        drive_service = build('drive', 'v3', credentials=creds)
-        sheet_service = build('sheets', 'v4', credentials=creds)
+        sheet_service = get_service('sheets', 'v4', creds)
 
         parent_id = form_data.get('parentId') # Thư mục gốc trên Drive
         sheet_id = form_data.get('sheetId')   # ID bảng tính cần cập nhật
         folder_name = form_data.get('folderName') # Tên thư mục mới (cũng dùng làm chủ đề)
         
-        # Hàm con hỗ trợ tạo thư mục trên Google Drive
+        # Các hàm con chạy trong thread của pool: Drive client dùng chung, mỗi request mượn một
+        # kết nối httplib2 riêng trong pool của client (httplib2 không thread-safe)
         def create_folder(name, pid):
             meta = {'name': name, 'mimeType': 'application/vnd.google-apps.folder', 'parents': [pid]}
-            f = drive_service.files().create(body=meta, fields='id').execute()
+            f = get_service('drive', 'v3', creds).files().create(body=meta, fields='id').execute()
             return f.get('id')
 
-        tasks[task_id]["progress"] = "Đang tạo các thư mục lưu trữ..."
-        image_folder_id = create_folder(f"{folder_name}-image", parent_id)
-        video_folder_id = create_folder(f"{folder_name}-video", parent_id)
+        if previous.get('folders'):
+            image_folder_id, video_folder_id = previous['folders']['image'], previous['folders']['video']
+        else:
+            tasks.update(task_id, progress="Đang tạo các thư mục lưu trữ...")
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                image_folder = pool.submit(create_folder, f"{folder_name}-image", parent_id)
+                video_folder = pool.submit(create_folder, f"{folder_name}-video", parent_id)
+                image_folder_id, video_folder_id = image_folder.result(), video_folder.result()
+            tasks.update(task_id, folders={'image': image_folder_id, 'video': video_folder_id})
 
         uploaded_links = {'videos': [], 'images': [], 'thumb': ''}
-        
-        # Hàm con hỗ trợ upload một file cụ thể lên Drive
-        def upload_to_drive(file_bytes, filename, content_type, folder_id):
-            # Lưu tạm file ra đĩa để Google client có thể đọc theo dạng stream
-            temp_name = f"{task_id}_{secure_filename(filename)}"
-            filepath = os.path.join(UPLOAD_FOLDER, temp_name)
-            with open(filepath, 'wb') as f:
-                f.write(file_bytes)
-            
-            meta = {'name': filename, 'parents': [folder_id]}
-            media = MediaFileUpload(filepath, mimetype=content_type, resumable=True)
-            f = drive_service.files().create(body=meta, media_body=media, fields='id,webViewLink').execute()
-            
-            # Xóa file tạm sau khi upload xong
-            os.remove(filepath)
-            return f.get('webViewLink')
 
-        # Xử lý upload Thumbnail
+        # Danh sách file cần upload: thumbnail (nếu có) rồi đến các file, theo đúng thứ tự gửi lên
+        uploads = []
         if 'thumbnail' in files_data:
-            tasks[task_id]["progress"] = "Đang upload ảnh bìa..."
-            t = files_data['thumbnail']
-            link = upload_to_drive(t['content'], t['filename'], t['content_type'], image_folder_id)
-            uploaded_links['thumb'] = link
-
-        # Xử lý upload danh sách Files
-        for i, f in enumerate(files_data.get('files', [])):
-            tasks[task_id]["progress"] = f"Đang upload file {i+1}/{len(files_data['files'])}..."
+            uploads.append(('thumb', files_data['thumbnail'], image_folder_id))
+        for f in files_data.get('files', []):
             is_video = f['content_type'].startswith('video/')
-            target_id = video_folder_id if is_video else image_folder_id
-            
-            link = upload_to_drive(f['content'], f['filename'], f['content_type'], target_id)
-            if is_video:
-                uploaded_links['videos'].append(link)
+            uploads.append(('videos' if is_video else 'images', f, video_folder_id if is_video else image_folder_id))
+
+        # Tiến độ từng file trong bản ghi tác vụ: pending -> uploading -> done / error
+        file_progress = [{"name": f['filename'], "status": "pending"} for _, f, _ in uploads]
+        # Chạy lại sau khi khởi động lại: file đã xong ở lần trước (file tạm đã xóa) giữ nguyên link
+        for index, item in enumerate(previous.get('files') or []):
+            if (index < len(file_progress) and item.get("status") == "done"
+                    and item["name"] == file_progress[index]["name"]):
+                file_progress[index] = item
+        progress_lock = threading.Lock()
+        completed = [sum(1 for item in file_progress if item["status"] == "done")]
+        # Số byte không phải gửi lại nhờ file trùng nội dung, và khóa theo hash để hai file giống nhau
+        # trong cùng tác vụ không cùng upload (file sau chờ file trước rồi dùng lại)
+        saved = {"files": previous.get('files_deduplicated', 0), "bytes": previous.get('bytes_saved', 0)}
+        hash_locks = {}
+
+        def set_file(index, **fields):
+            # Các thread upload cùng sửa file_progress: ghi xuống sổ tác vụ dưới cùng một khóa
+            with progress_lock:
+                file_progress[index].update(fields)
+                tasks.update(task_id, files=file_progress)
+
+        tasks.update(task_id, files=file_progress)
+
+        def find_duplicate(drive_service, digest):
+            # Tra hash chỉ để tiết kiệm băng thông: lỗi khi tra thì upload như bình thường
+            try:
+                return content_index.find_existing(drive_service, digest)
+            except Exception as e:
+                print(f"Dedup: không tra được hash {digest[:12]}: {e}")
+                return None
+
+        def send_file(index, filepath, filename, content_type, meta, drive_service):
+            media = MediaFileUpload(filepath, mimetype=content_type, chunksize=UPLOAD_CHUNK_SIZE, resumable=True)
+            try:
+                request = drive_service.files().create(body=meta, media_body=media, fields='id,webViewLink')
+                # Phiên resumable lưu theo (task, file): khi tiến trình chết giữa chừng, resume_uploads chạy lại
+                # tác vụ cùng task_id lúc server khởi động và file được gửi tiếp từ offset server đã nhận
+                return upload_sessions.resumable_execute(
+                    request, task_id, f"{index}:{filename}",
+                    on_progress=lambda sent, size: set_file(index, uploaded=sent, size=size)
+                )
+            finally:
+                if media.stream():
+                    media.stream().close()
+
+        # Hàm con hỗ trợ upload một file cụ thể lên Drive
+        def upload_to_drive(index, filepath, filename, content_type, folder_id, digest=None):
+            set_file(index, status="uploading")
+            # File tạm đã nằm sẵn trên đĩa (route ghi thẳng từ request), Google client đọc theo từng đoạn
+            meta = {'name': filename, 'parents': [folder_id]}
+            existing = None
+            try:
+                try:
+                    size = os.path.getsize(filepath)
+                    drive_service = get_service('drive', 'v3', creds)
+                    if not content_index.DEDUP_ENABLED:
+                        f = send_file(index, filepath, filename, content_type, meta, drive_service)
+                    else:
+                        digest = digest or content_index.file_sha256(filepath)
+                        meta['appProperties'] = {content_index.HASH_PROPERTY: digest}
+                        with progress_lock:
+                            hash_lock = hash_locks.setdefault(digest, threading.Lock())
+                        with hash_lock:
+                            existing = find_duplicate(drive_service, digest)
+                            if existing:
+                                # Cùng nội dung đã có trên Drive: bản sao riêng của bài này (link riêng,
+                                # không phụ thuộc file của bài cũ), Drive tự chép nội dung phía server
+                                try:
+                                    f = content_index.copy_file(drive_service, existing['id'], filename,
+                                                                folder_id, digest)
+                                except Exception as e:
+                                    print(f"Dedup: không sao chép được {existing['id']}: {e}")
+                                    existing = None
+                            if not existing:
+                                f = send_file(index, filepath, filename, content_type, meta, drive_service)
+                                content_index.default_index().save(digest, f.get('id'), f.get('webViewLink'),
+                                                                   size, filename)
+                finally:
+                    # Xóa file tạm sau khi upload xong (kể cả khi lỗi)
+                    os.remove(filepath)
+            except Exception as e:
+                set_file(index, status="error", message=str(e))
+                raise
+            if existing:
+                set_file(index, status="done", link=f.get('webViewLink'), deduplicated=True, size=size)
             else:
-                uploaded_links['images'].append(link)
+                set_file(index, status="done", link=f.get('webViewLink'))
+            with progress_lock:
+                completed[0] += 1
+                if existing:
+                    saved["files"] += 1
+                    saved["bytes"] += size
+                    tasks.update(task_id, files_deduplicated=saved["files"], bytes_saved=saved["bytes"])
+                tasks.update(task_id, progress=f"Đã upload {completed[0]}/{len(uploads)} file...")
+            return f.get('webViewLink')
+
+        # Upload song song qua pool giới hạn UPLOAD_WORKERS thread; link được ghi theo thứ tự ban đầu
+        tasks.update(task_id, progress=f"Đang upload {len(uploads)} file...")
+        pool = ThreadPoolExecutor(max_workers=UPLOAD_WORKERS)
+        try:
+            futures = [None if file_progress[i]["status"] == "done" else
+                       pool.submit(upload_to_drive, i, f['path'], f['filename'], f['content_type'], folder_id,
+                                   f.get('sha256'))
+                       for i, (_, f, folder_id) in enumerate(uploads)]
+            for (kind, _, _), item, future in zip(uploads, file_progress, futures):
+                link = future.result() if future else item['link']
+                if kind == 'thumb':
+                    uploaded_links['thumb'] = link
+                else:
+                    uploaded_links[kind].append(link)
+        finally:
+            # Một file lỗi thì hủy các file chưa bắt đầu (file tạm của chúng được dọn ở finally bên dưới)
+            pool.shutdown(wait=True, cancel_futures=True)
+            for index, item in enumerate(file_progress):
+                if item["status"] == "pending":
+                    set_file(index, status="cancelled")
 
         # CẬP NHẬT DỮ LIỆU VÀO GOOGLE SHEETS (Media_Calendar)
-        tasks[task_id]["progress"] = "Đang cập nhật link vào Media Calendar..."
+        tasks.update(task_id, progress="Đang cập nhật link vào Media Calendar...")
         
         # Sử dụng ID bảng tính từ yêu cầu của người dùng nếu có, hoặc dùng từ form
         TARGET_SHEET_ID = "1zFzHePIcOHXiWyAQRN7YOxIkE3kpDKwCuKMsdEe-snU"
@@ -184,17 +308,99 @@ def background_upload(task_id, form_data, files_data):
                 valueInputOption='USER_ENTERED',
                 body={"values": all_new_rows}
             ).execute()
+            # Import tại chỗ để tránh vòng lặp import (sheet_service phụ thuộc logic)
+            from services.sheet_service import SheetService
+            SheetService.invalidate_cache('Media_Calendar')
 
         # Đánh dấu tác vụ hoàn thành
-        tasks[task_id] = {
-            "status": "success", 
-            "progress": "Hoàn tất!", 
-            "message": f"Đã tạo thành công {len(all_new_rows)} hàng dữ liệu cho nội dung '{folder_name}'."
-        }
+        message = f"Đã tạo thành công {len(all_new_rows)} hàng dữ liệu cho nội dung '{folder_name}'."
+        if saved["files"]:
+            message += (f" {saved['files']} file trùng nội dung đã có trên Drive được dùng lại "
+                        f"(tiết kiệm {saved['bytes'] / 1024 / 1024:.1f} MB).")
+        tasks.update(
+            task_id,
+            status="success",
+            progress="Hoàn tất!",
+            message=message,
+            files_deduplicated=saved["files"],
+            bytes_saved=saved["bytes"]
+        )
 
     except Exception as e:
         print(f"Lỗi Tác vụ ngầm: {e}")
-        tasks[task_id] = {"status": "error", "progress": "Thất bại", "message": str(e)}
+        tasks.update(task_id, status="error", progress="Thất bại", message=str(e))
+    finally:
+        # Các file chưa kịp upload (tác vụ lỗi giữa chừng) không được nằm lại trong UPLOAD_FOLDER,
+        # phiên upload của chúng cũng không còn dùng được
+        discard_uploads(files_data)
+        upload_sessions.default_store().delete(task_id)
+        upload_sessions.default_store().delete_job(task_id)
+
+def resume_uploads(submit):
+    """
+    Đưa lại vào hàng đợi các tác vụ upload bị gián đoạn vì tiến trình chạy chúng đã chết (restart/crash).
+    Gọi khi server khởi động, trước TaskStore.recover(). Route /api/upload lưu job spec (form, file tạm,
+    độ ưu tiên) trong UploadSessionStore; tác vụ được chạy lại với cùng task_id (xem background_upload).
+    Tác vụ đã kết thúc hoặc thiếu file tạm thì bị bỏ cùng job spec và phiên upload của nó.
+    :param submit: hàm(task_id, form_data, files_data, priority) đưa job vào hàng đợi
+    :return: danh sách task_id đã đưa lại vào hàng đợi
+    """
+    tasks = task_store.default_store()
+    sessions = upload_sessions.default_store()
+    resumed = []
+    for task_id, job in sessions.jobs().items():
+        files_data = job['files']
+        task = tasks.get(task_id)
+        if task is not None and task['status'] in task_store.ACTIVE_STATES:
+            if not tasks.claim(task_id):
+                # Tiến trình chạy tác vụ vẫn còn sống (worker khác), hoặc worker khác vừa nhận chạy lại
+                continue
+            # Cùng thứ tự với uploads trong background_upload; file đã xong thì file tạm đã bị xóa
+            items = ([files_data['thumbnail']] if 'thumbnail' in files_data else []) + files_data.get('files', [])
+            progress = task.get('files') or []
+            missing = [f['filename'] for i, f in enumerate(items)
+                       if not (i < len(progress) and progress[i].get('status') == 'done')
+                       and not os.path.exists(f['path'])]
+            if missing:
+                message = f"File tạm không còn trên server ({', '.join(missing)}), vui lòng upload lại."
+            else:
+                tasks.update(task_id, status="queued", progress="Đang chờ tiếp tục sau khi server khởi động lại...")
+                try:
+                    submit(task_id, job['form'], files_data, job.get('priority', 'normal'))
+                    resumed.append(task_id)
+                    continue
+                except Exception as e:
+                    message = f"Không đưa lại được vào hàng đợi: {e}"
+            tasks.update(task_id, status="error", progress="Thất bại", message=message)
+        discard_uploads(files_data)
+        sessions.delete(task_id)
+        sessions.delete_job(task_id)
+    return resumed
+
+def sweep_uploads(max_age=UPLOAD_ORPHAN_AGE):
+    """
+    Xóa file tạm mồ côi trong UPLOAD_FOLDER: không thuộc job spec nào còn lưu (tiến trình chết trước khi dọn,
+    request bị cắt...) và không thay đổi trong max_age giây (file đang nhận dở vẫn được ghi tiếp).
+    Chỉ xét file upload_* do services/upload_storage tạo, không đụng tới các file SQLite. Trả về số file đã xóa.
+    """
+    referenced = set()
+    for job in upload_sessions.default_store().jobs().values():
+        files_data = job['files']
+        for item in [files_data.get('thumbnail')] + list(files_data.get('files', [])):
+            if item:
+                referenced.add(os.path.abspath(item['path']))
+    cutoff = time.time() - max_age
+    removed = 0
+    for entry in os.scandir(UPLOAD_FOLDER):
+        if not entry.name.startswith("upload_") or not entry.is_file() or os.path.abspath(entry.path) in referenced:
+            continue
+        try:
+            if entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except OSError:
+            pass
+    return removed
 
 def delete_drive_file(file_id):
     """Xóa hoàn toàn một file hoặc thư mục trên Google Drive"""
@@ -202,10 +408,12 @@ def delete_drive_file(file_id):
         return False
     try:
         creds = get_creds()
-        service = build('drive', 'v3', credentials=creds)
+        service = get_service('drive', 'v3', creds)
         # Sử dụng trash=False để xóa vĩnh viễn, hoặc trash=True để chuyển vào thùng rác
         # Người dùng yêu cầu xoá hẳn nên ta dùng delete
         service.files().delete(fileId=file_id).execute()
+        # File đã xóa không còn dùng lại được cho các lần upload trùng nội dung
+        content_index.default_index().forget(file_id=file_id)
         print(f"Drive: Đã xóa vĩnh viễn file {file_id}")
         return True
     except Exception as e:
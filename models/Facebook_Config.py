@@ -1,32 +1,23 @@
 # FILE: models/Facebook_Config.py
 # Ánh xạ cấu trúc của tab "Facebook_Config" (Thông tin Page)
 
+from models.schema import Field, Schema, schema_model
+
+
+@schema_model
 class FacebookConfModel:
     # Spreadsheet Information
     SPREADSHEET_ID = "1zFzHePIcOHXiWyAQRN7YOxIkE3kpDKwCuKMsdEe-snU"
     SHEET_NAME = "Facebook_Config"
     TAB_ID = 865071638
 
-    # Column Index Mapping (0-indexed)
-    COL_PAGE_NAME = 0
-    COL_PAGE_ID = 1
-    COL_ACCESS_TOKEN = 2
-
-    @classmethod
-    def to_dict(cls, row_values):
-        """Chuyển đổi một hàng từ Sheets sang Dictionary"""
-        data = row_values + [""] * (3 - len(row_values))
-        return {
-            "page_name": data[cls.COL_PAGE_NAME],
-            "page_id": data[cls.COL_PAGE_ID],
-            "access_token": data[cls.COL_ACCESS_TOKEN]
-        }
+    # Cấu trúc cột (0-indexed). Các hằng số COL_* được sinh từ đây.
+    SCHEMA = Schema([
+        Field("page_name", 0, "COL_PAGE_NAME"),
+        Field("page_id", 1, "COL_PAGE_ID"),
+        Field("access_token", 2, "COL_ACCESS_TOKEN"),
+    ])
 
-    @classmethod
-    def from_dict(cls, data_dict):
-        """Chuyển đổi Dictionary ngược lại thành mảng Row"""
-        row = [""] * 3
-        row[cls.COL_PAGE_NAME] = data_dict.get("page_name", "")
-        row[cls.COL_PAGE_ID] = data_dict.get("page_id", "")
-        row[cls.COL_ACCESS_TOKEN] = data_dict.get("access_token", "")
-        return row
\ No newline at end of file
+    # Chuyển đổi một hàng từ Sheets sang Dictionary và ngược lại
+    to_dict = SCHEMA.reader()
+    from_dict = SCHEMA.writer()
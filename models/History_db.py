@@ -1,52 +1,75 @@
+import re
+from models.schema import Field, Schema, schema_model
+
+
+@schema_model
 class HistoryDbModel:
     """
     Model ánh xạ cho bảng Published_History trên Google Sheets.
     Cấu trúc bảng: [
         "Id_media_on_drive", "Name_video", "Type_conten", "Page name", "Page Id", 
         "Access Token", "Facebook_Post_Id", "Channel_name", "Channel Id", "Gmail_channel", 
-        "Youtube_Post_Id", "Thumbnail", "Link_On_Platfrom", "Status"
+        "Youtube_Post_Id", "Thumbnail", "Link_On_Platfrom", "Status", "Published_At"
     ]
+    Các hàng cũ được chuyển sang tab lưu trữ theo tháng Published_History_YYYY_MM
+    (cùng cấu trúc, xem services/history_archive.py).
     """
     
     SPREADSHEET_ID = "1zFzHePIcOHXiWyAQRN7YOxIkE3kpDKwCuKMsdEe-snU"
+    SHEET_NAME = "Published_History"
     TAB_ID = 1820788510  # Đã cập nhật đúng GID từ hệ thống
 
-    @staticmethod
-    def to_dict(row):
-        """Chuyển đổi từ mảng hàng (row) sang dictionary"""
-        return {
-            "Id_media_on_drive": row[0] if len(row) > 0 else "",
-            "Name_video": row[1] if len(row) > 1 else "",
-            "Type_conten": row[2] if len(row) > 2 else "",
-            "Page_name": row[3] if len(row) > 3 else "",
-            "Page_Id": row[4] if len(row) > 4 else "",
-            "Access_token": row[5] if len(row) > 5 else "",
-            "Facebook_Post_Id": row[6] if len(row) > 6 else "",
-            "Channel_name": row[7] if len(row) > 7 else "",
-            "Channel_Id": row[8] if len(row) > 8 else "",
-            "Gmail_channel": row[9] if len(row) > 9 else "",
-            "Youtube_Post_Id": row[10] if len(row) > 10 else "",
-            "Thumbnail": row[11] if len(row) > 11 else "",
-            "Link_On_Platfrom": row[12] if len(row) > 12 else "",
-            "Status": row[13] if len(row) > 13 else ""
-        }
-
-    @staticmethod
-    def from_dict(data):
-        """Chuyển đổi từ dictionary sang mảng hàng (row) để lưu vào Sheets"""
-        return [
-            data.get("Id_media_on_drive", ""),
-            data.get("Name_video", ""),
-            data.get("Type_conten", ""),
-            data.get("Page_name", ""),
-            data.get("Page_Id", ""),
-            data.get("Access_token", ""),
-            data.get("Facebook_Post_Id", ""),
-            data.get("Channel_name", ""),
-            data.get("Channel_Id", ""),
-            data.get("Gmail_channel", ""),
-            data.get("Youtube_Post_Id", ""),
-            data.get("Thumbnail", ""),
-            data.get("Link_On_Platfrom", ""),
-            data.get("Status", "SUCCESS")
-        ]
+    # Tab lưu trữ theo tháng: Published_History_2026_09
+    ARCHIVE_PATTERN = re.compile(r"^Published_History_(\d{4})_(\d{2})$")
+    # Định dạng cột Published_At (thời điểm ghi lịch sử)
+    PUBLISHED_AT_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+    # Các trường dùng làm khóa tra cứu hàng (SheetService.get_by_key)
+    KEY_FIELDS = ("Facebook_Post_Id", "Youtube_Post_Id")
+
+    # Bộ lọc phía server (SheetService.query_rows): tên bộ lọc -> khóa trong dict của to_dict
+    QUERY_FIELDS = {"status": "Status"}
+
+    # Cấu trúc cột (0-indexed). Các hằng số COL_* được sinh từ đây.
+    SCHEMA = Schema([
+        Field("Id_media_on_drive", 0, "COL_ID_MEDIA_ON_DRIVE", "Id_media_on_drive"),
+        Field("Name_video", 1, "COL_NAME_VIDEO", "Name_video"),
+        Field("Type_conten", 2, "COL_TYPE_CONTEN", "Type_conten"),
+        Field("Page_name", 3, "COL_PAGE_NAME", "Page name"),
+        Field("Page_Id", 4, "COL_PAGE_ID", "Page Id"),
+        Field("Access_token", 5, "COL_ACCESS_TOKEN", "Access Token"),
+        Field("Facebook_Post_Id", 6, "COL_FACEBOOK_POST_ID", "Facebook_Post_Id"),
+        Field("Channel_name", 7, "COL_CHANNEL_NAME", "Channel_name"),
+        Field("Channel_Id", 8, "COL_CHANNEL_ID", "Channel Id"),
+        Field("Gmail_channel", 9, "COL_GMAIL_CHANNEL", "Gmail_channel"),
+        Field("Youtube_Post_Id", 10, "COL_YOUTUBE_POST_ID", "Youtube_Post_Id"),
+        Field("Thumbnail", 11, "COL_THUMBNAIL", "Thumbnail"),
+        Field("Link_On_Platfrom", 12, "COL_LINK_ON_PLATFROM", "Link_On_Platfrom"),
+        Field("Status", 13, "COL_STATUS", "Status", default="SUCCESS"),
+        Field("Published_At", 14, "COL_PUBLISHED_AT", "Published_At"),
+    ])
+
+    # Chuyển đổi giữa mảng hàng (row) và dictionary
+    to_dict = SCHEMA.reader()
+    from_dict = SCHEMA.writer()
+
+    @classmethod
+    def archive_tab(cls, year, month):
+        """Tên tab lưu trữ của một tháng"""
+        return f"{cls.SHEET_NAME}_{year:04d}_{month:02d}"
+
+    @classmethod
+    def archive_month(cls, sheet_name):
+        """(năm, tháng) nếu sheet_name là tab lưu trữ, ngược lại None"""
+        match = cls.ARCHIVE_PATTERN.match(sheet_name or "")
+        return (int(match.group(1)), int(match.group(2))) if match else None
+
+    @classmethod
+    def platforms_of(cls, item):
+        """Các nền tảng mà một hàng thuộc về (cùng quy tắc với renderHistory ở frontend)"""
+        platforms = []
+        if (item.get("Page_name") or item.get("Facebook_Post_Id")) and not item.get("Channel_name"):
+            platforms.append("facebook")
+        if item.get("Channel_name") or item.get("Youtube_Post_Id"):
+            platforms.append("youtube")
+        return platforms
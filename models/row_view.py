@@ -0,0 +1,179 @@
+# FILE: models/row_view.py
+# Lớp "view" gọn nhẹ cho một hàng Google Sheets: đọc thẳng từ mảng gốc thay vì dựng dict lồng nhau.
+# Lớp được sinh tự động từ to_dict của từng Model nên không phải khai báo lại cấu trúc cột.
+
+import json
+from operator import itemgetter
+from json.encoder import encode_basestring_ascii
+
+_view_classes = {}  # Model -> lớp view đã sinh
+
+# Số hàng gộp vào một đoạn khi stream (ít lần ghi socket hơn nhưng vẫn giữ bộ nhớ phẳng)
+STREAM_BATCH_ROWS = 500
+
+
+def _layout_of(model):
+    """
+    Suy ra cấu trúc dict của Model bằng cách đưa vào một hàng mà giá trị mỗi ô chính là chỉ số cột:
+    to_dict([0, 1, 2, ...]) -> {"stt": 0, "page": {"name": 12, ...}, ...}
+    """
+    width = len(model.from_dict({}))
+    return model.to_dict(list(range(width)))
+
+
+def _cell_property(index):
+    def get(self):
+        row = self._row
+        # Sheets bỏ các ô trống cuối hàng: thiếu ô thì coi là chuỗi rỗng (không cần đệm/copy mảng)
+        return row[index] if index < len(row) else ""
+    return property(get)
+
+
+def _nested_property(view_class):
+    def get(self):
+        return view_class(self._row)
+    return property(get)
+
+
+def _compile_json(layout):
+    """
+    Biên dịch layout thành một template '%s' và thứ tự cột tương ứng, ví dụ
+    {"stt": 0, "page": {"id": 13}} -> ('{"stt":%s,"page":{"id":%s}}', (0, 13)).
+    to_json chỉ còn: mã hóa các ô (hàm C của json) rồi điền vào template.
+    """
+    parts = []
+    order = []
+
+    def walk(node):
+        parts.append("{")
+        for position, (key, value) in enumerate(node.items()):
+            parts.append(("," if position else "") + encode_basestring_ascii(key).replace("%", "%%") + ":")
+            if isinstance(value, dict):
+                walk(value)
+            else:
+                parts.append("%s")
+                order.append(value)
+        parts.append("}")
+
+    walk(layout)
+    return "".join(parts), tuple(order)
+
+
+def _picker(order):
+    """itemgetter luôn trả về tuple (kể cả khi chỉ có một cột)"""
+    if len(order) == 1:
+        return lambda values: (values[order[0]],)
+    return itemgetter(*order)
+
+
+class RowView:
+    """
+    Lớp cơ sở: chỉ giữ tham chiếu tới mảng hàng gốc (không copy). Chỉ đọc.
+    Hỗ trợ cả truy cập thuộc tính (row.page.id) lẫn kiểu dict (row["page"]["id"], row.get(...)).
+    """
+
+    __slots__ = ("_row",)
+    _LAYOUT = {}
+    _FIELDS = ()
+    _WIDTH = 0
+    _JSON_TEMPLATE = "{}"
+    _JSON_PICK = staticmethod(lambda values: ())
+
+    def __init__(self, row):
+        self._row = row
+
+    def __getitem__(self, key):
+        if key not in self._LAYOUT:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self._LAYOUT else default
+
+    def __contains__(self, key):
+        return key in self._LAYOUT
+
+    def keys(self):
+        return self._LAYOUT.keys()
+
+    def __iter__(self):
+        return iter(self._LAYOUT)
+
+    def __len__(self):
+        return len(self._LAYOUT)
+
+    def to_dict(self):
+        """Dict lồng nhau giống hệt Model.to_dict"""
+        return {key: (value.to_dict() if isinstance(value, RowView) else value)
+                for key, value in ((key, getattr(self, key)) for key in self._FIELDS)}
+
+    def to_json(self):
+        """
+        Chuỗi JSON gọn (giống json.dumps(Model.to_dict(row), separators=(",", ":")))
+        nhưng không dựng dict trung gian
+        """
+        row = self._row
+        if len(row) < self._WIDTH:
+            row = row + [""] * (self._WIDTH - len(row))
+        try:
+            return self._JSON_TEMPLATE % self._JSON_PICK(list(map(encode_basestring_ascii, row)))
+        except TypeError:
+            # Có ô không phải chuỗi (số, None...) -> đường chậm nhưng vẫn đúng
+            return json.dumps(self.to_dict(), separators=(",", ":"))
+
+    def __eq__(self, other):
+        if isinstance(other, RowView):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+def _make_class(name, layout):
+    template, order = _compile_json(layout)
+    namespace = {
+        "__slots__": (), "_LAYOUT": layout, "_FIELDS": tuple(layout),
+        "_WIDTH": max(order) + 1 if order else 0,
+        "_JSON_TEMPLATE": template, "_JSON_PICK": staticmethod(_picker(order)),
+    }
+    for key, value in layout.items():
+        if isinstance(value, dict):
+            namespace[key] = _nested_property(_make_class(f"{name}_{key}", value))
+        else:
+            namespace[key] = _cell_property(value)
+    return type(name, (RowView,), namespace)
+
+
+def view_class(model):
+    """Lớp view (sinh một lần, dùng lại) cho một Model, ví dụ view_class(FacebookDbModel)(row).page.id"""
+    cls = _view_classes.get(model)
+    if cls is None:
+        cls = _view_classes[model] = _make_class(f"{model.__name__}Row", _layout_of(model))
+    return cls
+
+
+def rows_to_json(views):
+    """Nối nhiều view thành một mảng JSON"""
+    return "[" + ",".join(view.to_json() for view in views) + "]"
+
+
+def iter_rows_json(views, batch=STREAM_BATCH_ROWS):
+    """
+    Như rows_to_json nhưng sinh mảng JSON theo từng đoạn (mỗi đoạn tối đa batch hàng),
+    dùng cho Response stream: không bao giờ giữ toàn bộ chuỗi JSON trong bộ nhớ.
+    """
+    yield "["
+    separator = ""
+    chunk = []
+    for view in views:
+        chunk.append(view.to_json())
+        if len(chunk) >= batch:
+            yield separator + ",".join(chunk)
+            separator = ","
+            chunk = []
+    if chunk:
+        yield separator + ",".join(chunk)
+    yield "]"
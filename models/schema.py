@@ -0,0 +1,147 @@
+# FILE: models/schema.py
+# Khai báo cấu trúc cột của một tab MỘT lần; hằng số COL_*, to_dict/from_dict và kiểm tra tiêu đề được sinh từ đó.
+
+_SOURCE_NAME = "<schema {}>"
+
+
+class Field:
+    """
+    Một cột trên Sheets.
+    :param path: khóa trong dict của to_dict, dùng dấu chấm cho dict lồng nhau ("page.id")
+    :param column: chỉ số cột (0 = cột A)
+    :param const: tên hằng số trên Model (ví dụ "COL_PAGE_ID")
+    :param header: tiêu đề cột trên Sheets (để kiểm tra khi tải dữ liệu); None = không kiểm tra
+    :param default: giá trị from_dict ghi khi dict không có trường này
+    """
+
+    __slots__ = ("path", "column", "const", "header", "default")
+
+    def __init__(self, path, column, const, header=None, default=""):
+        self.path = path
+        self.column = column
+        self.const = const
+        self.header = header
+        self.default = default
+
+
+def _normalize_header(text):
+    """'Page name' và 'page_name' coi như cùng một tiêu đề"""
+    return str(text).strip().lower().replace(" ", "").replace("_", "")
+
+
+class Schema:
+    """
+    Danh sách Field theo thứ tự khóa của dict. Các hàm chuyển đổi được sinh thành mã Python
+    (một lần khi import) nên mỗi lần gọi chỉ còn các phép lấy phần tử theo chỉ số cố định.
+    """
+
+    def __init__(self, fields, width=None):
+        self.fields = list(fields)
+        self.width = width or max(f.column for f in self.fields) + 1
+        self.by_path = {f.path: f for f in self.fields}
+        if len(self.by_path) != len(self.fields):
+            raise ValueError("Schema có hai Field trùng path")
+
+    # --- SINH MÃ ---
+
+    def _tree(self, exclude=()):
+        """{"stt": Field, "page": {"id": Field, ...}} theo đúng thứ tự khai báo"""
+        tree = {}
+        for field in self.fields:
+            parts = field.path.split(".")
+            if parts[0] in exclude:
+                continue
+            node = tree
+            for part in parts[:-1]:
+                node = node.setdefault(part, {})
+            node[parts[-1]] = field
+        return tree
+
+    def _compile(self, name, source, namespace):
+        code = compile(source, _SOURCE_NAME.format(name), "exec")
+        exec(code, namespace)
+        return namespace[name]
+
+    def reader(self, exclude=()):
+        """
+        classmethod to_dict(row_values) -> dict lồng nhau. Hàng thiếu ô cuối được đệm chuỗi rỗng.
+        :param exclude: các nhóm cấp một bỏ qua (ví dụ MediaCalendarModel.to_youtube_dict bỏ facebook/tiktok)
+        """
+        def render(node):
+            items = []
+            for key, value in node.items():
+                if isinstance(value, dict):
+                    items.append(f"{key!r}: {render(value)}")
+                else:
+                    items.append(f"{key!r}: data[{value.column}]")
+            return "{" + ", ".join(items) + "}"
+
+        source = (
+            "def to_dict(cls, row_values):\n"
+            f"    data = row_values if len(row_values) >= {self.width} else row_values + _PAD[len(row_values):]\n"
+            f"    return {render(self._tree(exclude))}\n"
+        )
+        return classmethod(self._compile("to_dict", source, {"_PAD": [""] * self.width}))
+
+    def writer(self):
+        """classmethod from_dict(data_dict) -> mảng đủ độ rộng để ghi xuống Sheets"""
+        lines = ["def from_dict(cls, data_dict):", f"    row = [''] * {self.width}"]
+        defaults = {}
+
+        def render(node, source_var, depth):
+            for key, value in node.items():
+                if isinstance(value, dict):
+                    group_var = f"group{depth}"
+                    lines.append(f"    {group_var} = {source_var}.get({key!r}, {{}})")
+                    render(value, group_var, depth + 1)
+                else:
+                    default_name = f"_DEFAULT_{value.column}"
+                    defaults[default_name] = value.default
+                    lines.append(f"    row[{value.column}] = {source_var}.get({key!r}, {default_name})")
+
+        render(self._tree(), "data_dict", 0)
+        lines.append("    return row")
+        return classmethod(self._compile("from_dict", "\n".join(lines) + "\n", defaults))
+
+    # --- TIỆN ÍCH ---
+
+    def constants(self):
+        """{"COL_STT": 0, ...}"""
+        return {f.const: f.column for f in self.fields}
+
+    def columns(self, *paths):
+        """Chỉ số cột của các trường (dùng cho SheetService.get_all_rows(columns=...))"""
+        return [self.by_path[path].column for path in paths]
+
+    def header_row(self):
+        """Dòng tiêu đề theo Schema (dùng khi tạo tab mới); cột không khai báo tiêu đề để trống"""
+        row = [""] * self.width
+        for field in self.fields:
+            if field.header is not None:
+                row[field.column] = field.header
+        return row
+
+    def validate_header(self, header_row):
+        """
+        So sánh dòng tiêu đề trên Sheets với Schema. Trả về danh sách mô tả các cột lệch
+        (rỗng nếu khớp). Chỉ dùng để cảnh báo, không chặn việc đọc/ghi.
+        """
+        problems = []
+        for field in self.fields:
+            if field.header is None:
+                continue
+            actual = header_row[field.column] if field.column < len(header_row) else ""
+            if _normalize_header(actual) != _normalize_header(field.header):
+                problems.append(f"cột {field.column + 1}: mong đợi '{field.header}', trên Sheets là '{actual}'")
+        return problems
+
+
+def schema_model(cls):
+    """
+    Decorator cho Model có thuộc tính SCHEMA: gắn các hằng số COL_* và WIDTH.
+    to_dict/from_dict khai báo trong thân lớp bằng SCHEMA.reader()/SCHEMA.writer().
+    """
+    for const, column in cls.SCHEMA.constants().items():
+        setattr(cls, const, column)
+    cls.WIDTH = cls.SCHEMA.width
+    return cls
@@ -2,12 +2,14 @@ import json
 import datetime
 import time
 import os
-from googleapiclient.discovery import build
 from .facebook_publisher import FacebookPublisher
 from .youtube_publisher import YoutubePublisher
 from services.sheet_service import SheetService
+from models.History_db import HistoryDbModel
 from services.account_service import AccountService
-from logic import get_creds, tasks
+from services.google_clients import get_service
+from services import task_store
+from logic import get_creds
 
 class PostManager:
     """
@@ -19,6 +21,14 @@ class PostManager:
     
     HISTORY_SHEET = "Published_History"
 
+    # Các cột Published_History mà check_status_recur cần đọc
+    STATUS_CHECK_COLUMNS = HistoryDbModel.SCHEMA.columns(
+        "Status", "Page_Id", "Access_token", "Facebook_Post_Id",
+        "Type_conten", "Channel_Id", "Youtube_Post_Id",
+    )
+    # Các trường nhận diện một hàng lịch sử: chỉ ghi/xóa theo chỉ số khi hàng tại đó vẫn mang đúng các giá trị này
+    HISTORY_IDENTITY_FIELDS = HistoryDbModel.KEY_FIELDS + ("Id_media_on_drive",)
+
     def extract_drive_id(self, url):
         """Trích xuất ID file từ link Google Drive một cách mạnh mẽ."""
         if not url: return None
@@ -66,7 +76,7 @@ class PostManager:
         if not drive_id: return "Unknown"
         try:
             creds = get_creds()
-            service = build('drive', 'v3', credentials=creds)
+            service = get_service('drive', 'v3', creds)
             file_meta = service.files().get(fileId=drive_id, fields='mimeType').execute()
             mime = file_meta.get('mimeType', '')
             if 'video' in mime:
@@ -84,7 +94,7 @@ class PostManager:
         print(f"[PostManager] Đang tải file ID: {drive_id} về {output_path}...")
         try:
             creds = get_creds()
-            service = build('drive', 'v3', credentials=creds)
+            service = get_service('drive', 'v3', creds)
             
             # Kiểm tra file có tồn tại và size trước
             file_meta = service.files().get(fileId=drive_id, fields='size,name').execute()
@@ -146,18 +156,17 @@ class PostManager:
         print(f"\n[PostManager] === BẮT ĐẦU PUBLISH: {sheet_name} (Dòng {index}) ===")
         
         def update_task_msg(msg):
-            if task_id and task_id in tasks:
-                tasks[task_id]["message"] = msg
+            if task_id:
+                task_store.default_store().update(task_id, message=msg)
                 print(f"[PostManager] Task Update: {msg}")
 
         try:
-            rows = SheetService.get_all_rows(sheet_name)
-            if not rows or index >= len(rows):
+            item = SheetService.get_row(sheet_name, index)
+            if not item:
                 err = f"Không tìm thấy dữ liệu tại dòng {index} trong {sheet_name}."
                 print(f"[PostManager] ❌ {err}")
                 return {"success": False, "error": err}
             
-            item = rows[index]
             print(f"[PostManager] Dữ liệu dòng: {json.dumps(item)[:200]}...")
             
             # Xử lý Hẹn giờ (Scheduling)
@@ -187,8 +196,8 @@ class PostManager:
     def _handle_facebook_publish(self, item, sheet_name, index, task_id=None, scheduled_time=None):
         """Xử lý đăng bài lên Facebook và ghi lịch sử với logging chi tiết."""
         def update_task_msg(msg):
-            if task_id and task_id in tasks:
-                tasks[task_id]["message"] = msg
+            if task_id:
+                task_store.default_store().update(task_id, message=msg)
 
         page = item.get('page', {})
         page_id = page.get('id')
@@ -367,8 +376,8 @@ class PostManager:
     def _handle_youtube_publish(self, item, sheet_name, index, task_id=None, scheduled_time=None):
         """Xử lý đăng bài lên YouTube và ghi lịch sử với logging chi tiết."""
         def update_task_msg(msg):
-            if task_id and task_id in tasks:
-                tasks[task_id]["message"] = msg
+            if task_id:
+                task_store.default_store().update(task_id, message=msg)
 
         print(f"[PostManager] YT Publish - Dòng {index}")
         try:
@@ -422,7 +431,13 @@ class PostManager:
                 file_path=temp_path,
                 title=item.get('video_name', 'No Title'),
                 description=item.get('hook', ''),
-                scheduled_time=scheduled_time
+                scheduled_time=scheduled_time,
+                # Khóa theo nội dung của dòng (file Drive + kênh), không theo vị trí dòng: cùng video cho cùng kênh
+                # -> cùng phiên resumable nếu lần trước bị gián đoạn (publisher thêm hash metadata vào khóa)
+                session_key=f"{sheet_name}:{item.get('media_drive_id') or drive_id}:{channel_id}",
+                on_progress=lambda sent, size: update_task_msg(
+                    f"Đang upload video lên YouTube... {int(sent * 100 / size) if size else 0}%"
+                )
             )
 
             if os.path.exists(temp_path):
@@ -466,16 +481,42 @@ class PostManager:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def sync_facebook_post_info(self, index):
+    def _history_item(self, index, post_id=None):
+        """
+        Hàng Published_History mà client muốn thao tác: (row_index hiện tại, dict) hoặc None.
+        Có post_id (Facebook_Post_Id/Youtube_Post_Id của bài client đang thấy) thì tìm theo khóa, không dùng
+        chỉ số client giữ từ lần tải trước (hàng có thể đã dịch vì bị xóa hoặc chuyển sang tab lưu trữ).
+        """
+        if post_id:
+            for field in HistoryDbModel.KEY_FIELDS:
+                found = SheetService.locate_by_key(self.HISTORY_SHEET, field, post_id)
+                if found and found[1]:
+                    return found
+            return None
+        item = SheetService.get_row(self.HISTORY_SHEET, index)
+        return (index, item) if item else None
+
+    def _identity(self, item):
+        return {field: item.get(field) or "" for field in self.HISTORY_IDENTITY_FIELDS}
+
+    def _save_history(self, index, item):
+        """Ghi các ô đã đổi của hàng; hàng tại index không còn là bài này -> RowConflictError, không ghi gì"""
+        SheetService.patch_row(self.HISTORY_SHEET, index, item, expected=self._identity(item))
+
+    def _delete_history(self, index, item):
+        """Xóa hàng lịch sử của bài item; hàng tại index không còn là bài này -> RowConflictError, không xóa gì"""
+        SheetService.delete_row(self.HISTORY_SHEET, index, expected=self._identity(item))
+
+    def sync_facebook_post_info(self, index, post_id=None):
         """
         Lấy thông tin mới nhất từ Facebook và cập nhật vào Published_History.
         """
         try:
-            rows = SheetService.get_all_rows(self.HISTORY_SHEET)
-            if not rows or index >= len(rows):
+            found = self._history_item(index, post_id)
+            if not found:
                 return {"success": False, "error": "Không tìm thấy dòng lịch sử."}
+            index, item = found
             
-            item = rows[index]
             post_id = item.get("Facebook_Post_Id")
             page_id = item.get("Page_Id")
             token = item.get("Access_token")
@@ -506,23 +547,23 @@ class PostManager:
                 if data.get("message"):
                     item["Name_video"] = data.get("message")[:100] # Tạm lấy message làm title nếu trống
                 
-                SheetService.update_row(self.HISTORY_SHEET, index, item)
+                self._save_history(index, item)
                 return {"success": True, "data": item}
             
             return res
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def edit_facebook_post(self, index, new_message):
+    def edit_facebook_post(self, index, new_message, post_id=None):
         """
         Chỉnh sửa nội dung bài viết đã đăng trên Facebook.
         """
         try:
-            rows = SheetService.get_all_rows(self.HISTORY_SHEET)
-            if not rows or index >= len(rows):
+            found = self._history_item(index, post_id)
+            if not found:
                 return {"success": False, "error": "Không tìm thấy dòng lịch sử."}
+            index, item = found
             
-            item = rows[index]
             post_id = item.get("Facebook_Post_Id")
             page_id = item.get("Page_Id")
             token = item.get("Access_token")
@@ -536,30 +577,30 @@ class PostManager:
             if res["success"]:
                 # Cập nhật lại trong Sheet
                 item["Name_video"] = new_message[:100] # Update preview name
-                SheetService.update_row(self.HISTORY_SHEET, index, item)
+                self._save_history(index, item)
                 return {"success": True}
             
             return res
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def delete_facebook_post(self, index):
+    def delete_facebook_post(self, index, post_id=None):
         """
         Xóa bài viết trên Facebook và xóa khỏi Published_History.
         """
         try:
-            rows = SheetService.get_all_rows(self.HISTORY_SHEET)
-            if not rows or index >= len(rows):
+            found = self._history_item(index, post_id)
+            if not found:
                 return {"success": False, "error": "Không tìm thấy dòng lịch sử."}
+            index, item = found
             
-            item = rows[index]
             post_id = item.get("Facebook_Post_Id")
             page_id = item.get("Page_Id")
             token = item.get("Access_token")
 
             if not post_id or not token:
                 # Nếu không có ID nhưng vẫn muốn xóa dòng trong Sheet
-                SheetService.delete_row(self.HISTORY_SHEET, index)
+                self._delete_history(index, item)
                 return {"success": True, "message": "Đã xóa dòng trong Sheet (không tìm thấy ID FB)."}
 
             publisher = FacebookPublisher(page_id, token)
@@ -567,22 +608,22 @@ class PostManager:
             
             if res["success"] or "error" in res:
                 # Dù lỗi FB (VD bài đã bị xóa thủ công) thì vẫn ưu tiên xóa dòng trong Sheet
-                SheetService.delete_row(self.HISTORY_SHEET, index)
+                self._delete_history(index, item)
                 return {"success": True}
             
             return res
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def update_post_content(self, sheet_name, index, data, thumbnail_file=None):
+    def update_post_content(self, sheet_name, index, data, thumbnail_file=None, post_id=None):
         """
         Cập nhật nội dung bài viết (Title, Description, Privacy, Thumbnail) cho cả FB và YT.
         """
         try:
-            rows = SheetService.get_all_rows(self.HISTORY_SHEET)
-            if index >= len(rows): return {"success": False, "error": "Index out of range"}
+            found = self._history_item(index, post_id)
+            if not found: return {"success": False, "error": "Index out of range"}
+            index, item = found
             
-            item = rows[index]
             
             title = data.get('title')
             description = data.get('description')
@@ -619,7 +660,7 @@ class PostManager:
                     
                     if res["success"]:
                         if description: item["Name_video"] = description[:100]
-                        SheetService.update_row(self.HISTORY_SHEET, index, item)
+                        self._save_history(index, item)
                     return res
 
                 elif item.get("Channel_Id"): # YouTube
@@ -643,7 +684,7 @@ class PostManager:
                     
                     if res["success"]:
                         if title: item["Name_video"] = title
-                        SheetService.update_row(self.HISTORY_SHEET, index, item)
+                        self._save_history(index, item)
                     return res
                     
                 return {"success": False, "error": "Unknown Platform"}
@@ -656,16 +697,16 @@ class PostManager:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def publish_now(self, index):
+    def publish_now(self, index, post_id=None):
         """
         [NEW] Chuyển ngay bài viết đang SCHEDULED sang PUBLISHED (Public Now).
         Bỏ qua thời gian chờ.
         """
         try:
             print(f"[PostManager] Force Publishing row {index}...")
-            rows = SheetService.get_all_rows(self.HISTORY_SHEET)
-            if index >= len(rows): return {"success": False, "error": "Index out of range"}
-            item = rows[index]
+            found = self._history_item(index, post_id)
+            if not found: return {"success": False, "error": "Index out of range"}
+            index, item = found
             
             # --- FACEBOOK ---
             if item.get("Page_Id"):
@@ -687,7 +728,7 @@ class PostManager:
                         
                     if res["success"]:
                         item["Status"] = "SUCCESS"
-                        SheetService.update_row(self.HISTORY_SHEET, index, item)
+                        self._save_history(index, item)
                     return res
 
             # --- YOUTUBE ---
@@ -700,21 +741,21 @@ class PostManager:
                      res = publisher.update_metadata(video_id, privacy_status="public")
                      if res["success"]:
                          item["Status"] = "SUCCESS"
-                         SheetService.update_row(self.HISTORY_SHEET, index, item)
+                         self._save_history(index, item)
                      return res
 
             return {"success": False, "error": "Platform or ID not found or not supported"}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def delete_published_post(self, sheet_name, index):
+    def delete_published_post(self, sheet_name, index, post_id=None):
         """
         Xóa bài viết đã đăng (FB/YT) và xóa dòng trong History.
         """
         try:
-            rows = SheetService.get_all_rows(self.HISTORY_SHEET)
-            if index >= len(rows): return {"success": False, "error": "Index out of range"}
-            item = rows[index]
+            found = self._history_item(index, post_id)
+            if not found: return {"success": False, "error": "Index out of range"}
+            index, item = found
             
             res = {"success": False}
 
@@ -725,7 +766,7 @@ class PostManager:
                 
                 # [FIX Logic] Nếu không có ID/Token (ví dụ lỗi khi tạo), cho phép xóa row
                 if not post_id or not token:
-                     SheetService.delete_row(self.HISTORY_SHEET, index)
+                     self._delete_history(index, item)
                      return {"success": True, "message": "Deleted row (missing FB ID/Token)"}
 
                 if post_id and token:
@@ -737,7 +778,7 @@ class PostManager:
                 
                 # [FIX Logic] Nếu không có ID (ví dụ lỗi khi tạo), cho phép xóa row
                 if not video_id:
-                     SheetService.delete_row(self.HISTORY_SHEET, index)
+                     self._delete_history(index, item)
                      return {"success": True, "message": "Deleted row (missing YT ID)"}
 
                 if video_id:
@@ -750,7 +791,7 @@ class PostManager:
             # Tốt nhất là xóa dòng nếu API OK hoặc API báo không tìm thấy (đã xóa)
             # [FIX] Luôn xóa trong Sheet để tránh bị kẹt
             # Nếu API lỗi thì trả về success=True nhưng kèm message cảnh báo
-            SheetService.delete_row(self.HISTORY_SHEET, index)
+            self._delete_history(index, item)
             
             if res.get("success"):
                  return {"success": True}
@@ -762,14 +803,14 @@ class PostManager:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def sync_thumbnail(self, sheet_name, index):
+    def sync_thumbnail(self, sheet_name, index, post_id=None):
         """
         Đồng bộ Thumbnail từ Platform về Sheet.
         """
         try:
-            rows = SheetService.get_all_rows(self.HISTORY_SHEET)
-            if index >= len(rows): return {"success": False, "error": "Index out of range"}
-            item = rows[index]
+            found = self._history_item(index, post_id)
+            if not found: return {"success": False, "error": "Index out of range"}
+            index, item = found
             
             thumb_url = None
 
@@ -801,21 +842,21 @@ class PostManager:
 
             if thumb_url:
                 item["Thumbnail"] = thumb_url
-                SheetService.update_row(self.HISTORY_SHEET, index, item)
+                self._save_history(index, item)
                 return {"success": True, "thumbnail": thumb_url}
             
             return {"success": False, "error": "Thumbnail not found"}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    def get_post_details(self, sheet_name, index):
+    def get_post_details(self, sheet_name, index, post_id=None):
         """
         Lấy thông tin chi tiết hiện tại của bài viết từ Platform (Title, Description, Privacy).
         """
         try:
-            rows = SheetService.get_all_rows(self.HISTORY_SHEET)
-            if index >= len(rows): return {"success": False, "error": "Index out of range"}
-            item = rows[index]
+            found = self._history_item(index, post_id)
+            if not found: return {"success": False, "error": "Index out of range"}
+            index, item = found
             
             data = {"title": "", "description": "", "privacy": ""}
 
@@ -868,6 +909,7 @@ class PostManager:
 
     def _log_history(self, history_data):
         """Ghi nhật ký bài đăng thành công vào tab Published_History."""
+        history_data.setdefault("Published_At", datetime.datetime.now().strftime(HistoryDbModel.PUBLISHED_AT_FORMAT))
         try:
             SheetService.append_row(self.HISTORY_SHEET, history_data)
         except Exception as e:
@@ -888,77 +930,28 @@ class PostManager:
         try:
             print("[Scheduler] Đang kiểm tra trạng thái bài đăng...")
             start_time = time.time()
-            rows = SheetService.get_all_rows(self.HISTORY_SHEET)
+            # Chỉ đọc các cột cần cho việc kiểm tra trạng thái (values.batchGet)
+            rows = SheetService.get_all_rows(self.HISTORY_SHEET, columns=self.STATUS_CHECK_COLUMNS)
             updates_count = 0
             
-            for index, item in enumerate(rows):
-                if item.get("Status") != "SCHEDULED":
-                    continue
-                
-                # --- FACEBOOK CHECK ---
-                if item.get("Page_Id"):
-                    page_id = item.get("Page_Id")
-                    token = item.get("Access_token")
-                    post_id = item.get("Facebook_Post_Id")
-                    post_type = item.get("Type_conten", "Status")
-                    
-                    if page_id and token and post_id:
-                        publisher = FacebookPublisher(page_id, token)
-                        is_live = False
-                        
-                        # 1. Check Video
-                        if post_type == "Video":
-                            res = publisher._make_request(post_id, method="GET", params={"fields": "published"})
-                            if res["success"] and res["data"].get("published") is True:
-                                is_live = True
-                                
-                        # 2. Check Reels
-                        elif post_type == "Reels":
-                            # Reels thường ko có published/is_hidden, check permalink
-                            res = publisher._make_request(post_id, method="GET", params={"fields": "permalink_url"})
-                            if res["success"] and res["data"].get("permalink_url"):
-                                is_live = True
-                                
-                        # 3. Check Scheduled Object (đã tạo ID nhưng chưa tới giờ)
-                        # Trước tiên thử check xem nó có còn là scheduled object không
-                        res_sched = publisher._make_request(post_id, method="GET", params={"fields": "is_published"})
-                        if res_sched["success"]:
-                            if res_sched["data"].get("is_published") is True:
-                                is_live = True
-                        
-                        # 4. Fallback cho Image/Status (Feed Post)
-                        # Nếu check is_published ở trên trả về True rồi thì thôi. 
-                        # Nếu chưa, và là Image/Status, check is_hidden
-                        if not is_live and post_type in ["Image", "Album", "Status"]:
-                             res_hidden = publisher._make_request(post_id, method="GET", params={"fields": "is_hidden"})
-                             if res_hidden["success"]:
-                                 # is_hidden=False nghĩa là đang hiện -> Public
-                                 if res_hidden["data"].get("is_hidden") is False:
-                                     is_live = True
-
-                        if is_live:
-                            print(f"[Scheduler] ✅ FB Post {post_id} đã Pubic. Cập nhật Sheet...")
-                            item["Status"] = "SUCCESS"
-                            SheetService.update_row(self.HISTORY_SHEET, index, item)
-                            updates_count += 1
-
-                # --- YOUTUBE CHECK ---
-                elif item.get("Channel_Id"):
-                    video_id = item.get("Youtube_Post_Id")
-                    if video_id:
-                        try:
-                            # Tối ưu: Nếu chưa có service, function này sẽ tự gọi get_creds
-                            creds = get_creds()
-                            if creds:
-                                yt_pub = YoutubePublisher(creds)
-                                res = yt_pub.get_video_details(video_id) # Hàm này trả về title, desc, privacy
-                                if res.get("success") and res.get("privacy") == "public":
-                                    print(f"[Scheduler] ✅ YT Video {video_id} đã Public. Cập nhật Sheet...")
-                                    item["Status"] = "SUCCESS"
-                                    SheetService.update_row(self.HISTORY_SHEET, index, item)
-                                    updates_count += 1
-                        except Exception as ex:
-                            print(f"[Scheduler] Lỗi check YT {video_id}: {ex}")
+            # Gom các bài đã Public và ghi một lần (values.batchUpdate) khi kết thúc vòng quét.
+            # Không dùng "with": lỗi giữa vòng quét vẫn phải ghi các hàng đã xác nhận Public trước đó.
+            live = set()  # (Facebook_Post_Id, Youtube_Post_Id) của các bài đã Public
+            try:
+                for index, item in enumerate(rows):
+                    if item.get("Status") != "SCHEDULED":
+                        continue
+                    try:
+                        is_live = self._is_live(item)
+                    except Exception as ex:
+                        # Một bài lỗi (token hết hạn, mạng...) không làm dừng việc kiểm tra các bài khác
+                        print(f"[Scheduler] Lỗi kiểm tra hàng {index}: {ex}")
+                        continue
+                    if is_live:
+                        live.add(self._status_key(item))
+            finally:
+                if live:
+                    updates_count = self._mark_live(live)
 
             if updates_count > 0:
                 print(f"[Scheduler] Hoàn tất. Đã cập nhật {updates_count} bài.")
@@ -967,3 +960,88 @@ class PostManager:
                 
         except Exception as e:
             print(f"[Scheduler] ❌ Lỗi quá trình kiểm tra: {e}")
+
+    @staticmethod
+    def _status_key(item):
+        return item.get("Facebook_Post_Id") or "", item.get("Youtube_Post_Id") or ""
+
+    def _mark_live(self, live):
+        """
+        Chuyển các bài đã Public sang SUCCESS. Vòng quét gọi FB/YT có thể mất vài phút, trong lúc đó hàng có thể
+        đã bị xóa/xoay vòng làm chỉ số dịch đi: giữ khóa ghi của tab, đọc lại chỉ số hiện tại thẳng từ Sheets
+        và ghi theo khóa bài đăng thay vì theo chỉ số lúc bắt đầu quét.
+        :return: số hàng đã cập nhật
+        """
+        with SheetService._write_lock(self.HISTORY_SHEET):
+            SheetService.invalidate_cache(self.HISTORY_SHEET)
+            rows = SheetService.get_all_rows(self.HISTORY_SHEET, columns=self.STATUS_CHECK_COLUMNS)
+            indices = [index for index, item in enumerate(rows)
+                       if item.get("Status") == "SCHEDULED" and self._status_key(item) in live]
+            with SheetService.unit_of_work() as uow:
+                for index in indices:
+                    uow.update_cells(self.HISTORY_SHEET, index, {HistoryDbModel.COL_STATUS: "SUCCESS"})
+        return len(indices)
+
+    def _is_live(self, item):
+        """Bài SCHEDULED (một hàng Published_History) đã public trên Facebook/YouTube chưa"""
+        # --- FACEBOOK CHECK ---
+        if item.get("Page_Id"):
+            page_id = item.get("Page_Id")
+            token = item.get("Access_token")
+            post_id = item.get("Facebook_Post_Id")
+            post_type = item.get("Type_conten", "Status")
+            if not (page_id and token and post_id):
+                return False
+
+            publisher = FacebookPublisher(page_id, token)
+            is_live = False
+
+            # 1. Check Video
+            if post_type == "Video":
+                res = publisher._make_request(post_id, method="GET", params={"fields": "published"})
+                if res["success"] and res["data"].get("published") is True:
+                    is_live = True
+
+            # 2. Check Reels
+            elif post_type == "Reels":
+                # Reels thường ko có published/is_hidden, check permalink
+                res = publisher._make_request(post_id, method="GET", params={"fields": "permalink_url"})
+                if res["success"] and res["data"].get("permalink_url"):
+                    is_live = True
+
+            # 3. Check Scheduled Object (đã tạo ID nhưng chưa tới giờ)
+            # Trước tiên thử check xem nó có còn là scheduled object không
+            res_sched = publisher._make_request(post_id, method="GET", params={"fields": "is_published"})
+            if res_sched["success"]:
+                if res_sched["data"].get("is_published") is True:
+                    is_live = True
+
+            # 4. Fallback cho Image/Status (Feed Post)
+            # Nếu check is_published ở trên trả về True rồi thì thôi.
+            # Nếu chưa, và là Image/Status, check is_hidden
+            if not is_live and post_type in ["Image", "Album", "Status"]:
+                res_hidden = publisher._make_request(post_id, method="GET", params={"fields": "is_hidden"})
+                if res_hidden["success"]:
+                    # is_hidden=False nghĩa là đang hiện -> Public
+                    if res_hidden["data"].get("is_hidden") is False:
+                        is_live = True
+
+            if is_live:
+                print(f"[Scheduler] ✅ FB Post {post_id} đã Pubic. Cập nhật Sheet...")
+            return is_live
+
+        # --- YOUTUBE CHECK ---
+        if item.get("Channel_Id"):
+            video_id = item.get("Youtube_Post_Id")
+            if not video_id:
+                return False
+            # Tối ưu: Nếu chưa có service, function này sẽ tự gọi get_creds
+            creds = get_creds()
+            if not creds:
+                return False
+            yt_pub = YoutubePublisher(creds)
+            res = yt_pub.get_video_details(video_id) # Hàm này trả về title, desc, privacy
+            if res.get("success") and res.get("privacy") == "public":
+                print(f"[Scheduler] ✅ YT Video {video_id} đã Public. Cập nhật Sheet...")
+                return True
+        return False
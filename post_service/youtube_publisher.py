@@ -1,6 +1,10 @@
-from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload
+from services.google_clients import get_service
+from services import upload_sessions
+from logic import UPLOAD_CHUNK_SIZE
 import os
+import json
+import hashlib
 
 class YoutubePublisher:
     """
@@ -9,12 +13,16 @@ class YoutubePublisher:
     """
 
     def __init__(self, credentials):
-        self.youtube = build('youtube', 'v3', credentials=credentials)
+        self.youtube = get_service('youtube', 'v3', credentials)
 
-    def upload_video(self, file_path, title, description, category_id="22", tags=None, privacy_status="public", scheduled_time=None):
+    def upload_video(self, file_path, title, description, category_id="22", tags=None, privacy_status="public", scheduled_time=None, session_key=None, on_progress=None):
         """
         Tải video lên YouTube.
         :param scheduled_time: ISO 8601 format (YYYY-MM-DDTHH:MM:SSZ)
+        :param session_key: khóa ổn định của video cần upload (mặc định: file_path). Phiên resumable được lưu
+                            theo khóa này kèm hash của metadata, nên lần upload sau (kể cả sau khi server restart)
+                            gửi tiếp từ offset đã nhận nếu metadata không đổi, còn đổi thì tạo phiên mới.
+        :param on_progress: callback(số byte đã upload, tổng kích thước) sau mỗi đoạn
         """
         body = {
             'snippet': {
@@ -34,7 +42,11 @@ class YoutubePublisher:
             body['status']['privacyStatus'] = 'private'
             body['status']['publishAt'] = scheduled_time
 
-        media = MediaFileUpload(file_path, chunksize=-1, resumable=True)
+        # Metadata được gửi lúc tạo phiên: phiên cũ tạo với title/mô tả/lịch đăng khác thì không được dùng lại
+        metadata_hash = hashlib.sha1(json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+        file_key = f"{session_key or file_path}:{metadata_hash}"
+
+        media = MediaFileUpload(file_path, chunksize=UPLOAD_CHUNK_SIZE, resumable=True)
         
         try:
             request = self.youtube.videos().insert(
@@ -42,11 +54,16 @@ class YoutubePublisher:
                 body=body,
                 media_body=media
             )
-            response = request.execute()
+            response = upload_sessions.resumable_execute(
+                request, "youtube", file_key, on_progress=on_progress
+            )
             return {"success": True, "data": response}
         except Exception as e:
             print(f"YouTube Upload Error: {e}")
             return {"success": False, "error": str(e)}
+        finally:
+            if media.stream():
+                media.stream().close()
 
     def update_metadata(self, video_id, title=None, description=None, category_id=None, privacy_status=None):
         """
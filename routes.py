@@ -1,16 +1,27 @@
 import os
 import re
-import uuid
-import threading
-from flask import Blueprint, request, jsonify, redirect
-from googleapiclient.discovery import build
-from logic import get_creds, tasks, background_upload, delete_drive_file, TOKEN_FILE
-from services.sheet_service import SheetService
+import json
+import hashlib
+from flask import Blueprint, Response, request, jsonify, redirect
+from logic import get_creds, background_upload, discard_uploads, delete_drive_file, TOKEN_FILE
+from services.upload_storage import claim_upload
+from services import task_store
+from services.task_store import STATES as TASK_STATES
+from services.job_queue import job_queue, QueueFullError, PRIORITIES, QUEUE_RETRY_AFTER
+from services.sheet_service import SheetService, RowConflictError
+from models.row_view import rows_to_json, iter_rows_json
 from services.account_service import AccountService
+from services.google_clients import get_service
+from services import api_guard, history_archive, http_compression, upload_sessions
 
 # Khởi tạo Blueprint cho các API
 api_bp = Blueprint('api', __name__)
 
+@api_bp.after_request
+def compress_api_response(response):
+    """Nén gzip/br các phản hồi JSON lớn (xem services/http_compression.py)"""
+    return http_compression.compress_response(response, request)
+
 # --- API XÁC THỰC (AUTHENTICATION) ---
 
 @api_bp.route('/api/auth/login')
@@ -29,7 +40,7 @@ def auth_status():
             if not creds:
                 return jsonify({"connected": False, "reason": "token_invalid"})
             
-            service = build('drive', 'v3', credentials=creds)
+            service = get_service('drive', 'v3', creds)
             about = service.about().get(fields="user").execute()
             return jsonify({
                 "connected": True, 
@@ -101,23 +112,147 @@ def get_account_channels(account_id):
 
 # --- API QUẢN LÝ TÁC VỤ (TASK MANAGEMENT) ---
 
+def _queue_full_response(error):
+    """429 khi hàng đợi tác vụ đầy: kèm độ sâu hàng đợi và vị trí yêu cầu lẽ ra nhận được"""
+    response = jsonify({
+        "status": "rejected",
+        "error": str(error),
+        "queue_depth": error.depth,
+        "queue_position": error.position
+    })
+    response.status_code = 429
+    response.headers["Retry-After"] = str(QUEUE_RETRY_AFTER)
+    return response
+
 @api_bp.route('/api/tasks')
 def get_tasks():
     """
-    Lấy danh sách các tác vụ upload đang chạy ngầm.
+    Lấy danh sách các tác vụ chạy ngầm (dùng chung giữa các worker, tác vụ đã xong được giữ TASK_TTL giây).
+    ---
+    parameters:
+      - name: status
+        in: query
+        type: string
+        description: Lọc theo trạng thái, nhiều giá trị cách nhau bởi dấu phẩy (queued,processing,success,error)
+    responses:
+      200:
+        description: "{task_id: task} gồm status, progress, message và tiến độ từng file"
+      400:
+        description: Trạng thái không hợp lệ
+    """
+    status = request.args.get('status')
+    if not status:
+        return jsonify(task_store.default_store().all())
+    statuses = [s.strip() for s in status.split(',') if s.strip()]
+    invalid = [s for s in statuses if s not in TASK_STATES]
+    if invalid:
+        return jsonify({"error": f"Trạng thái không hợp lệ: {', '.join(invalid)}"}), 400
+    return jsonify({task["id"]: task for task in task_store.default_store().by_status(*statuses)})
+
+@api_bp.route('/api/tasks/<task_id>')
+def get_task(task_id):
+    """
+    Lấy một tác vụ theo ID.
     ---
+    parameters:
+      - name: task_id
+        in: path
+        type: string
+        required: true
     responses:
       200:
-        description: Danh sách các task và tiến độ
+        description: Trạng thái và tiến độ của tác vụ
+      404:
+        description: Không tìm thấy tác vụ (chưa tồn tại hoặc đã bị dọn)
     """
-    return jsonify(tasks)
+    task = task_store.default_store().get(task_id)
+    if task is None:
+        return jsonify({"error": "Không tìm thấy tác vụ"}), 404
+    if task["status"] == "queued":
+        # Vị trí hiện tại trong hàng đợi của worker này (None nếu job nằm ở worker khác)
+        task["queue_position"] = job_queue.position(task_id)
+    return jsonify(task)
+
+@api_bp.route('/api/v2/metrics')
+def get_metrics():
+    """
+    Các chỉ số vận hành nội bộ (cache đọc Google Sheets, limiter/retry của Google API...).
+    ---
+    responses:
+      200:
+        description: Bộ đếm hit/miss của cache, số lần chờ/thử lại theo từng Google API, độ sâu hàng đợi tác vụ
+    """
+    return jsonify({
+        "sheet_cache": SheetService.cache_stats(),
+        "google_api": api_guard.stats(),
+        "job_queue": job_queue.stats()
+    })
 
 # --- API DỮ LIỆU GOOGLE SHEETS ---
 
+def _quote_tab(title):
+    """Đặt tên tab trong dấu nháy đơn theo cú pháp A1 (ví dụ 'My Tab')"""
+    return "'" + title.replace("'", "''") + "'"
+
+def _iter_grid_rows(grid_data):
+    """
+    Duyệt GridData (spreadsheets.get + includeGridData) theo từng hàng giống values.get:
+    bỏ các ô trống cuối hàng và các hàng trống cuối bảng (hàng trống chỉ được trả ra khi còn hàng có dữ liệu phía sau).
+    """
+    empty_rows = 0
+    for grid in grid_data:
+        for row in grid.get('rowData', []):
+            cells = [cell.get('formattedValue', '') for cell in row.get('values', [])]
+            while cells and cells[-1] == '':
+                cells.pop()
+            if not cells:
+                empty_rows += 1
+                continue
+            for _ in range(empty_rows):
+                yield []
+            empty_rows = 0
+            yield cells
+
+def _grid_to_values(grid_data):
+    """Chuyển GridData về dạng mảng 2 chiều giống values.get"""
+    return list(_iter_grid_rows(grid_data))
+
+def _wants_stream():
+    """?stream=true: trả JSON theo từng đoạn (chunked) thay vì dựng toàn bộ body rồi mới gửi"""
+    return request.args.get('stream', '').lower() in ('1', 'true', 'yes')
+
+def _stream_json(chunks):
+    """
+    Response stream cho một generator các đoạn JSON. Không có ETag/304 vì body chưa tồn tại
+    khi gửi header; dữ liệu nguồn phải được tải xong TRƯỚC khi gọi để lỗi còn trả được mã 4xx/5xx.
+    """
+    return Response(chunks, mimetype='application/json')
+
+def _iter_full_data_json(spreadsheet):
+    """Sinh JSON của /api/sheets/full-data theo từng hàng, không dựng mảng values của từng tab"""
+    title = spreadsheet.get('properties', {}).get('title', 'Unknown')
+    yield '{"title":' + json.dumps(title) + ',"sheets":['
+    # Lấy từng tab ra khỏi response gốc: tab đã gửi xong được giải phóng ngay, không chờ hết request
+    sheets = spreadsheet.pop('sheets', [])
+    sheets.reverse()
+    prefix = ''
+    while sheets:
+        sheet = sheets.pop()
+        props = sheet.get('properties', {})
+        yield '%s{"title":%s,"sheetId":%s,"values":[' % (
+            prefix, json.dumps(props.get('title')), json.dumps(props.get('sheetId')))
+        prefix = ','
+        separator = ''
+        for cells in _iter_grid_rows(sheet.get('data', [])):
+            yield separator + json.dumps(cells)
+            separator = ','
+        yield ']}'
+    yield ']}'
+
 @api_bp.route('/api/sheets/full-data')
 def get_full_sheet_data():
     """
-    Lấy toàn bộ dữ liệu từ TẤT CẢ các tab.
+    Lấy toàn bộ dữ liệu từ TẤT CẢ các tab (hoặc một số tab) trong MỘT lần gọi Google Sheets.
     ---
     parameters:
       - name: sheetId
@@ -125,6 +260,16 @@ def get_full_sheet_data():
         type: string
         required: true
         description: ID của Google Spreadsheet
+      - name: tabs
+        in: query
+        type: string
+        required: false
+        description: Danh sách tên tab cần lấy, phân cách bằng dấu phẩy (mặc định lấy tất cả)
+      - name: stream
+        in: query
+        type: boolean
+        required: false
+        description: true = gửi JSON theo từng hàng (chunked) thay vì dựng toàn bộ body trước
     responses:
       200:
         description: Thành công
@@ -132,11 +277,22 @@ def get_full_sheet_data():
     sheet_id = request.args.get('sheetId')
     if not sheet_id:
         return jsonify({"error": "Thiếu tham số sheetId"}), 400
+    tabs = [t.strip() for t in request.args.get('tabs', '').split(',') if t.strip()]
     
     try:
         creds = get_creds()
-        service = build('sheets', 'v4', credentials=creds)
-        spreadsheet = service.spreadsheets().get(spreadsheetId=sheet_id).execute()
+        service = get_service('sheets', 'v4', creds)
+        # includeGridData + fields: metadata và giá trị của mọi tab về cùng lúc, chỉ lấy formattedValue
+        params = {
+            'spreadsheetId': sheet_id,
+            'includeGridData': True,
+            'fields': 'properties.title,sheets(properties(sheetId,title),data(rowData(values(formattedValue))))'
+        }
+        if tabs:
+            params['ranges'] = [_quote_tab(t) for t in tabs]
+        spreadsheet = service.spreadsheets().get(**params).execute()
+        if _wants_stream():
+            return _stream_json(_iter_full_data_json(spreadsheet))
         sheets_metadata = spreadsheet.get('sheets', [])
         
         full_data = {
@@ -146,13 +302,10 @@ def get_full_sheet_data():
         
         for sheet in sheets_metadata:
             props = sheet.get('properties', {})
-            title = props.get('title')
-            sheet_id_val = props.get('sheetId')
-            result = service.spreadsheets().values().get(spreadsheetId=sheet_id, range=title).execute()
             full_data["sheets"].append({
-                "title": title,
-                "sheetId": sheet_id_val,
-                "values": result.get('values', [])
+                "title": props.get('title'),
+                "sheetId": props.get('sheetId'),
+                "values": _grid_to_values(sheet.get('data', []))
             })
         return jsonify(full_data)
     except Exception as e:
@@ -183,7 +336,7 @@ def get_single_sheet_data():
     
     try:
         creds = get_creds()
-        service = build('sheets', 'v4', credentials=creds)
+        service = get_service('sheets', 'v4', creds)
         result = service.spreadsheets().values().get(spreadsheetId=sheet_id, range=sheet_name).execute()
         return jsonify({
             "sheetName": sheet_name,
@@ -218,9 +371,10 @@ def create_sheet_tab():
     title = data.get('title')
     try:
         creds = get_creds()
-        service = build('sheets', 'v4', credentials=creds)
+        service = get_service('sheets', 'v4', creds)
         body = {'requests': [{'addSheet': {'properties': {'title': title}}}]}
         res = service.spreadsheets().batchUpdate(spreadsheetId=sheet_id, body=body).execute()
+        SheetService.invalidate_cache()
         return jsonify(res)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -247,9 +401,10 @@ def delete_sheet_tab():
     tab_id = request.args.get('tabId', type=int)
     try:
         creds = get_creds()
-        service = build('sheets', 'v4', credentials=creds)
+        service = get_service('sheets', 'v4', creds)
         body = {'requests': [{'deleteSheet': {'sheetId': tab_id}}]}
         res = service.spreadsheets().batchUpdate(spreadsheetId=sheet_id, body=body).execute()
+        SheetService.invalidate_cache()
         return jsonify(res)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -288,7 +443,7 @@ def update_sheet_row():
     values = data.get('values')
     try:
         creds = get_creds()
-        service = build('sheets', 'v4', credentials=creds)
+        service = get_service('sheets', 'v4', creds)
         range_name = f"{sheet_name}!A{row_index + 1}"
         res = service.spreadsheets().values().update(
             spreadsheetId=sheet_id,
@@ -296,6 +451,7 @@ def update_sheet_row():
             valueInputOption='USER_ENTERED',
             body={'values': [values]}
         ).execute()
+        SheetService.invalidate_cache(sheet_name)
         return jsonify(res)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -327,7 +483,7 @@ def delete_sheet_row():
     row_index = request.args.get('rowIndex', type=int)
     try:
         creds = get_creds()
-        service = build('sheets', 'v4', credentials=creds)
+        service = get_service('sheets', 'v4', creds)
         body = {
             'requests': [{
                 'deleteDimension': {
@@ -341,6 +497,8 @@ def delete_sheet_row():
             }]
         }
         res = service.spreadsheets().batchUpdate(spreadsheetId=sheet_id, body=body).execute()
+        # Chỉ biết tabId nên vô hiệu hóa toàn bộ cache
+        SheetService.invalidate_cache()
         return jsonify(res)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -375,10 +533,21 @@ def upload_files():
         in: formData
         type: file
         required: true
+      - name: priority
+        in: formData
+        type: string
+        enum: [high, normal, low]
     responses:
       200:
-        description: Đã thêm vào hàng đợi
+        description: Đã thêm vào hàng đợi (kèm queue_position)
+      429:
+        description: Hàng đợi đầy, thử lại sau Retry-After giây
     """
+    priority = request.form.get('priority', 'normal')
+    if priority not in PRIORITIES:
+        return jsonify({"status": "error", "message": f"Độ ưu tiên không hợp lệ: {priority}"}), 400
+    files_data = {'files': []}
+    task_id = None
     try:
         form_data = {
             'parentId': request.form.get('parentId'),
@@ -386,22 +555,35 @@ def upload_files():
             'folderName': request.form.get('folderName'),
             'topic': request.form.get('topic')
         }
-        files_data = {'files': []}
+        # File đã được werkzeug ghi thẳng xuống UPLOAD_FOLDER trong lúc đọc request (DiskUploadRequest),
+        # ở đây chỉ nhận đường dẫn (kèm SHA-256 đã tính khi ghi); tác vụ ngầm upload từ file và xóa file khi xong.
         if 'thumbnail' in request.files:
             t = request.files['thumbnail']
-            files_data['thumbnail'] = {'content': t.read(), 'filename': t.filename, 'content_type': t.content_type}
+            files_data['thumbnail'] = dict(claim_upload(t), filename=t.filename, content_type=t.content_type)
         
         files = request.files.getlist('files')
         for f in files:
             if f.filename != '':
-                files_data['files'].append({'content': f.read(), 'filename': f.filename, 'content_type': f.content_type})
+                files_data['files'].append(dict(claim_upload(f), filename=f.filename, content_type=f.content_type))
 
-        task_id = str(uuid.uuid4())
-        tasks[task_id] = {"status": "queued", "progress": "Đang khởi tạo..."}
-        thread = threading.Thread(target=background_upload, args=(task_id, form_data, files_data))
-        thread.start()
-        return jsonify({"status": "queued", "task_id": task_id, "message": "Đã bắt đầu upload ở chế độ chạy ngầm."})
+        task_id = task_store.default_store().create(kind="upload", progress="Đang chờ trong hàng đợi...")
+        # Job spec lưu cùng phiên upload: tiến trình chết trước khi xong thì lần khởi động sau chạy lại
+        # tác vụ (logic.resume_uploads); background_upload xóa spec khi kết thúc
+        upload_sessions.default_store().save_job(task_id, {'form': form_data, 'files': files_data,
+                                                           'priority': priority})
+        position = job_queue.submit("upload", background_upload, task_id, form_data, files_data,
+                                    job_id=task_id, priority=priority)
+        return jsonify({"status": "queued", "task_id": task_id, "queue_position": position,
+                        "message": "Đã bắt đầu upload ở chế độ chạy ngầm."})
+    except QueueFullError as e:
+        task_store.default_store().delete(task_id)
+        upload_sessions.default_store().delete_job(task_id)
+        discard_uploads(files_data)
+        return _queue_full_response(e)
     except Exception as e:
+        if task_id:
+            upload_sessions.default_store().delete_job(task_id)
+        discard_uploads(files_data)
         return jsonify({"status": "error", "message": str(e)}), 500
 
 # --- API TIỆN ÍCH (UTILITIES) ---
@@ -435,11 +617,30 @@ def parse_sheet_url():
 
 # --- API CRUD DỰA TRÊN MODEL (NEW V2) ---
 
+# Tham số truy vấn được xử lý phía server bởi SheetService.query_rows
+SHEET_QUERY_PARAMS = ("status", "platform", "calendar_from", "calendar_to", "sort", "limit", "cursor")
+
+def _conditional_json(data):
+    """
+    jsonify kèm ETag băm từ nội dung. Cache-Control: no-cache buộc trình duyệt hỏi lại mỗi lần
+    (gửi If-None-Match), server trả 304 khi nội dung trùng để khỏi gửi lại cả bảng.
+    """
+    return _conditional(jsonify(data))
+
+def _conditional(response):
+    """Gắn ETag theo nội dung + Cache-Control: no-cache và trả 304 nếu khớp If-None-Match"""
+    response.set_etag(hashlib.sha1(response.get_data()).hexdigest())
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
 @api_bp.route('/api/v2/sheets/<sheet_name>', methods=['GET'])
 def get_v2_sheet_data(sheet_name):
     """
     Lấy toàn bộ dữ liệu từ một bảng tính cụ thể (Media_Calendar, Facebook_db, Youtube_db).
-    Dữ liệu trả về đã được ánh xạ qua Model tương ứng.
+    Dữ liệu trả về đã được ánh xạ qua Model tương ứng. Phản hồi có ETag theo nội dung:
+    client gửi lại If-None-Match sẽ nhận 304 (không kèm body) nếu dữ liệu chưa đổi.
+    Khi có bất kỳ tham số lọc/sắp xếp/phân trang nào, kết quả có dạng
+    {"items": [...], "total": N, "next_cursor": "..."} và mỗi item kèm "row_index".
     ---
     parameters:
       - name: sheet_name
@@ -447,13 +648,53 @@ def get_v2_sheet_data(sheet_name):
         type: string
         required: true
         description: Tên của bảng tính (ví dụ Facebook_db)
+      - name: status
+        in: query
+        type: string
+        description: Lọc theo trạng thái, nhiều giá trị phân cách bằng dấu phẩy (SUCCESS,SCHEDULED)
+      - name: platform
+        in: query
+        type: string
+        description: facebook / youtube / tiktok
+      - name: calendar_from
+        in: query
+        type: string
+        description: Thời điểm bắt đầu (YYYY-MM-DD [HH:MM] hoặc DD/MM/YYYY [HH:MM])
+      - name: calendar_to
+        in: query
+        type: string
+        description: Thời điểm kết thúc (bao gồm)
+      - name: sort
+        in: query
+        type: string
+        description: row_index hoặc bộ lọc của bảng (calendar, status), thêm '-' để giảm dần (ví dụ -calendar)
+      - name: limit
+        in: query
+        type: integer
+        description: Số hàng mỗi trang
+      - name: cursor
+        in: query
+        type: string
+        description: Giá trị next_cursor của trang trước
+      - name: stream
+        in: query
+        type: boolean
+        description: true = gửi mảng JSON theo từng đoạn (không có ETag/304, bỏ qua khi có tham số lọc)
     responses:
       200:
         description: Thành công
+      304:
+        description: Dữ liệu không đổi so với ETag client đang giữ
     """
     try:
-        data = SheetService.get_all_rows(sheet_name)
-        return jsonify(data)
+        query = {name: request.args.get(name) for name in SHEET_QUERY_PARAMS if request.args.get(name)}
+        if query:
+            return _conditional_json(SheetService.query_rows(sheet_name, **query))
+        if _wants_stream():
+            return _stream_json(iter_rows_json(SheetService.iter_views(sheet_name)))
+        # Dựng JSON thẳng từ các RowView trên dữ liệu cache, không qua list dict trung gian
+        body = rows_to_json(SheetService.get_all_views(sheet_name))
+        return _conditional(Response(body, mimetype='application/json'))
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
@@ -483,6 +724,103 @@ def append_v2_sheet_row(sheet_name):
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
+@api_bp.route('/api/v2/sheets/<sheet_name>/bulk', methods=['POST'])
+def bulk_append_v2_sheet_rows(sheet_name):
+    """
+    Thêm nhiều hàng mới trong một lần gọi Google Sheets (values.append).
+    ---
+    parameters:
+      - name: sheet_name
+        in: path
+        type: string
+        required: true
+      - name: body
+        in: body
+        required: true
+        schema:
+          properties:
+            rows:
+              type: array
+              items:
+                type: object
+              description: Danh sách dictionary dữ liệu hàng
+    responses:
+      200:
+        description: Thêm thành công, trả về row_index đã được gán cho từng hàng
+    """
+    try:
+        rows = (request.json or {}).get('rows') or []
+        if not rows:
+            return jsonify({"error": "Thiếu danh sách hàng cần thêm"}), 400
+        row_indices = SheetService.append_rows(sheet_name, rows)
+        return jsonify({"message": f"Đã thêm {len(rows)} hàng", "row_indices": row_indices})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
+@api_bp.route('/api/v2/sheets/<sheet_name>', methods=['PUT'])
+def batch_update_v2_sheet_rows(sheet_name):
+    """
+    Cập nhật nhiều hàng trong một lần gọi Google Sheets (values.batchUpdate).
+    ---
+    parameters:
+      - name: sheet_name
+        in: path
+        type: string
+        required: true
+      - name: body
+        in: body
+        required: true
+        schema:
+          properties:
+            rows:
+              type: object
+              description: "{row_index: dictionary dữ liệu hàng} (row_index bắt đầu từ 0)"
+    responses:
+      200:
+        description: Cập nhật thành công
+    """
+    try:
+        rows = (request.json or {}).get('rows') or {}
+        if not rows:
+            return jsonify({"error": "Thiếu danh sách hàng cần cập nhật"}), 400
+        SheetService.batch_update_rows(sheet_name, {int(idx): data for idx, data in rows.items()})
+        return jsonify({"message": f"Đã cập nhật {len(rows)} hàng", "updated": len(rows)})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
+@api_bp.route('/api/v2/sheets/<sheet_name>', methods=['DELETE'])
+def delete_v2_sheet_rows(sheet_name):
+    """
+    Xóa nhiều hàng trong một lần gọi Google Sheets (các hàng liền nhau được gộp thành một dải).
+    ---
+    parameters:
+      - name: sheet_name
+        in: path
+        type: string
+        required: true
+      - name: body
+        in: body
+        required: true
+        schema:
+          properties:
+            indices:
+              type: array
+              items:
+                type: integer
+              description: Danh sách row_index cần xóa (bắt đầu từ 0, tính theo dữ liệu trước khi xóa)
+    responses:
+      200:
+        description: Xóa thành công
+    """
+    try:
+        indices = (request.json or {}).get('indices') or []
+        if not indices:
+            return jsonify({"error": "Thiếu danh sách hàng cần xóa"}), 400
+        deleted = SheetService.delete_rows(sheet_name, indices)
+        return jsonify({"message": f"Đã xóa {deleted} hàng", "deleted": deleted})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
 @api_bp.route('/api/v2/sheets/<sheet_name>/<int:row_index>', methods=['PUT'])
 def update_v2_sheet_row(sheet_name, row_index):
     """
@@ -512,6 +850,49 @@ def update_v2_sheet_row(sheet_name, row_index):
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
+@api_bp.route('/api/v2/sheets/<sheet_name>/<int:row_index>', methods=['PATCH'])
+def patch_v2_sheet_row(sheet_name, row_index):
+    """
+    Cập nhật một phần hàng: chỉ các ô thay đổi được ghi, các trường khác giữ nguyên.
+    ---
+    parameters:
+      - name: sheet_name
+        in: path
+        type: string
+        required: true
+      - name: row_index
+        in: path
+        type: integer
+        required: true
+      - name: body
+        in: body
+        required: true
+        schema:
+          properties:
+            changes:
+              type: object
+              description: Các trường cần đổi (có thể lồng nhau như to_dict)
+            expected:
+              type: object
+              description: (tùy chọn) Giá trị các trường mà client đã thấy; khác trên Sheets -> 409
+    responses:
+      200:
+        description: Cập nhật thành công
+      409:
+        description: Hàng đã bị người khác thay đổi
+    """
+    try:
+        body = request.json or {}
+        changes = body.get('changes') or {}
+        if not changes:
+            return jsonify({"error": "Thiếu các trường cần cập nhật"}), 400
+        columns = SheetService.patch_row(sheet_name, row_index, changes, expected=body.get('expected'))
+        return jsonify({"message": f"Đã cập nhật {len(columns)} ô", "changed_columns": columns})
+    except RowConflictError as e:
+        return jsonify({"error": str(e), "current": e.current}), 409
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
 @api_bp.route('/api/v2/sheets/<sheet_name>/<int:row_index>', methods=['DELETE'])
 def delete_v2_sheet_row(sheet_name, row_index):
     """
@@ -535,9 +916,8 @@ def delete_v2_sheet_row(sheet_name, row_index):
         delete_drive = request.args.get('delete_drive', 'false').lower() == 'true'
         
         if delete_drive and sheet_name == "Media_Calendar":
-            rows = SheetService.get_all_rows(sheet_name)
-            if row_index < len(rows):
-                media_item = rows[row_index]
+            media_item = SheetService.get_row(sheet_name, row_index)
+            if media_item:
                 drive_id = media_item.get('id')
                 if drive_id:
                     delete_drive_file(drive_id)
@@ -548,6 +928,107 @@ def delete_v2_sheet_row(sheet_name, row_index):
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
+@api_bp.route('/api/v2/sheets/<sheet_name>/by/<field>/<path:value>', methods=['GET'])
+def get_v2_sheet_row_by_key(sheet_name, field, value):
+    """
+    Tra cứu một hàng theo khóa (ví dụ media_drive_id, fb_post_id, Youtube_Post_Id...).
+    ---
+    parameters:
+      - name: sheet_name
+        in: path
+        type: string
+        required: true
+      - name: field
+        in: path
+        type: string
+        required: true
+        description: Tên trường khóa (KEY_FIELDS của Model)
+      - name: value
+        in: path
+        type: string
+        required: true
+    responses:
+      200:
+        description: Thành công, trả về row_index hiện tại và dữ liệu hàng
+      404:
+        description: Không tìm thấy
+    """
+    try:
+        found = SheetService.get_by_key(sheet_name, field, value)
+        if not found:
+            return jsonify({"error": "Không tìm thấy hàng"}), 404
+        row_index, data = found
+        return jsonify({"row_index": row_index, "data": data})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
+@api_bp.route('/api/v2/sheets/<sheet_name>/by/<field>/<path:value>', methods=['PUT'])
+def update_v2_sheet_row_by_key(sheet_name, field, value):
+    """
+    Cập nhật một hàng xác định bằng khóa thay vì chỉ số vị trí.
+    ---
+    parameters:
+      - name: sheet_name
+        in: path
+        type: string
+        required: true
+      - name: field
+        in: path
+        type: string
+        required: true
+      - name: value
+        in: path
+        type: string
+        required: true
+      - name: body
+        in: body
+        required: true
+    responses:
+      200:
+        description: Cập nhật thành công
+      404:
+        description: Không tìm thấy
+    """
+    try:
+        row_index = SheetService.update_by_key(sheet_name, field, value, request.json)
+        if row_index is None:
+            return jsonify({"error": "Không tìm thấy hàng"}), 404
+        return jsonify({"message": "Cập nhật hàng thành công", "row_index": row_index})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
+@api_bp.route('/api/v2/sheets/<sheet_name>/by/<field>/<path:value>', methods=['DELETE'])
+def delete_v2_sheet_row_by_key(sheet_name, field, value):
+    """
+    Xóa một hàng xác định bằng khóa thay vì chỉ số vị trí.
+    ---
+    parameters:
+      - name: sheet_name
+        in: path
+        type: string
+        required: true
+      - name: field
+        in: path
+        type: string
+        required: true
+      - name: value
+        in: path
+        type: string
+        required: true
+    responses:
+      200:
+        description: Xóa thành công
+      404:
+        description: Không tìm thấy
+    """
+    try:
+        row_index = SheetService.delete_by_key(sheet_name, field, value)
+        if row_index is None:
+            return jsonify({"error": "Không tìm thấy hàng"}), 404
+        return jsonify({"message": "Xóa hàng thành công", "row_index": row_index})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 400
+
 from provider.gemini import GeminiProvider
 
 @api_bp.route('/api/v2/ai/generate', methods=['POST'])
@@ -591,52 +1072,107 @@ def post_publish():
     if not sheet_name or index is None:
         return jsonify({"error": "Thiếu thông tin bảng tính hoặc dòng"}), 400
     
-    task_id = str(uuid.uuid4())
-    tasks[task_id] = {
-        "status": "queued", 
-        "message": f"Đang chuẩn bị đăng bài (Dòng {index} - {sheet_name})..."
-    }
+    priority = data.get('priority', 'normal')
+    if priority not in PRIORITIES:
+        return jsonify({"error": f"Độ ưu tiên không hợp lệ: {priority}"}), 400
+
+    task_id = task_store.default_store().create(kind="publish", message=f"Đang chuẩn bị đăng bài (Dòng {index} - {sheet_name})...")
     
     def background_publish(tid, s_name, idx):
         try:
-            tasks[tid]["status"] = "processing"
-            tasks[tid]["message"] = "Đang tải video và xử lý..."
+            task_store.default_store().update(tid, status="processing", message="Đang tải video và xử lý...")
             
             # Gọi hàm xử lý chính (đồng bộ, mất thời gian tải)
             result = post_manager.publish_item(s_name, int(idx), tid)
             
             if result.get("success"):
-                tasks[tid]["status"] = "success"
-                tasks[tid]["message"] = "Đăng thành công!"
-                tasks[tid]["result"] = result
+                task_store.default_store().update(tid, status="success", message="Đăng thành công!", result=result)
             else:
-                tasks[tid]["status"] = "error"
-                tasks[tid]["message"] = result.get("error", "Lỗi không xác định")
+                task_store.default_store().update(tid, status="error", message=result.get("error", "Lỗi không xác định"))
         except Exception as e:
-            tasks[tid]["status"] = "error"
-            tasks[tid]["message"] = f"Lỗi hệ thống: {str(e)}"
+            task_store.default_store().update(tid, status="error", message=f"Lỗi hệ thống: {str(e)}")
 
-    # Chạy thread ngầm
-    threading.Thread(target=background_publish, args=(task_id, sheet_name, index)).start()
+    # Đưa vào hàng đợi (giới hạn số job đăng bài chạy đồng thời)
+    try:
+        position = job_queue.submit("publish", background_publish, task_id, sheet_name, index,
+                                    job_id=task_id, priority=priority)
+    except QueueFullError as e:
+        task_store.default_store().delete(task_id)
+        return _queue_full_response(e)
         
     return jsonify({
         "status": "queued", 
         "task_id": task_id, 
+        "queue_position": position,
         "message": "Yêu cầu đã được tiếp nhận và xử lý ngầm."
     })
 
 @api_bp.route('/api/v2/post/history', methods=['GET'])
 def post_history():
-    """Lấy danh sách lịch sử bài đã đăng."""
+    """
+    Lấy danh sách lịch sử bài đã đăng (?stream=true để nhận JSON theo từng đoạn).
+    Khi có from/to/status: trả {"items", "total", "partitions"} lọc theo Published_At, mới nhất trước;
+    các tab lưu trữ Published_History_YYYY_MM chỉ được đọc khi from cũ hơn mốc xoay vòng.
+    ---
+    parameters:
+      - name: from
+        in: query
+        type: string
+        description: Thời điểm bắt đầu (YYYY-MM-DD [HH:MM] hoặc DD/MM/YYYY [HH:MM])
+      - name: to
+        in: query
+        type: string
+        description: Thời điểm kết thúc (bao gồm)
+      - name: status
+        in: query
+        type: string
+        description: Lọc theo trạng thái, nhiều giá trị phân cách bằng dấu phẩy
+      - name: stream
+        in: query
+        type: boolean
+        description: true = gửi JSON theo từng đoạn (chỉ áp dụng khi không lọc)
+    responses:
+      200:
+        description: Thành công
+      400:
+        description: Ngày giờ không hợp lệ
+    """
+    if any(request.args.get(name) for name in ("from", "to", "status")):
+        try:
+            return jsonify(history_archive.query(
+                date_from=request.args.get("from"),
+                date_to=request.args.get("to"),
+                status=request.args.get("status")
+            ))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
     try:
+        if _wants_stream():
+            return _stream_json(iter_rows_json(SheetService.iter_views("Published_History")))
         data = SheetService.get_all_rows("Published_History")
         return jsonify(data)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+@api_bp.route('/api/v2/post/history/rotate', methods=['POST'])
+def post_history_rotate():
+    """
+    Chạy ngay một lượt xoay vòng lịch sử (bình thường do scheduler chạy định kỳ).
+    ---
+    responses:
+      200:
+        description: Số hàng đã chuyển sang từng tab lưu trữ
+    """
+    try:
+        return jsonify(history_archive.rotate())
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
 @api_bp.route('/api/v2/facebook/post/<int:index>', methods=['GET'])
 def facebook_post_sync(index):
     """Đồng bộ thông tin bài viết từ Facebook."""
-    res = post_manager.sync_facebook_post_info(index)
+    res = post_manager.sync_facebook_post_info(index, post_id=request.args.get('post_id'))
     if res["success"]:
         return jsonify(res)
     return jsonify(res), 400
@@ -649,7 +1185,7 @@ def facebook_post_edit(index):
     if not new_message:
         return jsonify({"success": False, "error": "Thiếu nội dung tin nhắn mới."}), 400
         
-    res = post_manager.edit_facebook_post(index, new_message)
+    res = post_manager.edit_facebook_post(index, new_message, post_id=request.args.get('post_id'))
     if res["success"]:
         return jsonify(res)
     return jsonify(res), 400
@@ -657,12 +1193,14 @@ def facebook_post_edit(index):
 @api_bp.route('/api/v2/facebook/post/<int:index>', methods=['DELETE'])
 def facebook_post_delete(index):
     """Xóa bài viết trên Facebook và trong lịch sử."""
-    res = post_manager.delete_facebook_post(index)
+    res = post_manager.delete_facebook_post(index, post_id=request.args.get('post_id'))
     if res["success"]:
         return jsonify(res)
     return jsonify(res), 400
 
 # --- UNIFIED POST MANAGEMENT API (Facebook & YouTube) ---
+# Các route theo <index> nhận thêm ?post_id= (Facebook_Post_Id/Youtube_Post_Id): hàng được tìm theo khóa,
+# vì chỉ số client giữ từ lần tải trước có thể đã dịch (hàng bị xóa, xoay vòng sang tab lưu trữ).
 
 @api_bp.route('/api/v2/post/update/<int:index>', methods=['POST'])
 def post_update(index):
@@ -678,7 +1216,8 @@ def post_update(index):
         data = request.json
         thumbnail = None
 
-    res = post_manager.update_post_content("Published_History", index, data, thumbnail_file=thumbnail)
+    res = post_manager.update_post_content("Published_History", index, data, thumbnail_file=thumbnail,
+                                          post_id=request.args.get('post_id'))
     if res["success"]:
         return jsonify(res)
     return jsonify(res), 400
@@ -686,7 +1225,7 @@ def post_update(index):
 @api_bp.route('/api/v2/post/delete/<int:index>', methods=['DELETE'])
 def post_delete_published(index):
     """Xóa bài viết đã đăng khỏi Platform và History."""
-    res = post_manager.delete_published_post("Published_History", index)
+    res = post_manager.delete_published_post("Published_History", index, post_id=request.args.get('post_id'))
     if res["success"]:
         return jsonify(res)
     return jsonify(res), 400
@@ -694,7 +1233,7 @@ def post_delete_published(index):
 @api_bp.route('/api/v2/post/sync-thumbnail/<int:index>', methods=['POST'])
 def post_sync_thumbnail(index):
     """Đồng bộ thumbnail từ Platform về Sheet."""
-    res = post_manager.sync_thumbnail("Published_History", index)
+    res = post_manager.sync_thumbnail("Published_History", index, post_id=request.args.get('post_id'))
     if res["success"]:
         return jsonify(res)
     return jsonify(res), 400
@@ -712,6 +1251,9 @@ def post_publish_now():
           properties:
             index:
               type: integer
+            post_id:
+              type: string
+              description: Facebook_Post_Id/Youtube_Post_Id của bài; có thì tìm hàng theo khóa thay vì index
     responses:
       200:
         description: Thành công
@@ -720,7 +1262,7 @@ def post_publish_now():
         data = request.json
         index = data.get('index')
         manager = PostManager()
-        res = manager.publish_now(index)
+        res = manager.publish_now(index, post_id=data.get('post_id'))
         return jsonify(res)
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
@@ -728,7 +1270,7 @@ def post_publish_now():
 @api_bp.route('/api/v2/post/details/<int:index>', methods=['GET'])
 def post_get_details(index):
     """Lấy thông tin chi tiết bài viết từ Platform."""
-    res = post_manager.get_post_details("Published_History", index)
+    res = post_manager.get_post_details("Published_History", index, post_id=request.args.get('post_id'))
     if res["success"]:
         return jsonify(res)
     return jsonify(res), 400
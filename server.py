@@ -1,13 +1,24 @@
 import os
-from flask import Flask, send_from_directory
+from flask import Flask, request, send_from_directory
 from flasgger import Swagger
 from routes import api_bp
 
 from apscheduler.schedulers.background import BackgroundScheduler
 from post_service.manager import PostManager
+from services.sheet_service import SheetService
+from services import history_archive
+from services.static_assets import StaticAssets
+from services.upload_storage import DiskUploadRequest
+from services.job_queue import job_queue
+from services import task_store
+from logic import background_upload, resume_uploads, sweep_uploads
 
 # Khởi tạo ứng dựng Flask
-app = Flask(__name__, static_url_path='', static_folder='Fontend')
+# static_folder=None: không đăng ký endpoint 'static' mặc định của Flask (cùng URL với send_static nhưng được
+# khớp trước), file tĩnh trong Fontend do send_static/StaticAssets phục vụ
+app = Flask(__name__, static_folder=None)
+# File upload (multipart) được ghi thẳng xuống uploads_temp thay vì giữ trong bộ nhớ
+app.request_class = DiskUploadRequest
 # Cấu hình Swagger để tự động tạo tài liệu API
 swagger = Swagger(app)
 
@@ -19,22 +30,54 @@ def run_schedule_check():
 
 scheduler = BackgroundScheduler()
 scheduler.add_job(func=run_schedule_check, trigger="interval", minutes=5)
+
+# --- MIRROR SQLITE (TÙY CHỌN) ---
+# Đặt SHEET_MIRROR_DB=sheet_mirror.db để đọc từ bản sao cục bộ; reconcile_mirror kéo các sửa đổi từ Sheets về
+if os.environ.get("SHEET_MIRROR_DB"):
+    SheetService.enable_mirror(os.environ["SHEET_MIRROR_DB"])
+    scheduler.add_job(func=SheetService.reconcile_mirror, trigger="interval",
+                      seconds=int(os.environ.get("SHEET_MIRROR_SYNC_INTERVAL", 60)))
+
+# --- XOAY VÒNG LỊCH SỬ ĐĂNG BÀI ---
+# Chuyển các hàng Published_History đã xong và cũ hơn HISTORY_ARCHIVE_AGE_DAYS sang tab lưu trữ theo tháng.
+# Mặc định tắt: đặt HISTORY_ROTATE_INTERVAL (giây, ví dụ 3600) để bật, sau khi đã chạy
+# "python init_sheets.py migrate-published-at" cho tab Published_History có sẵn.
+history_rotate_interval = int(os.environ.get("HISTORY_ROTATE_INTERVAL", 0))
+if history_rotate_interval > 0:
+    scheduler.add_job(func=history_archive.rotate, trigger="interval", seconds=history_rotate_interval)
+
+# --- SỔ TÁC VỤ ---
+# Tác vụ upload của tiến trình đã chết (restart/crash) được đưa lại vào hàng đợi và gửi tiếp từ offset Drive đã nhận;
+# các tác vụ dang dở còn lại được đánh dấu lỗi. Dọn tác vụ đã xong quá TASK_TTL và file upload tạm mồ côi.
+def submit_upload(task_id, form_data, files_data, priority):
+    job_queue.submit("upload", background_upload, task_id, form_data, files_data, job_id=task_id, priority=priority)
+
+resume_uploads(submit_upload)
+task_store.default_store().recover()
+sweep_uploads()
+scheduler.add_job(func=task_store.default_store().evict, trigger="interval", minutes=10)
+scheduler.add_job(func=sweep_uploads, trigger="interval", minutes=10)
+
 scheduler.start()
 
 # Đăng ký tập hợp các API từ file routes.py
 app.register_blueprint(api_bp)
 
 # --- PHỤC VỤ GIAO DIỆN NGƯỜI DÙNG (FRONTEND) ---
+# script.js/style.css: hash nội dung + cache 1 năm + bản gzip/br nén sẵn (services/static_assets.py)
+static_assets = StaticAssets(os.path.join(app.root_path, 'Fontend'))
 
 @app.route('/')
 def root():
     """Trả về trang chủ index.html từ thư mục Fontend"""
-    return send_from_directory('Fontend', 'index.html')
+    return static_assets.index_response(request)
 
 @app.route('/<path:path>')
 def send_static(path):
     """Phục vụ các file tĩnh như CSS, JS, ảnh từ thư mục Fontend"""
-    return send_from_directory('Fontend', path)
+    if path == 'index.html':
+        return static_assets.index_response(request)
+    return static_assets.asset_response(path, request) or send_from_directory('Fontend', path)
 
 if __name__ == '__main__':
     # Lấy PORT từ môi trường hoặc mặc định là 3000
@@ -7,7 +7,7 @@ import uuid
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
+from services.google_clients import get_service
 
 # --- CONSTANTS ---
 TOKENS_DIR = 'tokens'
@@ -202,7 +202,7 @@ class AccountService:
     def _fetch_user_info(creds):
         """Lấy thông tin user từ Google."""
         try:
-            service = build('oauth2', 'v2', credentials=creds)
+            service = get_service('oauth2', 'v2', creds)
             user_info = service.userinfo().get().execute()
             return {
                 "email": user_info.get("email"),
@@ -217,7 +217,7 @@ class AccountService:
     def _fetch_youtube_channels(creds):
         """Lấy danh sách kênh YouTube của user."""
         try:
-            youtube = build('youtube', 'v3', credentials=creds)
+            youtube = get_service('youtube', 'v3', creds)
             response = youtube.channels().list(
                 part='snippet,statistics',
                 mine=True
@@ -274,6 +274,9 @@ class AccountService:
                 if cid:
                     existing_map[cid] = (idx, config)
             
+            # Các cập nhật account_id được gom lại và ghi một lần (values.batchUpdate)
+            pending_updates = {}
+
             # Xử lý từng kênh
             for channel in channels:
                 channel_id = channel.get("id")
@@ -293,12 +296,7 @@ class AccountService:
                             "gmail_channel": email or existing_config.get("gmail_channel", ""),
                             "account_id": account_id
                         }
-                        try:
-                            SheetService.update_row("Youtube_Config", row_idx, updated_config)
-                            updated_count += 1
-                            print(f"[AccountService] Updated account_id for channel: {channel.get('title')}")
-                        except Exception as e:
-                            print(f"[AccountService] Error updating channel {channel.get('title')}: {e}")
+                        pending_updates[row_idx] = updated_config
                 else:
                     # Kênh mới - thêm vào Sheet
                     new_row = {
@@ -313,6 +311,14 @@ class AccountService:
                         print(f"[AccountService] Added channel to Sheet: {channel.get('title')}")
                     except Exception as e:
                         print(f"[AccountService] Error adding channel {channel.get('title')}: {e}")
+
+            if pending_updates:
+                try:
+                    SheetService.batch_update_rows("Youtube_Config", pending_updates)
+                    updated_count = len(pending_updates)
+                    print(f"[AccountService] Updated account_id for {updated_count} channels")
+                except Exception as e:
+                    print(f"[AccountService] Error updating channels: {e}")
             
             return {"success": True, "added": added_count, "updated": updated_count}
         except Exception as e:
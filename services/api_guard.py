@@ -0,0 +1,255 @@
+# FILE: services/api_guard.py
+# Giới hạn tốc độ (token bucket) và thử lại (retry) dùng chung cho mọi lời gọi Google API.
+# Được gắn vào client qua requestBuilder trong services/google_clients.get_service,
+# nên mọi .execute() của Sheets/Drive/YouTube đều đi qua đây mà không phải sửa từng chỗ gọi.
+
+import os
+import json
+import time
+import random
+import socket
+import threading
+import email.utils
+from googleapiclient.http import HttpRequest
+from googleapiclient.errors import HttpError
+
+# Số request mỗi phút cho MỘT credential (theo quota mặc định của Google, có thể đổi qua biến môi trường).
+# None = không giới hạn.
+DEFAULT_RATES = {
+    "sheets_read": 60,   # Sheets API: quota đọc và quota ghi tính riêng, mỗi loại 60 request/phút mỗi user
+    "sheets_write": 60,
+    "drive": 600,
+    "youtube": 100,
+}
+# Các API có quota đọc/ghi riêng: request được tính vào bucket "<api>_read" hoặc "<api>_write"
+SPLIT_QUOTA_APIS = {"sheets"}
+# POST chỉ đọc dữ liệu (tính vào quota đọc)
+READ_POST_METHODS = {
+    "sheets.spreadsheets.values.batchGetByDataFilter",
+    "sheets.spreadsheets.getByDataFilter",
+}
+
+MAX_RETRIES = int(os.environ.get("GOOGLE_API_MAX_RETRIES", 5))
+BACKOFF_BASE = float(os.environ.get("GOOGLE_API_BACKOFF_BASE", 1.0))  # giây
+BACKOFF_MAX = float(os.environ.get("GOOGLE_API_BACKOFF_MAX", 64.0))
+
+RETRYABLE_STATUS = {500, 502, 503, 504}
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded"}
+# Các phương thức POST ghi cùng một nội dung nên gửi lại nhiều lần vẫn an toàn.
+# Những POST khác (values.append, spreadsheets.batchUpdate xóa hàng, files.create, videos.insert...)
+# KHÔNG được gửi lại khi lỗi 5xx vì có thể đã được thực hiện một lần.
+IDEMPOTENT_POST_METHODS = {
+    "sheets.spreadsheets.values.batchUpdate",
+    "sheets.spreadsheets.values.batchClear",
+    "sheets.spreadsheets.values.batchGetByDataFilter",
+}
+
+# Có thể thay trong test để không phải chờ thật
+_sleep = time.sleep
+_clock = time.monotonic
+
+
+class TokenBucket:
+    """Token bucket an toàn đa luồng: rate_per_minute token mỗi phút, tối đa capacity token dồn lại."""
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(capacity if capacity is not None else rate_per_minute)
+        self.tokens = self.capacity
+        self.updated_at = _clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Lấy một token; nếu hết thì chờ tới khi có. Trả về số giây đã phải chờ."""
+        with self._lock:
+            now = _clock()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            # Giữ chỗ trước (token có thể âm) rồi mới ngủ ngoài khóa, các luồng sau xếp hàng phía sau
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            _sleep(wait)
+        return wait
+
+
+_buckets = {}  # (quota, credential_key) -> TokenBucket
+_buckets_lock = threading.Lock()
+_stats = {}    # api_name -> bộ đếm
+_stats_lock = threading.Lock()
+
+
+def rate_for(quota):
+    """
+    Giới hạn request/phút của một quota (tên API, hoặc "<api>_read"/"<api>_write" với SPLIT_QUOTA_APIS).
+    Biến môi trường GOOGLE_API_RATE_<QUOTA> (ví dụ GOOGLE_API_RATE_SHEETS_WRITE), nếu không có thì
+    GOOGLE_API_RATE_<API> áp cho cả đọc lẫn ghi; 0 = không giới hạn.
+    """
+    names = [quota]
+    if quota.endswith(("_read", "_write")):
+        names.append(quota.rsplit("_", 1)[0])
+    for name in names:
+        value = os.environ.get(f"GOOGLE_API_RATE_{name.upper()}")
+        if value is not None:
+            return float(value) or None
+    return DEFAULT_RATES.get(quota)
+
+
+def _bucket(quota, credential_key):
+    rate = rate_for(quota)
+    if not rate:
+        return None
+    key = (quota, credential_key)
+    with _buckets_lock:
+        bucket = _buckets.get(key)
+        if bucket is None:
+            bucket = _buckets[key] = TokenBucket(rate)
+        return bucket
+
+
+def _record(api_name, **counters):
+    with _stats_lock:
+        stats = _stats.setdefault(api_name, {
+            "calls": 0, "throttled": 0, "throttle_wait_seconds": 0.0, "retries": 0, "failures": 0
+        })
+        for name, value in counters.items():
+            stats[name] += value
+
+
+def stats():
+    """Bộ đếm theo API: số lời gọi, số lần phải chờ do limiter, tổng thời gian chờ, số lần thử lại, số lần thất bại"""
+    with _stats_lock:
+        return {api: dict(counters) for api, counters in _stats.items()}
+
+
+def reset():
+    """Xóa limiter và bộ đếm (dùng trong test)"""
+    with _buckets_lock:
+        _buckets.clear()
+    with _stats_lock:
+        _stats.clear()
+
+
+def _retry_after(error):
+    """Số giây trong header Retry-After (dạng số giây hoặc HTTP-date); None nếu không có"""
+    value = error.resp.get("retry-after") if error.resp is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_rate_limited(error):
+    """429, hoặc 403 kèm lý do rateLimitExceeded/userRateLimitExceeded (Drive/YouTube trả kiểu này)"""
+    status = error.resp.status
+    if status == 429:
+        return True
+    if status != 403:
+        return False
+    try:
+        details = json.loads(error.content.decode("utf-8")).get("error", {}).get("errors", [])
+    except (ValueError, AttributeError):
+        return False
+    return any(d.get("reason") in RATE_LIMIT_REASONS for d in details)
+
+
+def _backoff(attempt):
+    """Exponential backoff kèm full jitter: ngẫu nhiên trong [0, base * 2^attempt], tối đa BACKOFF_MAX"""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+
+def rate_limit_delay(error, attempt):
+    """
+    Số giây chờ trước lần thử lại thứ attempt nếu error là lỗi vượt quota (như execute() xử lý):
+    theo Retry-After nếu có, không thì backoff có jitter. None nếu không phải lỗi vượt quota.
+    """
+    if not _is_rate_limited(error):
+        return None
+    delay = _retry_after(error)
+    return delay if delay is not None else _backoff(attempt)
+
+
+class GuardedHttpRequest(HttpRequest):
+    """
+    HttpRequest chờ token của limiter trước mỗi lần gửi và tự thử lại khi gặp 429/5xx.
+    guard_key = (api_name, credential_key) được gán bởi request_builder.
+    """
+
+    guard_key = ("unknown", None)
+
+    def _is_idempotent(self):
+        return self.method in ("GET", "HEAD", "PUT", "PATCH") or self.methodId in IDEMPOTENT_POST_METHODS
+
+    def quota(self):
+        """Tên quota (bucket) request này bị tính vào: đọc/ghi riêng với API trong SPLIT_QUOTA_APIS"""
+        api_name = self.guard_key[0]
+        if api_name not in SPLIT_QUOTA_APIS:
+            return api_name
+        is_read = self.method in ("GET", "HEAD") or self.methodId in READ_POST_METHODS
+        return f"{api_name}_{'read' if is_read else 'write'}"
+
+    def _acquire(self):
+        """Chờ token của bucket rồi đếm một lời gọi"""
+        api_name, credential_key = self.guard_key
+        bucket = _bucket(self.quota(), credential_key)
+        if bucket is not None:
+            waited = bucket.acquire()
+            if waited:
+                _record(api_name, throttled=1, throttle_wait_seconds=waited)
+        _record(api_name, calls=1)
+
+    def record(self, **counters):
+        """Cộng bộ đếm (retries/failures...) vào thống kê của API này"""
+        _record(self.guard_key[0], **counters)
+
+    def next_chunk(self, http=None, num_retries=0):
+        """
+        Một đoạn của upload resumable: cũng chờ token và được đếm như execute().
+        Không tự thử lại ở đây vì sau lỗi phải hỏi server số byte đã nhận trước khi gửi tiếp;
+        việc đó do upload_sessions.resumable_execute lo (báo lại retries/failures qua record).
+        """
+        self._acquire()
+        return super().next_chunk(http=http, num_retries=num_retries)
+
+    def execute(self, http=None, num_retries=0):
+        api_name = self.guard_key[0]
+        attempt = 0
+        while True:
+            self._acquire()
+            try:
+                return super().execute(http=http, num_retries=num_retries)
+            except HttpError as e:
+                if _is_rate_limited(e):
+                    delay = _retry_after(e)
+                elif e.resp.status in RETRYABLE_STATUS and self._is_idempotent():
+                    delay = None
+                else:
+                    _record(api_name, failures=1)
+                    raise
+                if attempt >= MAX_RETRIES:
+                    _record(api_name, failures=1)
+                    raise
+            except (ConnectionError, socket.timeout):
+                if attempt >= MAX_RETRIES or not self._is_idempotent():
+                    _record(api_name, failures=1)
+                    raise
+                delay = None
+
+            _record(api_name, retries=1)
+            _sleep(delay if delay is not None else _backoff(attempt))
+            attempt += 1
+
+
+def request_builder(api_name, credential_key):
+    """Trả về requestBuilder cho googleapiclient.discovery.build gắn limiter của (api, credential)"""
+    def build_request(*args, **kwargs):
+        request = GuardedHttpRequest(*args, **kwargs)
+        request.guard_key = (api_name, credential_key)
+        return request
+    return build_request
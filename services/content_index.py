@@ -0,0 +1,131 @@
+# FILE: services/content_index.py
+# Chống upload trùng lên Drive theo nội dung: mỗi file upload được đánh dấu SHA-256 (tính trong lúc nhận request)
+# trong appProperties của file trên Drive và trong một bảng SQLite cục bộ. File có cùng hash đã có trên Drive
+# thì không gửi lại mà sao chép phía server (files().copy) vào thư mục mới.
+# Dùng bản sao chứ không dùng shortcut: mỗi bài có file và link riêng, xóa bài cũ (xóa file gốc) không làm hỏng
+# link của bài sau; đổi lại bản sao chiếm thêm dung lượng Drive, chỉ tiết kiệm băng thông upload.
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+from googleapiclient.errors import HttpError
+
+CONTENT_INDEX_DB = os.environ.get("CONTENT_INDEX_DB", os.path.join("uploads_temp", "content_index.db"))
+# Đặt UPLOAD_DEDUP=0 để luôn upload lại (không tra hash)
+DEDUP_ENABLED = os.environ.get("UPLOAD_DEDUP", "1") != "0"
+
+# Khóa appProperties lưu hash trên Drive (chỉ app tạo ra mới đọc/tìm được)
+HASH_PROPERTY = "sha256"
+HASH_CHUNK = 1024 * 1024
+
+
+def file_sha256(path):
+    """SHA-256 (hex) của file, đọc theo từng đoạn"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ContentIndex:
+    """
+    Bảng content_index sha256 -> file Drive (id, link, size, name) đã upload.
+    Chỉ là bộ đệm: bản ghi được kiểm tra lại trên Drive trước khi dùng, nguồn chính là appProperties.
+    """
+
+    def __init__(self, path=CONTENT_INDEX_DB):
+        self.path = path
+        self._lock = threading.RLock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS content_index ("
+                "sha256 TEXT PRIMARY KEY, file_id TEXT NOT NULL, link TEXT, size INTEGER, name TEXT, updated_at REAL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_content_file ON content_index (file_id)")
+
+    def get(self, sha256):
+        """{file_id, link, size, name} của file đã biết có hash này, hoặc None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT file_id, link, size, name FROM content_index WHERE sha256 = ?", (sha256,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def save(self, sha256, file_id, link=None, size=None, name=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO content_index (sha256, file_id, link, size, name, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (sha256, file_id, link, size, name, time.time())
+            )
+
+    def forget(self, sha256=None, file_id=None):
+        """Xóa bản ghi theo hash hoặc theo ID file Drive (file đã bị xóa)"""
+        with self._lock, self._conn:
+            if sha256 is not None:
+                self._conn.execute("DELETE FROM content_index WHERE sha256 = ?", (sha256,))
+            if file_id is not None:
+                self._conn.execute("DELETE FROM content_index WHERE file_id = ?", (file_id,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def default_index():
+    """ContentIndex dùng chung của tiến trình (mở lần đầu khi cần)"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = ContentIndex()
+        return _index
+
+
+def find_existing(drive, sha256, index=None):
+    """
+    File Drive (dict id, webViewLink, size, name) có nội dung SHA-256 này, hoặc None.
+    Tra bảng cục bộ trước (kiểm tra file còn và chưa vào thùng rác), không có thì tìm theo appProperties
+    trên Drive rồi ghi lại vào bảng.
+    """
+    index = index or default_index()
+    known = index.get(sha256)
+    if known:
+        try:
+            f = drive.files().get(fileId=known["file_id"], fields="id,webViewLink,size,name,trashed").execute()
+            if not f.get("trashed"):
+                return f
+        except HttpError as e:
+            if e.resp.status != 404:
+                raise
+        index.forget(sha256=sha256)
+
+    query = f"appProperties has {{ key='{HASH_PROPERTY}' and value='{sha256}' }} and trashed = false"
+    found = drive.files().list(q=query, spaces="drive", pageSize=1,
+                               fields="files(id,webViewLink,size,name)").execute().get("files", [])
+    if not found:
+        return None
+    f = found[0]
+    index.save(sha256, f["id"], f.get("webViewLink"), int(f.get("size") or 0), f.get("name"))
+    return f
+
+
+def copy_file(drive, source_id, name, folder_id, sha256):
+    """
+    Sao chép file source_id vào folder_id ngay trên Drive (không gửi lại nội dung), gắn lại appProperties hash.
+    Trả về dict id, webViewLink của bản sao.
+    """
+    meta = {"name": name, "parents": [folder_id], "appProperties": {HASH_PROPERTY: sha256}}
+    return drive.files().copy(fileId=source_id, body=meta, fields="id,webViewLink").execute()
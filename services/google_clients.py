@@ -0,0 +1,116 @@
+# FILE: services/google_clients.py
+# Factory dùng chung cho các Google API client (Sheets, Drive, YouTube, OAuth2)
+
+import os
+import threading
+from collections import OrderedDict
+from googleapiclient.discovery import build
+from googleapiclient.http import build_http
+from google_auth_httplib2 import AuthorizedHttp
+from services.api_guard import request_builder
+
+# Số client (api, version, credential) giữ trong cache của tiến trình; client ít dùng nhất bị bỏ trước
+CLIENT_CACHE_SIZE = int(os.environ.get("GOOGLE_CLIENT_CACHE_SIZE", 16))
+# Số kết nối rảnh giữ lại cho mỗi client (kết nối dư được đóng khi trả về)
+POOL_IDLE_CONNECTIONS = int(os.environ.get("GOOGLE_CLIENT_IDLE_CONNECTIONS", 8))
+
+_services = OrderedDict()  # (api, version, credential_key) -> client, thứ tự LRU
+_services_lock = threading.Lock()
+
+
+class _HttpPool:
+    """
+    http dùng chung cho một client giữa các thread. httplib2 không thread-safe nên mỗi request mượn
+    riêng một AuthorizedHttp rảnh (tạo mới nếu không còn) và trả lại khi xong, kết nối keep-alive
+    được thread sau dùng lại thay vì mỗi thread (mỗi request Flask) mở kết nối TLS mới.
+    """
+
+    def __init__(self, credentials, max_idle=POOL_IDLE_CONNECTIONS):
+        self.credentials = credentials
+        self.max_idle = max_idle
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        return AuthorizedHttp(self.credentials, http=build_http())
+
+    def request(self, *args, **kwargs):
+        with self._lock:
+            http = self._idle.pop() if self._idle else None
+        if http is None:
+            http = self._connect()
+        try:
+            return http.request(*args, **kwargs)
+        finally:
+            with self._lock:
+                keep = len(self._idle) < self.max_idle
+                if keep:
+                    self._idle.append(http)
+            if not keep:
+                http.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for http in idle:
+            http.close()
+
+
+def _credential_key(credentials):
+    """
+    Khóa ổn định cho một bộ credentials, None nếu không cache được.
+    get_creds() tạo object mới ở mỗi lần gọi nên không thể dùng id(); client_id + refresh_token
+    thì không đổi giữa các lần đọc token.json. Access token hết hạn sẽ được AuthorizedHttp tự refresh.
+    """
+    refresh_token = getattr(credentials, "refresh_token", None)
+    if not refresh_token:
+        return None
+    return (getattr(credentials, "client_id", None), refresh_token)
+
+
+def get_service(api_name, version, credentials):
+    """
+    Trả về client Google API đã được build sẵn cho (api, version, credential), dùng chung mọi thread.
+    Lần đầu sẽ build từ discovery document tĩnh đi kèm thư viện (không gọi mạng),
+    các lần sau dùng lại client cùng các kết nối HTTP keep-alive trong _HttpPool.
+    Credentials không có refresh_token (không có khóa ổn định) thì build mới, không cache.
+    Mọi request của client đi qua limiter + retry của services/api_guard (theo api và credential).
+    """
+    credential_key = _credential_key(credentials)
+    if credential_key is None:
+        return build(api_name, version, credentials=credentials, cache_discovery=False, static_discovery=True,
+                     requestBuilder=request_builder(api_name, credential_key))
+
+    key = (api_name, version, credential_key)
+    with _services_lock:
+        service = _services.get(key)
+        if service is not None:
+            _services.move_to_end(key)
+            return service
+
+    service = build(
+        api_name, version,
+        http=_HttpPool(credentials),
+        cache_discovery=False,
+        static_discovery=True,
+        requestBuilder=request_builder(api_name, credential_key)
+    )
+    evicted = []
+    with _services_lock:
+        # Thread khác có thể vừa build cùng khóa: dùng bản đã có để chung một pool kết nối
+        service = _services.setdefault(key, service)
+        _services.move_to_end(key)
+        while len(_services) > CLIENT_CACHE_SIZE:
+            evicted.append(_services.popitem(last=False)[1])
+    for old in evicted:
+        old._http.close()
+    return service
+
+
+def clear_services():
+    """Xóa các client đã cache (ví dụ sau khi đăng xuất/đổi token)."""
+    with _services_lock:
+        services = list(_services.values())
+        _services.clear()
+    for service in services:
+        service._http.close()
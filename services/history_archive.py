@@ -0,0 +1,206 @@
+# FILE: services/history_archive.py
+# Xoay vòng (rotation) tab Published_History: chuyển các hàng đã xong và đủ cũ sang tab lưu trữ theo tháng
+# (Published_History_2026_09) để tab "nóng" luôn nhỏ. Mọi thao tác sửa/xóa theo chỉ số và job kiểm tra
+# trạng thái 5 phút/lần vẫn chỉ đọc tab nóng; các tab lưu trữ chỉ được đọc khi truy vấn khoảng thời gian cũ.
+
+import os
+import datetime
+from models.History_db import HistoryDbModel
+from services.sheet_service import SheetService
+
+HOT_TAB = HistoryDbModel.SHEET_NAME
+
+# Hàng có trạng thái kết thúc và Published_At cũ hơn số ngày này sẽ được chuyển sang tab lưu trữ
+ARCHIVE_AGE_DAYS = float(os.environ.get("HISTORY_ARCHIVE_AGE_DAYS", 30))
+# SCHEDULED không bao giờ được chuyển: check_status_recur còn phải cập nhật các hàng này trên tab nóng
+TERMINAL_STATUSES = {"SUCCESS"}
+
+
+def _now():
+    return datetime.datetime.now()
+
+
+def _published_at(item):
+    return SheetService._parse_calendar(item.get("Published_At"))
+
+
+def _month_bounds(year, month):
+    """[đầu tháng, đầu tháng sau)"""
+    start = datetime.datetime(year, month, 1)
+    end = datetime.datetime(year + month // 12, month % 12 + 1, 1)
+    return start, end
+
+
+def archive_tabs():
+    """Các tab lưu trữ đang có, mới nhất trước: [(tên tab, (năm, tháng)), ...]"""
+    tabs = []
+    for name in SheetService.tab_ids(HistoryDbModel.SPREADSHEET_ID):
+        month = HistoryDbModel.archive_month(name)
+        if month:
+            tabs.append((name, month))
+    return sorted(tabs, key=lambda tab: tab[1], reverse=True)
+
+
+def _row_key(item):
+    """Nội dung đầy đủ của một hàng (theo thứ tự cột) dùng để nhận lại hàng sau khi chỉ số có thể đã dịch"""
+    return tuple(HistoryDbModel.from_dict(item))
+
+
+def _current_indices(entries):
+    """
+    Chỉ số HIỆN TẠI trên tab nóng của các hàng vừa được chép sang tab lưu trữ, đọc lại thẳng từ Sheets ngay
+    trước khi xóa. Khóa ghi chỉ chặn được thao tác trong tiến trình này; người sửa tay hoặc worker khác vẫn có
+    thể chèn/xóa hàng làm chỉ số dịch đi. Hàng còn nguyên ở chỗ cũ giữ chỉ số, hàng đã dịch được tìm lại
+    theo nội dung, hàng không còn khớp (đã bị sửa/xóa) thì bỏ qua -> nhiều nhất là trùng với tab lưu trữ.
+    :param entries: [(row_index lúc đọc, khóa nội dung)]
+    :return: (danh sách chỉ số cần xóa, số hàng không tìm lại được)
+    """
+    SheetService.invalidate_cache(HOT_TAB)
+    positions = {}  # khóa nội dung -> các chỉ số đang có nội dung đó
+    for index, item in enumerate(SheetService.get_all_rows(HOT_TAB)):
+        positions.setdefault(_row_key(item), []).append(index)
+
+    found, skipped = [], 0
+    for index, key in entries:
+        candidates = positions.get(key)
+        if not candidates:
+            skipped += 1
+            continue
+        pick = index if index in candidates else candidates[0]
+        candidates.remove(pick)
+        found.append(pick)
+    return found, skipped
+
+
+def _unstamped(rows):
+    """Chỉ số các hàng có dữ liệu nhưng chưa có Published_At"""
+    return [index for index, item in enumerate(rows) if not item.get("Published_At") and any(item.values())]
+
+
+def migrate_published_at(now=None):
+    """
+    Migration chạy một lần khi chuyển sang cột Published_At: thêm tiêu đề cột vào tab nóng nếu chưa có và
+    gán thời điểm hiện tại cho các hàng chưa có giá trị -> các hàng này được xoay vòng sau ARCHIVE_AGE_DAYS ngày.
+    Chạy lại không làm gì thêm.
+    :return: {"header_added": True nếu vừa ghi tiêu đề, "stamped": số hàng vừa gán Published_At}
+    """
+    now = now or _now()
+    column = HistoryDbModel.COL_PUBLISHED_AT
+    field_header = HistoryDbModel.SCHEMA.header_row()[column]
+
+    with SheetService._write_lock(HOT_TAB):
+        SheetService.invalidate_cache(HOT_TAB)
+        values = SheetService._get_values(HOT_TAB, HistoryDbModel)
+        header = values[0] if values else []
+        header_added = (header[column] if column < len(header) else "") != field_header
+        if header_added:
+            SheetService._service().spreadsheets().values().update(
+                spreadsheetId=HistoryDbModel.SPREADSHEET_ID,
+                range=f"{HOT_TAB}!{SheetService._column_letter(column + 1)}1",
+                valueInputOption='RAW',
+                body={'values': [[field_header]]}
+            ).execute()
+
+        unstamped = _unstamped([HistoryDbModel.to_dict(row) for row in values[1:]])
+        if unstamped:
+            stamp = now.strftime(HistoryDbModel.PUBLISHED_AT_FORMAT)
+            with SheetService.unit_of_work() as uow:
+                for index in unstamped:
+                    uow.update_cells(HOT_TAB, index, {column: stamp})
+        SheetService.invalidate_cache(HOT_TAB)
+
+    return {"header_added": header_added, "stamped": len(unstamped)}
+
+
+def rotate(now=None):
+    """
+    Một lượt xoay vòng: hàng có trạng thái kết thúc và cũ hơn ARCHIVE_AGE_DAYS được thêm vào tab lưu trữ
+    của tháng Published_At (tạo tab nếu chưa có), SAU ĐÓ mới bị xóa khỏi tab nóng: lỗi giữa chừng chỉ gây
+    trùng, không mất dữ liệu. Dữ liệu được đọc thẳng từ Sheets (không qua cache) và chỉ số được đối chiếu lại
+    theo nội dung ngay trước khi xóa, nên hàng bị chèn/xóa xen giữa không làm xóa nhầm hàng khác.
+    Hàng chưa có Published_At (ghi trước khi có cột này) không bị đụng tới; chạy migrate_published_at
+    (python init_sheets.py migrate-published-at) một lần để thêm cột và gán giá trị cho chúng.
+    :return: {"moved": số hàng đã chuyển, "unstamped": số hàng bỏ qua vì chưa có Published_At,
+              "partitions": {tab: số hàng}}
+    """
+    now = now or _now()
+    cutoff = now - datetime.timedelta(days=ARCHIVE_AGE_DAYS)
+
+    # Giữ khóa ghi của tab nóng để không có thao tác xóa theo chỉ số nào chen vào giữa lúc đọc và xóa
+    with SheetService._write_lock(HOT_TAB):
+        # Cache đọc có thể cũ tới CACHE_TTL giây: đọc lại thẳng từ Sheets
+        SheetService.invalidate_cache(HOT_TAB)
+        rows = SheetService.get_all_rows(HOT_TAB)
+
+        unstamped = _unstamped(rows)
+        partitions = {}  # tab lưu trữ -> [(row_index, item)]
+        for index, item in enumerate(rows):
+            published_at = _published_at(item)
+            if item.get("Status") in TERMINAL_STATUSES and published_at and published_at < cutoff:
+                tab = HistoryDbModel.archive_tab(published_at.year, published_at.month)
+                partitions.setdefault(tab, []).append((index, item))
+        archived = [(index, _row_key(item)) for entries in partitions.values() for index, item in entries]
+
+        header = HistoryDbModel.SCHEMA.header_row()
+        for tab, entries in sorted(partitions.items()):
+            SheetService.add_tab(HistoryDbModel, tab, header)
+            SheetService.append_rows(tab, [item for _, item in entries])
+        moved, skipped = _current_indices(archived) if archived else ([], 0)
+        if moved:
+            SheetService.delete_rows(HOT_TAB, moved)
+
+    if skipped:
+        print(f"[HistoryArchive] ⚠️ {skipped} hàng đã chép sang tab lưu trữ nhưng bị sửa/xóa trên tab nóng "
+              "trong lúc xoay vòng, giữ nguyên (có thể trùng với tab lưu trữ)")
+    if moved:
+        print(f"[HistoryArchive] Đã chuyển {len(moved)} hàng sang {len(partitions)} tab lưu trữ")
+    if unstamped:
+        print(f"[HistoryArchive] ⚠️ {len(unstamped)} hàng chưa có Published_At nên không được xoay vòng, "
+              "chạy 'python init_sheets.py migrate-published-at' để gán")
+    return {
+        "moved": len(moved),
+        "unstamped": len(unstamped),
+        "partitions": {tab: len(entries) for tab, entries in sorted(partitions.items())}
+    }
+
+
+def query(date_from=None, date_to=None, status=None, now=None):
+    """
+    Lịch sử đăng bài theo khoảng Published_At, mới nhất trước.
+    Tab nóng luôn được đọc; các tab lưu trữ chỉ được đọc khi date_from cũ hơn mốc xoay vòng
+    (now - ARCHIVE_AGE_DAYS), và chỉ những tháng giao với [date_from, date_to].
+    :param date_from, date_to: chuỗi ngày giờ (cùng định dạng với bộ lọc calendar của query_rows)
+    :param status: một hoặc nhiều trạng thái phân cách bằng dấu phẩy
+    :return: {"items": [... kèm "partition" và "row_index"], "total": N, "partitions": [các tab đã đọc]}
+    """
+    now = now or _now()
+    start = SheetService._parse_calendar(date_from) if date_from else None
+    end = SheetService._parse_calendar(date_to, end_of_day=True) if date_to else None
+    if (date_from and start is None) or (date_to and end is None):
+        raise ValueError("Ngày giờ không hợp lệ (dùng YYYY-MM-DD [HH:MM] hoặc DD/MM/YYYY [HH:MM])")
+    statuses = {s.strip() for s in status.split(",") if s.strip()} if status else None
+
+    tabs = [HOT_TAB]
+    if start is not None and start < now - datetime.timedelta(days=ARCHIVE_AGE_DAYS):
+        for name, (year, month) in archive_tabs():
+            month_start, month_end = _month_bounds(year, month)
+            if month_end > start and (end is None or month_start <= end):
+                tabs.append(name)
+
+    items = []
+    for tab in tabs:
+        for index, item in enumerate(SheetService.get_all_rows(tab)):
+            if statuses is not None and item.get("Status") not in statuses:
+                continue
+            published_at = _published_at(item)
+            if start is not None or end is not None:
+                if published_at is None:
+                    continue
+                if (start is not None and published_at < start) or (end is not None and published_at > end):
+                    continue
+            item["partition"] = tab
+            item["row_index"] = index
+            items.append((published_at, item))
+
+    items.sort(key=lambda entry: entry[0] or datetime.datetime.min, reverse=True)
+    return {"items": [item for _, item in items], "total": len(items), "partitions": tabs}
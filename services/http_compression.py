@@ -0,0 +1,71 @@
+# FILE: services/http_compression.py
+# Nén phản hồi HTTP (gzip, brotli nếu có cài gói brotli) theo Accept-Encoding của trình duyệt.
+# Dùng cho JSON của API (routes.api_bp.after_request) và các file tĩnh nén sẵn (services/static_assets.py).
+
+import os
+import gzip
+
+try:
+    import brotli  # Tùy chọn: pip install brotli
+except ImportError:
+    brotli = None
+
+# Chỉ nén JSON lớn hơn ngưỡng này (byte): phản hồi nhỏ nén không lợi mà còn tốn CPU
+COMPRESS_MIN_SIZE = int(os.environ.get("HTTP_COMPRESS_MIN_SIZE", 1024))
+# Mức nén cho phản hồi sinh động (mỗi request một lần) và cho file tĩnh (nén một lần khi khởi động)
+DYNAMIC_LEVELS = {"br": 5, "gzip": 6}
+STATIC_LEVELS = {"br": 11, "gzip": 9}
+
+COMPRESSIBLE_MIMETYPES = {"application/json", "text/html", "text/css", "application/javascript", "text/javascript"}
+
+
+def available_encodings():
+    """Các encoding server hỗ trợ, theo thứ tự ưu tiên"""
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate(accept_encodings, offered=None):
+    """
+    Chọn encoding tốt nhất mà client chấp nhận (q > 0) trong số offered.
+    :param accept_encodings: request.accept_encodings (werkzeug Accept)
+    :return: "br" / "gzip" hoặc None (gửi nguyên bản)
+    """
+    for encoding in offered or available_encodings():
+        if accept_encodings.quality(encoding) > 0:
+            return encoding
+    return None
+
+
+def compress(data, encoding, levels=DYNAMIC_LEVELS):
+    if encoding == "br":
+        return brotli.compress(data, quality=levels["br"])
+    if encoding == "gzip":
+        # mtime=0: cùng nội dung luôn ra cùng chuỗi byte
+        return gzip.compress(data, compresslevel=levels["gzip"], mtime=0)
+    raise ValueError(f"Encoding không hỗ trợ: {encoding}")
+
+
+def compress_response(response, request):
+    """
+    Nén một phản hồi đã dựng xong nếu: 200, JSON/văn bản, không stream, chưa nén, lớn hơn COMPRESS_MIN_SIZE
+    và client chấp nhận gzip/br. ETag mạnh được đổi thành ETag yếu (W/) vì body đã nén khác từng byte
+    với body gốc; If-None-Match vẫn so khớp (so sánh yếu) nên 304 hoạt động như cũ.
+    """
+    if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+            or "Content-Encoding" in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+        return response
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = negotiate(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    response.set_data(compress(data, encoding))
+    response.headers["Content-Encoding"] = encoding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
@@ -0,0 +1,152 @@
+# FILE: services/job_queue.py
+# Hàng đợi tác vụ nền (upload, đăng bài) với số worker cố định thay cho một thread mới mỗi request:
+# giới hạn số job chạy đồng thời theo loại, ưu tiên, và từ chối (QueueFullError -> HTTP 429) khi hàng đợi đầy.
+
+import os
+import itertools
+import threading
+
+# Tổng số thread worker xử lý job
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 4))
+# Số job tối đa đang chờ (chưa chạy); vượt quá thì submit báo QueueFullError
+JOB_QUEUE_SIZE = int(os.environ.get("JOB_QUEUE_SIZE", 50))
+# Số job chạy đồng thời tối đa cho từng loại (loại không có trong bảng chỉ bị giới hạn bởi JOB_WORKERS)
+JOB_LIMITS = {
+    "upload": int(os.environ.get("JOB_LIMIT_UPLOAD", 2)),
+    "publish": int(os.environ.get("JOB_LIMIT_PUBLISH", 2)),
+}
+
+# Retry-After (giây) gợi ý cho client khi bị từ chối vì hàng đợi đầy
+QUEUE_RETRY_AFTER = int(os.environ.get("JOB_RETRY_AFTER", 30))
+
+# Độ ưu tiên: số nhỏ chạy trước; cùng độ ưu tiên thì vào trước chạy trước
+PRIORITIES = {"high": 0, "normal": 5, "low": 9}
+
+
+class QueueFullError(Exception):
+    """Hàng đợi đã đủ JOB_QUEUE_SIZE job đang chờ"""
+
+    def __init__(self, depth, position):
+        super().__init__(f"Hàng đợi đã đầy ({depth} tác vụ đang chờ)")
+        self.depth = depth
+        self.position = position  # vị trí job sẽ nhận nếu được nhận vào hàng đợi
+
+
+class _Job:
+    __slots__ = ("job_id", "kind", "priority", "seq", "func", "args", "kwargs")
+
+    def __init__(self, job_id, kind, priority, seq, func, args, kwargs):
+        self.job_id = job_id
+        self.kind = kind
+        self.priority = priority
+        self.seq = seq
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    @property
+    def order(self):
+        return (self.priority, self.seq)
+
+
+class JobQueue:
+    """
+    Job được xếp theo (priority, thứ tự gửi). Worker rảnh lấy job đầu tiên mà loại của nó
+    chưa chạm giới hạn JOB_LIMITS, nên một loạt job upload không chặn job đăng bài phía sau.
+    Thread worker được tạo khi có job đầu tiên.
+    """
+
+    def __init__(self, workers=JOB_WORKERS, max_pending=JOB_QUEUE_SIZE, limits=None):
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.limits = dict(JOB_LIMITS if limits is None else limits)
+        self._pending = []  # luôn sắp theo _Job.order
+        self._running = {}  # job_id -> kind
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._stats = {"submitted": 0, "rejected": 0, "completed": 0, "failed": 0}
+
+    def submit(self, kind, func, *args, job_id=None, priority="normal", **kwargs):
+        """
+        Đưa func(*args, **kwargs) vào hàng đợi.
+        :param priority: "high" / "normal" / "low" hoặc số (nhỏ chạy trước)
+        :return: vị trí trong hàng đợi (1 = job tiếp theo được chạy)
+        :raises QueueFullError: khi đã có max_pending job đang chờ
+        :raises ValueError: độ ưu tiên không hợp lệ
+        """
+        rank = PRIORITIES.get(priority, priority)
+        if not isinstance(rank, int):
+            raise ValueError(f"Độ ưu tiên không hợp lệ: {priority}")
+        with self._cond:
+            job = _Job(job_id, kind, rank, next(self._counter), func, args, kwargs)
+            position = 1 + sum(1 for other in self._pending if other.order < job.order)
+            if len(self._pending) >= self.max_pending:
+                self._stats["rejected"] += 1
+                raise QueueFullError(len(self._pending), position)
+            self._pending.insert(position - 1, job)
+            self._stats["submitted"] += 1
+            self._start_workers()
+            self._cond.notify_all()
+        return position
+
+    def position(self, job_id):
+        """Vị trí hiện tại (1 = chạy tiếp theo) của job đang chờ; None nếu job đang chạy/đã xong/không có"""
+        with self._cond:
+            for index, job in enumerate(self._pending):
+                if job.job_id == job_id:
+                    return index + 1
+        return None
+
+    def stats(self):
+        """Độ sâu hàng đợi và số job đang chạy theo loại"""
+        with self._cond:
+            pending_by_kind, running_by_kind = {}, {}
+            for job in self._pending:
+                pending_by_kind[job.kind] = pending_by_kind.get(job.kind, 0) + 1
+            for kind in self._running.values():
+                running_by_kind[kind] = running_by_kind.get(kind, 0) + 1
+            return dict(self._stats, depth=len(self._pending), max_pending=self.max_pending,
+                        pending=pending_by_kind, running=running_by_kind,
+                        workers=self.workers, limits=dict(self.limits))
+
+    def _start_workers(self):
+        while len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f"job-worker-{len(self._threads)}", daemon=True)
+            self._threads.append(thread)
+            thread.start()
+
+    def _next_job(self):
+        """Job đầu tiên (theo thứ tự ưu tiên) mà loại của nó còn slot; gọi khi đang giữ _cond"""
+        running = {}
+        for kind in self._running.values():
+            running[kind] = running.get(kind, 0) + 1
+        for index, job in enumerate(self._pending):
+            limit = self.limits.get(job.kind)
+            if limit is None or running.get(job.kind, 0) < limit:
+                return self._pending.pop(index)
+        return None
+
+    def _work(self):
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None:
+                    self._cond.wait()
+                    job = self._next_job()
+                key = job.job_id if job.job_id is not None else ("job", job.seq)
+                self._running[key] = job.kind
+            try:
+                job.func(*job.args, **job.kwargs)
+                outcome = "completed"
+            except Exception as e:
+                print(f"[JobQueue] Job {job.kind} {job.job_id} lỗi: {e}")
+                outcome = "failed"
+            with self._cond:
+                del self._running[key]
+                self._stats[outcome] += 1
+                # Một slot của loại này vừa trống: job đang chờ vì giới hạn loại có thể chạy
+                self._cond.notify_all()
+
+
+job_queue = JobQueue()
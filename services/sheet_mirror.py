@@ -0,0 +1,189 @@
+# FILE: services/sheet_mirror.py
+# Bản sao cục bộ (SQLite) của các tab Google Sheets, dùng bởi SheetService khi đặt SHEET_MIRROR_DB
+
+import json
+import sqlite3
+import threading
+import time
+
+
+class SheetMirror:
+    """
+    Mỗi tab là một bảng SQLite sinh ra từ Model: cột row_index (0 = hàng dữ liệu đầu tiên,
+    không tính tiêu đề) và mỗi hằng số COL_* của Model thành một cột TEXT cùng tên viết thường
+    (COL_PAGE_ID -> page_id). Bảng _mirror_tabs lưu dòng tiêu đề, Drive version lúc đồng bộ và cờ stale.
+    Bảng có bộ cột khác với Model hiện tại (file mirror cũ) được dựng lại khi mở.
+
+    Google Sheets vẫn là nguồn dữ liệu gốc: mirror chỉ được ghi sau khi Sheets ghi thành công,
+    và bị đánh dấu stale khi có thay đổi mà mirror không biết nội dung (ghi ngoài SheetService).
+    """
+
+    def __init__(self, path, models):
+        """
+        :param path: đường dẫn file SQLite (":memory:" để thử nghiệm)
+        :param models: {sheet_name: Model}
+        """
+        self.path = path
+        self.models = dict(models)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._columns = {name: self.columns_of(model) for name, model in self.models.items()}
+        self._create_tables()
+
+    @staticmethod
+    def columns_of(model):
+        """Tên cột SQLite theo thứ tự cột trên Sheets, sinh từ các hằng số COL_* của Model"""
+        width = len(model.from_dict({}))
+        names = [f"c{i}" for i in range(width)]
+        for attr in dir(model):
+            if attr.startswith("COL_"):
+                index = getattr(model, attr)
+                if isinstance(index, int) and 0 <= index < width:
+                    names[index] = attr[4:].lower()
+        return names
+
+    @staticmethod
+    def _quote(name):
+        return '"' + name.replace('"', '""') + '"'
+
+    def _create_tables(self):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS _mirror_tabs ("
+                "name TEXT PRIMARY KEY, header TEXT, version TEXT, synced_at REAL, stale INTEGER DEFAULT 0)"
+            )
+            for name, columns in self._columns.items():
+                # File mirror tạo từ phiên bản Model cũ (ví dụ History trước khi có Published_At) giữ bảng
+                # với bộ cột cũ: CREATE TABLE IF NOT EXISTS không đổi được, INSERT sẽ lệch số cột.
+                # Bộ cột khác Model hiện tại -> xóa bảng và trạng thái đồng bộ, lần đọc sau tải lại từ Sheets.
+                existing = [row["name"] for row in self._conn.execute(f"PRAGMA table_info({self._quote(name)})")]
+                if existing and existing != ["row_index"] + columns:
+                    self._conn.execute(f"DROP TABLE {self._quote(name)}")
+                    self._conn.execute("DELETE FROM _mirror_tabs WHERE name = ?", (name,))
+                cols = ", ".join(f"{self._quote(c)} TEXT" for c in columns)
+                self._conn.execute(f"CREATE TABLE IF NOT EXISTS {self._quote(name)} (row_index INTEGER NOT NULL, {cols})")
+                self._conn.execute(
+                    f"CREATE INDEX IF NOT EXISTS {self._quote('idx_' + name + '_row')} ON {self._quote(name)} (row_index)"
+                )
+
+    # --- ĐỌC ---
+
+    def tab_state(self, name):
+        """(version, stale) của một tab đã đồng bộ; None nếu tab chưa từng được đồng bộ"""
+        with self._lock:
+            row = self._conn.execute("SELECT version, stale FROM _mirror_tabs WHERE name = ?", (name,)).fetchone()
+        return (row["version"], bool(row["stale"])) if row else None
+
+    def read_values(self, name):
+        """
+        Trả về dữ liệu thô giống values.get (dòng tiêu đề + các hàng, đã bỏ ô trống cuối hàng),
+        hoặc None nếu tab chưa đồng bộ / đang stale.
+        """
+        if name not in self._columns:
+            return None
+        with self._lock:
+            meta = self._conn.execute("SELECT header, stale FROM _mirror_tabs WHERE name = ?", (name,)).fetchone()
+            if not meta or meta["stale"]:
+                return None
+            cols = ", ".join(self._quote(c) for c in self._columns[name])
+            rows = self._conn.execute(f"SELECT row_index, {cols} FROM {self._quote(name)} ORDER BY row_index").fetchall()
+
+        values = [json.loads(meta["header"])]
+        for row in rows:
+            while len(values) - 1 < row["row_index"]:
+                values.append([])
+            cells = [row[i] or "" for i in range(1, len(row))]
+            while cells and cells[-1] == "":
+                cells.pop()
+            values.append(cells)
+        while len(values) > 1 and not values[-1]:
+            values.pop()
+        return values
+
+    def query(self, sql, params=()):
+        """Chạy một câu SQL chỉ đọc trên mirror, trả về danh sách dict"""
+        with self._lock:
+            return [dict(row) for row in self._conn.execute(sql, params).fetchall()]
+
+    # --- GHI ---
+
+    def _cells(self, name, row):
+        width = len(self._columns[name])
+        row = [("" if v is None else str(v)) for v in list(row)[:width]]
+        return row + [""] * (width - len(row))
+
+    def replace_tab(self, name, values, version=None):
+        """Thay toàn bộ nội dung một tab bằng dữ liệu vừa tải từ Sheets (values gồm cả dòng tiêu đề)"""
+        if name not in self._columns:
+            return
+        header = values[0] if values else []
+        placeholders = ", ".join("?" for _ in range(len(self._columns[name]) + 1))
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self._quote(name)}")
+            self._conn.executemany(
+                f"INSERT INTO {self._quote(name)} VALUES ({placeholders})",
+                [[index] + self._cells(name, row) for index, row in enumerate(values[1:])]
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO _mirror_tabs (name, header, version, synced_at, stale) VALUES (?, ?, ?, ?, 0)",
+                (name, json.dumps(header), version, time.time())
+            )
+
+    def write_cells(self, name, row_index, cells):
+        """Ghi một số ô {chỉ số cột: giá trị} của một hàng (tạo hàng nếu chưa có)"""
+        if name not in self._columns:
+            return
+        columns = self._columns[name]
+        with self._lock, self._conn:
+            exists = self._conn.execute(
+                f"SELECT 1 FROM {self._quote(name)} WHERE row_index = ?", (row_index,)
+            ).fetchone()
+            if not exists:
+                placeholders = ", ".join("?" for _ in range(len(columns) + 1))
+                self._conn.execute(f"INSERT INTO {self._quote(name)} VALUES ({placeholders})",
+                                   [row_index] + [""] * len(columns))
+            updates = {columns[col]: ("" if value is None else str(value))
+                       for col, value in cells.items() if 0 <= col < len(columns)}
+            if updates:
+                assignments = ", ".join(f"{self._quote(c)} = ?" for c in updates)
+                self._conn.execute(f"UPDATE {self._quote(name)} SET {assignments} WHERE row_index = ?",
+                                   list(updates.values()) + [row_index])
+
+    def write_row(self, name, row_index, row):
+        """Ghi đè toàn bộ một hàng"""
+        if name in self._columns:
+            self.write_cells(name, row_index, dict(enumerate(self._cells(name, row))))
+
+    def append_rows(self, name, rows):
+        """Thêm các hàng vào cuối bảng"""
+        if name not in self._columns:
+            return
+        with self._lock:
+            last = self._conn.execute(f"SELECT MAX(row_index) AS last FROM {self._quote(name)}").fetchone()["last"]
+            start = -1 if last is None else last
+            for offset, row in enumerate(rows, start=1):
+                self.write_row(name, start + offset, row)
+
+    def delete_row(self, name, row_index):
+        """Xóa một hàng và dồn các hàng phía sau lên (giống deleteDimension trên Sheets)"""
+        if name not in self._columns:
+            return
+        with self._lock, self._conn:
+            self._conn.execute(f"DELETE FROM {self._quote(name)} WHERE row_index = ?", (row_index,))
+            self._conn.execute(f"UPDATE {self._quote(name)} SET row_index = row_index - 1 WHERE row_index > ?",
+                               (row_index,))
+
+    def mark_stale(self, name=None):
+        """Đánh dấu tab (hoặc tất cả) cần tải lại từ Sheets ở lần đọc/đồng bộ tới"""
+        with self._lock, self._conn:
+            if name:
+                self._conn.execute("UPDATE _mirror_tabs SET stale = 1 WHERE name = ?", (name,))
+            else:
+                self._conn.execute("UPDATE _mirror_tabs SET stale = 1")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
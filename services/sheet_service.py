@@ -1,13 +1,141 @@
-from googleapiclient.discovery import build
+import os
+import time
+import datetime
+import threading
+from itertools import islice
 from models.media_calendar import MediaCalendarModel
 from models.Facebook_db import FacebookDbModel
 from models.Youtube_db import YoutubeDbModel
 from models.Facebook_Config import FacebookConfModel
 from models.Youtube_Config import YoutubeConfModel
 from models.History_db import HistoryDbModel
+from models.row_view import view_class
 from logic import get_creds
+from services.google_clients import get_service
+from services.sheet_mirror import SheetMirror
+
+
+class RowConflictError(Exception):
+    """Giá trị hiện tại của hàng trên Sheets khác với giá trị expected mà người gọi đưa vào patch_row"""
+
+    def __init__(self, message, current=None):
+        super().__init__(message)
+        self.current = current  # dict của hàng tại thời điểm kiểm tra
+
+
+class SheetUnitOfWork:
+    """
+    Gom nhiều thao tác ghi hàng lại và gửi đi trong MỘT lần gọi spreadsheets.values.batchUpdate.
+    Dùng qua context manager: dữ liệu chỉ được ghi khi khối lệnh kết thúc không có lỗi.
+
+        with SheetService.unit_of_work() as uow:
+            uow.update_row("Published_History", 3, item)
+    """
+
+    def __init__(self):
+        self._pending = {}  # spreadsheet_id -> {range A1: values} (ghi sau cùng vào cùng range sẽ thắng)
+        self._sheets = set()
+        self._mirror_ops = []  # (sheet_name, row_index, {cột: giá trị}) áp dụng vào mirror sau khi ghi thành công
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        else:
+            self.discard()
+        return False
+
+    def __len__(self):
+        return sum(len(data) for data in self._pending.values())
+
+    def update_row(self, sheet_name, row_index, data_dict):
+        """Ghi đè toàn bộ một hàng (row_index bắt đầu từ 0, không tính tiêu đề)"""
+        model = SheetService._require_model(sheet_name)
+        range_name = f"{sheet_name}!A{row_index + 2}"
+        row_array = model.from_dict(data_dict)
+        self._add(model, sheet_name, range_name, [row_array])
+        self._mirror_ops.append((sheet_name, row_index, dict(enumerate(row_array))))
+
+    def update_cells(self, sheet_name, row_index, cells):
+        """
+        Chỉ ghi một số ô của hàng, các cột khác giữ nguyên.
+        :param cells: {chỉ số cột COL_*: giá trị}
+        """
+        model = SheetService._require_model(sheet_name)
+        for col, value in cells.items():
+            range_name = f"{sheet_name}!{SheetService._column_letter(col + 1)}{row_index + 2}"
+            self._add(model, sheet_name, range_name, [[value]])
+        self._mirror_ops.append((sheet_name, row_index, dict(cells)))
+
+    def _add(self, model, sheet_name, range_name, values):
+        self._pending.setdefault(model.SPREADSHEET_ID, {})[range_name] = values
+        self._sheets.add(sheet_name)
+
+    def flush(self):
+        """Gửi toàn bộ thay đổi đang chờ; trả về số range đã ghi"""
+        written = 0
+        try:
+            for spreadsheet_id, data in self._pending.items():
+                if not data:
+                    continue
+                SheetService._service().spreadsheets().values().batchUpdate(
+                    spreadsheetId=spreadsheet_id,
+                    body={
+                        'valueInputOption': 'USER_ENTERED',
+                        'data': [{'range': rng, 'values': values} for rng, values in data.items()]
+                    }
+                ).execute()
+                written += len(data)
+        except Exception:
+            # Không biết phần nào đã được ghi -> coi như dữ liệu trên Sheets đã đổi
+            for sheet_name in self._sheets:
+                SheetService.invalidate_cache(sheet_name)
+            self.discard()
+            raise
+
+        for sheet_name in self._sheets:
+            ops = [op for op in self._mirror_ops if op[0] == sheet_name]
+            SheetService._after_write(sheet_name, lambda mirror, ops=ops: [mirror.write_cells(*op) for op in ops])
+        self.discard()
+        return written
+
+    def discard(self):
+        """Bỏ các thay đổi chưa gửi"""
+        self._pending = {}
+        self._sheets = set()
+        self._mirror_ops = []
+
 
 class SheetService:
+    # --- CACHE ĐỌC (READ-THROUGH) THEO TÊN BẢNG ---
+    # Thời gian sống của cache (giây). Đặt SHEET_CACHE_TTL=0 để tắt cache.
+    CACHE_TTL = float(os.environ.get("SHEET_CACHE_TTL", 60))
+    # Khi cache hết hạn, hỏi Drive version của spreadsheet trước; nếu chưa đổi thì dùng lại dữ liệu cũ.
+    # Đặt SHEET_VERSION_CHECK=0 để luôn tải lại toàn bộ tab.
+    VERSION_CHECK = os.environ.get("SHEET_VERSION_CHECK", "1") != "0"
+
+    _cache = {}             # sheet_name -> (thời điểm tải, mảng values thô, Drive version lúc tải)
+    _cache_generation = {}  # sheet_name (None = toàn bộ) -> số lần bị vô hiệu hóa, chống lưu dữ liệu cũ vào cache
+    _cache_lock = threading.Lock()
+    _cache_stats = {"hits": 0, "misses": 0, "revalidations": 0, "mirror_reads": 0, "invalidations": 0}
+
+    # --- MIRROR SQLITE (TÙY CHỌN) ---
+    # Bật bằng enable_mirror() (server.py đọc biến môi trường SHEET_MIRROR_DB)
+    MIRROR_TABS = ("Media_Calendar", "Facebook_db", "Youtube_db", "Facebook_Config", "Youtube_Config", "Published_History")
+    _mirror = None
+
+    # Các tab đã cảnh báo tiêu đề lệch với Model.SCHEMA (chỉ cảnh báo một lần mỗi tab)
+    _header_warned = set()
+
+    # --- KHÓA HÀNG & CHỈ MỤC PHỤ (SECONDARY INDEX) ---
+    _key_indexes = {}  # sheet_name -> (mảng values đã dùng để dựng, {field: {value: [row_index...]}})
+    _write_locks = {}  # sheet_name -> RLock, tuần tự hóa các thao tác có thể làm dịch chuyển hàng
+
+    # --- DANH SÁCH TAB ---
+    _tab_ids = {}  # spreadsheet_id -> {tên tab: sheetId}, đọc từ metadata của spreadsheet
+
     @staticmethod
     def get_model_by_name(name):
         """Trả về lớp Model tương ứng với tên bảng tính"""
@@ -19,24 +147,326 @@ class SheetService:
             "Youtube_Config": YoutubeConfModel,
             "Published_History": HistoryDbModel
         }
-        return models.get(name)
+        model = models.get(name)
+        if model is None and HistoryDbModel.archive_month(name):
+            # Tab lưu trữ theo tháng (Published_History_YYYY_MM) dùng chung cấu trúc lịch sử
+            return HistoryDbModel
+        return model
 
     @classmethod
-    def get_all_rows(cls, sheet_name):
-        """Lấy toàn bộ hàng từ một bảng tính và ánh xạ qua Model"""
+    def _require_model(cls, sheet_name):
+        """Như get_model_by_name nhưng báo lỗi nếu không có model"""
         model = cls.get_model_by_name(sheet_name)
         if not model:
             raise ValueError(f"Không tìm thấy model cho bảng tính: {sheet_name}")
+        return model
 
-        creds = get_creds()
-        service = build('sheets', 'v4', credentials=creds)
-        
-        result = service.spreadsheets().values().get(
+    @staticmethod
+    def _service():
+        """Client Sheets API dùng chung (cache theo credential và thread)"""
+        return get_service('sheets', 'v4', get_creds())
+
+    @staticmethod
+    def _drive():
+        """Client Drive API dùng chung, chỉ dùng để đọc version của spreadsheet"""
+        return get_service('drive', 'v3', get_creds())
+
+    @classmethod
+    def _spreadsheet_version(cls, model):
+        """
+        Drive version của spreadsheet (tăng sau MỖI lần sửa, kể cả sửa tay trên giao diện).
+        Chỉ lấy trường version nên rẻ hơn nhiều so với tải lại cả tab. Trả về None nếu tắt hoặc lỗi.
+        """
+        if not cls.VERSION_CHECK:
+            return None
+        try:
+            result = cls._drive().files().get(fileId=model.SPREADSHEET_ID, fields='version').execute()
+            return result.get('version')
+        except Exception as e:
+            print(f"[SheetService] Không lấy được version của spreadsheet: {e}")
+            return None
+
+    @classmethod
+    def invalidate_cache(cls, sheet_name=None, remote_changed=True):
+        """
+        Vô hiệu hóa cache của một bảng (hoặc toàn bộ nếu sheet_name=None).
+        Được gọi sau mỗi thao tác ghi để đảm bảo đọc lại thấy ngay dữ liệu vừa ghi.
+        :param remote_changed: True (mặc định) nếu dữ liệu trên Sheets đã đổi mà mirror không biết nội dung
+                               -> mirror của bảng cũng bị đánh dấu cần tải lại.
+        """
+        with cls._cache_lock:
+            cls._invalidate_locked(sheet_name)
+            if remote_changed and cls._mirror is not None:
+                cls._mirror.mark_stale(sheet_name)
+
+    @classmethod
+    def _invalidate_locked(cls, sheet_name):
+        """Phần thân của invalidate_cache; người gọi phải giữ _cache_lock"""
+        if sheet_name:
+            cls._cache.pop(sheet_name, None)
+            cls._key_indexes.pop(sheet_name, None)
+            cls._cache_generation[sheet_name] = cls._cache_generation.get(sheet_name, 0) + 1
+        else:
+            cls._cache.clear()
+            cls._key_indexes.clear()
+            cls._cache_generation[None] = cls._cache_generation.get(None, 0) + 1
+        cls._cache_stats["invalidations"] += 1
+
+    @classmethod
+    def _after_write(cls, sheet_name, apply_to_mirror):
+        """
+        Gọi sau khi Sheets đã ghi thành công: vô hiệu hóa cache và áp dụng cùng thay đổi vào mirror (nếu bật).
+        Hai việc nằm trong cùng một lần giữ khóa để reconcile_mirror không ghi đè dữ liệu cũ lên thay đổi này.
+        """
+        with cls._cache_lock:
+            cls._invalidate_locked(sheet_name)
+            mirror = cls._mirror
+            if mirror is not None:
+                try:
+                    apply_to_mirror(mirror)
+                except Exception as e:
+                    print(f"[SheetService] Lỗi ghi mirror {sheet_name}: {e}")
+                    mirror.mark_stale(sheet_name)
+
+    @classmethod
+    def cache_stats(cls):
+        """Trả về bộ đếm hit/miss của cache đọc"""
+        with cls._cache_lock:
+            stats = dict(cls._cache_stats)
+            stats["entries"] = len(cls._cache)
+        stats["ttl"] = cls.CACHE_TTL
+        stats["mirror"] = cls._mirror.path if cls._mirror is not None else None
+        return stats
+
+    @classmethod
+    def enable_mirror(cls, path):
+        """Bật mirror SQLite tại path; các tab được nạp dần ở lần đọc đầu tiên hoặc khi reconcile_mirror chạy"""
+        models = {name: cls.get_model_by_name(name) for name in cls.MIRROR_TABS}
+        mirror = SheetMirror(path, models)
+        with cls._cache_lock:
+            cls._mirror = mirror
+            cls._invalidate_locked(None)
+        return mirror
+
+    @classmethod
+    def disable_mirror(cls):
+        """Tắt mirror, quay lại đọc trực tiếp từ Sheets"""
+        with cls._cache_lock:
+            mirror, cls._mirror = cls._mirror, None
+            cls._invalidate_locked(None)
+        if mirror is not None:
+            mirror.close()
+
+    @classmethod
+    def reconcile_mirror(cls):
+        """
+        Kéo các thay đổi trên Sheets (kể cả sửa tay trên giao diện) về mirror; chạy định kỳ bởi scheduler.
+        Chỉ tải lại khi Drive version khác lúc đồng bộ hoặc tab bị stale, và mọi tab cần tải của cùng
+        một spreadsheet được lấy trong MỘT lần values.batchGet. Trả về danh sách tab đã làm mới.
+        """
+        mirror = cls._mirror
+        if mirror is None:
+            return []
+
+        by_spreadsheet = {}
+        for name, model in mirror.models.items():
+            by_spreadsheet.setdefault(model.SPREADSHEET_ID, []).append(name)
+
+        refreshed = []
+        for spreadsheet_id, names in by_spreadsheet.items():
+            version = cls._spreadsheet_version(mirror.models[names[0]])
+            pull = []
+            for name in names:
+                state = mirror.tab_state(name)
+                if version is None or state is None or state[1] or state[0] != version:
+                    pull.append(name)
+            if not pull:
+                continue
+
+            with cls._cache_lock:
+                generations = {name: cls._generation_of(name) for name in pull}
+            result = cls._service().spreadsheets().values().batchGet(
+                spreadsheetId=spreadsheet_id,
+                ranges=[f"{name}!A:Z" for name in pull]
+            ).execute()
+
+            for name, value_range in zip(pull, result.get('valueRanges', [])):
+                with cls._cache_lock:
+                    # Có thao tác ghi xen vào trong lúc tải -> để lần đồng bộ sau
+                    if cls._generation_of(name) != generations[name]:
+                        continue
+                    mirror.replace_tab(name, value_range.get('values', []), version)
+                    cls._invalidate_locked(name)
+                refreshed.append(name)
+        return refreshed
+
+    @classmethod
+    def _generation_of(cls, sheet_name):
+        """Phiên bản cache hiện tại của một bảng (gồm cả lần xóa toàn bộ cache)"""
+        return (cls._cache_generation.get(None, 0), cls._cache_generation.get(sheet_name, 0))
+
+    @classmethod
+    def _peek_cache(cls, sheet_name):
+        """Trả về values trong cache còn hạn hoặc trong mirror (không gọi Sheets API); None nếu không có"""
+        with cls._cache_lock:
+            entry = cls._cache.get(sheet_name)
+            if entry and time.monotonic() - entry[0] < cls.CACHE_TTL:
+                cls._cache_stats["hits"] += 1
+                return entry[1]
+            return cls._load_mirror_locked(sheet_name)
+
+    @classmethod
+    def _load_mirror_locked(cls, sheet_name):
+        """Đọc một tab từ mirror (nếu bật và không stale) và đưa vào cache; người gọi phải giữ _cache_lock"""
+        mirror = cls._mirror
+        values = mirror.read_values(sheet_name) if mirror is not None else None
+        if values is not None:
+            cls._cache_stats["mirror_reads"] += 1
+            if cls.CACHE_TTL > 0:
+                cls._cache[sheet_name] = (time.monotonic(), values, mirror.tab_state(sheet_name)[0])
+        return values
+
+    @staticmethod
+    def _column_letter(column_number):
+        """Đổi số thứ tự cột (bắt đầu từ 1) sang chữ cái A1: 1 -> A, 22 -> V, 27 -> AA"""
+        letters = ""
+        while column_number > 0:
+            column_number, remainder = divmod(column_number - 1, 26)
+            letters = chr(65 + remainder) + letters
+        return letters
+
+    @classmethod
+    def _last_column(cls, model):
+        """Chữ cái cột cuối cùng mà Model sử dụng (độ rộng lấy từ from_dict)"""
+        return cls._column_letter(len(model.from_dict({})))
+
+    @classmethod
+    def _read_range_values(cls, sheet_name, model, start, stop):
+        """
+        Đọc trực tiếp (bỏ qua cache) các hàng dữ liệu [start, stop) chỉ trong dải A1 cần thiết,
+        ví dụ Facebook_db!A5:V5 thay vì cả bảng A:Z.
+        """
+        first_row = start + 2
+        last_row = stop + 1
+        result = cls._service().spreadsheets().values().get(
+            spreadsheetId=model.SPREADSHEET_ID,
+            range=f"{sheet_name}!A{first_row}:{cls._last_column(model)}{last_row}"
+        ).execute()
+        return result.get('values', [])
+
+    @classmethod
+    def _get_values(cls, sheet_name, model):
+        """
+        Đọc dữ liệu thô (kể cả dòng tiêu đề) của một tab, ưu tiên lấy từ cache, sau đó tới mirror SQLite.
+        Cache hết hạn nhưng spreadsheet chưa đổi version -> gia hạn cache, không tải lại tab.
+        """
+        with cls._cache_lock:
+            entry = cls._cache.get(sheet_name)
+            if entry and time.monotonic() - entry[0] < cls.CACHE_TTL:
+                cls._cache_stats["hits"] += 1
+                return entry[1]
+            generation = cls._generation_of(sheet_name)
+            mirror = cls._mirror
+            values = cls._load_mirror_locked(sheet_name)
+            if values is not None:
+                return values
+
+        # Chỉ hỏi Drive version khi có bản cache để xác nhận lại; lần đọc đầu / cache tắt thì tải thẳng
+        # (một lần gọi API), bản cache lưu version None và lần hết hạn đầu tiên sẽ tải lại một lần.
+        # Lấy version TRƯỚC khi tải values: nếu có ai sửa trong lúc tải, version lưu kèm sẽ cũ hơn
+        # và lần kiểm tra sau chỉ tải lại thừa một lần chứ không giữ dữ liệu cũ.
+        fetched_at = time.monotonic()
+        version = cls._spreadsheet_version(model) if entry and cls.CACHE_TTL > 0 else None
+        if entry and version is not None and entry[2] == version:
+            with cls._cache_lock:
+                cls._cache_stats["revalidations"] += 1
+                if cls._generation_of(sheet_name) == generation:
+                    cls._cache[sheet_name] = (fetched_at, entry[1], version)
+            return entry[1]
+
+        with cls._cache_lock:
+            cls._cache_stats["misses"] += 1
+
+        result = cls._service().spreadsheets().values().get(
             spreadsheetId=model.SPREADSHEET_ID,
             range=f"{sheet_name}!A:Z"
         ).execute()
-        
         values = result.get('values', [])
+        cls._check_header(sheet_name, model, values)
+
+        with cls._cache_lock:
+            # Chỉ lưu nếu không có thao tác ghi nào xảy ra trong lúc đang tải
+            if cls._generation_of(sheet_name) == generation:
+                if cls.CACHE_TTL > 0:
+                    cls._cache[sheet_name] = (fetched_at, values, version)
+                if mirror is not None:
+                    mirror.replace_tab(sheet_name, values, version)
+        return values
+
+    @classmethod
+    def _check_header(cls, sheet_name, model, values):
+        """Cảnh báo (một lần) nếu dòng tiêu đề trên Sheets không khớp Model.SCHEMA, ví dụ ai đó chèn/đổi cột"""
+        schema = getattr(model, "SCHEMA", None)
+        if schema is None or not values or sheet_name in cls._header_warned:
+            return
+        problems = schema.validate_header(values[0])
+        if problems:
+            cls._header_warned.add(sheet_name)
+            print(f"[SheetService] Tiêu đề tab {sheet_name} không khớp Model: " + "; ".join(problems))
+
+    @classmethod
+    def _read_columns(cls, sheet_name, model, columns):
+        """
+        Đọc trực tiếp chỉ các cột cần thiết (chỉ số COL_* của Model) bằng một lần values.batchGet.
+        Các cột liền kề được gộp thành một dải (ví dụ E2:G). Trả về các hàng đủ độ rộng Model,
+        cột không được chọn để trống.
+        """
+        columns = sorted(set(columns))
+        runs = []  # [(cột đầu, cột cuối)] các dải cột liền nhau
+        for col in columns:
+            if runs and runs[-1][1] == col - 1:
+                runs[-1] = (runs[-1][0], col)
+            else:
+                runs.append((col, col))
+
+        result = cls._service().spreadsheets().values().batchGet(
+            spreadsheetId=model.SPREADSHEET_ID,
+            ranges=[
+                f"{sheet_name}!{cls._column_letter(first + 1)}2:{cls._column_letter(last + 1)}"
+                for first, last in runs
+            ],
+            majorDimension='COLUMNS'
+        ).execute()
+
+        width = len(model.from_dict({}))
+        rows = []
+        for (first, _), value_range in zip(runs, result.get('valueRanges', [])):
+            for offset, column_values in enumerate(value_range.get('values', [])):
+                col = first + offset
+                while len(rows) < len(column_values):
+                    rows.append([""] * width)
+                for row_index, cell in enumerate(column_values):
+                    rows[row_index][col] = cell
+        return rows
+
+    @classmethod
+    def get_all_rows(cls, sheet_name, columns=None):
+        """
+        Lấy toàn bộ hàng từ một bảng tính và ánh xạ qua Model.
+        :param columns: (tùy chọn) danh sách chỉ số cột COL_* cần đọc. Khi không có cache còn hạn,
+                        chỉ các cột này được tải; các trường khác trong dict trả về sẽ để trống.
+        """
+        model = cls.get_model_by_name(sheet_name)
+        if not model:
+            raise ValueError(f"Không tìm thấy model cho bảng tính: {sheet_name}")
+
+        if columns:
+            cached = cls._peek_cache(sheet_name)
+            if cached is None:
+                return [model.to_dict(row) for row in cls._read_columns(sheet_name, model, columns)]
+            return [model.to_dict(row) for row in cached[1:]]
+
+        values = cls._get_values(sheet_name, model)
         if not values:
             return []
 
@@ -46,6 +476,275 @@ class SheetService:
         
         return [model.to_dict(row) for row in rows]
 
+    @classmethod
+    def get_all_views(cls, sheet_name):
+        """
+        Như get_all_rows nhưng trả về các RowView (models/row_view.py) trỏ thẳng vào dữ liệu đã cache:
+        không dựng dict lồng nhau, không copy/đệm từng hàng. View chỉ đọc; gọi .to_dict() nếu cần sửa.
+        """
+        model = cls._require_model(sheet_name)
+        view = view_class(model)
+        return [view(row) for row in cls._get_values(sheet_name, model)[1:]]
+
+    @classmethod
+    def iter_views(cls, sheet_name):
+        """
+        Như get_all_views nhưng trả về iterator: dữ liệu được tải/lấy từ cache ngay khi gọi
+        (lỗi xảy ra ở đây chứ không phải giữa lúc stream), còn các RowView được tạo dần khi duyệt.
+        """
+        model = cls._require_model(sheet_name)
+        return map(view_class(model), islice(cls._get_values(sheet_name, model), 1, None))
+
+    @classmethod
+    def _write_lock(cls, sheet_name):
+        with cls._cache_lock:
+            return cls._write_locks.setdefault(sheet_name, threading.RLock())
+
+    @classmethod
+    def _key_index(cls, sheet_name, field):
+        """
+        Trả về (values, {value: [row_index...]}) cho một trường khóa.
+        Chỉ mục được dựng một lần cho mỗi bản dữ liệu trong cache và dựng lại khi cache đổi.
+        """
+        model = cls._require_model(sheet_name)
+        if field not in getattr(model, "KEY_FIELDS", ()):
+            raise ValueError(f"Trường '{field}' không phải khóa của bảng {sheet_name}")
+
+        values = cls._get_values(sheet_name, model)
+        with cls._cache_lock:
+            entry = cls._key_indexes.get(sheet_name)
+            if entry and entry[0] is values:
+                return values, entry[1][field]
+
+        indexes = {f: {} for f in model.KEY_FIELDS}
+        for row_index, row in enumerate(values[1:]):
+            data = model.to_dict(row)
+            for f, index in indexes.items():
+                key = data.get(f)
+                if key:
+                    index.setdefault(key, []).append(row_index)
+
+        with cls._cache_lock:
+            cls._key_indexes[sheet_name] = (values, indexes)
+        return values, indexes[field]
+
+    @classmethod
+    def resolve_key(cls, sheet_name, field, value):
+        """Vị trí hàng hiện tại (0-based, không tính tiêu đề) của một khóa; None nếu không có. Khóa trùng -> hàng đầu tiên"""
+        _, index = cls._key_index(sheet_name, field)
+        matches = index.get(str(value))
+        return matches[0] if matches else None
+
+    @classmethod
+    def get_by_key(cls, sheet_name, field, value):
+        """Tra cứu hàng theo khóa trong O(1). Trả về (row_index, dict) hoặc None"""
+        model = cls._require_model(sheet_name)
+        values, index = cls._key_index(sheet_name, field)
+        matches = index.get(str(value))
+        if not matches:
+            return None
+        return matches[0], model.to_dict(values[matches[0] + 1])
+
+    @classmethod
+    def _read_row_values(cls, sheet_name, model, row_index):
+        """Đọc trực tiếp một hàng từ Sheet (bỏ qua cache)"""
+        rows = cls._read_range_values(sheet_name, model, row_index, row_index + 1)
+        return rows[0] if rows else []
+
+    @classmethod
+    def _locate_for_write(cls, sheet_name, field, value):
+        """
+        Xác định hàng vật lý hiện tại của khóa trước khi ghi.
+        Kiểm tra lại hàng đó trên Sheet; nếu lệch (hàng bị chèn/xóa từ nơi khác) thì tải lại chỉ mục và thử lần nữa.
+        """
+        model = cls._require_model(sheet_name)
+        for _ in range(2):
+            row_index = cls.resolve_key(sheet_name, field, value)
+            if row_index is None:
+                return None
+            current = model.to_dict(cls._read_row_values(sheet_name, model, row_index))
+            if current.get(field) == str(value):
+                return row_index
+            cls.invalidate_cache(sheet_name)
+        return None
+
+    @classmethod
+    def locate_by_key(cls, sheet_name, field, value):
+        """
+        Như get_by_key nhưng vị trí được xác nhận lại trực tiếp trên Sheets (tải lại chỉ mục nếu hàng đã dịch),
+        dùng khi chỉ số trả về sẽ được ghi/xóa ngay sau đó. Trả về (row_index, dict) hoặc None.
+        """
+        with cls._write_lock(sheet_name):
+            row_index = cls._locate_for_write(sheet_name, field, value)
+            if row_index is None:
+                return None
+            return row_index, cls.get_row(sheet_name, row_index)
+
+    @classmethod
+    def update_by_key(cls, sheet_name, field, value, data_dict):
+        """Cập nhật hàng có khóa field=value. Trả về row_index đã ghi hoặc None nếu không tìm thấy"""
+        with cls._write_lock(sheet_name):
+            row_index = cls._locate_for_write(sheet_name, field, value)
+            if row_index is None:
+                return None
+            cls.update_row(sheet_name, row_index, data_dict)
+            return row_index
+
+    @classmethod
+    def delete_by_key(cls, sheet_name, field, value):
+        """Xóa hàng có khóa field=value. Trả về row_index đã xóa hoặc None nếu không tìm thấy"""
+        with cls._write_lock(sheet_name):
+            row_index = cls._locate_for_write(sheet_name, field, value)
+            if row_index is None:
+                return None
+            cls.delete_row(sheet_name, row_index)
+            return row_index
+
+    @classmethod
+    def get_row(cls, sheet_name, row_index):
+        """
+        Lấy một hàng (row_index bắt đầu từ 0, không tính tiêu đề) đã ánh xạ qua Model.
+        Dùng cache nếu còn hạn, nếu không chỉ tải đúng dải của hàng đó. Trả về None nếu hàng không tồn tại/trống.
+        """
+        rows = cls.get_rows(sheet_name, row_index, row_index + 1)
+        return rows[0] if rows else None
+
+    @classmethod
+    def get_rows(cls, sheet_name, start, stop):
+        """
+        Lấy các hàng trong khoảng [start, stop) (chỉ số bắt đầu từ 0, không tính tiêu đề).
+        Payload và độ trễ không phụ thuộc vào tổng số hàng của bảng.
+        """
+        model = cls._require_model(sheet_name)
+        if start < 0 or stop <= start:
+            return []
+
+        values = cls._peek_cache(sheet_name)
+        if values is not None:
+            rows = values[start + 1:stop + 1]
+        else:
+            rows = cls._read_range_values(sheet_name, model, start, stop)
+
+        # Hàng trống nằm cuối dải không được Sheets trả về; hàng trống ở giữa vẫn giữ vị trí
+        while rows and not rows[-1]:
+            rows = rows[:-1]
+        return [model.to_dict(row) for row in rows]
+
+    # Các định dạng ngày giờ đang có trong cột calendar (nhập tay trên Sheets hoặc từ form lịch đăng)
+    CALENDAR_FORMATS = ("%d/%m/%Y %H:%M", "%d/%m/%Y %H:%M:%S", "%d/%m/%Y",
+                        "%Y-%m-%d %H:%M", "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M", "%Y-%m-%d")
+
+    @classmethod
+    def _parse_calendar(cls, value, end_of_day=False):
+        """Chuỗi ngày giờ -> datetime (None nếu trống/không hợp lệ). end_of_day: ngày không có giờ tính đến 23:59:59"""
+        value = (value or "").strip()
+        for fmt in cls.CALENDAR_FORMATS:
+            try:
+                parsed = datetime.datetime.strptime(value, fmt)
+            except ValueError:
+                continue
+            if end_of_day and "%H" not in fmt:
+                parsed = parsed.replace(hour=23, minute=59, second=59)
+            return parsed
+        return None
+
+    @staticmethod
+    def _field_value(item, path):
+        """Lấy giá trị theo đường dẫn có dấu chấm, ví dụ 'facebook.calendar'"""
+        for part in path.split("."):
+            if not isinstance(item, dict):
+                return None
+            item = item.get(part)
+        return item
+
+    @classmethod
+    def query_rows(cls, sheet_name, status=None, platform=None, calendar_from=None, calendar_to=None,
+                   sort=None, limit=None, cursor=None):
+        """
+        Lọc, sắp xếp và phân trang phía server trên dữ liệu đã cache của một bảng.
+        :param status: một hoặc nhiều trạng thái, phân cách bằng dấu phẩy (không phân biệt hoa thường)
+        :param platform: facebook / youtube / tiktok (theo Model.platforms_of)
+        :param calendar_from, calendar_to: khoảng thời gian (bao gồm hai đầu) của trường calendar
+        :param sort: 'row_index' hoặc một bộ lọc trong Model.QUERY_FIELDS (ví dụ 'calendar', 'status'),
+                     thêm '-' phía trước để sắp xếp giảm dần
+        :raises ValueError: bộ lọc/trường sắp xếp bảng không hỗ trợ hoặc tham số sai định dạng
+        :param limit, cursor: kích thước trang và vị trí bắt đầu (next_cursor của trang trước)
+        :return: {"items": [...], "total": số hàng khớp bộ lọc, "next_cursor": str hoặc None}
+                 Mỗi item có thêm "row_index" để dùng với các API cập nhật/xóa theo chỉ số hàng.
+        """
+        model = cls._require_model(sheet_name)
+        query_fields = getattr(model, "QUERY_FIELDS", {})
+
+        def field_for(name):
+            if name not in query_fields:
+                raise ValueError(f"Bảng {sheet_name} không hỗ trợ lọc/sắp xếp theo '{name}'")
+            return query_fields[name]
+
+        filters = []
+        if status:
+            wanted = {s.strip().upper() for s in status.split(",") if s.strip()}
+            status_field = field_for("status")
+            filters.append(lambda item: (cls._field_value(item, status_field) or "").upper() in wanted)
+        if platform:
+            if not hasattr(model, "platforms_of"):
+                raise ValueError(f"Bảng {sheet_name} không hỗ trợ lọc theo 'platform'")
+            platform = platform.strip().lower()
+            filters.append(lambda item: platform in model.platforms_of(item))
+        if calendar_from or calendar_to:
+            calendar_field = field_for("calendar")
+            start = cls._parse_calendar(calendar_from) if calendar_from else None
+            end = cls._parse_calendar(calendar_to, end_of_day=True) if calendar_to else None
+            if (calendar_from and start is None) or (calendar_to and end is None):
+                raise ValueError("calendar_from/calendar_to không đúng định dạng ngày giờ")
+
+            def in_range(item):
+                when = cls._parse_calendar(cls._field_value(item, calendar_field))
+                return when is not None and (start is None or when >= start) and (end is None or when <= end)
+            filters.append(in_range)
+
+        # Kiểm tra trường sắp xếp trước khi đọc dữ liệu: chỉ row_index và các trường trong QUERY_FIELDS
+        # (giá trị đơn, so sánh được); trường lồng nhau/không tồn tại sẽ làm sorted() lỗi
+        key = None
+        if sort:
+            descending = sort.startswith("-")
+            sort_field = sort.lstrip("-")
+            if sort_field == "row_index":
+                key = lambda item: item["row_index"]
+            elif sort_field == "calendar":
+                calendar_field = field_for("calendar")
+                key = lambda item: cls._parse_calendar(cls._field_value(item, calendar_field))
+            else:
+                sort_path = field_for(sort_field)
+                key = lambda item: cls._field_value(item, sort_path)
+
+        items = []
+        for row_index, item in enumerate(cls.get_all_rows(sheet_name)):
+            if all(f(item) for f in filters):
+                item["row_index"] = row_index
+                items.append(item)
+
+        if key is not None:
+            # Hàng không có giá trị luôn nằm cuối, dù sắp xếp tăng hay giảm
+            present = [item for item in items if key(item) not in (None, "")]
+            missing = [item for item in items if key(item) in (None, "")]
+            items = sorted(present, key=key, reverse=descending) + missing
+
+        try:
+            offset = int(cursor) if cursor else 0
+            page_size = int(limit) if limit else None
+        except ValueError:
+            raise ValueError("limit/cursor phải là số nguyên")
+        if offset < 0 or (page_size is not None and page_size <= 0):
+            raise ValueError("limit phải lớn hơn 0 và cursor không được âm")
+
+        total = len(items)
+        end_offset = total if page_size is None else min(offset + page_size, total)
+        return {
+            "items": items[offset:end_offset],
+            "total": total,
+            "next_cursor": str(end_offset) if end_offset < total else None
+        }
+
     @classmethod
     def update_row(cls, sheet_name, row_index, data_dict):
         """Cập nhật một hàng dựa trên dữ liệu Dictionary gửi từ Frontend"""
@@ -53,8 +752,7 @@ class SheetService:
         if not model:
             raise ValueError(f"Không tìm thấy model cho bảng tính: {sheet_name}")
 
-        creds = get_creds()
-        service = build('sheets', 'v4', credentials=creds)
+        service = cls._service()
         
         # Chuyển đổi từ Dict ngược lại thành mảng Row chuẩn
         row_array = model.from_dict(data_dict)
@@ -68,60 +766,259 @@ class SheetService:
             valueInputOption='USER_ENTERED',
             body={'values': [row_array]}
         ).execute()
+        cls._after_write(sheet_name, lambda mirror: mirror.write_row(sheet_name, row_index, row_array))
         
         return True
 
+    @staticmethod
+    def _merge_changes(current, changes):
+        """Gộp dict thay đổi (có thể lồng nhau, ví dụ {"youtube": {"calendar": ...}}) vào bản sao của current"""
+        merged = dict(current)
+        for field, value in changes.items():
+            if isinstance(value, dict) and isinstance(merged.get(field), dict):
+                merged[field] = SheetService._merge_changes(merged[field], value)
+            else:
+                merged[field] = value
+        return merged
+
+    @classmethod
+    def _leaf_paths(cls, data, prefix=""):
+        """{"a": 1, "b": {"c": 2}} -> [("a", 1), ("b.c", 2)]"""
+        for field, value in data.items():
+            path = f"{prefix}{field}"
+            if isinstance(value, dict):
+                yield from cls._leaf_paths(value, path + ".")
+            else:
+                yield path, value
+
+    @classmethod
+    def patch_row(cls, sheet_name, row_index, changes, expected=None):
+        """
+        Chỉ ghi các ô thực sự thay đổi của một hàng thay vì ghi đè cả hàng như update_row.
+        Trường không có trong changes giữ nguyên giá trị trên Sheets.
+        :param changes: dict các trường cần đổi (cùng cấu trúc với to_dict, có thể chỉ một phần)
+        :param expected: (tùy chọn) dict các trường mà người gọi đã đọc được. Hàng được đọc lại trực tiếp
+                         từ Sheets và nếu một trường khác giá trị -> RowConflictError, không ghi gì.
+                         Nhờ vậy nhiều worker có thể sửa các cột khác nhau của cùng một hàng song song.
+        :return: danh sách chỉ số cột đã ghi (rỗng nếu không có gì thay đổi)
+        """
+        model = cls._require_model(sheet_name)
+        with cls._write_lock(sheet_name):
+            if expected:
+                current = cls._check_expected(sheet_name, model, row_index, expected)
+            else:
+                current = cls.get_row(sheet_name, row_index) or model.to_dict([])
+
+            old_row = model.from_dict(current)
+            new_row = model.from_dict(cls._merge_changes(current, changes))
+            changed = {col: value for col, (value, old) in enumerate(zip(new_row, old_row)) if str(value) != str(old)}
+            if changed:
+                with cls.unit_of_work() as uow:
+                    uow.update_cells(sheet_name, row_index, changed)
+        return sorted(changed)
+
+    @classmethod
+    def _check_expected(cls, sheet_name, model, row_index, expected):
+        """
+        Đọc lại hàng trực tiếp từ Sheets (không qua cache) và so với expected; lệch -> RowConflictError.
+        Người gọi phải giữ _write_lock(sheet_name). Trả về dict hiện tại của hàng.
+        """
+        current = model.to_dict(cls._read_row_values(sheet_name, model, row_index))
+        for path, value in cls._leaf_paths(expected):
+            actual = cls._field_value(current, path)
+            if str(actual if actual is not None else "") != str(value):
+                raise RowConflictError(
+                    f"Hàng {row_index} đã bị thay đổi: {path} = {actual!r}, mong đợi {value!r}",
+                    current=current
+                )
+        return current
+
+    @classmethod
+    def unit_of_work(cls):
+        """Tạo một SheetUnitOfWork để gom các thao tác ghi thành một lần gọi API"""
+        return SheetUnitOfWork()
+
+    @classmethod
+    def batch_update_rows(cls, sheet_name, updates):
+        """
+        Cập nhật nhiều hàng cùng lúc bằng một lần gọi values.batchUpdate.
+        :param updates: {row_index: data_dict} (row_index bắt đầu từ 0, không tính tiêu đề)
+        """
+        with cls.unit_of_work() as uow:
+            for row_index, data_dict in updates.items():
+                uow.update_row(sheet_name, int(row_index), data_dict)
+        return True
+
     @classmethod
     def append_row(cls, sheet_name, data_dict):
         """Thêm một hàng mới vào cuối bảng tính"""
-        model = cls.get_model_by_name(sheet_name)
-        if not model:
-            raise ValueError(f"Không tìm thấy model cho bảng tính: {sheet_name}")
+        cls.append_rows(sheet_name, [data_dict])
+        return True
 
-        creds = get_creds()
-        service = build('sheets', 'v4', credentials=creds)
-        
-        row_array = model.from_dict(data_dict)
-        
-        service.spreadsheets().values().append(
+    @staticmethod
+    def _row_indices_of(updated_range):
+        """
+        Chuyển updates.updatedRange của values.append thành các row_index (bắt đầu từ 0, không tính tiêu đề):
+        "Facebook_db!A10:V12" -> [8, 9, 10]. Trả về [] nếu không đọc được.
+        """
+        cells = (updated_range or "").rsplit("!", 1)[-1]
+        start, _, stop = cells.partition(":")
+        start_row = start.lstrip("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+        stop_row = stop.lstrip("ABCDEFGHIJKLMNOPQRSTUVWXYZ") or start_row
+        if not start_row.isdigit() or not stop_row.isdigit():
+            return []
+        return list(range(int(start_row) - 2, int(stop_row) - 1))
+
+    @classmethod
+    def append_rows(cls, sheet_name, data_dicts):
+        """
+        Thêm nhiều hàng vào cuối bảng tính trong MỘT lần gọi values.append.
+        :return: danh sách row_index (bắt đầu từ 0) mà Sheets đã gán cho các hàng mới
+        """
+        model = cls._require_model(sheet_name)
+        rows = [model.from_dict(data_dict) for data_dict in data_dicts]
+        if not rows:
+            return []
+
+        result = cls._service().spreadsheets().values().append(
             spreadsheetId=model.SPREADSHEET_ID,
             range=f"{sheet_name}!A:A",
             valueInputOption='USER_ENTERED',
-            body={'values': [row_array]}
+            body={'values': rows}
         ).execute()
-        
+        row_indices = cls._row_indices_of(result.get('updates', {}).get('updatedRange'))
+
+        def apply_to_mirror(mirror):
+            if len(row_indices) == len(rows):
+                for row_index, row in zip(row_indices, rows):
+                    mirror.write_row(sheet_name, row_index, row)
+            else:
+                mirror.append_rows(sheet_name, rows)
+
+        cls._after_write(sheet_name, apply_to_mirror)
+        return row_indices
+
+    @classmethod
+    def delete_row(cls, sheet_name, row_index, expected=None):
+        """
+        Xóa hẳn một hàng khỏi trang tính.
+        :param expected: (tùy chọn) như patch_row: hàng hiện tại trên Sheets phải mang đúng các giá trị này,
+                         nếu không -> RowConflictError và không xóa gì (chỉ số người gọi giữ đã bị dịch).
+        """
+        with cls._write_lock(sheet_name):
+            if expected:
+                cls._check_expected(sheet_name, cls._require_model(sheet_name), row_index, expected)
+            cls.delete_rows(sheet_name, [row_index])
         return True
 
+    @staticmethod
+    def _descending_runs(indices):
+        """
+        Gộp các chỉ số hàng thành các dải liền nhau, sắp xếp giảm dần: [1, 2, 3, 7, 9, 8] -> [(7, 10), (1, 4)].
+        Xóa từ dưới lên nên việc xóa một dải không làm lệch chỉ số của các dải phía trên.
+        """
+        runs = []  # [(start, stop)] với stop không bao gồm
+        for index in sorted(set(indices), reverse=True):
+            if runs and runs[-1][0] == index + 1:
+                runs[-1] = (index, runs[-1][1])
+            else:
+                runs.append((index, index + 1))
+        return runs
+
     @classmethod
-    def delete_row(cls, sheet_name, row_index):
-        """Xóa hẳn một hàng khỏi trang tính"""
-        model = cls.get_model_by_name(sheet_name)
-        if not model:
-            raise ValueError(f"Không tìm thấy model cho bảng tính: {sheet_name}")
+    def tab_ids(cls, spreadsheet_id, refresh=False):
+        """{tên tab: sheetId} của một spreadsheet (một lần spreadsheets.get chỉ lấy properties, có cache)"""
+        with cls._cache_lock:
+            tabs = cls._tab_ids.get(spreadsheet_id)
+        if tabs is None or refresh:
+            result = cls._service().spreadsheets().get(
+                spreadsheetId=spreadsheet_id,
+                fields="sheets.properties(sheetId,title)"
+            ).execute()
+            tabs = {s["properties"]["title"]: s["properties"]["sheetId"] for s in result.get("sheets", [])}
+            with cls._cache_lock:
+                cls._tab_ids[spreadsheet_id] = tabs
+        return dict(tabs)
 
-        creds = get_creds()
-        service = build('sheets', 'v4', credentials=creds)
-        
-        # Google Sheets startIndex bắt đầu từ 0. Hàng tiêu đề là 0. 
-        # Nếu người dùng muốn xóa hàng dữ liệu số 0 (index 0), thì thực tế là hàng số 1 trên Google Sheets.
-        actual_index = row_index + 1 
-        
+    @classmethod
+    def add_tab(cls, model, title, header=None):
+        """
+        Tạo tab mới trong spreadsheet của model (bỏ qua nếu đã có) và ghi dòng tiêu đề.
+        :return: sheetId của tab
+        """
+        existing = cls.tab_ids(model.SPREADSHEET_ID)
+        if title in existing:
+            return existing[title]
+        reply = cls._service().spreadsheets().batchUpdate(
+            spreadsheetId=model.SPREADSHEET_ID,
+            body={'requests': [{'addSheet': {'properties': {'title': title}}}]}
+        ).execute()
+        sheet_id = reply['replies'][0]['addSheet']['properties']['sheetId']
+        if header:
+            cls._service().spreadsheets().values().update(
+                spreadsheetId=model.SPREADSHEET_ID,
+                range=f"{title}!A1",
+                valueInputOption='RAW',
+                body={'values': [header]}
+            ).execute()
+        with cls._cache_lock:
+            cls._tab_ids.setdefault(model.SPREADSHEET_ID, {})[title] = sheet_id
+        return sheet_id
+
+    @classmethod
+    def _sheet_id(cls, sheet_name, model):
+        """sheetId của tab: TAB_ID của model, hoặc tra metadata với các tab dùng chung model (tab lưu trữ)"""
+        if sheet_name == getattr(model, "SHEET_NAME", sheet_name):
+            return model.TAB_ID
+        tabs = cls.tab_ids(model.SPREADSHEET_ID)
+        if sheet_name not in tabs:
+            tabs = cls.tab_ids(model.SPREADSHEET_ID, refresh=True)
+        if sheet_name not in tabs:
+            raise ValueError(f"Không tìm thấy tab {sheet_name} trong spreadsheet")
+        return tabs[sheet_name]
+
+    @classmethod
+    def delete_rows(cls, sheet_name, indices):
+        """
+        Xóa nhiều hàng (row_index bắt đầu từ 0, không tính tiêu đề) trong MỘT lần gọi batchUpdate.
+        Các chỉ số liền nhau được gộp thành một deleteDimension. Chỉ số đều tính theo trạng thái
+        TRƯỚC khi xóa nên người gọi không phải tự bù trừ việc hàng dịch chuyển.
+        :return: số hàng đã xóa
+        """
+        model = cls._require_model(sheet_name)
+        indices = [int(i) for i in indices]
+        if any(i < 0 for i in indices):
+            raise ValueError("row_index không được âm")
+        runs = cls._descending_runs(indices)
+        if not runs:
+            return 0
+        sheet_id = cls._sheet_id(sheet_name, model)
+
+        # Google Sheets startIndex bắt đầu từ 0 và hàng 0 là tiêu đề -> hàng dữ liệu row_index nằm ở row_index + 1
         body = {
             'requests': [{
                 'deleteDimension': {
                     'range': {
-                        'sheetId': model.TAB_ID,
+                        'sheetId': sheet_id,
                         'dimension': 'ROWS',
-                        'startIndex': actual_index,
-                        'endIndex': actual_index + 1
+                        'startIndex': start + 1,
+                        'endIndex': stop + 1
                     }
                 }
-            }]
+            } for start, stop in runs]
         }
-        
-        service.spreadsheets().batchUpdate(
-            spreadsheetId=model.SPREADSHEET_ID,
-            body=body
-        ).execute()
-        
-        return True
+
+        def apply_to_mirror(mirror):
+            for start, stop in runs:
+                for row_index in range(stop - 1, start - 1, -1):
+                    mirror.delete_row(sheet_name, row_index)
+
+        # Giữ khóa ghi để các thao tác theo khóa hàng không xen vào giữa lúc hàng đang dịch chuyển
+        with cls._write_lock(sheet_name):
+            cls._service().spreadsheets().batchUpdate(
+                spreadsheetId=model.SPREADSHEET_ID,
+                body=body
+            ).execute()
+            cls._after_write(sheet_name, apply_to_mirror)
+
+        return sum(stop - start for start, stop in runs)
@@ -0,0 +1,102 @@
+# FILE: services/static_assets.py
+# Phục vụ giao diện (Fontend/) với cache dài hạn cho script.js/style.css:
+# index.html được viết lại để trỏ tới "js/script.js?v=<hash nội dung>", file có hash đúng được gửi kèm
+# Cache-Control: immutable 1 năm; bản gzip/br được nén sẵn trong bộ nhớ khi khởi động.
+
+import os
+import re
+import hashlib
+import mimetypes
+import threading
+from flask import Response
+from services import http_compression
+
+# Các file được đánh hash và cache dài hạn (đường dẫn tương đối trong thư mục giao diện)
+HASHED_ASSETS = ("js/script.js", "css/style.css")
+INDEX_FILE = "index.html"
+LONG_CACHE = "public, max-age=31536000, immutable"
+
+
+class _Asset:
+    """Một file đã nạp vào bộ nhớ: nội dung gốc, hash, các bản nén sẵn"""
+
+    __slots__ = ("body", "digest", "stamp", "mimetype", "variants")
+
+    def __init__(self, body, stamp, mimetype):
+        self.body = body
+        self.digest = hashlib.sha256(body).hexdigest()[:12]
+        self.stamp = stamp  # mtime trên đĩa (index.html: kèm hash các file nó trỏ tới)
+        self.mimetype = mimetype
+        self.variants = {encoding: http_compression.compress(body, encoding, http_compression.STATIC_LEVELS)
+                         for encoding in http_compression.available_encodings()}
+
+
+class StaticAssets:
+    def __init__(self, root, hashed=HASHED_ASSETS, index=INDEX_FILE):
+        self.root = root
+        self.hashed = tuple(hashed)
+        self.index = index
+        self._assets = {}  # đường dẫn -> _Asset
+        self._lock = threading.Lock()
+        # 'js/script.js' hoặc 'js/script.js?v=...' trong index.html
+        self._reference = re.compile(
+            r"(?P<path>" + "|".join(re.escape(p) for p in self.hashed) + r")(?:\?v=[^\"'\s>]*)?"
+        )
+        for path in self.hashed + (self.index,):
+            self._load(path)
+
+    def _load(self, path):
+        """Nạp (hoặc nạp lại nếu file đã đổi trên đĩa) một file; None nếu không tồn tại"""
+        full_path = os.path.join(self.root, path)
+        try:
+            stamp = os.stat(full_path).st_mtime
+        except OSError:
+            return None
+        if path == self.index:
+            # index.html phải dựng lại cả khi chỉ script.js/style.css thay đổi
+            dependencies = [self._load(p) for p in self.hashed]
+            stamp = (stamp,) + tuple(d.digest if d else None for d in dependencies)
+        asset = self._assets.get(path)
+        if asset is not None and asset.stamp == stamp:
+            return asset
+        with open(full_path, "rb") as f:
+            body = f.read()
+        if path == self.index:
+            body = self._reference.sub(self._versioned, body.decode("utf-8")).encode("utf-8")
+        mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        asset = _Asset(body, stamp, mimetype)
+        with self._lock:
+            self._assets[path] = asset
+        return asset
+
+    def _versioned(self, match):
+        asset = self._load(match.group("path"))
+        return match.group("path") + (f"?v={asset.digest}" if asset else "")
+
+    def _respond(self, asset, request, cache_control):
+        encoding = http_compression.negotiate(request.accept_encodings, tuple(asset.variants))
+        response = Response(asset.variants[encoding] if encoding else asset.body, mimetype=asset.mimetype)
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept-Encoding")
+        response.headers["Cache-Control"] = cache_control
+        # ETag theo nội dung gốc: bản nén khác từng byte nên dùng ETag yếu
+        response.set_etag(asset.digest, weak=True)
+        return response.make_conditional(request)
+
+    def index_response(self, request):
+        """index.html (đã trỏ tới các file có hash); luôn hỏi lại server (no-cache) để nhận hash mới khi deploy"""
+        return self._respond(self._load(self.index), request, "no-cache")
+
+    def asset_response(self, path, request):
+        """
+        Phản hồi cho một file được quản lý; None nếu path không thuộc HASHED_ASSETS (để server.py dùng
+        send_from_directory như cũ). Chỉ đúng hash hiện tại mới được cache dài hạn.
+        """
+        if path not in self.hashed:
+            return None
+        asset = self._load(path)
+        if asset is None:
+            return None
+        version = request.args.get("v")
+        return self._respond(asset, request, LONG_CACHE if version == asset.digest else "no-cache")
@@ -0,0 +1,261 @@
+# FILE: services/task_store.py
+# Sổ tác vụ chạy ngầm (upload, đăng bài) lưu trong SQLite (WAL) thay cho dict trong bộ nhớ:
+# mọi worker gunicorn cùng đọc/ghi một file nên /api/tasks thấy tác vụ của worker khác,
+# tác vụ không mất khi restart và tác vụ đã xong quá TASK_TTL giây bị dọn tự động.
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+
+TASK_DB = os.environ.get("TASK_DB", os.path.join("uploads_temp", "tasks.db"))
+# Tác vụ đã kết thúc được giữ lại bao lâu (giây) trước khi bị xóa
+TASK_TTL = int(os.environ.get("TASK_TTL", 24 * 3600))
+# Chạy dọn dẹp tối đa một lần mỗi EVICT_INTERVAL giây (khi có tác vụ mới)
+EVICT_INTERVAL = 60
+
+QUEUED, PROCESSING, SUCCESS, ERROR = "queued", "processing", "success", "error"
+STATES = (QUEUED, PROCESSING, SUCCESS, ERROR)
+ACTIVE_STATES = (QUEUED, PROCESSING)
+FINISHED_STATES = (SUCCESS, ERROR)
+
+# Các trường có cột riêng; trường khác (files, result, ...) nằm trong cột data (JSON)
+COLUMNS = ("kind", "status", "progress", "message")
+
+
+class TaskStore:
+    """
+    Bảng tasks: id, kind (upload/publish...), status (một trong STATES), progress, message,
+    data (JSON các trường còn lại), pid và instance (định danh lần chạy, xem instance_id) của tiến trình chạy
+    tác vụ, created_at/updated_at/finished_at.
+    Một kết nối cho mỗi tiến trình (mở lại sau fork), dùng chung giữa các thread với RLock.
+    """
+
+    def __init__(self, path=TASK_DB, ttl=TASK_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.RLock()
+        self._conn = None
+        self._pid = None
+        self._last_evict = 0.0
+        self._connection()
+
+    def _connection(self):
+        if self._conn is None or self._pid != os.getpid():
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            conn.row_factory = sqlite3.Row
+            if self.path != ":memory:":
+                conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS tasks ("
+                    "id TEXT PRIMARY KEY, kind TEXT, status TEXT NOT NULL, progress TEXT, message TEXT, "
+                    "data TEXT, pid INTEGER, instance TEXT, created_at REAL, updated_at REAL, finished_at REAL)"
+                )
+                # File tasks.db tạo trước khi có cột instance
+                if "instance" not in [row["name"] for row in conn.execute("PRAGMA table_info(tasks)")]:
+                    conn.execute("ALTER TABLE tasks ADD COLUMN instance TEXT")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status, updated_at)")
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    @staticmethod
+    def _to_dict(row):
+        task = json.loads(row["data"] or "{}")
+        task.update({key: row[key] for key in COLUMNS if row[key] is not None})
+        task.update(id=row["id"], created_at=row["created_at"], updated_at=row["updated_at"])
+        if row["finished_at"] is not None:
+            task["finished_at"] = row["finished_at"]
+        return task
+
+    # --- GHI ---
+
+    def create(self, task_id=None, kind=None, status=QUEUED, **fields):
+        """Tạo tác vụ mới (mặc định ở trạng thái queued), trả về task_id"""
+        task_id = task_id or str(uuid.uuid4())
+        if status not in STATES:
+            raise ValueError(f"Trạng thái tác vụ không hợp lệ: {status}")
+        now = time.time()
+        columns = {key: fields.pop(key) for key in COLUMNS if key in fields}
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO tasks (id, kind, status, progress, message, data, pid, instance, "
+                    "created_at, updated_at, finished_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (task_id, kind, status, columns.get("progress"), columns.get("message"),
+                     json.dumps(fields, ensure_ascii=False), os.getpid(), instance_id(), now, now,
+                     now if status in FINISHED_STATES else None)
+                )
+            if now - self._last_evict > EVICT_INTERVAL:
+                self._last_evict = now
+                self.evict()
+        return task_id
+
+    def update(self, task_id, **fields):
+        """
+        Cập nhật một số trường của tác vụ; trường không có cột riêng được gộp vào data.
+        Chuyển sang success/error thì ghi finished_at. Trả về False nếu tác vụ không tồn tại.
+        """
+        status = fields.get("status")
+        if status is not None and status not in STATES:
+            raise ValueError(f"Trạng thái tác vụ không hợp lệ: {status}")
+        columns = {key: fields.pop(key) for key in COLUMNS if key in fields}
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                row = conn.execute("SELECT data FROM tasks WHERE id = ?", (task_id,)).fetchone()
+                if row is None:
+                    return False
+                assignments = [f"{key} = ?" for key in columns] + ["updated_at = ?", "pid = ?", "instance = ?"]
+                params = list(columns.values()) + [now, os.getpid(), instance_id()]
+                if fields:
+                    data = json.loads(row["data"] or "{}")
+                    data.update(fields)
+                    assignments.append("data = ?")
+                    params.append(json.dumps(data, ensure_ascii=False))
+                if status is not None:
+                    assignments.append("finished_at = ?")
+                    params.append(now if status in FINISHED_STATES else None)
+                conn.execute(f"UPDATE tasks SET {', '.join(assignments)} WHERE id = ?", params + [task_id])
+        return True
+
+    def claim(self, task_id):
+        """
+        Nhận về tiến trình hiện tại một tác vụ mà tiến trình chạy nó đã chết, để chạy lại.
+        False nếu tác vụ không tồn tại, tiến trình cũ vẫn còn sống hoặc tiến trình khác vừa nhận trước.
+        """
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                row = conn.execute("SELECT pid, instance FROM tasks WHERE id = ?", (task_id,)).fetchone()
+                if row is None or _alive(row["pid"], row["instance"]):
+                    return False
+                # Chỉ nhận nếu chưa worker nào khác đổi chủ tác vụ kể từ lúc đọc
+                return conn.execute(
+                    "UPDATE tasks SET pid = ?, instance = ?, updated_at = ? "
+                    "WHERE id = ? AND pid IS ? AND instance IS ?",
+                    (os.getpid(), instance_id(), time.time(), task_id, row["pid"], row["instance"])
+                ).rowcount == 1
+
+    def delete(self, task_id):
+        """Xóa hẳn một tác vụ (ví dụ tác vụ bị hàng đợi từ chối, chưa từng chạy)"""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+
+    def evict(self, ttl=None):
+        """Xóa các tác vụ đã kết thúc lâu hơn ttl giây, trả về số tác vụ đã xóa"""
+        cutoff = time.time() - (self.ttl if ttl is None else ttl)
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                return conn.execute(
+                    f"DELETE FROM tasks WHERE status IN ({', '.join('?' for _ in FINISHED_STATES)}) "
+                    "AND finished_at < ?", FINISHED_STATES + (cutoff,)
+                ).rowcount
+
+    def recover(self, message="Tác vụ bị gián đoạn do server khởi động lại."):
+        """
+        Đánh dấu lỗi các tác vụ đang queued/processing mà tiến trình chạy chúng đã không còn
+        (worker bị kill/restart); gọi khi server khởi động. Trả về số tác vụ đã đánh dấu.
+        So theo instance chứ không chỉ pid: trong container tiến trình mới thường nhận lại đúng pid cũ.
+        """
+        dead = [task for task in self.by_status(*ACTIVE_STATES) if not _alive(task["pid"], task["instance"])]
+        for task in dead:
+            self.update(task["id"], status=ERROR, progress="Thất bại", message=message)
+        return len(dead)
+
+    # --- ĐỌC ---
+
+    def get(self, task_id):
+        """dict của tác vụ (status, progress, message, các trường trong data, id, thời gian) hoặc None"""
+        with self._lock:
+            row = self._connection().execute("SELECT * FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def by_status(self, *statuses, kind=None):
+        """Danh sách tác vụ theo trạng thái (mới cập nhật trước), kèm pid và instance"""
+        sql = f"SELECT * FROM tasks WHERE status IN ({', '.join('?' for _ in statuses)})"
+        params = list(statuses)
+        if kind is not None:
+            sql += " AND kind = ?"
+            params.append(kind)
+        with self._lock:
+            rows = self._connection().execute(sql + " ORDER BY updated_at DESC", params).fetchall()
+        return [dict(self._to_dict(row), pid=row["pid"], instance=row["instance"]) for row in rows]
+
+    def all(self):
+        """{task_id: tác vụ} của mọi tác vụ còn lưu (định dạng /api/tasks)"""
+        with self._lock:
+            rows = self._connection().execute("SELECT * FROM tasks ORDER BY created_at").fetchall()
+        return {row["id"]: self._to_dict(row) for row in rows}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def default_store():
+    """TaskStore dùng chung của tiến trình (mở TASK_DB lần đầu khi cần, không mở lúc import)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TaskStore()
+        return _store
+
+
+_instances = {}  # pid -> instance_id của tiến trình hiện tại (tính lại sau fork)
+
+
+def _process_start(pid):
+    """Thời điểm tiến trình pid khởi động (số tick từ lúc boot, trường 22 của /proc/<pid>/stat), None nếu không đọc được"""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            stat = f.read()
+    except OSError:
+        return None
+    # Tên tiến trình (trường 2, trong ngoặc) có thể chứa khoảng trắng: đếm trường sau dấu ')' cuối cùng
+    return stat.rsplit(")", 1)[1].split()[19]
+
+
+def instance_id():
+    """
+    Định danh lần chạy của tiến trình hiện tại: "pid:thời điểm khởi động". Khác nhau giữa hai lần khởi động
+    dù pid trùng (container restart, PID 1). Không có /proc thì dùng uuid sinh khi khởi động.
+    """
+    pid = os.getpid()
+    if pid not in _instances:
+        _instances[pid] = f"{pid}:{_process_start(pid) or uuid.uuid4().hex}"
+    return _instances[pid]
+
+
+def _alive(pid, instance=None):
+    """Tiến trình pid (lần chạy instance) còn chạy trên máy này không"""
+    if not pid:
+        return False
+    if pid == os.getpid():
+        # Cùng pid: chỉ còn sống nếu cùng lần chạy, khác instance là tiến trình trước khi khởi động lại
+        return instance == instance_id()
+    start = _process_start(pid)
+    if instance and start is not None:
+        return instance == f"{pid}:{start}"
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
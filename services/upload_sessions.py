@@ -0,0 +1,226 @@
+# FILE: services/upload_sessions.py
+# Lưu phiên upload resumable (Drive/YouTube) xuống SQLite để upload lớn không phải làm lại từ byte 0
+# khi worker bị recycle/crash hoặc kết nối rớt giữa chừng: URI phiên và số byte server đã xác nhận
+# được ghi sau mỗi đoạn, lần chạy sau hỏi server trạng thái phiên ("Content-Range: bytes */size") rồi gửi tiếp.
+# Job spec của tác vụ upload (form, file tạm) cũng được lưu ở đây để chạy lại sau khi khởi động lại
+# (logic.resume_uploads).
+
+import json
+import os
+import time
+import sqlite3
+import threading
+import httplib2
+from googleapiclient.errors import HttpError
+from googleapiclient.http import _StreamSlice
+from services import api_guard
+
+# File SQLite lưu các phiên (mặc định nằm trong thư mục tạm upload, cạnh các file đang chờ upload)
+SESSION_DB = os.environ.get("UPLOAD_SESSION_DB", os.path.join("uploads_temp", "upload_sessions.db"))
+# Phiên resumable của Google hết hạn sau khoảng 1 tuần; bản ghi cũ hơn bị dọn khi mở store
+SESSION_TTL = 6 * 24 * 3600
+# Số lần thử gửi tiếp trong cùng tiến trình khi kết nối rớt / server lỗi 5xx
+RESUME_ATTEMPTS = int(os.environ.get("UPLOAD_RESUME_ATTEMPTS", 5))
+BACKOFF_MAX = 30
+
+# Mã HTTP khi hỏi trạng thái phiên cho biết phiên không còn dùng được -> bắt đầu phiên mới
+EXPIRED_STATUS = (404, 410)
+RETRYABLE_STATUS = (500, 502, 503, 504)
+
+_sleep = time.sleep  # tách ra để test không phải chờ thật
+
+
+class UploadSessionStore:
+    """
+    Bảng upload_sessions (task_key, file_key) -> URI phiên, số byte đã xác nhận, kích thước file;
+    bảng upload_jobs task_key -> job spec (JSON) của tác vụ upload chưa kết thúc.
+    Dùng chung giữa các thread (một kết nối, khóa RLock), WAL như SheetMirror.
+    """
+
+    def __init__(self, path=SESSION_DB):
+        self.path = path
+        self._lock = threading.RLock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS upload_sessions ("
+                "task_key TEXT NOT NULL, file_key TEXT NOT NULL, uri TEXT NOT NULL, "
+                "offset INTEGER NOT NULL DEFAULT 0, size INTEGER, updated_at REAL, "
+                "PRIMARY KEY (task_key, file_key))"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS upload_jobs (task_key TEXT PRIMARY KEY, spec TEXT NOT NULL, updated_at REAL)"
+            )
+        self.purge()
+
+    def get(self, task_key, file_key):
+        """{uri, offset, size, updated_at} của phiên đã lưu, hoặc None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT uri, offset, size, updated_at FROM upload_sessions WHERE task_key = ? AND file_key = ?",
+                (task_key, file_key)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def save(self, task_key, file_key, uri, offset, size):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO upload_sessions (task_key, file_key, uri, offset, size, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (task_key, file_key, uri, offset, size, time.time())
+            )
+
+    def delete(self, task_key, file_key=None):
+        """Xóa một phiên, hoặc mọi phiên của task nếu không truyền file_key"""
+        with self._lock, self._conn:
+            if file_key is None:
+                self._conn.execute("DELETE FROM upload_sessions WHERE task_key = ?", (task_key,))
+            else:
+                self._conn.execute("DELETE FROM upload_sessions WHERE task_key = ? AND file_key = ?",
+                                   (task_key, file_key))
+
+    def save_job(self, task_key, spec):
+        """Lưu job spec (dict JSON được) của một tác vụ upload"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO upload_jobs (task_key, spec, updated_at) VALUES (?, ?, ?)",
+                (task_key, json.dumps(spec, ensure_ascii=False), time.time())
+            )
+
+    def jobs(self):
+        """{task_key: job spec} của mọi tác vụ upload còn lưu (cũ trước)"""
+        with self._lock:
+            rows = self._conn.execute("SELECT task_key, spec FROM upload_jobs ORDER BY updated_at").fetchall()
+        return {row["task_key"]: json.loads(row["spec"]) for row in rows}
+
+    def delete_job(self, task_key):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM upload_jobs WHERE task_key = ?", (task_key,))
+
+    def purge(self, max_age=SESSION_TTL):
+        """Xóa các phiên quá cũ (server đã hủy phiên)"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM upload_sessions WHERE updated_at < ?", (time.time() - max_age,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def default_store():
+    """UploadSessionStore dùng chung của tiến trình (mở lần đầu khi cần)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = UploadSessionStore()
+        return _store
+
+
+class _SessionRecorder:
+    """
+    Bọc http của request: ghi URI phiên xuống store ngay khi server trả về (trước khi gửi byte đầu tiên),
+    để cả khi tiến trình chết giữa đoạn đầu tiên lần chạy sau vẫn tiếp tục được.
+    """
+
+    def __init__(self, http, request, save):
+        self._http = http
+        self._request = request
+        self._save = save
+
+    def request(self, uri, method="GET", body=None, *args, **kwargs):
+        if isinstance(body, _StreamSlice):
+            # httplib2 tự gửi lại request một lần khi kết nối rớt; body dạng stream đã bị đọc dở thì lần gửi lại
+            # thiếu byte so với Content-Length và treo. Đọc sẵn đoạn (tối đa chunksize) để gửi lại được nguyên vẹn.
+            body = body.read()
+        resp, content = self._http.request(uri, method, body, *args, **kwargs)
+        if uri == self._request.uri and resp.status == 200 and "location" in resp:
+            self._save(resp["location"], 0)
+        return resp, content
+
+    def __getattr__(self, name):
+        return getattr(self._http, name)
+
+
+def _restart(request):
+    """Bỏ phiên hiện tại của request để lần next_chunk sau tạo phiên mới từ byte 0"""
+    request.resumable_uri = None
+    request.resumable_progress = 0
+    request._in_error_state = False
+
+
+def resumable_execute(request, task_key, file_key, store=None, on_progress=None):
+    """
+    Chạy một HttpRequest có media resumable (files().create / videos().insert ...) theo từng đoạn,
+    lưu URI phiên và offset đã xác nhận sau mỗi đoạn.
+
+    Nếu store đã có phiên cho (task_key, file_key) với cùng kích thước file, request được gắn lại
+    URI đó ở trạng thái "lỗi" để googleapiclient hỏi server số byte đã nhận (PUT rỗng,
+    Content-Range: bytes */size) rồi gửi tiếp từ đó. Phiên hết hạn (404/410) thì bắt đầu lại.
+    Kết nối rớt / 5xx / vượt quota (429, chờ theo Retry-After) được thử lại tối đa RESUME_ATTEMPTS lần;
+    nếu vẫn lỗi thì phiên vẫn nằm trong store để lần chạy sau (sau khi khởi động lại) tiếp tục.
+    Với request của client từ google_clients (GuardedHttpRequest), mỗi đoạn chờ token của limiter
+    và số lần thử lại/thất bại được tính vào thống kê của api_guard.
+
+    :param on_progress: callback(số byte đã xác nhận, tổng kích thước) sau mỗi đoạn
+    :return: body phản hồi cuối cùng (như request.execute())
+    """
+    store = store or default_store()
+    size = request.resumable.size()
+    saved = store.get(task_key, file_key)
+    if saved and saved["size"] == size:
+        request.resumable_uri = saved["uri"]
+        request.resumable_progress = saved["offset"]
+        request._in_error_state = True
+    elif saved:
+        store.delete(task_key, file_key)
+
+    def save(uri, offset):
+        store.save(task_key, file_key, uri, offset, size)
+
+    def record(**counters):
+        if isinstance(request, api_guard.GuardedHttpRequest):
+            request.record(**counters)
+
+    http = _SessionRecorder(request.http, request, save)
+    attempt = 0
+    while True:
+        delay = None
+        try:
+            status, response = request.next_chunk(http=http)
+        except HttpError as e:
+            if e.resp.status in EXPIRED_STATUS and request.resumable_uri:
+                store.delete(task_key, file_key)
+                _restart(request)
+                continue
+            delay = api_guard.rate_limit_delay(e, attempt)
+            if (delay is None and e.resp.status not in RETRYABLE_STATUS) or attempt >= RESUME_ATTEMPTS:
+                record(failures=1)
+                raise
+        except (OSError, httplib2.HttpLib2Error):
+            # Kết nối rớt giữa đoạn: lần next_chunk sau hỏi server trạng thái phiên rồi gửi tiếp
+            if attempt >= RESUME_ATTEMPTS:
+                record(failures=1)
+                raise
+        else:
+            attempt = 0
+            if response is not None:
+                store.delete(task_key, file_key)
+                return response
+            save(request.resumable_uri, request.resumable_progress)
+            if on_progress:
+                on_progress(request.resumable_progress, size)
+            continue
+
+        record(retries=1)
+        request._in_error_state = True
+        _sleep(delay if delay is not None else min(BACKOFF_MAX, 2 ** attempt))
+        attempt += 1
@@ -0,0 +1,88 @@
+# FILE: services/upload_storage.py
+# Nhận file upload (multipart) thẳng xuống đĩa: werkzeug ghi từng đoạn của mỗi file vào UPLOAD_FOLDER
+# trong lúc đọc request, route chỉ "nhận" đường dẫn file đó và chuyển cho tác vụ nền.
+# Bộ nhớ cho mỗi upload chỉ cỡ một đoạn đệm, không có bản sao thứ hai trên đĩa.
+# SHA-256 của file được tính luôn trong lúc ghi (dùng để chống upload trùng, xem content_index).
+
+import os
+import hashlib
+import tempfile
+from flask import Request, request
+from logic import UPLOAD_FOLDER
+from services.content_index import HASH_CHUNK
+
+
+class _HashingFile:
+    """Bọc file tạm: cập nhật SHA-256 với mỗi đoạn werkzeug ghi vào, các thao tác khác chuyển thẳng cho file"""
+
+    def __init__(self, file):
+        self._file = file
+        self.sha256 = hashlib.sha256()
+
+    def write(self, data):
+        self.sha256.update(data)
+        return self._file.write(data)
+
+    def __iter__(self):
+        return iter(self._file)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+
+class DiskUploadRequest(Request):
+    """
+    Request có file upload được ghi vào file tạm có tên trong UPLOAD_FOLDER (thay vì SpooledTemporaryFile).
+    File nào route không claim_file() sẽ bị xóa khi request kết thúc.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._spooled_paths = set()  # file tạm đã tạo mà chưa được claim
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        stream = tempfile.NamedTemporaryFile(dir=UPLOAD_FOLDER, prefix="upload_", delete=False)
+        self._spooled_paths.add(stream.name)
+        return _HashingFile(stream)
+
+    def claim_file(self, file_storage):
+        """
+        Nhận quyền sở hữu file tạm của một FileStorage (người gọi chịu trách nhiệm xóa).
+        :return: đường dẫn file, hoặc None nếu FileStorage không do request này ghi xuống đĩa
+        """
+        path = getattr(file_storage.stream, "name", None)
+        if path not in self._spooled_paths:
+            return None
+        file_storage.stream.close()
+        self._spooled_paths.discard(path)
+        return path
+
+    def close(self):
+        super().close()
+        for path in self._spooled_paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._spooled_paths.clear()
+
+
+def claim_upload(file_storage):
+    """
+    File tạm trong UPLOAD_FOLDER chứa nội dung file upload; người gọi xóa sau khi dùng.
+    Với DiskUploadRequest file đã nằm sẵn trên đĩa nên không copy; request thường thì chép theo từng đoạn.
+    :return: {'path': đường dẫn file, 'sha256': hash nội dung (hex)}
+    """
+    stream = file_storage.stream
+    claim = getattr(request._get_current_object(), "claim_file", None)
+    path = claim(file_storage) if claim else None
+    if path is not None:
+        return {'path': path, 'sha256': stream.sha256.hexdigest()}
+
+    digest = hashlib.sha256()
+    fd, path = tempfile.mkstemp(dir=UPLOAD_FOLDER, prefix="upload_")
+    with os.fdopen(fd, "wb") as out:
+        while chunk := stream.read(HASH_CHUNK):
+            digest.update(chunk)
+            out.write(chunk)
+    return {'path': path, 'sha256': digest.hexdigest()}
@@ -0,0 +1,215 @@
+# FILE: sheet_fakes.py
+# Google Sheets / Drive API giả lập trong bộ nhớ cho test và bench (không gọi mạng).
+# Trong pytest dùng qua fixture fake_sheets (conftest.py); script bench/test chạy riêng gọi install_fake trực tiếp.
+
+from services.sheet_service import SheetService
+
+
+class FakeRequest:
+    def __init__(self, fn):
+        self.fn = fn
+
+    def execute(self):
+        return self.fn()
+
+
+def row_number_of(a1_range):
+    """'Facebook_db!A5' hoặc 'Facebook_db!A5:V5' -> 5"""
+    cell = a1_range.split("!")[1].split(":")[0]
+    return int(cell.lstrip("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+
+
+class FakeValuesApi:
+    """Giả lập spreadsheets().values() và đếm số lần gọi."""
+
+    def __init__(self, owner):
+        self.owner = owner
+
+    def get(self, spreadsheetId=None, range=None):
+        def run():
+            self.owner.calls["get"] += 1
+            return {"values": self.owner.read(range)}
+        return FakeRequest(run)
+
+    def batchGet(self, spreadsheetId=None, ranges=None, majorDimension="ROWS"):
+        def run():
+            self.owner.calls["batchGet"] += 1
+            self.owner.batch_get_ranges.append(list(ranges))
+            return {"valueRanges": [
+                {"range": r, "values": self.owner.read_columns(r) if majorDimension == "COLUMNS" else self.owner.read(r)}
+                for r in ranges
+            ]}
+        return FakeRequest(run)
+
+    def update(self, spreadsheetId=None, range=None, valueInputOption=None, body=None):
+        def run():
+            self.owner.calls["update"] += 1
+            self.owner.write(range, body["values"])
+            return {}
+        return FakeRequest(run)
+
+    def batchUpdate(self, spreadsheetId=None, body=None):
+        def run():
+            self.owner.calls["values.batchUpdate"] += 1
+            for item in body["data"]:
+                self.owner.write(item["range"], item["values"])
+            return {"totalUpdatedRows": len(body["data"])}
+        return FakeRequest(run)
+
+    def append(self, spreadsheetId=None, range=None, valueInputOption=None, body=None):
+        def run():
+            self.owner.calls["append"] += 1
+            name = range.split("!")[0]
+            first_row = len(self.owner.tabs[name]) + 1
+            self.owner.tabs[name].extend(body["values"])
+            last_row = first_row + len(body["values"]) - 1
+            return {"updates": {"updatedRange": f"{name}!A{first_row}:N{last_row}"}}
+        return FakeRequest(run)
+
+
+class FakeSheetsApi:
+    """Giả lập Google Sheets API (spreadsheets + values) và đếm số lần gọi."""
+
+    def __init__(self, tabs):
+        self.tabs = tabs  # sheet_name -> list các hàng (kể cả tiêu đề)
+        self.calls = {"get": 0, "batchGet": 0, "update": 0, "append": 0, "batchUpdate": 0, "values.batchUpdate": 0,
+                      "metadata": 0}
+        self.batch_get_ranges = []
+        self.added_ids = {}  # tab tạo bằng addSheet -> sheetId
+        self._values = FakeValuesApi(self)
+
+    def write(self, a1_range, rows):
+        name, cells = a1_range.split("!")
+        start = row_number_of(a1_range) - 1
+        start_col = ord(cells[0]) - 65
+        tab = self.tabs[name]
+        for offset, row in enumerate(rows):
+            while len(tab) <= start + offset:
+                tab.append([])
+            target = tab[start + offset]
+            while len(target) < start_col + len(row):
+                target.append("")
+            target[start_col:start_col + len(row)] = list(row)
+
+    def read(self, a1_range):
+        """Hỗ trợ 'Tab!A:Z' (cả bảng) và 'Tab!A5:5' / 'Tab!A5:V7' (một dải hàng)"""
+        name, cells = a1_range.split("!")
+        rows = [list(r) for r in self.tabs.get(name, [])]
+        start, _, end = cells.partition(":")
+        start_row = start.lstrip("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+        end_row = end.lstrip("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+        if not start_row:
+            return rows
+        return rows[int(start_row) - 1:int(end_row or start_row)]
+
+    def read_columns(self, a1_range):
+        """'Tab!E2:G' theo majorDimension=COLUMNS -> [[cột E], [cột F], [cột G]] (bỏ ô trống cuối cột)"""
+        name, cells = a1_range.split("!")
+        start, _, end = cells.partition(":")
+        first_col = ord(start[0]) - 65
+        last_col = ord(end[0]) - 65
+        first_row = int(start[1:]) - 1
+        columns = []
+        for col in range(first_col, last_col + 1):
+            column = [row[col] if col < len(row) else "" for row in self.tabs[name][first_row:]]
+            while column and column[-1] == "":
+                column.pop()
+            columns.append(column)
+        while columns and not columns[-1]:
+            columns.pop()
+        return columns
+
+    def sheet_id_of(self, name):
+        if name in self.added_ids:
+            return self.added_ids[name]
+        return SheetService.get_model_by_name(name).TAB_ID
+
+    def tab_name_by_id(self, tab_id):
+        for name, sheet_id in self.added_ids.items():
+            if sheet_id == tab_id:
+                return name
+        for name in self.tabs:
+            model = SheetService.get_model_by_name(name)
+            if model and model.TAB_ID == tab_id:
+                return name
+        raise KeyError(tab_id)
+
+    # SheetService._service().spreadsheets()
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return self._values
+
+    def get(self, spreadsheetId=None, fields=None):
+        """spreadsheets().get chỉ lấy properties của các tab"""
+        def run():
+            self.calls["metadata"] += 1
+            return {"sheets": [{"properties": {"title": name, "sheetId": self.sheet_id_of(name)}} for name in self.tabs]}
+        return FakeRequest(run)
+
+    def batchUpdate(self, spreadsheetId=None, body=None):
+        def run():
+            self.calls["batchUpdate"] += 1
+            replies = []
+            for req in body["requests"]:
+                if "addSheet" in req:
+                    title = req["addSheet"]["properties"]["title"]
+                    self.tabs[title] = []
+                    self.added_ids[title] = 900000 + len(self.added_ids)
+                    replies.append({"addSheet": {"properties": {"title": title, "sheetId": self.added_ids[title]}}})
+                    continue
+                rng = req["deleteDimension"]["range"]
+                tab = self.tabs[self.tab_name_by_id(rng["sheetId"])]
+                del tab[rng["startIndex"]:rng["endIndex"]]
+                replies.append({})
+            return {"replies": replies}
+        return FakeRequest(run)
+
+
+class FakeDriveApi:
+    """Giả lập drive.files().get(fields='version'); version tăng khi có người sửa spreadsheet."""
+
+    def __init__(self):
+        self.version = "1"
+        self.calls = 0
+
+    def files(self):
+        return self
+
+    def get(self, fileId=None, fields=None):
+        def run():
+            self.calls += 1
+            return {"version": self.version}
+        return FakeRequest(run)
+
+
+def install_fake(tabs, monkeypatch=None):
+    """
+    Cho SheetService dùng FakeSheetsApi(tabs) với cache, bảng tab id, chỉ mục khóa và thống kê trống.
+    Truyền monkeypatch (fixture fake_sheets trong conftest.py) để mọi thứ được trả lại như cũ khi test kết thúc;
+    không truyền (chạy test/bench như script) thì thay trực tiếp cho cả tiến trình.
+    """
+    fake = FakeSheetsApi(tabs)
+    fake.drive = FakeDriveApi()
+    assign = monkeypatch.setattr if monkeypatch is not None else setattr
+    assign(SheetService, "_service", staticmethod(lambda: fake))
+    assign(SheetService, "_drive", staticmethod(lambda: fake.drive))
+    assign(SheetService, "_cache", {})
+    assign(SheetService, "_cache_generation", {})
+    assign(SheetService, "_cache_stats", dict.fromkeys(SheetService._cache_stats, 0))
+    assign(SheetService, "_tab_ids", {})
+    assign(SheetService, "_key_indexes", {})
+    assign(SheetService, "_mirror", None)
+    return fake
+
+
+def history_tab():
+    header = ["Id_media_on_drive", "Name_video", "Type_conten", "Page name", "Page Id", "Access Token",
+              "Facebook_Post_Id", "Channel_name", "Channel Id", "Gmail_channel", "Youtube_Post_Id",
+              "Thumbnail", "Link_On_Platfrom", "Status", "Published_At"]
+    rows = [
+        ["DRIVE_1", "Video 1", "Video", "Page", "P1", "T", "FB_1", "", "", "", "", "", "", "SCHEDULED"],
+        ["DRIVE_2", "Video 2", "Video", "", "", "", "", "Kênh", "C1", "g@x", "YT_2", "", "", "SUCCESS"],
+    ]
+    return [header] + rows
@@ -0,0 +1,228 @@
+import sys
+import os
+import json
+import time
+import threading
+
+# Thêm đường dẫn để có thể import từ thư mục hiện tại
+sys.path.append(os.getcwd())
+
+from googleapiclient.http import HttpMockSequence
+from googleapiclient.errors import HttpError
+from google.oauth2.credentials import Credentials
+from services import api_guard
+from services import google_clients
+from services.google_clients import get_service, clear_services
+
+
+class FakeClock:
+    """Đồng hồ giả: sleep chỉ cộng thời gian, không chờ thật"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(round(seconds, 3))
+        self.now += seconds
+
+
+def install_clock():
+    clock = FakeClock()
+    api_guard._clock = clock.clock
+    api_guard._sleep = clock.sleep
+    api_guard.reset()
+    return clock
+
+
+def make_request(responses, method="GET", method_id="sheets.spreadsheets.values.get"):
+    request = api_guard.request_builder("sheets", "cred-1")(
+        HttpMockSequence(responses), lambda resp, content: json.loads(content),
+        "https://sheets.googleapis.com/v4/x", method=method, methodId=method_id
+    )
+    return request
+
+
+def test_token_bucket():
+    print("--- ĐANG KIỂM TRA TOKEN BUCKET ---\n")
+    clock = install_clock()
+    bucket = api_guard.TokenBucket(60, capacity=2)  # 1 token/giây, dồn tối đa 2
+    assert bucket.acquire() == 0 and bucket.acquire() == 0
+    assert bucket.acquire() == 1.0
+    assert clock.sleeps == [1.0]
+    clock.now += 10
+    assert bucket.acquire() == 0
+    print("✅ Hết token thì chờ đúng 1/rate giây, nghỉ lâu thì dồn tối đa capacity")
+
+
+def test_separate_read_write_quota():
+    print("\n--- ĐANG KIỂM TRA QUOTA ĐỌC / GHI RIÊNG CỦA SHEETS ---\n")
+    clock = install_clock()
+    os.environ["GOOGLE_API_RATE_SHEETS_WRITE"] = "1"
+    try:
+        write = lambda: make_request([({"status": "200"}, "{}")], method="POST",
+                                     method_id="sheets.spreadsheets.values.batchUpdate").execute()
+        read = lambda: make_request([({"status": "200"}, "{}")]).execute()
+        write()
+        write()
+        assert clock.sleeps == [60.0]
+        for _ in range(10):
+            read()
+        make_request([({"status": "200"}, "{}")], method="POST",
+                     method_id="sheets.spreadsheets.values.batchGetByDataFilter").execute()
+        assert clock.sleeps == [60.0]
+        print("✅ Hết quota ghi thì chỉ request ghi phải chờ, đọc (kể cả POST batchGetByDataFilter) không bị chặn")
+    finally:
+        del os.environ["GOOGLE_API_RATE_SHEETS_WRITE"]
+    assert api_guard.rate_for("sheets_read") == 60 and api_guard.rate_for("drive") == 600
+    os.environ["GOOGLE_API_RATE_SHEETS"] = "30"
+    try:
+        assert api_guard.rate_for("sheets_read") == 30 and api_guard.rate_for("sheets_write") == 30
+    finally:
+        del os.environ["GOOGLE_API_RATE_SHEETS"]
+    print("✅ GOOGLE_API_RATE_SHEETS vẫn áp cho cả hai quota khi không đặt riêng")
+
+
+def test_retry_on_429_and_5xx():
+    print("\n--- ĐANG KIỂM TRA RETRY 429/5xx ---\n")
+    clock = install_clock()
+    request = make_request([
+        ({"status": "429", "retry-after": "7"}, "{}"),
+        ({"status": "503"}, "{}"),
+        ({"status": "200"}, '{"values": [["ok"]]}'),
+    ])
+    assert request.execute() == {"values": [["ok"]]}
+    assert clock.sleeps[0] == 7.0 and len(clock.sleeps) == 2
+    stats = api_guard.stats()["sheets"]
+    assert stats["calls"] == 3 and stats["retries"] == 2 and stats["failures"] == 0
+    print("✅ 429 chờ theo Retry-After, 503 chờ theo backoff rồi thành công")
+
+    # 403 userRateLimitExceeded cũng là bị giới hạn tốc độ
+    rate_limited = json.dumps({"error": {"errors": [{"reason": "userRateLimitExceeded"}]}})
+    request = make_request([({"status": "403"}, rate_limited), ({"status": "200"}, "{}")])
+    assert request.execute() == {}
+    print("✅ 403 userRateLimitExceeded được thử lại")
+
+
+def test_no_retry_for_unsafe_requests():
+    print("\n--- ĐANG KIỂM TRA KHÔNG GỬI LẠI REQUEST KHÔNG AN TOÀN ---\n")
+    clock = install_clock()
+    # values.append lỗi 503 có thể đã ghi -> không gửi lại để tránh trùng hàng
+    request = make_request([({"status": "503"}, "{}"), ({"status": "200"}, "{}")],
+                           method="POST", method_id="sheets.spreadsheets.values.append")
+    try:
+        request.execute()
+        assert False, "phải báo lỗi"
+    except HttpError as e:
+        assert e.resp.status == 503
+    assert clock.sleeps == []
+
+    # 404 không phải lỗi tạm thời
+    try:
+        make_request([({"status": "404"}, "{}")]).execute()
+        assert False, "phải báo lỗi"
+    except HttpError:
+        pass
+    assert api_guard.stats()["sheets"]["failures"] == 2
+    print("✅ POST không idempotent và lỗi 4xx không được thử lại")
+
+
+def test_clients_use_guard():
+    print("\n--- ĐANG KIỂM TRA CLIENT DÙNG LIMITER ---\n")
+    clear_services()
+    creds = Credentials(token="t", refresh_token="r", client_id="c", client_secret="s",
+                        token_uri="https://oauth2.googleapis.com/token")
+    request = get_service("sheets", "v4", creds).spreadsheets().values().get(spreadsheetId="x", range="A1")
+    assert isinstance(request, api_guard.GuardedHttpRequest)
+    assert request.guard_key == ("sheets", ("c", "r"))
+    clear_services()
+    print("✅ Mọi request từ get_service đều đi qua GuardedHttpRequest")
+
+
+def make_creds(refresh_token="r"):
+    return Credentials(token="t", refresh_token=refresh_token, client_id="c", client_secret="s",
+                       token_uri="https://oauth2.googleapis.com/token")
+
+
+def test_client_cache():
+    print("\n--- ĐANG KIỂM TRA CACHE CLIENT ---\n")
+    clear_services()
+    original_size = google_clients.CLIENT_CACHE_SIZE
+    try:
+        service = get_service("drive", "v3", make_creds())
+        seen = []
+        thread = threading.Thread(target=lambda: seen.append(get_service("drive", "v3", make_creds())))
+        thread.start()
+        thread.join()
+        assert seen == [service]
+        print("✅ Credentials mới cùng refresh_token ở thread khác (request khác) dùng lại cùng client")
+
+        no_refresh = Credentials(token="chi-co-access-token")
+        assert get_service("drive", "v3", no_refresh) is not get_service("drive", "v3", no_refresh)
+        assert len(google_clients._services) == 1
+        print("✅ Credentials không có refresh_token không được cache (không còn khóa id())")
+
+        google_clients.CLIENT_CACHE_SIZE = 3
+        for i in range(10):
+            get_service("drive", "v3", make_creds(f"r{i}"))
+        assert len(google_clients._services) == 3
+        assert [key[2][1] for key in google_clients._services] == ["r7", "r8", "r9"]
+        print("✅ Cache giới hạn CLIENT_CACHE_SIZE client, bỏ client ít dùng nhất")
+    finally:
+        google_clients.CLIENT_CACHE_SIZE = original_size
+        clear_services()
+
+
+def test_http_pool():
+    print("\n--- ĐANG KIỂM TRA POOL KẾT NỐI DÙNG CHUNG ---\n")
+    lock, created, busy = threading.Lock(), [], set()
+    release = threading.Event()
+
+    class FakeHttp:
+        def __init__(self):
+            created.append(self)
+
+        def request(self, *args, **kwargs):
+            with lock:
+                assert self not in busy, "một kết nối bị hai thread dùng cùng lúc"
+                busy.add(self)
+            release.wait(5)
+            with lock:
+                busy.discard(self)
+            return {"status": "200"}, b"{}"
+
+        def close(self):
+            pass
+
+    pool = google_clients._HttpPool(None, max_idle=2)
+    pool._connect = FakeHttp
+    threads = [threading.Thread(target=pool.request, args=("https://x",)) for _ in range(4)]
+    for t in threads:
+        t.start()
+    while len(busy) < 4:
+        time.sleep(0.01)
+    release.set()
+    for t in threads:
+        t.join()
+    assert len(created) == 4 and len(pool._idle) == 2
+    pool.request("https://x")
+    assert len(created) == 4
+    print("✅ Mỗi request đồng thời mượn kết nối riêng, kết nối rảnh được dùng lại (giữ tối đa max_idle)")
+
+
+if __name__ == "__main__":
+    try:
+        test_token_bucket()
+        test_separate_read_write_quota()
+        test_retry_on_429_and_5xx()
+        test_no_retry_for_unsafe_requests()
+        test_clients_use_guard()
+        test_client_cache()
+        test_http_pool()
+        print("\n🎉 TẤT CẢ CÁC BÀI TEST ĐÃ VƯỢT QUA!")
+    except Exception as e:
+        print(f"❌ LỖI KHI TEST: {e}")
+        sys.exit(1)
@@ -0,0 +1,212 @@
+import sys
+import os
+import io
+import re
+import hashlib
+import itertools
+import tempfile
+import threading
+
+# Thêm đường dẫn để có thể import từ thư mục hiện tại
+sys.path.append(os.getcwd())
+
+import httplib2
+from flask import Flask, jsonify, request
+from googleapiclient.errors import HttpError
+import logic
+from services import content_index, task_store
+from services.content_index import ContentIndex
+from services.upload_storage import DiskUploadRequest, claim_upload
+from test_upload_stream import FakeRequest, FakeSheets
+
+
+class DedupDrive:
+    """Drive giả có appProperties: files().get/list/create/copy giống Drive v3, đếm byte thực sự được upload"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.files_by_id = {}
+        self.copies = []
+        self.copy_error = None
+        self.bytes_uploaded = 0
+        self.list_error = None
+        self.ids = itertools.count(1)
+
+    def files(self):
+        return self
+
+    def get(self, fileId, fields):
+        f = self.files_by_id.get(fileId)
+        if f is None:
+            raise HttpError(httplib2.Response({"status": 404}), b"File not found")
+        return FakeRequest(dict(f))
+
+    def list(self, q, **kwargs):
+        if self.list_error:
+            raise self.list_error
+        value = re.search(r"value='(\w+)'", q).group(1)
+        found = [dict(f) for f in self.files_by_id.values()
+                 if f.get("appProperties", {}).get("sha256") == value and not f["trashed"]]
+        return FakeRequest({"files": found})
+
+    def create(self, body, fields, media_body=None):
+        with self.lock:
+            file_id = f"ID_{next(self.ids)}"
+            if media_body is None:
+                return FakeRequest({"id": file_id})
+            size = os.path.getsize(media_body._filename)
+            self.bytes_uploaded += size
+            self.files_by_id[file_id] = {"id": file_id, "name": body["name"], "size": str(size), "trashed": False,
+                                         "webViewLink": f"https://drive/{file_id}",
+                                         "appProperties": dict(body.get("appProperties", {}))}
+        return FakeRequest({"id": file_id, "webViewLink": f"https://drive/{file_id}"}, media_body)
+
+    def copy(self, fileId, body, fields):
+        """Sao chép phía server: không tính vào byte upload"""
+        if self.copy_error:
+            raise self.copy_error
+        with self.lock:
+            file_id = f"ID_{next(self.ids)}"
+            self.files_by_id[file_id] = dict(self.files_by_id[fileId], id=file_id, name=body["name"],
+                                             parents=body["parents"], webViewLink=f"https://drive/{file_id}",
+                                             appProperties=dict(body.get("appProperties", {})))
+            self.copies.append({"source": fileId, "id": file_id, "parents": body["parents"]})
+        return FakeRequest({"id": file_id, "webViewLink": f"https://drive/{file_id}"})
+
+    def delete(self, fileId):
+        del self.files_by_id[fileId]
+        return FakeRequest({})
+
+
+def make_temp(content):
+    fd, path = tempfile.mkstemp(dir=logic.UPLOAD_FOLDER, prefix="upload_test_")
+    with os.fdopen(fd, "wb") as f:
+        f.write(content)
+    return path
+
+
+def run(drive, task_id, contents):
+    """background_upload với các file (tên, nội dung) cho sẵn, trả về bản ghi tác vụ"""
+    files_data = {"files": [{"path": make_temp(content), "filename": name, "content_type": "video/mp4"}
+                            for name, content in contents]}
+    sheets = FakeSheets()
+    originals = (logic.get_creds, logic.get_service)
+    logic.get_creds = lambda: None
+    logic.get_service = lambda name, version, creds: drive if name == "drive" else sheets
+    try:
+        logic.background_upload(task_id, {"parentId": "P", "folderName": "Review"}, files_data)
+    finally:
+        logic.get_creds, logic.get_service = originals
+    assert not any(os.path.exists(f["path"]) for f in files_data["files"])
+    return task_store.default_store().get(task_id)
+
+
+def test_hash_on_ingest():
+    print("--- ĐANG KIỂM TRA TÍNH SHA-256 KHI NHẬN FILE ---\n")
+    content = os.urandom(3 * 1024 * 1024 + 17)
+    for request_class in (DiskUploadRequest, Flask.request_class):
+        app = Flask(__name__)
+        app.request_class = request_class
+        app.add_url_rule("/up", "up", lambda: jsonify(claim_upload(request.files["f"])),
+                         methods=["POST"])
+        claimed = app.test_client().post("/up", data={"f": (io.BytesIO(content), "clip.mp4")},
+                                         content_type="multipart/form-data").get_json()
+        try:
+            assert claimed["sha256"] == hashlib.sha256(content).hexdigest()
+            with open(claimed["path"], "rb") as f:
+                assert f.read() == content
+        finally:
+            os.remove(claimed["path"])
+    print("✅ Hash tính ngay trong lúc werkzeug ghi file xuống đĩa (và khi chép từ request thường), không đọc lại file")
+
+
+def test_reuse_existing_content():
+    print("\n--- ĐANG KIỂM TRA DÙNG LẠI FILE TRÙNG NỘI DUNG ---\n")
+    drive = DedupDrive()
+    broll, thumb = os.urandom(1024 * 1024), os.urandom(1000)
+    original_index, content_index._index = content_index._index, ContentIndex(":memory:")
+    try:
+        first = run(drive, "task-dedup-1", [("broll.mp4", broll), ("thumb.png", thumb)])
+        assert first["status"] == "success" and first["bytes_saved"] == 0
+        assert drive.bytes_uploaded == len(broll) + len(thumb)
+        stored = next(f for f in drive.files_by_id.values() if f["name"] == "broll.mp4")
+        assert stored["appProperties"] == {"sha256": hashlib.sha256(broll).hexdigest()}
+        print("✅ File upload mới được gắn appProperties sha256")
+
+        second = run(drive, "task-dedup-2", [("broll_ban_sao.mp4", broll), ("moi.mp4", b"noi dung moi")])
+        assert second["status"] == "success", second
+        assert drive.bytes_uploaded == len(broll) + len(thumb) + len(b"noi dung moi")
+        assert second["bytes_saved"] == len(broll) and second["files_deduplicated"] == 1
+        copy = drive.copies[-1]
+        assert copy["source"] == stored["id"]
+        assert second["files"][0] == {"name": "broll_ban_sao.mp4", "status": "done", "deduplicated": True,
+                                      "size": len(broll), "link": f"https://drive/{copy['id']}"}
+        assert second["files"][0]["link"] != stored["webViewLink"]
+        assert drive.files_by_id[copy["id"]]["appProperties"] == stored["appProperties"]
+        print(f"✅ Tác vụ sau không gửi lại B-roll: bản sao phía server có link riêng, tiết kiệm "
+              f"{second['bytes_saved']} byte")
+
+        # Xóa bài cũ (file gốc) không ảnh hưởng link của bài sau
+        originals = (logic.get_creds, logic.get_service)
+        logic.get_creds, logic.get_service = (lambda: None), (lambda name, version, creds: drive)
+        try:
+            assert logic.delete_drive_file(stored["id"])
+        finally:
+            logic.get_creds, logic.get_service = originals
+        assert stored["id"] not in drive.files_by_id and copy["id"] in drive.files_by_id
+        print("✅ Xóa file gốc, bản sao của bài sau vẫn còn")
+
+        uploaded = drive.bytes_uploaded
+        third = run(drive, "task-dedup-3", [("a.mp4", b"giong nhau" * 100), ("b.mp4", b"giong nhau" * 100)])
+        assert drive.bytes_uploaded - uploaded == 1000 and third["bytes_saved"] == 1000
+        print("✅ Hai file giống nhau trong cùng tác vụ chỉ upload một lần")
+
+        # Tiến trình khác / mất bảng cục bộ: tìm lại theo appProperties trên Drive (file gốc đã xóa, còn bản sao)
+        content_index._index = ContentIndex(":memory:")
+        uploaded = drive.bytes_uploaded
+        fourth = run(drive, "task-dedup-4", [("broll.mp4", broll)])
+        assert drive.bytes_uploaded == uploaded and fourth["bytes_saved"] == len(broll)
+        assert content_index._index.get(hashlib.sha256(broll).hexdigest())["file_id"] == copy["id"]
+        print("✅ Bảng cục bộ trống vẫn tìm được file qua appProperties và ghi lại vào bảng")
+    finally:
+        content_index._index = original_index
+
+
+def test_stale_index_and_lookup_errors():
+    print("\n--- ĐANG KIỂM TRA FILE CŨ ĐÃ BỊ XÓA / LỖI KHI TRA ---\n")
+    drive = DedupDrive()
+    clip = os.urandom(5000)
+    original_index, content_index._index = content_index._index, ContentIndex(":memory:")
+    try:
+        run(drive, "task-stale-1", [("clip.mp4", clip)])
+        old_id = content_index._index.get(hashlib.sha256(clip).hexdigest())["file_id"]
+        del drive.files_by_id[old_id]
+        task = run(drive, "task-stale-2", [("clip.mp4", clip)])
+        assert task["bytes_saved"] == 0 and drive.bytes_uploaded == 2 * len(clip)
+        assert content_index._index.get(hashlib.sha256(clip).hexdigest())["file_id"] != old_id
+        print("✅ File trong bảng cục bộ đã bị xóa trên Drive -> upload lại và cập nhật bảng")
+
+        content_index._index = ContentIndex(":memory:")
+        drive.list_error = HttpError(httplib2.Response({"status": 500}), b"backend error")
+        task = run(drive, "task-stale-3", [("clip.mp4", clip)])
+        assert task["status"] == "success" and drive.bytes_uploaded == 3 * len(clip)
+        print("✅ Không tra được Drive -> vẫn upload bình thường")
+
+        drive.list_error = None
+        drive.copy_error = HttpError(httplib2.Response({"status": 403}), b"storage quota exceeded")
+        task = run(drive, "task-stale-4", [("clip.mp4", clip)])
+        assert task["status"] == "success" and task["bytes_saved"] == 0 and drive.bytes_uploaded == 4 * len(clip)
+        print("✅ Không sao chép được file cũ -> upload lại bình thường")
+    finally:
+        content_index._index = original_index
+
+
+if __name__ == "__main__":
+    try:
+        test_hash_on_ingest()
+        test_reuse_existing_content()
+        test_stale_index_and_lookup_errors()
+        print("\n🎉 TẤT CẢ CÁC BÀI TEST ĐÃ VƯỢT QUA!")
+    except Exception as e:
+        print(f"❌ LỖI KHI TEST: {e}")
+        sys.exit(1)
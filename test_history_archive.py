@@ -0,0 +1,228 @@
+import sys
+import os
+import datetime
+
+# Thêm đường dẫn để có thể import từ thư mục hiện tại
+sys.path.append(os.getcwd())
+
+from flask import Flask
+from services import history_archive
+from services.sheet_service import SheetService
+from models.History_db import HistoryDbModel
+from sheet_fakes import install_fake, history_tab
+
+NOW = datetime.datetime(2026, 10, 18, 9, 0, 0)
+
+
+def history_row(drive_id, status, published_at):
+    row = [drive_id, f"Video {drive_id}", "Video", "", "", "", "", "Kênh", "C1", "", f"YT_{drive_id}", "", "", status]
+    return row + [published_at] if published_at else row
+
+
+def seeded_tabs():
+    return {"Published_History": [history_tab()[0],
+        history_row("OLD_AUG", "SUCCESS", "2026-08-03 10:00:00"),
+        history_row("OLD_SCHEDULED", "SCHEDULED", "2026-08-05 10:00:00"),
+        history_row("OLD_SEP", "SUCCESS", "2026-09-10 08:30:00"),
+        history_row("RECENT", "SUCCESS", "2026-10-15 12:00:00"),
+        history_row("LEGACY", "SUCCESS", ""),
+        history_row("OLD_AUG_2", "SUCCESS", "2026-08-28 22:00:00"),
+    ]}
+
+
+def test_rotate(fake_sheets):
+    print("--- ĐANG KIỂM TRA XOAY VÒNG PUBLISHED_HISTORY ---\n")
+    fake = fake_sheets(seeded_tabs())
+
+    result = history_archive.rotate(now=NOW)
+    assert result == {"moved": 3, "unstamped": 1,
+                      "partitions": {"Published_History_2026_08": 2, "Published_History_2026_09": 1}}
+
+    hot = SheetService.get_all_rows("Published_History")
+    assert [r["Id_media_on_drive"] for r in hot] == ["OLD_SCHEDULED", "RECENT", "LEGACY"]
+    assert hot[2]["Published_At"] == "" and len(fake.tabs["Published_History"][3]) == 14
+    print("✅ Chỉ hàng SUCCESS cũ hơn mốc được chuyển; SCHEDULED và hàng mới ở lại tab nóng")
+    print("✅ Hàng cũ chưa có Published_At được giữ nguyên, không bị scheduler tự gán")
+
+    august = fake.tabs["Published_History_2026_08"]
+    assert august[0] == HistoryDbModel.SCHEMA.header_row()
+    assert [row[0] for row in august[1:]] == ["OLD_AUG", "OLD_AUG_2"]
+    assert [r["Id_media_on_drive"] for r in SheetService.get_all_rows("Published_History_2026_09")] == ["OLD_SEP"]
+    # Xóa các hàng đã chuyển trong một lần batchUpdate (sau lần tạo 2 tab)
+    assert fake.calls["batchUpdate"] == 3
+    print("✅ Hàng được thêm vào tab lưu trữ theo tháng (tạo tab kèm tiêu đề) rồi mới xóa khỏi tab nóng")
+
+    # Chạy lại: không còn gì để chuyển, không tạo thêm tab
+    assert history_archive.rotate(now=NOW) == {"moved": 0, "unstamped": 1, "partitions": {}}
+    assert fake.calls["batchUpdate"] == 3
+    print("✅ Lượt xoay vòng lặp lại không làm gì thêm")
+
+    # Xóa trên tab lưu trữ dùng đúng sheetId của tab đó, không phải tab nóng
+    SheetService.delete_rows("Published_History_2026_08", [0])
+    assert [row[0] for row in fake.tabs["Published_History_2026_08"][1:]] == ["OLD_AUG_2"]
+    assert len(fake.tabs["Published_History"]) == 4
+    print("✅ delete_rows trên tab lưu trữ không đụng tới tab nóng")
+
+
+def test_migrate_published_at(fake_sheets):
+    print("\n--- ĐANG KIỂM TRA MIGRATION CỘT PUBLISHED_AT ---\n")
+    tabs = seeded_tabs()
+    tabs["Published_History"][0] = tabs["Published_History"][0][:14]  # tab tạo trước khi có cột Published_At
+    fake = fake_sheets(tabs)
+
+    assert history_archive.migrate_published_at(now=NOW) == {"header_added": True, "stamped": 1}
+    hot = fake.tabs["Published_History"]
+    assert hot[0] == HistoryDbModel.SCHEMA.header_row()
+    assert [row[14] for row in hot[1:]] == ["2026-08-03 10:00:00", "2026-08-05 10:00:00", "2026-09-10 08:30:00",
+                                            "2026-10-15 12:00:00", "2026-10-18 09:00:00", "2026-08-28 22:00:00"]
+    print("✅ Thêm tiêu đề Published_At và chỉ gán thời điểm hiện tại cho hàng chưa có giá trị")
+
+    assert history_archive.migrate_published_at(now=NOW) == {"header_added": False, "stamped": 0}
+    assert history_archive.rotate(now=NOW)["unstamped"] == 0
+    print("✅ Chạy lại migration không làm gì thêm; xoay vòng sau đó không còn hàng thiếu Published_At")
+
+
+def test_rotate_with_shifting_rows(fake_sheets):
+    print("\n--- ĐANG KIỂM TRA XOAY VÒNG KHI HÀNG BỊ CHÈN/XÓA XEN GIỮA ---\n")
+    fake = fake_sheets(seeded_tabs())
+    hot = fake.tabs["Published_History"]
+
+    # Cache đang giữ bản cũ; sau đó có người chèn một hàng lên đầu tab nóng (chỉ số dịch xuống 1)
+    SheetService.get_all_rows("Published_History")
+    hot.insert(1, history_row("MANUAL_TOP", "SCHEDULED", "2026-10-17 08:00:00"))
+
+    # Giữa lúc chép sang tab lưu trữ và lúc xóa: worker khác chèn thêm hàng, người dùng xóa một hàng
+    # và sửa tay một hàng sắp được chuyển
+    original_append = SheetService.append_rows
+
+    def append_and_shift(sheet_name, items):
+        result = original_append(sheet_name, items)
+        if sheet_name == "Published_History_2026_09":
+            hot.insert(1, history_row("WORKER_NEW", "SCHEDULED", "2026-10-18 08:00:00"))
+            del hot[[row[0] for row in hot].index("RECENT")]
+            hot[[row[0] for row in hot].index("OLD_AUG_2")][1] = "Tên sửa tay"
+        return result
+    SheetService.append_rows = append_and_shift
+    try:
+        result = history_archive.rotate(now=NOW)
+    finally:
+        SheetService.append_rows = original_append
+
+    assert result["moved"] == 2
+    ids = [row[0] for row in fake.tabs["Published_History"][1:]]
+    assert ids == ["WORKER_NEW", "MANUAL_TOP", "OLD_SCHEDULED", "LEGACY", "OLD_AUG_2"], ids
+    print("✅ Chỉ số được đối chiếu lại theo nội dung: hàng chèn xen giữa không bị xóa nhầm")
+    assert [row[0] for row in fake.tabs["Published_History_2026_08"][1:]] == ["OLD_AUG", "OLD_AUG_2"]
+    print("✅ Hàng bị sửa tay trong lúc xoay vòng được giữ lại trên tab nóng (chỉ trùng, không mất)")
+
+
+def test_post_actions_after_rotate(fake_sheets):
+    print("\n--- ĐANG KIỂM TRA THAO TÁC THEO CHỈ SỐ SAU KHI XOAY VÒNG ---\n")
+    from post_service import manager
+    fake = fake_sheets(seeded_tabs())
+    deleted = []
+
+    class FakeYoutube:
+        def __init__(self, creds):
+            pass
+
+        def get_video_details(self, video_id):
+            return {"success": True, "thumbnail_url": f"https://img/{video_id}.jpg"}
+
+        def delete_video(self, video_id):
+            deleted.append(video_id)
+            return {"success": True}
+    originals = (manager.YoutubePublisher, manager.get_creds)
+    manager.YoutubePublisher, manager.get_creds = FakeYoutube, lambda: None
+    try:
+        check_post_actions(fake, manager.PostManager(), deleted)
+    finally:
+        manager.YoutubePublisher, manager.get_creds = originals
+
+
+def check_post_actions(fake, pm, deleted):
+    # Trang lịch sử được tải trước khi xoay vòng: RECENT đang ở chỉ số 3
+    client_view = SheetService.get_all_rows("Published_History")
+    assert client_view[3]["Youtube_Post_Id"] == "YT_RECENT"
+    history_archive.migrate_published_at(now=NOW)
+    history_archive.rotate(now=NOW)
+
+    res = pm.sync_thumbnail("Published_History", 3, post_id="YT_RECENT")
+    hot = fake.tabs["Published_History"]
+    assert res["success"] and hot[2][0] == "RECENT" and hot[2][11] == "https://img/YT_RECENT.jpg"
+    print("✅ Có post_id: hàng được tìm theo khóa, chỉ số cũ của client bị bỏ qua")
+
+    # Chỉ số cũ trỏ vào hàng khác (người khác xóa hàng đầu, cache chưa biết): không ghi/xóa nhầm
+    SheetService.get_all_rows("Published_History")
+    del hot[1]
+    res = pm.delete_published_post("Published_History", 0)
+    assert not res["success"] and "đã bị thay đổi" in res["error"]
+    assert [row[0] for row in hot[1:]] == ["RECENT", "LEGACY"]
+    print("✅ Không có post_id: hàng tại chỉ số được đối chiếu lại theo khóa trước khi xóa, lệch -> từ chối")
+
+    res = pm.delete_published_post("Published_History", 0, post_id="YT_LEGACY")
+    assert res["success"] and deleted[-1] == "YT_LEGACY"
+    assert [row[0] for row in hot[1:]] == ["RECENT"]
+    assert pm.get_post_details("Published_History", 0, post_id="YT_LEGACY")["success"] is False
+    print("✅ Xóa theo post_id đúng bài dù chỉ số đã dịch; bài không còn -> báo lỗi")
+
+
+def test_query_fan_out(fake_sheets):
+    print("\n--- ĐANG KIỂM TRA TRUY VẤN LỊCH SỬ QUA CÁC TAB LƯU TRỮ ---\n")
+    fake = fake_sheets(seeded_tabs())
+    history_archive.migrate_published_at(now=NOW)
+    history_archive.rotate(now=NOW)
+    reads = []
+    original_read = fake.read
+    fake.read = lambda a1_range: reads.append(a1_range.split("!")[0]) or original_read(a1_range)
+    SheetService.invalidate_cache()
+
+    # Khoảng gần đây: chỉ đọc tab nóng
+    recent = history_archive.query(date_from="2026-10-01", now=NOW)
+    assert recent["partitions"] == ["Published_History"]
+    assert [r["Id_media_on_drive"] for r in recent["items"]] == ["LEGACY", "RECENT"]
+    assert reads == ["Published_History"]
+    print("✅ Khoảng thời gian mới chỉ đọc tab nóng")
+
+    # Khoảng cũ: chỉ đọc các tháng giao với khoảng cần tìm
+    older = history_archive.query(date_from="2026-09-01", date_to="2026-09-30", now=NOW)
+    assert older["partitions"] == ["Published_History", "Published_History_2026_09"]
+    assert [r["Id_media_on_drive"] for r in older["items"]] == ["OLD_SEP"]
+    assert older["items"][0]["partition"] == "Published_History_2026_09"
+    assert "Published_History_2026_08" not in reads
+    print("✅ Khoảng thời gian cũ chỉ đọc thêm tab lưu trữ của tháng tương ứng")
+
+    everything = history_archive.query(date_from="2026-01-01", status="SUCCESS,SCHEDULED", now=NOW)
+    assert everything["total"] == 6
+    assert [r["Id_media_on_drive"] for r in everything["items"]][:2] == ["LEGACY", "RECENT"]
+    assert [r["Id_media_on_drive"] for r in everything["items"]][-1] == "OLD_AUG"
+    print("✅ Kết quả gộp từ mọi tab, sắp xếp mới nhất trước")
+
+    # Qua API
+    import routes
+    app = Flask(__name__)
+    app.register_blueprint(routes.api_bp)
+    client = app.test_client()
+    original_now = history_archive._now
+    history_archive._now = lambda: NOW
+    try:
+        response = client.get("/api/v2/post/history?from=2026-08-01&to=2026-08-31&status=SUCCESS")
+        assert response.status_code == 200 and response.json["total"] == 2
+        assert client.get("/api/v2/post/history?from=hôm-qua").status_code == 400
+        assert len(client.get("/api/v2/post/history").json) == 3
+    finally:
+        history_archive._now = original_now
+    print("✅ /api/v2/post/history?from=&to=&status= dùng truy vấn qua các tab")
+
+
+if __name__ == "__main__":
+    try:
+        test_rotate(install_fake)
+        test_migrate_published_at(install_fake)
+        test_rotate_with_shifting_rows(install_fake)
+        test_post_actions_after_rotate(install_fake)
+        test_query_fan_out(install_fake)
+        print("\n🎉 TẤT CẢ CÁC BÀI TEST ĐÃ VƯỢT QUA!")
+    except Exception as e:
+        print(f"❌ LỖI KHI TEST: {e}")
+        sys.exit(1)
@@ -0,0 +1,147 @@
+import sys
+import os
+import gzip
+import time
+import tempfile
+
+# Thêm đường dẫn để có thể import từ thư mục hiện tại
+sys.path.append(os.getcwd())
+
+from flask import Flask, request
+from services import http_compression
+from services.static_assets import StaticAssets, LONG_CACHE
+from sheet_fakes import install_fake, history_tab
+
+GZIP = {"Accept-Encoding": "gzip, deflate"}
+
+
+def make_client():
+    import routes
+    app = Flask(__name__)
+    app.register_blueprint(routes.api_bp)
+    return app.test_client()
+
+
+def test_json_compression(fake_sheets):
+    print("--- ĐANG KIỂM TRA NÉN PHẢN HỒI JSON CỦA API ---\n")
+    tab = history_tab()
+    for i in range(200):
+        tab.append([f"DRIVE_{i}", f"Video {i}", "Video", "Page", "P1", "TOKEN", f"FB_{i}", "", "", "", "", "", "", "SUCCESS"])
+    fake_sheets({"Published_History": tab})
+    client = make_client()
+
+    plain = client.get("/api/v2/sheets/Published_History")
+    assert "Content-Encoding" not in plain.headers and "Accept-Encoding" in plain.headers["Vary"]
+
+    packed = client.get("/api/v2/sheets/Published_History", headers=GZIP)
+    assert packed.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(packed.data) == plain.data
+    assert len(packed.data) * 5 < len(plain.data)
+    print(f"✅ JSON lớn được nén gzip ({len(plain.data)} -> {len(packed.data)} byte)")
+
+    # ETag yếu sau khi nén, 304 vẫn hoạt động với cả ETag gốc lẫn ETag yếu
+    assert packed.headers["ETag"].startswith("W/")
+    for etag in (packed.headers["ETag"], plain.headers["ETag"]):
+        again = client.get("/api/v2/sheets/Published_History", headers={**GZIP, "If-None-Match": etag})
+        assert again.status_code == 304
+    print("✅ ETag đổi thành ETag yếu, If-None-Match vẫn trả 304")
+
+    # Phản hồi nhỏ và phản hồi stream không bị nén
+    small = client.get("/api/v2/metrics", headers=GZIP)
+    assert "Content-Encoding" not in small.headers
+    streamed = client.get("/api/v2/sheets/Published_History?stream=true", headers=GZIP)
+    assert "Content-Encoding" not in streamed.headers
+    print("✅ Bỏ qua phản hồi nhỏ hơn ngưỡng và phản hồi stream")
+
+    # Client từ chối gzip (q=0)
+    refused = client.get("/api/v2/sheets/Published_History", headers={"Accept-Encoding": "gzip;q=0"})
+    assert "Content-Encoding" not in refused.headers
+    print("✅ Tôn trọng q=0 trong Accept-Encoding")
+
+
+def make_site(root):
+    os.makedirs(os.path.join(root, "js"))
+    os.makedirs(os.path.join(root, "css"))
+    with open(os.path.join(root, "index.html"), "w") as f:
+        f.write('<link href="css/style.css?v=2.0.0"><script src="js/script.js?v=2.0.0"></script>')
+    with open(os.path.join(root, "js", "script.js"), "w") as f:
+        f.write("console.log('xin chào');\n" * 200)
+    with open(os.path.join(root, "css", "style.css"), "w") as f:
+        f.write("body { color: red; }\n" * 200)
+
+
+def test_static_assets():
+    print("\n--- ĐANG KIỂM TRA FILE TĨNH CÓ HASH VÀ NÉN SẴN ---\n")
+    with tempfile.TemporaryDirectory() as root:
+        make_site(root)
+        assets = StaticAssets(root)
+        app = Flask(__name__)
+        app.add_url_rule("/", "root", lambda: assets.index_response(request))
+        app.add_url_rule("/<path:path>", "static_file", lambda path: assets.asset_response(path, request) or ("", 404))
+        client = app.test_client()
+
+        index = client.get("/")
+        html = index.get_data(as_text=True)
+        script_hash = html.split("js/script.js?v=")[1].split('"')[0]
+        assert len(script_hash) == 12 and "?v=2.0.0" not in html
+        assert index.headers["Cache-Control"] == "no-cache"
+        print("✅ index.html trỏ tới script.js/style.css kèm hash nội dung")
+
+        script = client.get(f"/js/script.js?v={script_hash}", headers=GZIP)
+        assert script.headers["Cache-Control"] == LONG_CACHE
+        assert script.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(script.data).decode() == "console.log('xin chào');\n" * 200
+        assert client.get("/js/script.js?v=cu").headers["Cache-Control"] == "no-cache"
+        assert client.get("/js/script.js", headers={"If-None-Match": script.headers["ETag"]}).status_code == 304
+        print("✅ Đúng hash -> cache 1 năm (immutable), bản gzip nén sẵn")
+
+        # Sửa file -> hash mới trong index.html
+        with open(os.path.join(root, "js", "script.js"), "a") as f:
+            f.write("// bản mới\n")
+        os.utime(os.path.join(root, "js", "script.js"), (time.time() + 5, time.time() + 5))
+        new_hash = client.get("/").get_data(as_text=True).split("js/script.js?v=")[1].split('"')[0]
+        assert new_hash != script_hash
+        assert client.get(f"/js/script.js?v={script_hash}").headers["Cache-Control"] == "no-cache"
+        print("✅ File thay đổi trên đĩa -> index.html nhận hash mới")
+
+        assert client.get("/img/logo.png").status_code == 404
+        print("✅ File không được quản lý trả về None (server.py dùng send_from_directory)")
+
+
+def test_server_static_routes():
+    print("\n--- ĐANG KIỂM TRA FILE TĨNH QUA server.app ---\n")
+    import server
+    client = server.app.test_client()
+    assert "static" not in server.app.view_functions
+    html = client.get("/", headers=GZIP)
+    assert html.headers["Cache-Control"] == "no-cache" and html.headers["Content-Encoding"] == "gzip"
+    script_hash = gzip.decompress(html.data).decode("utf-8").split("js/script.js?v=")[1].split('"')[0]
+
+    script = client.get(f"/js/script.js?v={script_hash}", headers=GZIP)
+    assert script.status_code == 200
+    assert "immutable" in script.headers["Cache-Control"] and script.headers["Content-Encoding"] == "gzip"
+    style = client.get("/css/style.css", headers=GZIP)
+    assert style.headers["Content-Encoding"] == "gzip" and style.headers["Cache-Control"] == "no-cache"
+    assert client.get("/index.html").headers["Cache-Control"] == "no-cache"
+    print("✅ /js/script.js đi qua send_static (StaticAssets): immutable + gzip, không bị endpoint static của Flask che")
+
+
+def test_negotiate():
+    print("\n--- ĐANG KIỂM TRA CHỌN ENCODING ---\n")
+    from werkzeug.datastructures import Accept
+    assert http_compression.negotiate(Accept([("gzip", 1), ("br", 1)]), ("br", "gzip")) == "br"
+    assert http_compression.negotiate(Accept([("gzip", 1)]), ("br", "gzip")) == "gzip"
+    assert http_compression.negotiate(Accept([("identity", 1)]), ("br", "gzip")) is None
+    print("✅ Ưu tiên br, rồi gzip, không thì gửi nguyên bản")
+
+
+if __name__ == "__main__":
+    try:
+        test_json_compression(install_fake)
+        test_static_assets()
+        test_server_static_routes()
+        test_negotiate()
+        print("\n🎉 TẤT CẢ CÁC BÀI TEST ĐÃ VƯỢT QUA!")
+    except Exception as e:
+        print(f"❌ LỖI KHI TEST: {e}")
+        sys.exit(1)
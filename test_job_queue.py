@@ -0,0 +1,150 @@
+import sys
+import os
+import time
+import threading
+
+# Thêm đường dẫn để có thể import từ thư mục hiện tại
+sys.path.append(os.getcwd())
+
+from flask import Flask
+from services.job_queue import JobQueue, QueueFullError
+from services import task_store
+from services.task_store import TaskStore
+
+
+class Recorder:
+    """Job giả: ghi lại thứ tự chạy và số job chạy đồng thời theo loại, chờ release() mới xong"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.order = []
+        self.running = {}
+        self.peak = {}
+        self.release = threading.Event()
+
+    def job(self, kind, name):
+        with self.lock:
+            self.order.append(name)
+            self.running[kind] = self.running.get(kind, 0) + 1
+            self.peak[kind] = max(self.peak.get(kind, 0), self.running[kind])
+        self.release.wait(5)
+        with self.lock:
+            self.running[kind] -= 1
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            raise AssertionError("hết thời gian chờ")
+        time.sleep(0.01)
+
+
+def test_limits_and_priorities():
+    print("--- ĐANG KIỂM TRA GIỚI HẠN THEO LOẠI VÀ ĐỘ ƯU TIÊN ---\n")
+    queue = JobQueue(workers=4, max_pending=20, limits={"upload": 1, "publish": 2})
+    rec = Recorder()
+    for i in range(3):
+        queue.submit("upload", rec.job, "upload", f"u{i}", job_id=f"u{i}")
+    for i in range(4):
+        queue.submit("publish", rec.job, "publish", f"p{i}", job_id=f"p{i}")
+    wait_until(lambda: len(rec.order) == 3)
+    time.sleep(0.05)
+    stats = queue.stats()
+    assert stats["running"] == {"upload": 1, "publish": 2} and stats["depth"] == 4
+    assert stats["pending"] == {"upload": 2, "publish": 2}
+    print("✅ 4 worker nhưng chỉ 1 upload + 2 publish chạy cùng lúc, publish không bị upload chặn")
+
+    # Job ưu tiên cao vượt lên đầu phần đang chờ của cùng loại
+    assert queue.submit("publish", rec.job, "publish", "p-high", job_id="p-high", priority="high") == 1
+    assert queue.position("p-high") == 1 and queue.position("p2") == 4 and queue.position("p0") is None
+    rec.release.set()
+    wait_until(lambda: queue.stats()["completed"] == 8)
+    publish_order = [name for name in rec.order if name.startswith("p")]
+    assert publish_order.index("p-high") < publish_order.index("p2")
+    assert rec.peak == {"upload": 1, "publish": 2}
+    print(f"✅ Ưu tiên cao chạy trước các job đang chờ; thứ tự publish: {publish_order}")
+
+
+def test_backpressure():
+    print("\n--- ĐANG KIỂM TRA TỪ CHỐI KHI HÀNG ĐỢI ĐẦY ---\n")
+    queue = JobQueue(workers=1, max_pending=2, limits={})
+    rec = Recorder()
+    queue.submit("publish", rec.job, "publish", "chay")
+    wait_until(lambda: rec.order == ["chay"])
+    assert queue.submit("publish", rec.job, "publish", "a") == 1
+    assert queue.submit("publish", rec.job, "publish", "b") == 2
+    try:
+        queue.submit("publish", rec.job, "publish", "c")
+        raise AssertionError("phải báo hàng đợi đầy")
+    except QueueFullError as e:
+        assert e.depth == 2 and e.position == 3
+    assert queue.stats()["rejected"] == 1
+    rec.release.set()
+    wait_until(lambda: queue.stats()["completed"] == 3)
+    print("✅ Quá max_pending -> QueueFullError kèm độ sâu và vị trí")
+
+    failing = JobQueue(workers=1, max_pending=5, limits={})
+    failing.submit("upload", lambda: 1 / 0)
+    failing.submit("upload", rec.job, "upload", "sau-loi")
+    wait_until(lambda: failing.stats()["completed"] == 1)
+    assert failing.stats()["failed"] == 1
+    print("✅ Job lỗi không làm chết worker")
+
+
+def test_routes_return_429():
+    print("\n--- ĐANG KIỂM TRA API ĐĂNG BÀI VỚI HÀNG ĐỢI ---\n")
+    import routes
+    originals = (routes.job_queue, task_store._store, routes.post_manager)
+    rec = Recorder()
+
+    class SlowManager:
+        def publish_item(self, sheet_name, index, task_id):
+            rec.job("publish", f"{sheet_name}:{index}")
+            return {"success": True, "post_id": f"POST_{index}"}
+
+    routes.job_queue = JobQueue(workers=1, max_pending=1, limits={"publish": 1})
+    task_store._store = TaskStore(":memory:")
+    routes.post_manager = SlowManager()
+    try:
+        app = Flask(__name__)
+        app.register_blueprint(routes.api_bp)
+        client = app.test_client()
+
+        first = client.post("/api/v2/post/publish", json={"sheet_name": "FB", "index": 1}).get_json()
+        wait_until(lambda: rec.order == ["FB:1"])
+        second = client.post("/api/v2/post/publish", json={"sheet_name": "FB", "index": 2}).get_json()
+        assert second["queue_position"] == 1
+        assert client.get(f"/api/tasks/{second['task_id']}").get_json()["queue_position"] == 1
+
+        rejected = client.post("/api/v2/post/publish", json={"sheet_name": "FB", "index": 3})
+        body = rejected.get_json()
+        assert rejected.status_code == 429 and rejected.headers["Retry-After"]
+        assert body["queue_depth"] == 1 and body["queue_position"] == 2
+        assert set(task_store._store.all()) == {first["task_id"], second["task_id"]}
+        print("✅ Hàng đợi đầy -> 429 kèm queue_position/queue_depth, không để lại tác vụ rác")
+
+        assert client.post("/api/v2/post/publish", json={"sheet_name": "FB", "index": 4,
+                                                         "priority": "gap"}).status_code == 400
+        metrics = client.get("/api/v2/metrics").get_json()["job_queue"]
+        assert metrics["depth"] == 1 and metrics["running"] == {"publish": 1} and metrics["rejected"] == 1
+        print("✅ /api/v2/metrics có độ sâu hàng đợi và số job đang chạy")
+
+        rec.release.set()
+        wait_until(lambda: task_store._store.get(second["task_id"])["status"] == "success")
+        assert task_store._store.get(first["task_id"])["result"]["post_id"] == "POST_1"
+        print("✅ Job trong hàng đợi chạy xong và cập nhật sổ tác vụ")
+    finally:
+        rec.release.set()
+        routes.job_queue, task_store._store, routes.post_manager = originals
+
+
+if __name__ == "__main__":
+    try:
+        test_limits_and_priorities()
+        test_backpressure()
+        test_routes_return_429()
+        print("\n🎉 TẤT CẢ CÁC BÀI TEST ĐÃ VƯỢT QUA!")
+    except Exception as e:
+        print(f"❌ LỖI KHI TEST: {e}")
+        sys.exit(1)
@@ -0,0 +1,133 @@
+import sys
+import os
+import json
+import time
+import tempfile
+import threading
+
+# Thêm đường dẫn để có thể import từ thư mục hiện tại
+sys.path.append(os.getcwd())
+
+import logic
+from services import content_index, task_store
+from services.content_index import ContentIndex
+from test_upload_stream import FakeRequest, FakeSheets
+
+UPLOAD_DELAY = 0.1  # giây giả lập cho mỗi lần upload một file
+
+
+class SlowDrive:
+    """Drive giả: mỗi upload tốn UPLOAD_DELAY giây; ghi lại thread gọi và số upload chạy đồng thời"""
+
+    def __init__(self, fail=None):
+        self.fail = fail
+        self.lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+        self.folder_threads = set()
+        self.upload_threads = set()
+
+    def files(self):
+        return self
+
+    def list(self, **kwargs):
+        return FakeRequest({"files": []})
+
+    def create(self, body, fields, media_body=None):
+        if media_body is None:
+            self.folder_threads.add(threading.get_ident())
+            time.sleep(UPLOAD_DELAY)
+            return FakeRequest({"id": f"FOLDER_{body['name']}"})
+        with self.lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        self.upload_threads.add(threading.get_ident())
+        try:
+            time.sleep(UPLOAD_DELAY)
+            if body["name"] == self.fail:
+                raise RuntimeError("Drive lỗi")
+        finally:
+            with self.lock:
+                self.running -= 1
+        return FakeRequest({"id": f"ID_{body['name']}", "webViewLink": f"https://drive/{body['name']}"}, media_body)
+
+
+def make_files(count, content_type="image/png"):
+    files = []
+    for i in range(count):
+        fd, path = tempfile.mkstemp(dir=logic.UPLOAD_FOLDER, prefix="upload_test_")
+        with os.fdopen(fd, "wb") as f:
+            f.write(f"x{i}".encode())
+        files.append({"path": path, "filename": f"anh_{i:02d}.png", "content_type": content_type})
+    return files
+
+
+def run(drive, files_data):
+    sheets = FakeSheets()
+    originals = (logic.get_creds, logic.get_service)
+    clients = {}
+
+    def get_service(name, version, creds):
+        # Ghi lại client được lấy ở thread nào (get_service thật cache client theo thread)
+        clients.setdefault(name, set()).add(threading.get_ident())
+        return drive if name == "drive" else sheets
+
+    logic.get_creds = lambda: None
+    logic.get_service = get_service
+    original_index, content_index._index = content_index._index, ContentIndex(":memory:")
+    try:
+        start = time.perf_counter()
+        logic.background_upload("task-parallel", {"parentId": "P", "folderName": "Lo"}, files_data)
+        return time.perf_counter() - start, sheets, clients
+    finally:
+        logic.get_creds, logic.get_service = originals
+        content_index._index = original_index
+
+
+def test_parallel_upload():
+    print("--- ĐANG KIỂM TRA UPLOAD SONG SONG TRONG TÁC VỤ NGẦM ---\n")
+    drive = SlowDrive()
+    files = make_files(20)
+    elapsed, sheets, clients = run(drive, {"files": files})
+    task = task_store.default_store().get("task-parallel")
+    assert task["status"] == "success", task
+
+    sequential = (20 + 2) * UPLOAD_DELAY
+    assert drive.max_running == logic.UPLOAD_WORKERS
+    assert elapsed < sequential / 2, f"{elapsed:.2f}s"
+    print(f"✅ 20 ảnh: {elapsed:.2f}s thay vì ~{sequential:.1f}s tuần tự, tối đa {drive.max_running} upload cùng lúc")
+
+    assert len(drive.folder_threads) == 2
+    assert len(drive.upload_threads) > 1 and threading.get_ident() not in drive.upload_threads
+    assert drive.upload_threads <= clients["drive"]
+    print("✅ Hai thư mục được tạo đồng thời, mỗi thread upload lấy Drive client riêng")
+
+    links = json.loads(sheets.appended[0][3])
+    assert links == [f"https://drive/anh_{i:02d}.png" for i in range(20)]
+    assert [f["status"] for f in task["files"]] == ["done"] * 20
+    assert task["files"][5] == {"name": "anh_05.png", "status": "done", "link": "https://drive/anh_05.png"}
+    assert not any(os.path.exists(f["path"]) for f in files)
+    print("✅ Link giữ đúng thứ tự gửi lên, bản ghi tác vụ có tiến độ từng file")
+
+
+def test_failure_cancels_rest():
+    print("\n--- ĐANG KIỂM TRA MỘT FILE LỖI ---\n")
+    drive = SlowDrive(fail="anh_00.png")
+    files = make_files(3 * logic.UPLOAD_WORKERS)
+    run(drive, {"files": files})
+    task = task_store.default_store().get("task-parallel")
+    statuses = [f["status"] for f in task["files"]]
+    assert task["status"] == "error" and statuses[0] == "error"
+    assert "cancelled" in statuses and "pending" not in statuses and "uploading" not in statuses
+    assert not any(os.path.exists(f["path"]) for f in files)
+    print(f"✅ Tác vụ báo lỗi, các file chưa bắt đầu bị hủy ({statuses.count('cancelled')} file), file tạm được dọn")
+
+
+if __name__ == "__main__":
+    try:
+        test_parallel_upload()
+        test_failure_cancels_rest()
+        print("\n🎉 TẤT CẢ CÁC BÀI TEST ĐÃ VƯỢT QUA!")
+    except Exception as e:
+        print(f"❌ LỖI KHI TEST: {e}")
+        sys.exit(1)
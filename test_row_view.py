@@ -0,0 +1,56 @@
+import sys
+import os
+import json
+
+# Thêm đường dẫn để có thể import từ thư mục hiện tại
+sys.path.append(os.getcwd())
+
+from models.row_view import view_class, rows_to_json
+from services.sheet_service import SheetService
+
+
+def test_views_match_to_dict():
+    print("--- ĐANG KIỂM TRA ROW VIEW KHỚP VỚI MODEL.TO_DICT ---\n")
+    for sheet_name in SheetService.MIRROR_TABS:
+        model = SheetService.get_model_by_name(sheet_name)
+        width = len(model.from_dict({}))
+        view = view_class(model)
+        for row in ([f"ô \"{i}\"" for i in range(width)], ["chỉ 1 ô"], []):
+            item = view(row)
+            assert item.to_dict() == model.to_dict(row), sheet_name
+            assert json.loads(item.to_json()) == model.to_dict(row), sheet_name
+            assert item.to_json() == json.dumps(model.to_dict(row), separators=(",", ":"))
+        print(f"✅ {sheet_name}: to_dict/to_json giống hệt Model")
+
+
+def test_attribute_access():
+    print("\n--- ĐANG KIỂM TRA TRUY CẬP THUỘC TÍNH VÀ VIEW LỒNG NHAU ---\n")
+    from models.Facebook_db import FacebookDbModel
+    row = FacebookDbModel.from_dict({"media_drive_id": "D1", "page": {"id": "P1"}, "status": "SCHEDULED"})
+    item = view_class(FacebookDbModel)(row)
+    assert item.media_drive_id == "D1" and item["status"] == "SCHEDULED"
+    assert item.page.id == "P1" and item["page"]["id"] == "P1"
+    assert item.get("khong_co", "x") == "x"
+    # View trỏ thẳng vào mảng gốc, không copy
+    row[FacebookDbModel.COL_CURRENT_STATUS] = "SUCCESS"
+    assert item.status == "SUCCESS"
+    try:
+        item.status = "ERROR"
+        assert False, "view phải chỉ đọc"
+    except AttributeError:
+        pass
+    assert not hasattr(item, "__dict__")
+    print("✅ row.page.id, row['status'], view chỉ đọc và dùng __slots__")
+
+    assert json.loads(rows_to_json([item, item])) == [item.to_dict()] * 2
+    print("✅ rows_to_json nối thành mảng JSON hợp lệ")
+
+
+if __name__ == "__main__":
+    try:
+        test_views_match_to_dict()
+        test_attribute_access()
+        print("\n🎉 TẤT CẢ CÁC BÀI TEST ĐÃ VƯỢT QUA!")
+    except Exception as e:
+        print(f"❌ LỖI KHI TEST: {e}")
+        sys.exit(1)
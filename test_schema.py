@@ -0,0 +1,113 @@
+import sys
+import os
+
+# Thêm đường dẫn để có thể import từ thư mục hiện tại
+sys.path.append(os.getcwd())
+
+from models.schema import Field, Schema, schema_model
+from models.Facebook_db import FacebookDbModel
+from models.Youtube_db import YoutubeDbModel
+from models.History_db import HistoryDbModel
+from models.media_calendar import MediaCalendarModel
+from sheet_fakes import install_fake, history_tab
+from services.sheet_service import SheetService
+
+
+@schema_model
+class DemoModel:
+    SCHEMA = Schema([
+        Field("name", 0, "COL_NAME", "Name"),
+        Field("page.token", 3, "COL_TOKEN", "Access Token"),
+        Field("page.id", 2, "COL_PAGE_ID", "Page_Id"),
+        Field("status", 1, "COL_STATUS", None, default="NEW"),
+    ])
+    to_dict = SCHEMA.reader()
+    from_dict = SCHEMA.writer()
+
+
+def test_generated_converters():
+    print("--- ĐANG KIỂM TRA BỘ CHUYỂN ĐỔI SINH TỪ SCHEMA ---\n")
+
+    # 1. Hằng số COL_* và độ rộng được gắn lên Model
+    assert (DemoModel.COL_NAME, DemoModel.COL_STATUS, DemoModel.COL_PAGE_ID, DemoModel.COL_TOKEN) == (0, 1, 2, 3)
+    assert DemoModel.WIDTH == 4
+    print("✅ Hằng số COL_* và WIDTH được sinh từ Schema")
+
+    # 2. to_dict: thứ tự khóa theo khai báo, hàng thiếu ô được đệm chuỗi rỗng, không sửa mảng gốc
+    row = ["A", "RUNNING"]
+    item = DemoModel.to_dict(row)
+    assert item == {"name": "A", "page": {"token": "", "id": ""}, "status": "RUNNING"}
+    assert list(item) == ["name", "page", "status"] and list(item["page"]) == ["token", "id"]
+    assert row == ["A", "RUNNING"]
+    assert DemoModel.to_dict(["A", "B", "C", "D", "THỪA"])["page"] == {"token": "D", "id": "C"}
+    print("✅ to_dict giữ thứ tự khóa và đệm hàng thiếu ô")
+
+    # 3. from_dict: mảng đủ độ rộng, giá trị mặc định theo Field
+    assert DemoModel.from_dict({}) == ["", "NEW", "", ""]
+    assert DemoModel.from_dict({"name": "A", "page": {"id": "P"}}) == ["A", "NEW", "P", ""]
+    assert DemoModel.from_dict(DemoModel.to_dict(["A", "B", "C", "D"])) == ["A", "B", "C", "D"]
+    assert HistoryDbModel.from_dict({})[HistoryDbModel.COL_STATUS] == "SUCCESS"
+    print("✅ from_dict ghi đúng cột và giá trị mặc định")
+
+    # 4. Các dạng rút gọn theo nền tảng của Media_Calendar
+    row = [str(i) for i in range(MediaCalendarModel.WIDTH)]
+    yt = MediaCalendarModel.to_youtube_dict(row)
+    assert "youtube" in yt and "facebook" not in yt and "tiktok" not in yt
+    assert yt["youtube"]["calendar"] == row[MediaCalendarModel.COL_YOUTUBE_CALENDAR]
+    assert MediaCalendarModel.to_facebook_dict(row)["facebook"]["post_type"] == row[MediaCalendarModel.COL_POST_TYPES]
+    print("✅ to_youtube_dict/to_facebook_dict dùng chung Schema")
+
+    # 5. Trùng path bị từ chối
+    try:
+        Schema([Field("a", 0, "COL_A"), Field("a", 1, "COL_B")])
+        raise AssertionError("Schema phải báo lỗi khi trùng path")
+    except ValueError:
+        pass
+    print("✅ Schema báo lỗi khi khai báo trùng trường")
+
+
+def test_columns_and_header(fake_sheets):
+    print("\n--- ĐANG KIỂM TRA PROJECTION VÀ KIỂM TRA TIÊU ĐỀ ---\n")
+
+    assert HistoryDbModel.SCHEMA.columns("Status", "Page_Id") == [HistoryDbModel.COL_STATUS, HistoryDbModel.COL_PAGE_ID]
+    assert YoutubeDbModel.SCHEMA.columns("channel.gmail") == [YoutubeDbModel.COL_GMAIL_CHANNEL]
+    print("✅ columns() trả về chỉ số cột theo tên trường")
+
+    # Tiêu đề thật (khác hoa/thường, khoảng trắng/gạch dưới vẫn coi là khớp)
+    assert HistoryDbModel.SCHEMA.validate_header(history_tab()[0]) == []
+    assert DemoModel.SCHEMA.validate_header(["name", "x", "page id", "access_token"]) == []
+    problems = DemoModel.SCHEMA.validate_header(["Name", "", "Access Token"])
+    assert len(problems) == 2
+    assert any("cột 3" in p and "Page_Id" in p for p in problems) and any("cột 4" in p for p in problems)
+    print("✅ validate_header phát hiện cột bị đổi chỗ/thiếu")
+
+    # SheetService cảnh báo một lần khi tải tab có tiêu đề lệch
+    header = list(history_tab()[0])
+    header[3], header[4] = header[4], header[3]
+    fake_sheets({"Published_History": [header] + history_tab()[1:]})
+    SheetService._header_warned.clear()
+    SheetService.get_all_rows("Published_History")
+    assert "Published_History" in SheetService._header_warned
+    print("✅ SheetService ghi nhận tab có tiêu đề lệch Schema")
+
+
+def test_model_headers():
+    print("\n--- ĐANG KIỂM TRA TIÊU ĐỀ KHAI BÁO CỦA CÁC MODEL ---\n")
+    fb_header = ["STT", "Id_media_on_drive", "Name_video", "Video_url", "Type_conten", "Hook", "Body_content",
+                 "CTA_text", "Contact_me", "Product_hashtag", "Brand_hashtag", "Thumbnail_url", "Page_name",
+                 "Page_Id", "Access_token", "Post_type", "Calendar", "Completion_time", "Link_post_on_facebook",
+                 "Post_Id", "Curent_Status", "Scrip_action"]
+    assert FacebookDbModel.SCHEMA.validate_header(fb_header) == []
+    assert len(FacebookDbModel.from_dict({})) == len(fb_header)
+    print("✅ Schema Facebook_db khớp tiêu đề trên Sheets")
+
+
+if __name__ == "__main__":
+    try:
+        test_generated_converters()
+        test_columns_and_header(install_fake)
+        test_model_headers()
+        print("\n🎉 TẤT CẢ CÁC BÀI TEST ĐÃ VƯỢT QUA!")
+    except Exception as e:
+        print(f"❌ LỖI KHI TEST: {e}")
+        sys.exit(1)
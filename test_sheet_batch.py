@@ -0,0 +1,216 @@
+import sys
+import os
+
+# Thêm đường dẫn để có thể import từ thư mục hiện tại
+sys.path.append(os.getcwd())
+
+from services.sheet_service import SheetService, RowConflictError
+from sheet_fakes import install_fake, history_tab
+
+
+def test_batch_update_rows(fake_sheets):
+    print("--- ĐANG KIỂM TRA BATCH UPDATE NHIỀU HÀNG ---\n")
+    fake = fake_sheets({"Published_History": history_tab()})
+
+    rows = SheetService.get_all_rows("Published_History")
+    for item in rows:
+        item["Status"] = "SUCCESS"
+    SheetService.batch_update_rows("Published_History", dict(enumerate(rows)))
+
+    assert fake.calls["values.batchUpdate"] == 1
+    assert fake.calls["update"] == 0
+    assert all(r["Status"] == "SUCCESS" for r in SheetService.get_all_rows("Published_History"))
+    print("✅ N hàng chỉ tốn một lần gọi values.batchUpdate")
+
+
+def test_unit_of_work(fake_sheets):
+    print("\n--- ĐANG KIỂM TRA UNIT OF WORK ---\n")
+    fake = fake_sheets({"Published_History": history_tab()})
+    rows = SheetService.get_all_rows("Published_History")
+
+    # 1. Chưa thoát khối lệnh thì chưa ghi gì
+    with SheetService.unit_of_work() as uow:
+        rows[0]["Status"] = "SUCCESS"
+        uow.update_row("Published_History", 0, rows[0])
+        rows[0]["Name_video"] = "Ghi lần 2"
+        uow.update_row("Published_History", 0, rows[0])
+        assert fake.calls["values.batchUpdate"] == 0
+        assert len(uow) == 1
+    assert fake.calls["values.batchUpdate"] == 1
+    assert SheetService.get_all_rows("Published_History")[0]["Name_video"] == "Ghi lần 2"
+    print("✅ Thay đổi được gom và ghi một lần khi kết thúc (ghi sau cùng thắng)")
+
+    # 2. Có lỗi trong khối lệnh thì bỏ toàn bộ thay đổi
+    try:
+        with SheetService.unit_of_work() as uow:
+            uow.update_row("Published_History", 1, {"Status": "ERROR"})
+            raise RuntimeError("lỗi giữa chừng")
+    except RuntimeError:
+        pass
+    assert fake.calls["values.batchUpdate"] == 1
+    assert SheetService.get_all_rows("Published_History")[1]["Status"] == "SUCCESS"
+    print("✅ Lỗi trong khối lệnh -> không ghi gì")
+
+
+def test_delete_rows(fake_sheets):
+    print("\n--- ĐANG KIỂM TRA XÓA NHIỀU HÀNG ---\n")
+    tab = history_tab()
+    for i in range(3, 9):
+        tab.append([f"DRIVE_{i}", f"Video {i}"] + [""] * 11 + ["SUCCESS"])
+    fake = fake_sheets({"Published_History": tab})
+    requests_sent = []
+    original_batch_update = fake.batchUpdate
+    fake.batchUpdate = lambda spreadsheetId=None, body=None: requests_sent.extend(body["requests"]) or original_batch_update(spreadsheetId, body)
+
+    # Hàng DRIVE_1..DRIVE_8 có row_index 0..7; xóa 1,2,3 và 5,6 (chỉ số theo dữ liệu trước khi xóa)
+    deleted = SheetService.delete_rows("Published_History", [6, 1, 3, 2, 5, 3])
+    assert deleted == 5
+    assert fake.calls["batchUpdate"] == 1 and len(requests_sent) == 2
+    assert [(r["deleteDimension"]["range"]["startIndex"], r["deleteDimension"]["range"]["endIndex"]) for r in requests_sent] == [(6, 8), (2, 5)]
+    ids = [r["Id_media_on_drive"] for r in SheetService.get_all_rows("Published_History")]
+    assert ids == ["DRIVE_1", "DRIVE_5", "DRIVE_8"]
+    print("✅ 5 hàng, 2 dải liền nhau -> một batchUpdate với 2 deleteDimension (xóa từ dưới lên)")
+
+
+def test_append_rows(fake_sheets):
+    print("\n--- ĐANG KIỂM TRA THÊM NHIỀU HÀNG ---\n")
+    fake = fake_sheets({"Published_History": history_tab()})
+
+    row_indices = SheetService.append_rows("Published_History", [
+        {"Id_media_on_drive": "DRIVE_3", "Status": "SCHEDULED"},
+        {"Id_media_on_drive": "DRIVE_4", "Status": "SCHEDULED"},
+        {"Id_media_on_drive": "DRIVE_5", "Status": "SCHEDULED"},
+    ])
+    assert fake.calls["append"] == 1
+    assert row_indices == [2, 3, 4]
+    rows = SheetService.get_all_rows("Published_History")
+    assert [rows[i]["Id_media_on_drive"] for i in row_indices] == ["DRIVE_3", "DRIVE_4", "DRIVE_5"]
+    assert SheetService._row_indices_of("'My tab'!A7:V7") == [5]
+    print("✅ N hàng -> một values.append, trả về row_index lấy từ updatedRange")
+
+
+def test_patch_row(fake_sheets):
+    print("\n--- ĐANG KIỂM TRA CẬP NHẬT TỪNG Ô (PATCH) ---\n")
+    fake = fake_sheets({"Published_History": history_tab()})
+    ranges = []
+    original_batch_update = fake._values.batchUpdate
+    fake._values.batchUpdate = lambda spreadsheetId=None, body=None: ranges.extend(
+        d["range"] for d in body["data"]) or original_batch_update(spreadsheetId, body)
+
+    # 1. Chỉ ô thay đổi được gửi đi; cột khác (kể cả vừa bị người khác sửa) giữ nguyên
+    SheetService.get_all_rows("Published_History")
+    fake.tabs["Published_History"][1][1] = "Tên do người khác sửa"
+    columns = SheetService.patch_row("Published_History", 0, {"Status": "SUCCESS"})
+    assert columns == [13] and ranges == ["Published_History!N2"]
+    assert fake.tabs["Published_History"][1][1] == "Tên do người khác sửa"
+    assert fake.tabs["Published_History"][1][13] == "SUCCESS"
+    print("✅ Chỉ ghi ô Status, không ghi đè cột khác")
+
+    # 2. Không có gì thay đổi -> không gọi API
+    calls = fake.calls["values.batchUpdate"]
+    assert SheetService.patch_row("Published_History", 0, {"Status": "SUCCESS"}) == []
+    assert fake.calls["values.batchUpdate"] == calls
+    print("✅ Không thay đổi -> không ghi")
+
+    # 3. expected: trường đã đổi -> xung đột; trường không đổi -> ghi song song cột khác
+    try:
+        SheetService.patch_row("Published_History", 1, {"Status": "ERROR"}, expected={"Status": "SCHEDULED"})
+        assert False, "phải báo xung đột"
+    except RowConflictError as e:
+        assert e.current["Status"] == "SUCCESS"
+    assert fake.tabs["Published_History"][2][13] == "SUCCESS"
+    SheetService.patch_row("Published_History", 1, {"Thumbnail": "thumb.jpg"}, expected={"Youtube_Post_Id": "YT_2"})
+    assert fake.tabs["Published_History"][2][11] == "thumb.jpg"
+    print("✅ expected khác giá trị trên Sheets -> RowConflictError, khớp -> ghi")
+
+
+def test_status_check_keeps_partial_results(fake_sheets):
+    print("\n--- ĐANG KIỂM TRA QUÉT TRẠNG THÁI LỖI GIỮA CHỪNG ---\n")
+    from post_service import manager
+    def scheduled_tab():
+        tab = history_tab()
+        for i in (3, 4):
+            tab.append([f"DRIVE_{i}", f"Video {i}", "Video", "Page", "P1", "T", f"FB_{i}"] + [""] * 6 + ["SCHEDULED"])
+        return tab
+    fake = fake_sheets({"Published_History": scheduled_tab()})
+
+    class FakePublisher:
+        def __init__(self, page_id, token):
+            pass
+
+        def _make_request(self, post_id, method="GET", params=None):
+            if post_id == "FB_3":
+                raise ConnectionError("mạng lỗi")
+            return {"success": True, "data": {"published": True, "is_published": True}}
+
+    original = manager.FacebookPublisher
+    manager.FacebookPublisher = FakePublisher
+    try:
+        manager.PostManager().check_status_recur()
+    finally:
+        manager.FacebookPublisher = original
+    statuses = [row[13] for row in fake.tabs["Published_History"][1:]]
+    assert statuses == ["SUCCESS", "SUCCESS", "SCHEDULED", "SUCCESS"], statuses
+    assert fake.calls["values.batchUpdate"] == 1
+    print("✅ Một bài lỗi khi kiểm tra không làm mất cập nhật của các bài khác (vẫn một batchUpdate)")
+
+    class Interrupted(BaseException):
+        pass
+
+    fake = fake_sheets({"Published_History": scheduled_tab()})
+    pm = manager.PostManager()
+    checked = []
+
+    def is_live(item):
+        if checked:
+            raise Interrupted()
+        checked.append(item)
+        return True
+    pm._is_live = is_live
+    try:
+        pm.check_status_recur()
+        assert False, "phải dừng giữa chừng"
+    except Interrupted:
+        pass
+    assert fake.tabs["Published_History"][1][13] == "SUCCESS"
+    print("✅ Vòng quét bị dừng hẳn giữa chừng vẫn ghi các thay đổi đã gom")
+
+
+def test_status_check_after_rows_shift(fake_sheets):
+    print("\n--- ĐANG KIỂM TRA QUÉT TRẠNG THÁI KHI HÀNG BỊ DỊCH GIỮA CHỪNG ---\n")
+    from post_service import manager
+    tab = history_tab()
+    for i in (3, 4):
+        tab.append([f"DRIVE_{i}", f"Video {i}", "Video", "Page", "P1", "T", f"FB_{i}"] + [""] * 6 + ["SCHEDULED"])
+    fake = fake_sheets({"Published_History": tab})
+    pm = manager.PostManager()
+
+    def is_live(item):
+        # Trong lúc đang gọi FB/YT, hàng DRIVE_2 bị xóa (xoay vòng / người dùng): các hàng sau dịch lên 1
+        if len(fake.tabs["Published_History"]) == 5:
+            del fake.tabs["Published_History"][2]
+        return item["Facebook_Post_Id"] in ("FB_3", "FB_4")
+    pm._is_live = is_live
+    pm.check_status_recur()
+
+    rows = fake.tabs["Published_History"][1:]
+    assert [(row[0], row[13]) for row in rows] == [
+        ("DRIVE_1", "SCHEDULED"), ("DRIVE_3", "SUCCESS"), ("DRIVE_4", "SUCCESS")
+    ], rows
+    assert fake.calls["values.batchUpdate"] == 1
+    print("✅ Trạng thái được ghi theo khóa bài đăng vào đúng hàng hiện tại, không theo chỉ số lúc bắt đầu quét")
+
+
+if __name__ == "__main__":
+    try:
+        test_batch_update_rows(install_fake)
+        test_unit_of_work(install_fake)
+        test_delete_rows(install_fake)
+        test_append_rows(install_fake)
+        test_patch_row(install_fake)
+        test_status_check_keeps_partial_results(install_fake)
+        test_status_check_after_rows_shift(install_fake)
+        print("\n🎉 TẤT CẢ CÁC BÀI TEST ĐÃ VƯỢT QUA!")
+    except Exception as e:
+        print(f"❌ LỖI KHI TEST: {e}")
+        sys.exit(1)
@@ -0,0 +1,121 @@
+import sys
+import os
+
+# Thêm đường dẫn để có thể import từ thư mục hiện tại
+sys.path.append(os.getcwd())
+
+from services.sheet_service import SheetService
+from sheet_fakes import install_fake, history_tab
+
+
+def test_read_through_cache(fake_sheets):
+    print("--- ĐANG KIỂM TRA CACHE ĐỌC CỦA SHEETSERVICE ---\n")
+    fake = fake_sheets({"Published_History": history_tab()})
+
+    # 1. Lần đọc đầu gọi API, các lần sau lấy từ cache
+    rows = SheetService.get_all_rows("Published_History")
+    rows_again = SheetService.get_all_rows("Published_History")
+    assert rows == rows_again and len(rows) == 2
+    assert fake.calls["get"] == 1
+    stats = SheetService.cache_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    print("✅ Đọc lặp lại không gọi lại Sheets API")
+
+    # 2. Sửa dict trả về không làm hỏng cache
+    rows[0]["Status"] = "ĐÃ SỬA TẠM"
+    assert SheetService.get_all_rows("Published_History")[0]["Status"] == "SCHEDULED"
+    print("✅ Dữ liệu cache không bị thay đổi bởi người gọi")
+
+    # 3. Ghi xong đọc lại thấy ngay (read-your-writes)
+    item = SheetService.get_all_rows("Published_History")[0]
+    item["Status"] = "SUCCESS"
+    SheetService.update_row("Published_History", 0, item)
+    assert SheetService.get_all_rows("Published_History")[0]["Status"] == "SUCCESS"
+    assert fake.calls["get"] == 2
+
+    SheetService.append_row("Published_History", {"Id_media_on_drive": "DRIVE_3", "Status": "SCHEDULED"})
+    assert len(SheetService.get_all_rows("Published_History")) == 3
+    assert fake.calls["get"] == 3
+    print("✅ update_row/append_row vô hiệu hóa cache")
+
+    SheetService.delete_row("Published_History", 2)
+    SheetService.get_all_rows("Published_History")
+    assert fake.calls["get"] == 4
+    print("✅ delete_row vô hiệu hóa cache")
+
+
+def test_cache_ttl(fake_sheets):
+    print("\n--- ĐANG KIỂM TRA TTL CỦA CACHE ---\n")
+    fake = fake_sheets({"Published_History": history_tab()})
+    original_ttl = SheetService.CACHE_TTL
+    try:
+        SheetService.CACHE_TTL = 0
+        SheetService.get_all_rows("Published_History")
+        SheetService.get_all_rows("Published_History")
+        assert fake.calls["get"] == 2
+        print("✅ TTL=0 tắt cache")
+    finally:
+        SheetService.CACHE_TTL = original_ttl
+
+
+def test_single_row_reads(fake_sheets):
+    print("\n--- ĐANG KIỂM TRA ĐỌC MỘT HÀNG / MỘT DẢI HÀNG ---\n")
+    fake = fake_sheets({"Published_History": history_tab()})
+    ranges = []
+    original_read = fake.read
+    fake.read = lambda a1_range: ranges.append(a1_range) or original_read(a1_range)
+
+    # 1. Chưa có cache -> chỉ đọc đúng dải của hàng cần lấy
+    item = SheetService.get_row("Published_History", 1)
+    assert item["Youtube_Post_Id"] == "YT_2"
+    assert ranges == ["Published_History!A3:O3"]
+    assert SheetService.get_row("Published_History", 5) is None
+    assert [r["Status"] for r in SheetService.get_rows("Published_History", 0, 2)] == ["SCHEDULED", "SUCCESS"]
+    assert ranges[-1] == "Published_History!A2:O3"
+    print("✅ get_row/get_rows chỉ tải dải A1 cần thiết")
+
+    # 2. Có cache còn hạn -> không gọi API
+    SheetService.get_all_rows("Published_History")
+    calls = fake.calls["get"]
+    assert SheetService.get_row("Published_History", 0)["Facebook_Post_Id"] == "FB_1"
+    assert [r["Id_media_on_drive"] for r in SheetService.get_rows("Published_History", 1, 5)] == ["DRIVE_2"]
+    assert SheetService.get_row("Published_History", 5) is None
+    assert fake.calls["get"] == calls
+    print("✅ get_row dùng cache khi còn hạn")
+
+
+def test_column_projection(fake_sheets):
+    print("\n--- ĐANG KIỂM TRA ĐỌC THEO CỘT (COLUMN PROJECTION) ---\n")
+    from models.History_db import HistoryDbModel
+    fake = fake_sheets({"Published_History": history_tab()})
+
+    rows = SheetService.get_all_rows("Published_History", columns=[
+        HistoryDbModel.COL_STATUS, HistoryDbModel.COL_PAGE_ID, HistoryDbModel.COL_ACCESS_TOKEN,
+        HistoryDbModel.COL_FACEBOOK_POST_ID, HistoryDbModel.COL_YOUTUBE_POST_ID
+    ])
+    assert fake.calls["get"] == 0 and fake.calls["batchGet"] == 1
+    # Cột liền kề (E:G) được gộp thành một dải
+    assert fake.batch_get_ranges[0] == ["Published_History!E2:G", "Published_History!K2:K", "Published_History!N2:N"]
+    assert [r["Status"] for r in rows] == ["SCHEDULED", "SUCCESS"]
+    assert rows[0]["Facebook_Post_Id"] == "FB_1" and rows[1]["Youtube_Post_Id"] == "YT_2"
+    assert rows[0]["Name_video"] == ""
+    print("✅ Chỉ tải các cột cần thiết, kết quả vẫn là dict theo Model")
+
+    # Ghi từng ô: chỉ cột Status thay đổi
+    with SheetService.unit_of_work() as uow:
+        uow.update_cells("Published_History", 0, {HistoryDbModel.COL_STATUS: "SUCCESS"})
+    assert fake.tabs["Published_History"][1][13] == "SUCCESS"
+    assert fake.tabs["Published_History"][1][1] == "Video 1"
+    print("✅ update_cells chỉ ghi đúng ô cần đổi")
+
+
+if __name__ == "__main__":
+    try:
+        test_read_through_cache(install_fake)
+        test_cache_ttl(install_fake)
+        test_single_row_reads(install_fake)
+        test_column_projection(install_fake)
+        print("\n🎉 TẤT CẢ CÁC BÀI TEST ĐÃ VƯỢT QUA!")
+    except Exception as e:
+        print(f"❌ LỖI KHI TEST: {e}")
+        sys.exit(1)
@@ -0,0 +1,59 @@
+import sys
+import os
+
+# Thêm đường dẫn để có thể import từ thư mục hiện tại
+sys.path.append(os.getcwd())
+
+from services.sheet_service import SheetService
+from sheet_fakes import install_fake, history_tab
+
+
+def test_get_by_key(fake_sheets):
+    print("--- ĐANG KIỂM TRA TRA CỨU HÀNG THEO KHÓA ---\n")
+    fake = fake_sheets({"Published_History": history_tab()})
+
+    row_index, data = SheetService.get_by_key("Published_History", "Youtube_Post_Id", "YT_2")
+    assert row_index == 1 and data["Name_video"] == "Video 2"
+    assert SheetService.get_by_key("Published_History", "Facebook_Post_Id", "KHONG_CO") is None
+    # Các lần tra cứu sau dùng lại chỉ mục, không gọi lại API
+    SheetService.get_by_key("Published_History", "Facebook_Post_Id", "FB_1")
+    assert fake.calls["get"] == 1
+    print("✅ get_by_key trả về đúng hàng, chỉ mục dựng một lần")
+
+    try:
+        SheetService.get_by_key("Published_History", "Status", "SUCCESS")
+        assert False, "Phải báo lỗi với trường không phải khóa"
+    except ValueError:
+        print("✅ Trường không khai báo trong KEY_FIELDS bị từ chối")
+
+
+def test_write_by_key_after_shift(fake_sheets):
+    print("\n--- ĐANG KIỂM TRA GHI THEO KHÓA KHI HÀNG BỊ DỊCH CHUYỂN ---\n")
+    fake = fake_sheets({"Published_History": history_tab()})
+    SheetService.get_all_rows("Published_History")  # nạp cache
+
+    # Một nơi khác xóa hàng đầu tiên ngay trên Sheet -> cache đang lệch vị trí
+    del fake.tabs["Published_History"][1]
+
+    row_index = SheetService.update_by_key(
+        "Published_History", "Youtube_Post_Id", "YT_2",
+        {"Youtube_Post_Id": "YT_2", "Name_video": "Đã sửa", "Status": "SUCCESS"}
+    )
+    assert row_index == 0
+    assert fake.tabs["Published_History"][1][1] == "Đã sửa"
+    print("✅ update_by_key phát hiện lệch vị trí và ghi vào đúng hàng vật lý")
+
+    assert SheetService.delete_by_key("Published_History", "Youtube_Post_Id", "YT_2") == 0
+    assert len(fake.tabs["Published_History"]) == 1
+    assert SheetService.delete_by_key("Published_History", "Youtube_Post_Id", "YT_2") is None
+    print("✅ delete_by_key xóa đúng hàng và trả về None khi không còn khóa")
+
+
+if __name__ == "__main__":
+    try:
+        test_get_by_key(install_fake)
+        test_write_by_key_after_shift(install_fake)
+        print("\n🎉 TẤT CẢ CÁC BÀI TEST ĐÃ VƯỢT QUA!")
+    except Exception as e:
+        print(f"❌ LỖI KHI TEST: {e}")
+        sys.exit(1)
@@ -0,0 +1,104 @@
+import sys
+import os
+import json
+import sqlite3
+import tempfile
+
+# Thêm đường dẫn để có thể import từ thư mục hiện tại
+sys.path.append(os.getcwd())
+
+from services.sheet_service import SheetService
+from services.sheet_mirror import SheetMirror
+from models.History_db import HistoryDbModel
+from sheet_fakes import install_fake, history_tab
+
+
+def test_mirror_reads_and_write_through(fake_sheets):
+    print("--- ĐANG KIỂM TRA MIRROR SQLITE ---\n")
+    fake = fake_sheets({"Published_History": history_tab()})
+    mirror = SheetService.enable_mirror(":memory:")
+    try:
+        # 1. Lần đầu tải từ Sheets và nạp vào mirror; sau đó đọc từ mirror
+        assert len(SheetService.get_all_rows("Published_History")) == 2
+        SheetService.invalidate_cache("Published_History", remote_changed=False)
+        rows = SheetService.get_all_rows("Published_History")
+        assert rows[1]["Youtube_Post_Id"] == "YT_2"
+        assert fake.calls["get"] == 1 and SheetService.cache_stats()["mirror_reads"] == 1
+        print("✅ Đọc lại lấy từ mirror, không gọi Sheets API")
+
+        # 2. Ghi đi cả Sheets và mirror
+        rows[0]["Status"] = "SUCCESS"
+        SheetService.update_row("Published_History", 0, rows[0])
+        assert fake.tabs["Published_History"][1][13] == "SUCCESS"
+        assert SheetService.get_all_rows("Published_History")[0]["Status"] == "SUCCESS"
+        SheetService.append_row("Published_History", {"Id_media_on_drive": "DRIVE_3", "Status": "SCHEDULED"})
+        SheetService.delete_row("Published_History", 0)
+        ids = [r["Id_media_on_drive"] for r in SheetService.get_all_rows("Published_History")]
+        assert ids == ["DRIVE_2", "DRIVE_3"]
+        assert fake.calls["get"] == 1
+        print("✅ update/append/delete ghi xuyên xuống mirror (đọc lại không cần gọi API)")
+
+        # 3. Truy vấn SQL trực tiếp trên bảng sinh từ Model
+        found = mirror.query('SELECT row_index, id_media_on_drive FROM "Published_History" WHERE status = ?', ("SCHEDULED",))
+        assert found == [{"row_index": 1, "id_media_on_drive": "DRIVE_3"}]
+        print("✅ Truy vấn SQL theo tên cột sinh từ COL_*")
+
+        # 4. Sửa tay trên Sheets -> reconcile kéo về bằng một lần batchGet
+        fake.tabs["Published_History"][1][1] = "Sửa trên Sheets"
+        fake.drive.version = "2"
+        assert "Published_History" in SheetService.reconcile_mirror()
+        assert fake.calls["batchGet"] == 1
+        assert SheetService.get_all_rows("Published_History")[0]["Name_video"] == "Sửa trên Sheets"
+        assert SheetService.reconcile_mirror() == []
+        assert fake.calls["batchGet"] == 1
+        print("✅ reconcile_mirror chỉ tải lại khi Drive version đổi")
+
+        # 5. Ghi ngoài SheetService (route cũ) -> mirror bị stale và đọc lại từ Sheets
+        SheetService.invalidate_cache()
+        SheetService.get_all_rows("Published_History")
+        assert fake.calls["get"] == 2
+        print("✅ invalidate_cache() đánh dấu mirror cần tải lại")
+    finally:
+        SheetService.disable_mirror()
+
+
+def test_mirror_schema_change():
+    print("\n--- ĐANG KIỂM TRA MIRROR CŨ KHI MODEL THÊM CỘT ---\n")
+    columns = SheetMirror.columns_of(HistoryDbModel)
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "mirror.db")
+        # File mirror tạo trước khi History có cột Published_At (thiếu cột cuối), đang đánh dấu đồng bộ
+        conn = sqlite3.connect(path)
+        old = columns[:-1]
+        conn.execute("CREATE TABLE _mirror_tabs (name TEXT PRIMARY KEY, header TEXT, version TEXT, "
+                     "synced_at REAL, stale INTEGER DEFAULT 0)")
+        conn.execute('CREATE TABLE "Published_History" (row_index INTEGER NOT NULL, '
+                     + ", ".join(f'"{c}" TEXT' for c in old) + ")")
+        conn.execute('INSERT INTO "Published_History" VALUES (' + ", ".join("?" for _ in range(len(old) + 1)) + ")",
+                     [0, "DRIVE_OLD"] + [""] * (len(old) - 1))
+        conn.execute("INSERT INTO _mirror_tabs VALUES (?, ?, ?, ?, 0)",
+                     ("Published_History", json.dumps(history_tab()[0][:-1]), "1", 0))
+        conn.commit()
+        conn.close()
+
+        mirror = SheetMirror(path, {"Published_History": HistoryDbModel})
+        assert mirror.tab_state("Published_History") is None
+        assert mirror.read_values("Published_History") is None
+        mirror.replace_tab("Published_History", history_tab(), version="2")
+        assert mirror.read_values("Published_History") == history_tab()
+        mirror._conn.close()
+
+        reopened = SheetMirror(path, {"Published_History": HistoryDbModel})
+        assert reopened.read_values("Published_History") == history_tab()
+        reopened._conn.close()
+    print("✅ Bảng mirror có bộ cột cũ được dựng lại và tải lại từ Sheets; mở lại với cùng Model giữ nguyên dữ liệu")
+
+
+if __name__ == "__main__":
+    try:
+        test_mirror_reads_and_write_through(install_fake)
+        test_mirror_schema_change()
+        print("\n🎉 TẤT CẢ CÁC BÀI TEST ĐÃ VƯỢT QUA!")
+    except Exception as e:
+        print(f"❌ LỖI KHI TEST: {e}")
+        sys.exit(1)
@@ -0,0 +1,113 @@
+import sys
+import os
+
+# Thêm đường dẫn để có thể import từ thư mục hiện tại
+sys.path.append(os.getcwd())
+
+from flask import Flask
+from models.Facebook_db import FacebookDbModel
+from services.sheet_service import SheetService
+from sheet_fakes import install_fake, history_tab
+
+
+def facebook_tab():
+    rows = [
+        {"media_drive_id": "D1", "status": "SCHEDULED", "calendar": "20/05/2025 09:00"},
+        {"media_drive_id": "D2", "status": "SUCCESS", "calendar": "2025-05-18 08:30"},
+        {"media_drive_id": "D3", "status": "scheduled", "calendar": ""},
+        {"media_drive_id": "D4", "status": "ERROR", "calendar": "01/06/2025 10:00"},
+        {"media_drive_id": "D5", "status": "SCHEDULED", "calendar": "19/05/2025 23:00"},
+    ]
+    return [["header"]] + [FacebookDbModel.from_dict(r) for r in rows]
+
+
+def test_filter_sort_paginate(fake_sheets):
+    print("--- ĐANG KIỂM TRA LỌC / SẮP XẾP / PHÂN TRANG PHÍA SERVER ---\n")
+    fake = fake_sheets({"Facebook_db": facebook_tab()})
+
+    # 1. Lọc trạng thái (không phân biệt hoa thường), giữ nguyên row_index gốc
+    result = SheetService.query_rows("Facebook_db", status="scheduled")
+    assert result["total"] == 3
+    assert [i["row_index"] for i in result["items"]] == [0, 2, 4]
+    print("✅ status= lọc đúng và trả về row_index gốc")
+
+    # 2. Khoảng thời gian hiểu cả hai định dạng ngày, calendar_to chỉ có ngày tính hết ngày
+    result = SheetService.query_rows("Facebook_db", calendar_from="2025-05-19", calendar_to="20/05/2025")
+    assert [i["media_drive_id"] for i in result["items"]] == ["D1", "D5"]
+    print("✅ calendar_from/calendar_to lọc theo thời gian thực, không theo chuỗi")
+
+    # 3. Sắp xếp theo calendar, hàng không có lịch luôn nằm cuối
+    result = SheetService.query_rows("Facebook_db", sort="-calendar")
+    assert [i["media_drive_id"] for i in result["items"]] == ["D4", "D1", "D5", "D2", "D3"]
+    print("✅ sort=-calendar sắp xếp giảm dần")
+
+    # 4. Phân trang bằng cursor
+    page1 = SheetService.query_rows("Facebook_db", sort="calendar", limit="2")
+    page2 = SheetService.query_rows("Facebook_db", sort="calendar", limit="2", cursor=page1["next_cursor"])
+    page3 = SheetService.query_rows("Facebook_db", sort="calendar", limit="2", cursor=page2["next_cursor"])
+    ids = [i["media_drive_id"] for p in (page1, page2, page3) for i in p["items"]]
+    assert ids == ["D2", "D5", "D1", "D4", "D3"]
+    assert page1["total"] == 5 and page3["next_cursor"] is None
+    print("✅ limit/cursor duyệt hết dữ liệu, trang cuối không có next_cursor")
+
+    # Tất cả truy vấn trên đều dùng chung một lần tải từ Sheets
+    assert fake.calls["get"] == 1
+    print("✅ Truy vấn chạy trên dữ liệu cache, không gọi lại API")
+
+
+def test_platform_and_route(fake_sheets):
+    print("\n--- ĐANG KIỂM TRA BỘ LỌC PLATFORM VÀ ROUTE ---\n")
+    import routes
+    fake_sheets({"Published_History": history_tab()})
+    app = Flask(__name__)
+    app.register_blueprint(routes.api_bp)
+    client = app.test_client()
+
+    res = client.get("/api/v2/sheets/Published_History?platform=youtube")
+    assert res.status_code == 200
+    assert res.json["total"] == 1 and res.json["items"][0]["Youtube_Post_Id"] == "YT_2"
+    print("✅ platform=youtube trả về dạng {items, total, next_cursor}")
+
+    # Không có tham số -> giữ nguyên dạng danh sách như trước
+    assert isinstance(client.get("/api/v2/sheets/Published_History").json, list)
+    # Bộ lọc không được hỗ trợ bởi bảng -> 400
+    assert client.get("/api/v2/sheets/Published_History?calendar_from=2025-01-01").status_code == 400
+    assert client.get("/api/v2/sheets/Published_History?limit=abc").status_code == 400
+    print("✅ Tương thích ngược và báo lỗi 400 với tham số không hợp lệ")
+
+
+def test_invalid_sort_and_platform(fake_sheets):
+    print("\n--- ĐANG KIỂM TRA TRƯỜNG SẮP XẾP / PLATFORM KHÔNG HỢP LỆ ---\n")
+    import routes
+    fake_sheets({"Facebook_db": facebook_tab(), "Facebook_Config": [["header"], ["Page", "P1", "T"]]})
+    result = SheetService.query_rows("Facebook_db", sort="-status")
+    assert [i["status"] for i in result["items"]][:2] == ["scheduled", "SUCCESS"]
+    print("✅ sort theo bộ lọc trong QUERY_FIELDS (status) vẫn dùng được")
+
+    for sheet_name, query in (("Facebook_db", {"sort": "media_drive_id.x"}), ("Facebook_db", {"sort": "khong_co"}),
+                              ("Facebook_db", {"sort": "-"}), ("Facebook_Config", {"platform": "facebook"})):
+        try:
+            SheetService.query_rows(sheet_name, **query)
+            raise AssertionError(f"phải báo lỗi: {sheet_name} {query}")
+        except ValueError:
+            pass
+
+    app = Flask(__name__)
+    app.register_blueprint(routes.api_bp)
+    client = app.test_client()
+    res = client.get("/api/v2/sheets/Facebook_db?sort=facebook.calendar")
+    assert res.status_code == 400 and "facebook.calendar" in res.json["error"]
+    res = client.get("/api/v2/sheets/Facebook_Config?platform=facebook")
+    assert res.status_code == 400 and "platform" in res.json["error"]
+    print("✅ Trường sắp xếp lồng nhau/không tồn tại và platform trên bảng không hỗ trợ -> 400 kèm thông báo rõ")
+
+
+if __name__ == "__main__":
+    try:
+        test_filter_sort_paginate(install_fake)
+        test_platform_and_route(install_fake)
+        test_invalid_sort_and_platform(install_fake)
+        print("\n🎉 TẤT CẢ CÁC BÀI TEST ĐÃ VƯỢT QUA!")
+    except Exception as e:
+        print(f"❌ LỖI KHI TEST: {e}")
+        sys.exit(1)
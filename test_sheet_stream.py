@@ -0,0 +1,107 @@
+import sys
+import os
+import json
+
+# Thêm đường dẫn để có thể import từ thư mục hiện tại
+sys.path.append(os.getcwd())
+
+from flask import Flask
+from models import row_view
+from sheet_fakes import install_fake, history_tab, FakeRequest
+
+
+def make_client():
+    import routes
+    app = Flask(__name__)
+    app.register_blueprint(routes.api_bp)
+    return app.test_client()
+
+
+def big_history(count):
+    tab = history_tab()
+    for i in range(count):
+        tab.append([f"DRIVE_{i}", f"Video \"{i}\" ✓", "Video", "", "", "", "", "Kênh", "C1", "", f"YT_{i}", "", "", "SUCCESS"])
+    return tab
+
+
+def test_stream_sheet_rows(fake_sheets):
+    print("--- ĐANG KIỂM TRA STREAM JSON CỦA /api/v2/sheets/<sheet_name> ---\n")
+    fake_sheets({"Published_History": big_history(1200)})
+    client = make_client()
+
+    normal = client.get("/api/v2/sheets/Published_History")
+    streamed = client.get("/api/v2/sheets/Published_History?stream=true", buffered=False)
+    assert streamed.is_streamed and "ETag" not in streamed.headers
+    chunks = list(streamed.response)
+    # "[" + 3 đoạn (500 + 500 + 202 hàng) + "]"
+    assert len(chunks) == 5
+    assert json.loads(b"".join(c if isinstance(c, bytes) else c.encode() for c in chunks)) == normal.json
+    print("✅ ?stream=true trả cùng dữ liệu, gửi theo từng đoạn, không có ETag")
+
+    # Bộ lọc vẫn đi qua query_rows (không stream)
+    filtered = client.get("/api/v2/sheets/Published_History?stream=true&status=SCHEDULED")
+    assert filtered.json["total"] == 1
+    # Tab không tồn tại -> lỗi trước khi stream bắt đầu
+    assert client.get("/api/v2/sheets/Khong_Co?stream=true").status_code == 400
+    print("✅ Có tham số lọc hoặc lỗi -> phản hồi thường")
+
+
+def test_stream_history(fake_sheets):
+    print("\n--- ĐANG KIỂM TRA STREAM JSON CỦA /api/v2/post/history ---\n")
+    fake_sheets({"Published_History": big_history(10)})
+    client = make_client()
+    normal = client.get("/api/v2/post/history")
+    streamed = client.get("/api/v2/post/history?stream=1")
+    assert streamed.is_streamed and streamed.json == normal.json and len(streamed.json) == 12
+    assert list(row_view.iter_rows_json([], batch=2)) == ["[", "]"]
+    print("✅ Lịch sử đăng bài stream đúng dữ liệu")
+
+
+class FakeSpreadsheetApi:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def spreadsheets(self):
+        return self
+
+    def get(self, **params):
+        return FakeRequest(lambda: json.loads(json.dumps(self.payload)))
+
+
+def test_stream_full_data():
+    print("\n--- ĐANG KIỂM TRA STREAM JSON CỦA /api/sheets/full-data ---\n")
+    import routes
+
+    def cells(*values):
+        return {"values": [{"formattedValue": v} if v else {} for v in values]}
+
+    payload = {"properties": {"title": "Kho \"nội dung\""}, "sheets": [
+        {"properties": {"sheetId": 1, "title": "A"},
+         "data": [{"rowData": [cells("STT", "Tên"), {}, cells("1", "x", ""), {}, cells("", "")]}]},
+        {"properties": {"sheetId": 2, "title": "B"}, "data": [{}]},
+    ]}
+    original = (routes.get_service, routes.get_creds)
+    routes.get_service = lambda *args, **kwargs: FakeSpreadsheetApi(payload)
+    routes.get_creds = lambda *args, **kwargs: None
+    try:
+        client = make_client()
+        normal = client.get("/api/sheets/full-data?sheetId=S")
+        streamed = client.get("/api/sheets/full-data?sheetId=S&stream=true")
+    finally:
+        routes.get_service, routes.get_creds = original
+
+    assert streamed.is_streamed and streamed.json == normal.json
+    assert normal.json["sheets"][0]["values"] == [["STT", "Tên"], [], ["1", "x"]]
+    assert normal.json["sheets"][1]["values"] == []
+    print("✅ full-data stream khớp phản hồi thường (bỏ hàng/ô trống cuối như values.get)")
+
+
+if __name__ == "__main__":
+    try:
+        test_stream_sheet_rows(install_fake)
+        test_stream_history(install_fake)
+        test_stream_full_data()
+        print("\n🎉 TẤT CẢ CÁC BÀI TEST ĐÃ VƯỢT QUA!")
+    except Exception as e:
+        print(f"❌ LỖI KHI TEST: {e}")
+        sys.exit(1)
@@ -0,0 +1,103 @@
+import sys
+import os
+
+# Thêm đường dẫn để có thể import từ thư mục hiện tại
+sys.path.append(os.getcwd())
+
+from flask import Flask
+from services.sheet_service import SheetService
+from sheet_fakes import install_fake, history_tab
+
+
+def expire(sheet_name):
+    """Cho cache của một tab hết hạn ngay lập tức"""
+    fetched_at, values, version = SheetService._cache[sheet_name]
+    SheetService._cache[sheet_name] = (fetched_at - SheetService.CACHE_TTL - 1, values, version)
+
+
+def test_revalidate_by_drive_version(fake_sheets):
+    print("--- ĐANG KIỂM TRA KIỂM TRA VERSION TRƯỚC KHI TẢI LẠI ---\n")
+    fake = fake_sheets({"Published_History": history_tab()})
+
+    # 0. Lần đọc đầu (chưa có cache để xác nhận lại) chỉ tốn một lần gọi Sheets, không hỏi Drive
+    SheetService.get_all_rows("Published_History")
+    assert fake.calls["get"] == 1 and fake.drive.calls == 0
+    # Lần hết hạn đầu tiên: bản cache chưa có version -> tải lại một lần, lưu kèm version
+    expire("Published_History")
+    SheetService.get_all_rows("Published_History")
+    assert fake.calls["get"] == 2 and fake.drive.calls == 1
+    print("✅ Đọc lần đầu không gọi Drive, chỉ một lần gọi API")
+
+    # 1. Hết hạn nhưng spreadsheet chưa đổi -> chỉ hỏi Drive, không tải lại tab
+    expire("Published_History")
+    rows = SheetService.get_all_rows("Published_History")
+    assert len(rows) == 2
+    assert fake.calls["get"] == 2 and fake.drive.calls == 2
+    assert SheetService.cache_stats()["revalidations"] == 1
+    # Đã được gia hạn: lần đọc tiếp theo là cache hit, không hỏi Drive
+    SheetService.get_all_rows("Published_History")
+    assert fake.drive.calls == 2
+    print("✅ Spreadsheet không đổi -> không tải lại dữ liệu")
+
+    # 2. Có người sửa trên giao diện (version tăng) -> tải lại
+    fake.tabs["Published_History"][1][13] = "SUCCESS"
+    fake.drive.version = "2"
+    expire("Published_History")
+    assert SheetService.get_all_rows("Published_History")[0]["Status"] == "SUCCESS"
+    assert fake.calls["get"] == 3
+    print("✅ Version thay đổi -> tải lại tab")
+
+    # 3. Tắt kiểm tra version -> luôn tải lại như cũ
+    SheetService.VERSION_CHECK = False
+    try:
+        expire("Published_History")
+        SheetService.get_all_rows("Published_History")
+        assert fake.calls["get"] == 4 and fake.drive.calls == 3
+    finally:
+        SheetService.VERSION_CHECK = True
+    print("✅ SHEET_VERSION_CHECK=0 bỏ qua bước kiểm tra")
+
+    # 4. Cache tắt (TTL=0): mỗi lần đọc chỉ một lần gọi Sheets
+    original_ttl = SheetService.CACHE_TTL
+    SheetService.CACHE_TTL = 0
+    try:
+        drive_calls = fake.drive.calls
+        SheetService.get_all_rows("Published_History")
+        SheetService.get_all_rows("Published_History")
+        assert fake.calls["get"] == 6 and fake.drive.calls == drive_calls
+    finally:
+        SheetService.CACHE_TTL = original_ttl
+    print("✅ CACHE_TTL=0 không hỏi Drive version")
+
+
+def test_etag_304(fake_sheets):
+    print("\n--- ĐANG KIỂM TRA ETAG / 304 CỦA /api/v2/sheets/<sheet_name> ---\n")
+    import routes
+    fake = fake_sheets({"Published_History": history_tab()})
+    app = Flask(__name__)
+    app.register_blueprint(routes.api_bp)
+    client = app.test_client()
+
+    first = client.get("/api/v2/sheets/Published_History")
+    etag = first.headers["ETag"]
+    assert first.status_code == 200 and len(first.json) == 2
+    assert first.headers["Cache-Control"] == "no-cache"
+
+    second = client.get("/api/v2/sheets/Published_History", headers={"If-None-Match": etag})
+    assert second.status_code == 304 and second.data == b""
+    print("✅ Dữ liệu không đổi -> 304, không gửi lại body")
+
+    SheetService.update_row("Published_History", 0, {"Id_media_on_drive": "DRIVE_1", "Status": "SUCCESS"})
+    third = client.get("/api/v2/sheets/Published_History", headers={"If-None-Match": etag})
+    assert third.status_code == 200 and third.headers["ETag"] != etag
+    print("✅ Dữ liệu thay đổi -> 200 với ETag mới")
+
+
+if __name__ == "__main__":
+    try:
+        test_revalidate_by_drive_version(install_fake)
+        test_etag_304(install_fake)
+        print("\n🎉 TẤT CẢ CÁC BÀI TEST ĐÃ VƯỢT QUA!")
+    except Exception as e:
+        print(f"❌ LỖI KHI TEST: {e}")
+        sys.exit(1)
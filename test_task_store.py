@@ -0,0 +1,150 @@
+import sys
+import os
+import time
+import tempfile
+import threading
+import subprocess
+
+# Thêm đường dẫn để có thể import từ thư mục hiện tại
+sys.path.append(os.getcwd())
+
+from flask import Flask
+from services import task_store
+from services.task_store import TaskStore
+
+
+def test_lifecycle():
+    print("--- ĐANG KIỂM TRA VÒNG ĐỜI TÁC VỤ ---\n")
+    store = TaskStore(":memory:")
+    task_id = store.create(kind="upload", progress="Đang khởi tạo...")
+    task = store.get(task_id)
+    assert task["status"] == "queued" and task["kind"] == "upload" and "finished_at" not in task
+
+    store.update(task_id, status="processing", progress="Đang upload 1/2 file...",
+                 files=[{"name": "a.mp4", "status": "done"}])
+    store.update(task_id, status="success", message="Xong", result={"post_id": "P1"})
+    task = store.get(task_id)
+    assert task["progress"] == "Đang upload 1/2 file..." and task["message"] == "Xong"
+    assert task["files"] == [{"name": "a.mp4", "status": "done"}] and task["result"] == {"post_id": "P1"}
+    assert task["finished_at"] >= task["created_at"]
+    print("✅ queued -> processing -> success, trường phụ (files, result) được giữ qua các lần cập nhật")
+
+    for bad in (lambda: store.create(status="done"), lambda: store.update(task_id, status="xong")):
+        try:
+            bad()
+            raise AssertionError("phải báo lỗi trạng thái")
+        except ValueError:
+            pass
+    assert store.update("khong-co", status="error") is False and store.get("khong-co") is None
+    print("✅ Trạng thái ngoài STATES bị từ chối, tác vụ không tồn tại trả về None/False")
+
+    other = store.create(kind="publish", status="processing")
+    assert [t["id"] for t in store.by_status("processing")] == [other]
+    assert [t["id"] for t in store.by_status("success", "processing", kind="upload")] == [task_id]
+    assert set(store.all()) == {task_id, other}
+    print("✅ Tra cứu theo ID, theo trạng thái và loại tác vụ")
+
+
+def test_eviction_and_recovery():
+    print("\n--- ĐANG KIỂM TRA DỌN TÁC VỤ CŨ VÀ KHÔI PHỤC SAU RESTART ---\n")
+    store = TaskStore(":memory:", ttl=3600)
+    old = store.create(status="success")
+    running = store.create(status="processing")
+    fresh = store.create(status="error")
+    store._conn.execute("UPDATE tasks SET finished_at = ? WHERE id = ?", (time.time() - 7200, old))
+    assert store.evict() == 1
+    assert store.get(old) is None and store.get(running) and store.get(fresh)
+    print("✅ Chỉ tác vụ đã kết thúc quá TTL bị xóa, tác vụ đang chạy được giữ")
+
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    orphan = store.create(status="processing")
+    store._conn.execute("UPDATE tasks SET pid = ? WHERE id = ?", (dead.pid, orphan))
+    assert store.recover() == 1
+    assert store.get(orphan)["status"] == "error" and store.get(running)["status"] == "processing"
+    print("✅ Tác vụ của tiến trình đã chết bị đánh dấu lỗi khi khởi động, tác vụ của tiến trình còn sống giữ nguyên")
+
+    # Container khởi động lại: tiến trình mới nhận đúng pid của tiến trình cũ (thường là PID 1)
+    previous_boot = store.create(status="processing")
+    store._conn.execute("UPDATE tasks SET instance = ? WHERE id = ?", (f"{os.getpid()}:0", previous_boot))
+    legacy = store.create(status="queued")
+    store._conn.execute("UPDATE tasks SET instance = NULL WHERE id = ?", (legacy,))
+    sleeper = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    try:
+        other_worker = store.create(status="processing")
+        reused_pid = store.create(status="processing")
+        store._conn.execute("UPDATE tasks SET pid = ?, instance = ? WHERE id = ?",
+                            (sleeper.pid, f"{sleeper.pid}:{task_store._process_start(sleeper.pid)}", other_worker))
+        store._conn.execute("UPDATE tasks SET pid = ?, instance = ? WHERE id = ?",
+                            (sleeper.pid, f"{sleeper.pid}:0", reused_pid))
+        assert store.recover() == 3
+        assert all(store.get(t)["status"] == "error" for t in (previous_boot, legacy, reused_pid))
+        assert store.get(other_worker)["status"] == "processing" and store.get(running)["status"] == "processing"
+    finally:
+        sleeper.kill()
+        sleeper.wait()
+    print("✅ Pid trùng nhưng khác lần chạy (instance) -> coi là đã chết; worker khác còn sống giữ nguyên")
+
+
+def test_shared_between_processes():
+    print("\n--- ĐANG KIỂM TRA DÙNG CHUNG GIỮA CÁC WORKER ---\n")
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "tasks.db")
+        store = TaskStore(path)
+        task_id = store.create(kind="upload")
+        # Một tiến trình khác (giống worker gunicorn khác) cập nhật tác vụ
+        script = ("import sys; sys.path.append(%r); from services.task_store import TaskStore; "
+                  "s = TaskStore(%r); s.update(%r, status='success', message='từ worker khác'); "
+                  "s.create('task-b', kind='publish')") % (os.getcwd(), path, task_id)
+        subprocess.run([sys.executable, "-c", script], check=True)
+        assert store.get(task_id)["message"] == "từ worker khác"
+        assert store.get("task-b")["kind"] == "publish"
+        assert store._conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        print("✅ Tác vụ do worker khác tạo/cập nhật được thấy ngay (SQLite WAL)")
+
+        def worker(n):
+            for i in range(50):
+                store.update(task_id, progress=f"{n}-{i}", **{f"t{n}": i})
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        task = store.get(task_id)
+        assert all(task[f"t{n}"] == 49 for n in range(4))
+        print("✅ Nhiều thread cập nhật cùng tác vụ không mất trường nào")
+        store.close()
+
+
+def test_tasks_api():
+    print("\n--- ĐANG KIỂM TRA /api/tasks ---\n")
+    import routes
+    original = task_store._store
+    task_store._store = store = TaskStore(":memory:")
+    try:
+        app = Flask(__name__)
+        app.register_blueprint(routes.api_bp)
+        client = app.test_client()
+        done = store.create(kind="upload", status="success")
+        running = store.create(kind="publish", status="processing", message="Đang đăng...")
+
+        assert set(client.get("/api/tasks").get_json()) == {done, running}
+        assert list(client.get("/api/tasks?status=processing,queued").get_json()) == [running]
+        assert client.get("/api/tasks?status=xong").status_code == 400
+        assert client.get(f"/api/tasks/{running}").get_json()["message"] == "Đang đăng..."
+        assert client.get("/api/tasks/khong-co").status_code == 404
+        print("✅ /api/tasks giữ định dạng {task_id: task}, có lọc ?status= và /api/tasks/<id>")
+    finally:
+        task_store._store = original
+
+
+if __name__ == "__main__":
+    try:
+        test_lifecycle()
+        test_eviction_and_recovery()
+        test_shared_between_processes()
+        test_tasks_api()
+        print("\n🎉 TẤT CẢ CÁC BÀI TEST ĐÃ VƯỢT QUA!")
+    except Exception as e:
+        print(f"❌ LỖI KHI TEST: {e}")
+        sys.exit(1)
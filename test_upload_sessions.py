@@ -0,0 +1,491 @@
+import sys
+import os
+import json
+import time
+import socket
+import threading
+import tempfile
+import shutil
+import subprocess
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Thêm đường dẫn để có thể import từ thư mục hiện tại
+sys.path.append(os.getcwd())
+
+from googleapiclient.discovery import build
+from googleapiclient.http import HttpRequest, MediaFileUpload, build_http
+from services import api_guard, upload_sessions
+from services.upload_sessions import UploadSessionStore, resumable_execute
+from services import task_store
+from services.task_store import TaskStore
+
+KB = 1024
+GRANULARITY = 256 * KB  # server resumable chỉ xác nhận theo bội 256 KB như Google
+
+
+class FakeResumableServer(ThreadingHTTPServer):
+    """
+    Endpoint upload resumable giả (giao thức của Google): POST tạo phiên trả Location, PUT gửi đoạn
+    (Content-Range: bytes a-b/size), PUT rỗng "bytes */size" hỏi trạng thái -> 308 + Range.
+    drop_budget: nếu đặt, server chỉ nhận chừng ấy byte của một lần PUT (bắt đầu từ offset >= drop_from)
+    rồi cắt kết nối không trả lời; drops_left: số lần cắt. rate_limited: số đoạn bị trả 429 (Retry-After: 3).
+    """
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), FakeResumableHandler)
+        self.sessions = {}
+        self.drop_budget = None
+        self.drop_from = 0
+        self.drops_left = 0
+        self.rate_limited = 0
+        self.received = 0
+        self.status_queries = 0
+        self.initiations = 0
+        self.lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def base(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class FakeResumableHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, headers=None, body=b""):
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _progress(self, session):
+        data = session["data"]
+        if len(data) == session["size"]:
+            body = json.dumps({"id": "FILE_OK", "webViewLink": "https://drive/FILE_OK", "size": len(data)})
+            return self._reply(200, {"Content-Type": "application/json"}, body.encode())
+        return self._reply(308, {"Range": f"bytes=0-{len(data) - 1}"} if data else {})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        server = self.server
+        with server.lock:
+            server.initiations += 1
+            session_id = str(len(server.sessions) + 1)
+            server.sessions[session_id] = {"size": int(self.headers["X-Upload-Content-Length"]), "data": bytearray()}
+        self._reply(200, {"Location": f"{server.base}/session/{session_id}"})
+
+    def do_PUT(self):
+        server = self.server
+        session = server.sessions.get(self.path.rsplit("/", 1)[-1])
+        length = int(self.headers.get("Content-Length", 0))
+        if session is None:
+            self.rfile.read(length)
+            return self._reply(404)
+        content_range = self.headers.get("Content-Range", "")
+        if content_range.startswith("bytes */"):
+            server.status_queries += 1
+            return self._progress(session)
+
+        if server.rate_limited:
+            server.rate_limited -= 1
+            self.rfile.read(length)
+            return self._reply(429, {"Retry-After": "3"})
+        start = int(content_range.split(" ")[1].split("-")[0])
+        if start > len(session["data"]):
+            self.rfile.read(length)
+            return self._reply(400)
+        if server.drops_left and start >= server.drop_from and length > server.drop_budget:
+            server.drops_left -= 1
+            partial = self.rfile.read(server.drop_budget)
+            server.received += len(partial)
+            committed = start + len(partial) // GRANULARITY * GRANULARITY
+            self._store(session, start, partial[:committed - start])
+            # Cắt kết nối giữa chừng, không gửi phản hồi
+            self.close_connection = True
+            self.connection.shutdown(socket.SHUT_RDWR)
+            return
+        chunk = self.rfile.read(length)
+        server.received += len(chunk)
+        self._store(session, start, chunk)
+        self._progress(session)
+
+    @staticmethod
+    def _store(session, start, chunk):
+        """Ghi đoạn bắt đầu tại start; phần trùng với byte đã có bị bỏ qua (Google cũng chấp nhận gửi lại)"""
+        session["data"] += chunk[len(session["data"]) - start:]
+
+
+def make_file(size):
+    fd, path = tempfile.mkstemp(prefix="resumable_")
+    with os.fdopen(fd, "wb") as f:
+        f.write(bytes(i % 251 for i in range(size)))
+    return path
+
+
+def drive_request(server, path, chunksize=GRANULARITY, request_builder=HttpRequest):
+    """files().create thật của googleapiclient, trỏ tới server giả"""
+    drive = build("drive", "v3", http=build_http(), static_discovery=True, requestBuilder=request_builder,
+                  client_options={"api_endpoint": server.base + "/"})
+    media = MediaFileUpload(path, mimetype="video/mp4", chunksize=chunksize, resumable=True)
+    request = drive.files().create(body={"name": "clip.mp4"}, media_body=media, fields="id,webViewLink")
+    request.uri = request.uri.replace("https://", "http://")
+    return request
+
+
+def uploaded(server):
+    return bytes(next(iter(server.sessions.values()))["data"])
+
+
+def test_resume_after_restart():
+    print("--- ĐANG KIỂM TRA TIẾP TỤC UPLOAD SAU KHI KHỞI ĐỘNG LẠI ---\n")
+    server, store = FakeResumableServer(), UploadSessionStore(":memory:")
+    path = make_file(2 * 1024 * KB)
+    original_attempts = upload_sessions.RESUME_ATTEMPTS
+    try:
+        # Lần 1: kết nối rớt từ đoạn thứ 3, không thử lại (giống worker bị kill giữa chừng)
+        server.drop_budget, server.drop_from, server.drops_left = 100 * KB, 2 * GRANULARITY, 99
+        upload_sessions.RESUME_ATTEMPTS = 0
+        try:
+            resumable_execute(drive_request(server, path), "task-1", "0:clip.mp4", store=store)
+            raise AssertionError("lần 1 phải lỗi")
+        except OSError:
+            pass
+        saved = store.get("task-1", "0:clip.mp4")
+        assert saved["offset"] == 2 * GRANULARITY and saved["uri"].endswith("/session/1")
+        print(f"✅ Kết nối rớt: phiên và offset {saved['offset'] // KB} KB đã lưu trong SQLite")
+
+        # Lần 2: tiến trình mới (request mới, client mới), cùng khóa task/file
+        upload_sessions.RESUME_ATTEMPTS = original_attempts
+        server.drops_left = 0
+        before = server.received
+        progress = []
+        result = resumable_execute(drive_request(server, path), "task-1", "0:clip.mp4", store=store,
+                                   on_progress=lambda sent, size: progress.append(sent))
+        with open(path, "rb") as f:
+            assert uploaded(server) == f.read()
+        assert result["id"] == "FILE_OK" and server.initiations == 1 and server.status_queries == 1
+        assert server.received - before == 2 * 1024 * KB - 2 * GRANULARITY
+        assert progress[0] == 3 * GRANULARITY
+        assert store.get("task-1", "0:clip.mp4") is None
+        print(f"✅ Lần chạy sau hỏi trạng thái phiên rồi chỉ gửi {(server.received - before) // KB} KB còn lại, "
+              "phiên bị xóa khi xong")
+    finally:
+        upload_sessions.RESUME_ATTEMPTS = original_attempts
+        server.shutdown()
+        os.remove(path)
+
+
+class RestartDrive:
+    """Drive cho background_upload: thư mục tạo trong bộ nhớ, file (media) upload thật tới FakeResumableServer"""
+
+    def __init__(self, base):
+        from test_upload_stream import FakeRequest
+        self.request_class = FakeRequest
+        self.folders = []
+        self.drive = build("drive", "v3", http=build_http(), static_discovery=True,
+                           client_options={"api_endpoint": base + "/"})
+
+    def files(self):
+        return self
+
+    def create(self, body, fields, media_body=None):
+        if media_body is None:
+            self.folders.append(body["name"])
+            return self.request_class({"id": f"FOLDER_{len(self.folders)}"})
+        request = self.drive.files().create(body=body, media_body=media_body, fields=fields)
+        request.uri = request.uri.replace("https://", "http://")
+        return request
+
+
+def use_drive(drive):
+    """Cho logic dùng Drive/Sheets giả, trả về hàm khôi phục"""
+    import logic
+    from test_upload_stream import FakeSheets
+    originals = (logic.get_creds, logic.get_service, logic.UPLOAD_WORKERS, logic.UPLOAD_CHUNK_SIZE)
+    logic.get_creds = lambda: None
+    logic.get_service = lambda name, version, creds: drive if name == "drive" else FakeSheets()
+    logic.UPLOAD_WORKERS, logic.UPLOAD_CHUNK_SIZE = 1, GRANULARITY
+
+    def restore():
+        logic.get_creds, logic.get_service, logic.UPLOAD_WORKERS, logic.UPLOAD_CHUNK_SIZE = originals
+    return restore
+
+
+def crash_during_upload(base, task_id, spec, crash_at):
+    """
+    Chạy trong tiến trình con: nhận job như route /api/upload (tạo tác vụ + lưu job spec) rồi upload,
+    tiến trình chết hẳn (os._exit, không chạy finally) khi file đang upload đã gửi crash_at byte.
+    """
+    import logic
+    use_drive(RestartDrive(base))
+    original = upload_sessions.resumable_execute
+
+    def crashing_execute(request, task_key, file_key, on_progress=None, **kwargs):
+        def progress(sent, size):
+            on_progress(sent, size)
+            if sent >= crash_at:
+                os._exit(3)
+        return original(request, task_key, file_key, on_progress=progress, **kwargs)
+    upload_sessions.resumable_execute = crashing_execute
+    task_store.default_store().create(task_id, kind="upload", progress="Đang chờ trong hàng đợi...")
+    upload_sessions.default_store().save_job(task_id, spec)
+    logic.background_upload(task_id, spec["form"], spec["files"])
+
+
+def test_resume_job_after_process_restart():
+    print("\n--- ĐANG KIỂM TRA CHẠY LẠI TÁC VỤ UPLOAD KHI SERVER KHỞI ĐỘNG LẠI ---\n")
+    import logic
+    from services import content_index
+    server = FakeResumableServer()
+    folder = tempfile.mkdtemp(prefix="restart_")
+    paths = {name: os.path.join(folder, name) for name in ("tasks.db", "sessions.db", "index.db")}
+    image, video = make_file(100 * KB), make_file(1024 * KB)
+    spec = {"form": {"parentId": "P", "folderName": "Review"}, "priority": "normal",
+            "files": {"files": [{"path": image, "filename": "anh.jpg", "content_type": "image/jpeg"},
+                                {"path": video, "filename": "clip.mp4", "content_type": "video/mp4"}]}}
+    with open(video, "rb") as f:
+        video_bytes = f.read()
+    originals = (task_store._store, upload_sessions._store, content_index.DEDUP_ENABLED)
+    try:
+        # Tiến trình 1: ảnh upload xong, video chết sau 2 đoạn (512 KB)
+        script = ("import sys, json; sys.path.insert(0, %r); import test_upload_sessions as t; "
+                  "t.crash_during_upload(%r, 'task-restart', json.loads(sys.argv[1]), %d)"
+                  ) % (os.getcwd(), server.base, 2 * GRANULARITY)
+        env = dict(os.environ, TASK_DB=paths["tasks.db"], UPLOAD_SESSION_DB=paths["sessions.db"],
+                   CONTENT_INDEX_DB=paths["index.db"], UPLOAD_DEDUP="0")
+        child = subprocess.run([sys.executable, "-c", script, json.dumps(spec)], env=env, timeout=60)
+        assert child.returncode == 3
+
+        task_store._store = TaskStore(paths["tasks.db"])
+        upload_sessions._store = store = UploadSessionStore(paths["sessions.db"])
+        content_index.DEDUP_ENABLED = False
+        task = task_store._store.get("task-restart")
+        assert task["status"] == "processing" and [f["status"] for f in task["files"]] == ["done", "uploading"]
+        assert not os.path.exists(image) and os.path.exists(video) and "task-restart" in store.jobs()
+        assert store.get("task-restart", "1:clip.mp4")["offset"] == 2 * GRANULARITY
+        print("✅ Tiến trình chết giữa chừng: job spec, file tạm của video và phiên (offset 512 KB) còn lại")
+
+        # Tiến trình 2 (server khởi động lại): chạy lại tác vụ với cùng task_id
+        drive = RestartDrive(server.base)
+        restore = use_drive(drive)
+        before = server.received
+        try:
+            resumed = logic.resume_uploads(lambda task_id, form, files, priority:
+                                           logic.background_upload(task_id, form, files))
+        finally:
+            restore()
+        task = task_store._store.get("task-restart")
+        assert resumed == ["task-restart"] and task["status"] == "success", task
+        assert drive.folders == [] and server.initiations == 2 and server.status_queries == 1
+        assert server.received - before == len(video_bytes) - 2 * GRANULARITY
+        assert bytes(server.sessions["2"]["data"]) == video_bytes
+        assert [f["status"] for f in task["files"]] == ["done", "done"]
+        print(f"✅ Khởi động lại: dùng lại thư mục, bỏ qua ảnh đã xong, video hỏi offset rồi chỉ gửi "
+              f"{(server.received - before) // KB} KB còn lại")
+
+        assert store.jobs() == {} and store.get("task-restart", "1:clip.mp4") is None and not os.path.exists(video)
+        assert logic.resume_uploads(lambda *args: None) == []
+        print("✅ Xong thì xóa job spec, phiên và file tạm; lần khởi động sau không chạy lại")
+
+        # Tác vụ của tiến trình còn sống không bị nhận, tác vụ thiếu file tạm bị đánh dấu lỗi
+        task_store._store.create("task-live", kind="upload", status="processing")
+        store.save_job("task-live", spec)
+        task_store._store.create("task-lost", kind="upload", status="processing")
+        task_store._store._conn.execute("UPDATE tasks SET instance = 'cu' WHERE id = 'task-lost'")
+        store.save_job("task-lost", spec)
+        submitted = []
+        assert logic.resume_uploads(lambda *args: submitted.append(args)) == [] and submitted == []
+        assert set(store.jobs()) == {"task-live"}
+        assert task_store._store.get("task-lost")["status"] == "error"
+        print("✅ Tác vụ của worker còn sống được giữ nguyên, tác vụ mất file tạm -> lỗi và bỏ job spec")
+    finally:
+        for opened in (task_store._store, upload_sessions._store):
+            if opened not in originals:
+                opened.close()
+        task_store._store, upload_sessions._store, content_index.DEDUP_ENABLED = originals
+        server.shutdown()
+        for path in (image, video):
+            if os.path.exists(path):
+                os.remove(path)
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def test_sweep_orphan_uploads():
+    print("\n--- ĐANG KIỂM TRA DỌN FILE UPLOAD TẠM MỒ CÔI ---\n")
+    import logic
+    folder = tempfile.mkdtemp(prefix="sweep_")
+    originals = (logic.UPLOAD_FOLDER, upload_sessions._store)
+    logic.UPLOAD_FOLDER, upload_sessions._store = folder, UploadSessionStore(":memory:")
+    try:
+        names = ("upload_mo_coi", "upload_cua_job", "upload_dang_nhan", "tasks.db")
+        for name in names:
+            with open(os.path.join(folder, name), "wb") as f:
+                f.write(b"x")
+        old = time.time() - 2 * logic.UPLOAD_ORPHAN_AGE
+        for name in ("upload_mo_coi", "upload_cua_job", "tasks.db"):
+            os.utime(os.path.join(folder, name), (old, old))
+        upload_sessions._store.save_job("task-1", {"form": {}, "files": {"files": [
+            {"path": os.path.join(folder, "upload_cua_job"), "filename": "a.mp4", "content_type": "video/mp4"}]}})
+        assert logic.sweep_uploads() == 1
+        assert sorted(os.listdir(folder)) == sorted(set(names) - {"upload_mo_coi"})
+        print("✅ Chỉ xóa file upload_* cũ không thuộc job nào; file của job, file đang nhận và file SQLite được giữ")
+    finally:
+        logic.UPLOAD_FOLDER, upload_sessions._store = originals
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def test_retry_in_process():
+    print("\n--- ĐANG KIỂM TRA THỬ LẠI KHI KẾT NỐI RỚT NHIỀU LẦN ---\n")
+    server, store = FakeResumableServer(), UploadSessionStore(":memory:")
+    path = make_file(1024 * KB)
+    original_sleep = upload_sessions._sleep
+    upload_sessions._sleep = lambda seconds: None
+    try:
+        # Đoạn 512 KB, rớt 3 lần giữa đoạn, mỗi lần server giữ lại 256 KB đã nhận
+        server.drop_budget, server.drops_left = 300 * KB, 3
+        result = resumable_execute(drive_request(server, path, chunksize=2 * GRANULARITY), "task-2", "0:a.mp4",
+                                   store=store)
+        with open(path, "rb") as f:
+            assert uploaded(server) == f.read()
+        assert result["id"] == "FILE_OK" and server.initiations == 1 and server.drops_left == 0
+        assert store.get("task-2", "0:a.mp4") is None
+        print(f"✅ Rớt 3 lần vẫn xong trên cùng một phiên, tổng byte gửi {server.received // KB} KB cho file 1024 KB")
+    finally:
+        upload_sessions._sleep = original_sleep
+        server.shutdown()
+        os.remove(path)
+
+
+def test_chunks_use_api_guard():
+    print("\n--- ĐANG KIỂM TRA ĐOẠN UPLOAD ĐI QUA LIMITER CỦA API_GUARD ---\n")
+    server, store = FakeResumableServer(), UploadSessionStore(":memory:")
+    path = make_file(1024 * KB)
+    guard_sleeps, chunk_sleeps = [], []
+    originals = (api_guard._sleep, api_guard._clock, upload_sessions._sleep, os.environ.get("GOOGLE_API_RATE_DRIVE"))
+    api_guard._sleep, api_guard._clock = guard_sleeps.append, lambda: 0.0
+    upload_sessions._sleep = chunk_sleeps.append
+    os.environ["GOOGLE_API_RATE_DRIVE"] = "2"  # bucket 2 token, đồng hồ đứng yên -> từ lời gọi thứ 3 phải chờ
+    api_guard.reset()
+    try:
+        server.rate_limited = 1
+        request = drive_request(server, path, request_builder=api_guard.request_builder("drive", "cred-1"))
+        result = resumable_execute(request, "task-4", "0:a.mp4", store=store)
+        with open(path, "rb") as f:
+            assert result["id"] == "FILE_OK" and uploaded(server) == f.read()
+        stats = api_guard.stats()["drive"]
+        # 4 đoạn thành công + 1 đoạn bị 429
+        assert stats["calls"] == 5 and stats["throttled"] == 3 and len(guard_sleeps) == 3
+        assert stats["retries"] == 1 and stats["failures"] == 0
+        assert chunk_sleeps == [3.0]
+        print(f"✅ Mỗi đoạn chờ token của limiter ({stats['throttled']} lần), 429 chờ theo Retry-After, "
+              "số lời gọi/thử lại hiện trong thống kê api_guard")
+    finally:
+        api_guard._sleep, api_guard._clock, upload_sessions._sleep, rate = originals
+        if rate is None:
+            os.environ.pop("GOOGLE_API_RATE_DRIVE", None)
+        else:
+            os.environ["GOOGLE_API_RATE_DRIVE"] = rate
+        api_guard.reset()
+        server.shutdown()
+        os.remove(path)
+
+
+def test_expired_and_mismatched_sessions():
+    print("\n--- ĐANG KIỂM TRA PHIÊN HẾT HẠN / FILE ĐỔI KÍCH THƯỚC ---\n")
+    server, store = FakeResumableServer(), UploadSessionStore(":memory:")
+    path = make_file(300 * KB)
+    try:
+        size = os.path.getsize(path)
+        store.save("task-3", "0:a.mp4", server.base + "/session/999", GRANULARITY, size)
+        result = resumable_execute(drive_request(server, path), "task-3", "0:a.mp4", store=store)
+        assert result["id"] == "FILE_OK" and server.initiations == 1 and len(uploaded(server)) == size
+        print("✅ Phiên không còn trên server (404) -> tạo phiên mới và upload từ đầu")
+
+        store.save("task-3", "1:b.mp4", server.base + "/session/1", GRANULARITY, size + 1)
+        result = resumable_execute(drive_request(server, path), "task-3", "1:b.mp4", store=store)
+        assert result["id"] == "FILE_OK" and server.initiations == 2 and server.status_queries == 0
+        print("✅ Kích thước file khác phiên đã lưu -> bỏ phiên cũ")
+    finally:
+        server.shutdown()
+        os.remove(path)
+
+
+def test_youtube_upload_resumes():
+    print("\n--- ĐANG KIỂM TRA YOUTUBE UPLOAD TIẾP TỤC THEO SESSION_KEY ---\n")
+    from post_service.youtube_publisher import YoutubePublisher
+    server = FakeResumableServer()
+    path = make_file(1024 * KB)
+    originals = (upload_sessions._store, upload_sessions.RESUME_ATTEMPTS)
+    upload_sessions._store = UploadSessionStore(":memory:")
+
+    def publisher():
+        youtube = build("youtube", "v3", http=build_http(), static_discovery=True,
+                        client_options={"api_endpoint": server.base + "/"})
+        original_insert = youtube.videos().insert
+
+        class Videos:
+            def insert(self, **kwargs):
+                request = original_insert(**kwargs)
+                request.uri = request.uri.replace("https://", "http://")
+                return request
+        pub = YoutubePublisher.__new__(YoutubePublisher)
+        pub.youtube = type("YouTube", (), {"videos": lambda self: Videos()})()
+        return pub
+
+    def saved_sessions():
+        rows = upload_sessions._store._conn.execute(
+            "SELECT file_key, uri FROM upload_sessions WHERE task_key = 'youtube' ORDER BY updated_at"
+        ).fetchall()
+        return [(row["file_key"], row["uri"]) for row in rows]
+
+    try:
+        server.drop_budget, server.drops_left = 600 * KB, 99
+        upload_sessions.RESUME_ATTEMPTS = 0
+        first = publisher().upload_video(path, "Video", "", session_key="Media_Calendar:DRIVE1:UC1")
+        assert not first["success"]
+        (file_key, uri), = saved_sessions()
+        assert file_key.startswith("Media_Calendar:DRIVE1:UC1:") and uri.endswith("/session/1")
+        print("✅ Rớt ngay trong đoạn đầu tiên: URI phiên đã được lưu trước khi gửi byte nào")
+
+        # Đổi title: phiên cũ (tạo với metadata cũ) không được dùng, upload trên phiên mới
+        server.drops_left = 2  # httplib2 tự gửi lại một lần khi kết nối rớt
+        changed = publisher().upload_video(path, "Video (sửa)", "", session_key="Media_Calendar:DRIVE1:UC1")
+        assert not changed["success"] and server.initiations == 2 and server.status_queries == 0
+        assert len(saved_sessions()) == 2
+        print("✅ Metadata đổi -> khóa phiên khác, không gửi tiếp vào phiên đã tạo với title cũ")
+
+        upload_sessions.RESUME_ATTEMPTS = originals[1]
+        server.drops_left = 0
+        before = server.received
+        second = publisher().upload_video(path, "Video", "", session_key="Media_Calendar:DRIVE1:UC1")
+        assert second["success"] and server.initiations == 2 and server.status_queries == 1
+        assert server.received - before == 1024 * KB - 2 * GRANULARITY
+        # Phiên của lần upload thành công bị xóa; phiên dở của metadata đã đổi chờ hết hạn
+        assert [uri for _, uri in saved_sessions()] == [server.base + "/session/2"]
+        print(f"✅ Lần publish sau cùng metadata chỉ gửi {(server.received - before) // KB} KB còn lại")
+    finally:
+        upload_sessions._store, upload_sessions.RESUME_ATTEMPTS = originals
+        server.shutdown()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    try:
+        test_resume_after_restart()
+        test_resume_job_after_process_restart()
+        test_sweep_orphan_uploads()
+        test_retry_in_process()
+        test_chunks_use_api_guard()
+        test_expired_and_mismatched_sessions()
+        test_youtube_upload_resumes()
+        print("\n🎉 TẤT CẢ CÁC BÀI TEST ĐÃ VƯỢT QUA!")
+    except Exception as e:
+        print(f"❌ LỖI KHI TEST: {e}")
+        sys.exit(1)
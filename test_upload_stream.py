@@ -0,0 +1,225 @@
+import sys
+import os
+import io
+import tempfile
+import threading
+import tracemalloc
+
+# Thêm đường dẫn để có thể import từ thư mục hiện tại
+sys.path.append(os.getcwd())
+
+from flask import Flask, request
+import logic
+import routes
+from services import content_index, task_store
+from services.content_index import ContentIndex
+from services.upload_storage import DiskUploadRequest
+
+BOUNDARY = "----testboundary"
+FILE_SIZE = 24 * 1024 * 1024
+
+
+def write_multipart(path, video_path):
+    """Ghi body multipart (form + 1 video + 1 thumbnail) ra đĩa, không giữ trong bộ nhớ"""
+    with open(path, "wb") as out:
+        for name, value in (("parentId", "PARENT"), ("sheetId", "SHEET"), ("folderName", "Review")):
+            out.write(f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+        for field, filename, mimetype, source in (("files", "clip.mp4", "video/mp4", video_path),
+                                                  ("thumbnail", "thumb.jpg", "image/jpeg", None)):
+            out.write(f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+                      f'Content-Type: {mimetype}\r\n\r\n'.encode())
+            if source:
+                with open(source, "rb") as f:
+                    while chunk := f.read(1024 * 1024):
+                        out.write(chunk)
+            else:
+                out.write(b"JPEGDATA")
+            out.write(b"\r\n")
+        out.write(f"--{BOUNDARY}--\r\n".encode())
+
+
+def make_client(captured, received):
+    app = Flask(__name__)
+    app.request_class = DiskUploadRequest
+    app.register_blueprint(routes.api_bp)
+
+    def fake_background_upload(task_id, form_data, files_data):
+        captured.append(files_data)
+        received.set()
+    # Route đưa job vào hàng đợi, worker của hàng đợi gọi hàm này
+    routes.background_upload = fake_background_upload
+    return app.test_client()
+
+
+def temp_files():
+    return {name for name in os.listdir(logic.UPLOAD_FOLDER) if name.startswith("upload_")}
+
+
+def test_request_streams_to_disk():
+    print("--- ĐANG KIỂM TRA NHẬN FILE UPLOAD THẲNG XUỐNG ĐĨA ---\n")
+    video = os.path.join(logic.UPLOAD_FOLDER, "test_source.bin")
+    body = os.path.join(logic.UPLOAD_FOLDER, "test_body.bin")
+    original = routes.background_upload
+    with open(video, "wb") as f:
+        for i in range(FILE_SIZE // (1024 * 1024)):
+            f.write(bytes([i % 251]) * (1024 * 1024))
+    try:
+        write_multipart(body, video)
+        captured, received = [], threading.Event()
+        client = make_client(captured, received)
+        before = temp_files()
+
+        tracemalloc.start()
+        with open(body, "rb") as stream:
+            res = client.post("/api/upload", input_stream=stream, content_length=os.path.getsize(body),
+                              content_type=f"multipart/form-data; boundary={BOUNDARY}")
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        assert res.status_code == 200 and res.get_json()["status"] == "queued"
+        assert peak < FILE_SIZE // 4, f"peak {peak}"
+        print(f"✅ Upload {FILE_SIZE // (1024 * 1024)} MB, bộ nhớ đỉnh chỉ {peak / 1024 / 1024:.1f} MB")
+
+        assert received.wait(5)
+        files_data = captured[0]
+        path = files_data["files"][0]["path"]
+        assert os.path.samefile(os.path.dirname(path), logic.UPLOAD_FOLDER)
+        assert os.path.getsize(path) == FILE_SIZE
+        with open(path, "rb") as a, open(video, "rb") as b:
+            assert a.read() == b.read()
+        with open(files_data["thumbnail"]["path"], "rb") as f:
+            assert f.read() == b"JPEGDATA"
+        assert files_data["files"][0]["content_type"] == "video/mp4" and "content" not in files_data["files"][0]
+        print("✅ Tác vụ ngầm nhận đường dẫn file tạm với đúng nội dung (không copy lần hai)")
+
+        logic.discard_uploads(files_data)
+        assert temp_files() == before
+        print("✅ discard_uploads xóa hết file tạm")
+    finally:
+        routes.background_upload = original
+        for p in (video, body):
+            if os.path.exists(p):
+                os.remove(p)
+
+
+def test_unclaimed_files_removed():
+    print("\n--- ĐANG KIỂM TRA DỌN FILE KHÔNG ĐƯỢC NHẬN ---\n")
+    app = Flask(__name__)
+    app.request_class = DiskUploadRequest
+    app.add_url_rule("/ignore", "ignore", lambda: str(len(request.files)), methods=["POST"])
+    before = temp_files()
+    res = app.test_client().post("/ignore", data={"files": (io.BytesIO(b"x" * 1000), "a.bin")},
+                                 content_type="multipart/form-data")
+    assert res.get_data(as_text=True) == "1"
+    assert temp_files() == before
+    print("✅ File tạm route không claim bị xóa khi request kết thúc")
+
+
+class FakeRequest:
+    """Request giả: execute() hoặc một lần next_chunk() (upload resumable gửi xong trong một đoạn)"""
+
+    def __init__(self, result, media=None):
+        self.result = result
+        self.resumable = media
+        self.http = None
+        self.uri = "fake://upload"
+
+    def execute(self):
+        return self.result
+
+    def next_chunk(self, http=None):
+        return None, self.result
+
+
+class FakeDrive:
+    def __init__(self):
+        self.uploads = []
+
+    def files(self):
+        return self
+
+    def list(self, **kwargs):
+        return FakeRequest({"files": []})
+
+    def create(self, body, fields, media_body=None):
+        if media_body is not None:
+            self.uploads.append((body["name"], media_body.chunksize(), media_body.resumable(),
+                                 os.path.exists(media_body._filename)))
+            if body["name"] == "hong.mp4":
+                raise RuntimeError("Drive lỗi")
+        return FakeRequest({"id": f"ID_{body['name']}", "webViewLink": f"https://drive/{body['name']}"}, media_body)
+
+
+class FakeSheets:
+    def __init__(self):
+        self.appended = []
+
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return self
+
+    def get(self, **kwargs):
+        self._result = {"values": [["STT"]]}
+        return self
+
+    def append(self, body, **kwargs):
+        self.appended.extend(body["values"])
+        self._result = {}
+        return self
+
+    def execute(self):
+        return self._result
+
+
+def make_temp(content):
+    fd, path = tempfile.mkstemp(dir=logic.UPLOAD_FOLDER, prefix="upload_test_")
+    with os.fdopen(fd, "wb") as f:
+        f.write(content)
+    return path
+
+
+def test_background_upload_from_paths():
+    print("\n--- ĐANG KIỂM TRA TÁC VỤ NGẦM UPLOAD TỪ FILE TẠM ---\n")
+    drive, sheets = FakeDrive(), FakeSheets()
+    originals = (logic.get_creds, logic.get_service, content_index._index)
+    logic.get_creds = lambda: None
+    logic.get_service = lambda name, version, creds: drive if name == "drive" else sheets
+    content_index._index = ContentIndex(":memory:")
+    try:
+        files_data = {"thumbnail": {"path": make_temp(b"T"), "filename": "t.jpg", "content_type": "image/jpeg"},
+                      "files": [{"path": make_temp(b"V" * 10), "filename": "v.mp4", "content_type": "video/mp4"},
+                                {"path": make_temp(b"I"), "filename": "i.png", "content_type": "image/png"}]}
+        paths = [files_data["thumbnail"]["path"]] + [f["path"] for f in files_data["files"]]
+        logic.background_upload("task-ok", {"parentId": "P", "folderName": "Review"}, files_data)
+        assert task_store.default_store().get("task-ok")["status"] == "success", task_store.default_store().get("task-ok")
+        assert all(exists for _, _, _, exists in drive.uploads)
+        assert all(chunk == logic.UPLOAD_CHUNK_SIZE and resumable for _, chunk, resumable, _ in drive.uploads)
+        assert not any(os.path.exists(p) for p in paths)
+        assert len(sheets.appended) == 2
+        print(f"✅ Upload resumable theo đoạn {logic.UPLOAD_CHUNK_SIZE // (1024 * 1024)} MB, file tạm bị xóa sau khi xong")
+
+        files_data = {"files": [{"path": make_temp(b"V"), "filename": "hong.mp4", "content_type": "video/mp4"},
+                                {"path": make_temp(b"W"), "filename": "sau.mp4", "content_type": "video/mp4"}]}
+        paths = [f["path"] for f in files_data["files"]]
+        logic.background_upload("task-err", {"parentId": "P", "folderName": "Review"}, files_data)
+        assert task_store.default_store().get("task-err")["status"] == "error"
+        assert not any(os.path.exists(p) for p in paths)
+        print("✅ Tác vụ lỗi giữa chừng vẫn dọn các file chưa upload")
+    finally:
+        logic.get_creds, logic.get_service, content_index._index = originals
+
+    assert logic.UPLOAD_CHUNK_SIZE % (256 * 1024) == 0
+    print("✅ UPLOAD_CHUNK_SIZE là bội của 256 KB")
+
+
+if __name__ == "__main__":
+    try:
+        test_request_streams_to_disk()
+        test_unclaimed_files_removed()
+        test_background_upload_from_paths()
+        print("\n🎉 TẤT CẢ CÁC BÀI TEST ĐÃ VƯỢT QUA!")
+    except Exception as e:
+        print(f"❌ LỖI KHI TEST: {e}")
+        sys.exit(1)